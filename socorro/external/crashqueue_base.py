@@ -10,9 +10,23 @@ crash ids from queues for processing.
 class CrashQueueBase:
     """Base class for crash queue classes."""
 
+    # Function that returns how many crash ids the caller can take right now or None
+    capacity_func = None
+
     def close(self):
         pass
 
+    def set_capacity_func(self, capacity_func):
+        """Set the function that returns how many crash ids the caller can take.
+
+        Crash queues can use this to size how many crash ids they fetch at a time.
+
+        :arg capacity_func: function that takes no arguments and returns an int or
+            None if the capacity is unknown
+
+        """
+        self.capacity_func = capacity_func
+
     def __iter__(self):
         """Return iterator over crash ids for processing.
 
@@ -4,8 +4,11 @@
 
 """Base classes for crashstorage system."""
 
+from collections.abc import Mapping, MutableMapping
 from contextlib import suppress
+import copy
 import datetime
+from functools import partial
 import json
 import logging
 import os
@@ -94,6 +97,403 @@ class FileDumpsMapping(dict):
         return in_memory_dumps
 
 
+class LazyFileDumpsMapping(Mapping):
+    """Mapping of crash dump names to pathnames of files containing the dumps
+    where dumps are fetched when they're first accessed.
+
+    Dump names are fetched the first time they're needed. Each dump is saved to a
+    file the first time it's accessed. Use ``prefetch`` to fetch several dumps at
+    once.
+
+    :arg get_names: function that returns the list of dump names
+    :arg fetch: function that takes a list of dump names, saves those dumps to files,
+        and returns a dict of dump name -> file path
+
+    """
+
+    def __init__(self, get_names, fetch):
+        self._get_names = get_names
+        self._fetch = fetch
+        self._names = None
+        self._paths = FileDumpsMapping()
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = list(self._get_names())
+        return self._names
+
+    def prefetch(self, names=None):
+        """Fetch dumps that haven't been fetched, yet
+
+        :arg names: list of dump names to fetch; names of dumps that don't exist are
+            ignored; None fetches all dumps
+
+        """
+        if names is None:
+            names = self.names
+        missing = [
+            name for name in names if name in self.names and name not in self._paths
+        ]
+        if missing:
+            self._paths.update(self._fetch(missing))
+
+    def as_file_dumps_mapping(self, *args, **kwargs):
+        """Fetch all dumps and return them as a FileDumpsMapping"""
+        self.prefetch()
+        return FileDumpsMapping(self._paths)
+
+    def __getitem__(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        self.prefetch([name])
+        return self._paths[name]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+
+class LazyRawCrash(MutableMapping):
+    """Raw crash that's fetched when it's first accessed
+
+    :arg fetch: function that returns the raw crash
+
+    """
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+        self._data = None
+
+    @property
+    def is_loaded(self):
+        return self._data is not None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._fetch()
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+def _track_value(value, on_change):
+    """Wrap dict and list values so changing them in place calls ``on_change``"""
+    if getattr(value, "_on_change", None) is on_change:
+        return value
+    if isinstance(value, dict):
+        return _TrackedDict(value, on_change)
+    if isinstance(value, list):
+        return _TrackedList(value, on_change)
+    return value
+
+
+class _TrackedDict(dict):
+    """Dict in a TrackedProcessedCrash that reports changes made in place
+
+    Dict and list values are wrapped when they're accessed, so changes to them are
+    reported, too. Copies are plain dicts.
+
+    """
+
+    def __init__(self, value, on_change):
+        super().__init__(value)
+        self._on_change = on_change
+
+    def _track(self, key, value):
+        tracked = _track_value(value, self._on_change)
+        if tracked is not value:
+            super().__setitem__(key, tracked)
+        return tracked
+
+    def _track_all(self):
+        for key, value in list(super().items()):
+            self._track(key, value)
+
+    def __getitem__(self, key):
+        return self._track(key, super().__getitem__(key))
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        self._track_all()
+        return super().values()
+
+    def items(self):
+        self._track_all()
+        return super().items()
+
+    def copy(self):
+        self._track_all()
+        return dict(self)
+
+    def __setitem__(self, key, value):
+        self._on_change()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._on_change()
+        super().__delitem__(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        self._on_change()
+        super().update(*args, **kwargs)
+
+    def __ior__(self, other):
+        self._on_change()
+        return super().__ior__(other)
+
+    def pop(self, key, *args):
+        if key in self:
+            self._on_change()
+        return super().pop(key, *args)
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_change()
+        return item
+
+    def clear(self):
+        if self:
+            self._on_change()
+        super().clear()
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class _TrackedList(list):
+    """List in a TrackedProcessedCrash that reports changes made in place
+
+    Dict and list items are wrapped when they're accessed, so changes to them are
+    reported, too. Copies are plain lists.
+
+    """
+
+    def __init__(self, value, on_change):
+        super().__init__(value)
+        self._on_change = on_change
+
+    def _track(self, index, value):
+        tracked = _track_value(value, self._on_change)
+        if tracked is not value:
+            super().__setitem__(index, tracked)
+        return tracked
+
+    def _track_all(self):
+        for index, value in enumerate(super().__iter__()):
+            self._track(index, value)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Slices are new lists, but they have the same items
+            self._track_all()
+            return super().__getitem__(index)
+        return self._track(index, super().__getitem__(index))
+
+    def __iter__(self):
+        self._track_all()
+        return super().__iter__()
+
+    def __reversed__(self):
+        self._track_all()
+        return super().__reversed__()
+
+    def copy(self):
+        return list(self)
+
+    def __setitem__(self, index, value):
+        self._on_change()
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self._on_change()
+        super().__delitem__(index)
+
+    def __iadd__(self, other):
+        self._on_change()
+        return super().__iadd__(other)
+
+    def __imul__(self, other):
+        self._on_change()
+        return super().__imul__(other)
+
+    def append(self, value):
+        self._on_change()
+        super().append(value)
+
+    def extend(self, values):
+        self._on_change()
+        super().extend(values)
+
+    def insert(self, index, value):
+        self._on_change()
+        super().insert(index, value)
+
+    def pop(self, *args):
+        item = super().pop(*args)
+        self._on_change()
+        return item
+
+    def remove(self, value):
+        super().remove(value)
+        self._on_change()
+
+    def clear(self):
+        if self:
+            self._on_change()
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self._on_change()
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self._on_change()
+        super().reverse()
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+class TrackedProcessedCrash(dict):
+    """Processed crash that keeps track of which top-level keys were changed
+
+    Keys that are set or deleted are changed. Dict and list values are wrapped when
+    they're accessed, so keys whose values are changed in place are changed, too.
+    Reading values isn't a change.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._changed_keys = set()
+        self._deleted_keys = set()
+        # key -> function that marks the key as changed
+        self._change_funcs = {}
+
+    @property
+    def changed_keys(self):
+        """Keys that were set, deleted, or changed in place"""
+        return frozenset(self._changed_keys)
+
+    @property
+    def deleted_keys(self):
+        """Keys that were deleted"""
+        return frozenset(self._deleted_keys)
+
+    def _track_access(self, key, value):
+        on_change = self._change_funcs.get(key)
+        if on_change is None:
+            on_change = self._change_funcs[key] = partial(self._changed_keys.add, key)
+        tracked = _track_value(value, on_change)
+        if tracked is not value:
+            super().__setitem__(key, tracked)
+        return tracked
+
+    def _track_all(self):
+        for key, value in list(super().items()):
+            self._track_access(key, value)
+
+    def _track_set(self, key):
+        self._changed_keys.add(key)
+        self._deleted_keys.discard(key)
+
+    def _track_delete(self, key):
+        self._changed_keys.add(key)
+        self._deleted_keys.add(key)
+
+    def __getitem__(self, key):
+        return self._track_access(key, super().__getitem__(key))
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        self._track_set(key)
+        super().__setitem__(key, value)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._track_delete(key)
+
+    def pop(self, key, *args):
+        if key in self:
+            self._track_delete(key)
+        return super().pop(key, *args)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._track_delete(key)
+        return key, value
+
+    def clear(self):
+        for key in self:
+            self._track_delete(key)
+        super().clear()
+
+    def values(self):
+        self._track_all()
+        return super().values()
+
+    def items(self):
+        self._track_all()
+        return super().items()
+
+    def copy(self):
+        self._track_all()
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        # Deep copies are plain dicts like copies; otherwise every key would be
+        # marked as changed when the copy is built
+        return copy.deepcopy(dict(self), memo)
+
+
 class CrashIDNotFound(Exception):
     pass
 
@@ -133,6 +533,20 @@ class CrashStorageBase:
         """
         raise NotImplementedError("save_processed_crash not implemented")
 
+    def save_processed_crash_changes(self, raw_crash, processed_crash, changed_keys):
+        """Save changes to a processed crash that's already in crash storage
+
+        Crash storage implementations can override this to save only the changes.
+        By default, this saves the whole processed crash.
+
+        :param raw_crash: the raw crash data (no dumps)
+        :param processed_crash: the processed crash data
+        :param changed_keys: set of top-level keys in the processed crash that were
+            changed, added, or deleted
+
+        """
+        self.save_processed_crash(raw_crash, processed_crash)
+
     def get_raw_crash(self, crash_id):
         """Fetch raw crash
 
@@ -183,6 +597,30 @@ class CrashStorageBase:
         """
         raise NotImplementedError("get_dumps_as_files is not implemented")
 
+    def get_lazy_dumps_as_files(self, crash_id, tmpdir):
+        """Return dumps for a crash report that are saved as files when accessed.
+
+        This fetches all the dumps the first time anything is accessed. Crash storage
+        implementations can override this to fetch dump names and each dump
+        separately.
+
+        :param crash_id: crash report id
+        :param tmpdir: the path to store the dump files in
+
+        :returns: LazyFileDumpsMapping
+
+        """
+        all_dumps = {}
+
+        def get_names():
+            all_dumps.update(self.get_dumps_as_files(crash_id, tmpdir))
+            return list(all_dumps)
+
+        def fetch(names):
+            return {name: all_dumps[name] for name in names}
+
+        return LazyFileDumpsMapping(get_names=get_names, fetch=fetch)
+
     def get_processed_crash(self, crash_id):
         """Fetch processed crash.
 
@@ -195,6 +633,29 @@ class CrashStorageBase:
         """
         raise NotImplementedError("get_processed_crash is not implemented")
 
+    def get_crash_data_as_files(self, crash_id, tmpdir):
+        """Fetch raw crash, dumps as files, and processed crash for processing.
+
+        Crash storage implementations can override this to fetch the data
+        concurrently.
+
+        :param crash_id: crash report id
+        :param tmpdir: the path to store the dump files in
+
+        :returns: tuple of (raw crash, dict of dumpname -> file path, processed crash);
+            processed crash is None if the crash report hasn't been processed, yet
+
+        :raises CrashIdNotFound: if the raw crash or dumps don't exist
+
+        """
+        raw_crash = self.get_raw_crash(crash_id)
+        dumps = self.get_dumps_as_files(crash_id, tmpdir)
+        try:
+            processed_crash = self.get_processed_crash(crash_id)
+        except CrashIDNotFound:
+            processed_crash = None
+        return raw_crash, dumps, processed_crash
+
     def catalog_crash(self, crash_id):
         """Return a list of data items for this crash id
 
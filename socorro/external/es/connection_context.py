@@ -3,8 +3,115 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 from contextlib import contextmanager
+import os
+import socket
+import threading
+import time
 
+from elastic_transport import ConnectionError as TransportConnectionError
+from elastic_transport import Urllib3HttpNode
 from elasticsearch import Elasticsearch, RequestError
+from urllib3.connection import HTTPConnection
+
+from socorro.libmarkus import METRICS
+
+
+class PooledUrllib3HttpNode(Urllib3HttpNode):
+    """Urllib3HttpNode that publishes connection pool metrics.
+
+    Requests wait for a free connection when all ``connections_per_node`` connections
+    are in use. Connections are kept alive between requests and have TCP keepalive
+    turned on so idle connections in the pool aren't silently dropped.
+
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.pool.conn_kw["socket_options"] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ]
+        self._slots = threading.BoundedSemaphore(config.connections_per_node)
+        self._in_use = 0
+        self._in_use_lock = threading.Lock()
+
+    def perform_request(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        self._slots.acquire()
+        wait_time = (time.perf_counter() - start_time) * 1000.0
+        METRICS.histogram("es.pool.wait_time", value=wait_time)
+
+        with self._in_use_lock:
+            self._in_use += 1
+            METRICS.gauge("es.pool.in_use", value=self._in_use)
+
+        try:
+            return super().perform_request(*args, **kwargs)
+        except TransportConnectionError:
+            # urllib3 throws away the connection and opens a new one for the next
+            # request
+            METRICS.incr("es.pool.reset", tags=["reason:connection_error"])
+            raise
+        finally:
+            with self._in_use_lock:
+                self._in_use -= 1
+            self._slots.release()
+
+
+# (url, ca_certs, connections_per_node) -> Elasticsearch client; shared by all threads
+# in the process
+_CLIENTS = {}
+_CLIENTS_PID = os.getpid()
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(url, ca_certs=None, connections_per_node=10):
+    """Return the process-wide Elasticsearch client for these settings.
+
+    The client and its connection pool are thread-safe and shared by everything in the
+    process that uses the same settings. Use ``.options()`` on the client to change
+    per-request settings like the request timeout.
+
+    Connections aren't safe to share across processes, so a forked process gets new
+    clients.
+
+    :arg url: the url to the elasticsearch instances
+    :arg ca_certs: path to a certs.pem file for verifying self-issued certs
+    :arg connections_per_node: maximum number of connections to each node
+
+    :returns: Elasticsearch client
+
+    """
+    global _CLIENTS_PID
+
+    key = (url, ca_certs, connections_per_node)
+    with _CLIENTS_LOCK:
+        if _CLIENTS_PID != os.getpid():
+            # Don't close the clients from the parent process since that would close
+            # the parent's sockets
+            if _CLIENTS:
+                METRICS.incr("es.pool.reset", tags=["reason:fork"])
+            _CLIENTS.clear()
+            _CLIENTS_PID = os.getpid()
+
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = Elasticsearch(
+                hosts=url,
+                verify_certs=True,
+                ca_certs=ca_certs,
+                connections_per_node=connections_per_node,
+                node_class=PooledUrllib3HttpNode,
+            )
+            _CLIENTS[key] = client
+        return client
+
+
+def close_clients():
+    """Close all the process-wide Elasticsearch clients."""
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.close()
+        _CLIENTS.clear()
 
 
 class ConnectionContext:
@@ -19,33 +126,39 @@ class ConnectionContext:
         url="http://localhost:9200",
         timeout=30,
         ca_certs=None,
+        connections=10,
         **kwargs,
     ):
         """
         :arg url: the url to the elasticsearch instances
         :arg timeout: the time in seconds before a query to elasticsearch fails
         :arg ca_certs: path to a certs.pem file for verifying self-issued certs
+        :arg connections: maximum number of connections to each node in the
+            process-wide connection pool
         """
         self.url = url
         self.timeout = timeout
         self.ca_certs = ca_certs
+        self.connections = connections
 
     def connection(self, name=None, timeout=None):
         """Returns an instance of elasticsearch-py's Elasticsearch class as
         encapsulated by the Connection class above.
 
+        This uses the process-wide pooled client with the request timeout set.
+
         Documentation: http://elasticsearch-py.readthedocs.org
 
         """
         if timeout is None:
             timeout = self.timeout
 
-        return Elasticsearch(
-            hosts=self.url,
-            request_timeout=timeout,
-            verify_certs=True,
+        client = get_client(
+            url=self.url,
             ca_certs=self.ca_certs,
+            connections_per_node=self.connections,
         )
+        return client.options(request_timeout=timeout)
 
     def indices_client(self, name=None):
         """Returns an instance of elasticsearch-py's Index client class as
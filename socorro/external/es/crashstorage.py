@@ -2,17 +2,20 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import contextlib
 import copy
 import datetime
-import json
+from functools import partial
 import re
+import threading
 import time
 from math import isnan, isinf
 
 import elasticsearch
 from elasticsearch.exceptions import NotFoundError
+from elasticsearch.helpers import BulkIndexError
 from elasticsearch.dsl import Search
-import glom
+from elasticsearch.serializer import JsonSerializer
 import markus
 
 from socorro.external.crashstorage_base import CrashStorageBase
@@ -28,7 +31,7 @@ from socorro.external.es.super_search_fields import (
     parse_mapping,
 )
 from socorro.libmarkus import METRICS, build_prefix
-from socorro.lib.libdatetime import JsonDTEncoder, string_to_datetime, utc_now
+from socorro.lib.libdatetime import string_to_datetime, utc_now
 
 
 # Additional custom analyzers for crash report data
@@ -39,6 +42,9 @@ ES_CUSTOM_ANALYZERS = {
 # Elasticsearch indices configuration
 ES_QUERY_SETTINGS = {"default_field": "signature"}
 
+# How long before an index is needed that ensure_index creates it
+NEXT_INDEX_LEAD_TIME = datetime.timedelta(days=1)
+
 # Maximum size in characters for a keyword field value
 MAX_KEYWORD_FIELD_VALUE_SIZE = 10_000
 
@@ -227,60 +233,242 @@ def fix_datetime(value):
     return value
 
 
-def build_document(src, crash_document, fields, all_keys):
-    """Given a source document and fields and valid keys, builds a document to index.
+def copy_value(value):
+    """Copy mutable values so the document doesn't share them with the source
+
+    :param value: the value to copy
 
-    :param dict src: the source document with "processed_crash" key
-    :param dict crash_document: the document to fill
-    :param list fields: the list of fields in super search fields
-    :param set all_keys: the list of valid keys
+    :returns: copied value
 
     """
-    for field in fields.values():
-        # There are some fields that aren't indexable--skip those
-        if not is_indexable(field):
-            continue
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
 
-        src_key = get_source_key(field)
-        value = glom.glom(src, src_key, default=None)
-        if value is None:
-            continue
+# Map of storage type -> function that fixes a value so it indexes correctly; a fixer
+# returns None if the value should be left out
+FIXERS = {
+    "keyword": partial(fix_keyword, max_size=MAX_KEYWORD_FIELD_VALUE_SIZE),
+    "text": partial(fix_string, max_size=MAX_STRING_FIELD_VALUE_SIZE),
+    "integer": fix_integer,
+    "long": fix_long,
+    "double": fix_double,
+    "date": fix_datetime,
+    "boolean": fix_boolean,
+}
 
-        # Fix values so they index correctly
-        storage_type = field.get("type", field["storage_mapping"].get("type"))
 
-        if storage_type == "keyword":
-            value = fix_keyword(value, max_size=MAX_KEYWORD_FIELD_VALUE_SIZE)
+def build_getter(key):
+    """Return a function that gets the value at a "namespace.key" key
 
-        elif storage_type == "text":
-            value = fix_string(value, max_size=MAX_STRING_FIELD_VALUE_SIZE)
+    :param str key: the key in "namespace.key" format
 
-        elif storage_type == "integer":
-            value = fix_integer(value)
-            if value is None:
+    :returns: function that takes a document and returns the value or None
+
+    """
+    path = tuple(key.split("."))
+
+    def getter(document):
+        value = document
+        for part in path:
+            try:
+                value = value[part]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return value
+
+    return getter
+
+
+def build_setter(keys):
+    """Return a function that sets a value at "namespace.key" keys
+
+    Intermediate dicts are created as needed.
+
+    :param list keys: the keys in "namespace.key" format
+
+    :returns: function that takes a document and a value
+
+    """
+    paths = [tuple(key.split(".")) for key in keys]
+
+    def setter(document, value):
+        for path in paths:
+            parent = document
+            for part in path[:-1]:
+                parent = parent.setdefault(part, {})
+            parent[path[-1]] = value
+
+    return setter
+
+
+class DocumentBuilder:
+    """Builds documents to index from processed crashes.
+
+    Super search fields and valid keys are compiled once into a flat list of (getter,
+    fixer, setter) operations. Fields that aren't indexable or have no valid
+    destination keys are dropped at compile time.
+
+    The source document isn't changed. Values that are dicts or lists and aren't
+    rebuilt by a fixer are copied so the crash document doesn't share them with it.
+
+    """
+
+    def __init__(self, fields, all_keys):
+        """
+        :param dict fields: super search fields
+        :param set all_keys: the set of valid keys
+
+        """
+        self.operations = []
+        for field in fields.values():
+            # There are some fields that aren't indexable--skip those
+            if not is_indexable(field):
                 continue
 
-        elif storage_type == "long":
-            value = fix_long(value)
-            if value is None:
+            dest_keys = [key for key in get_destination_keys(field) if key in all_keys]
+            if not dest_keys:
                 continue
 
-        elif storage_type == "double":
-            value = fix_double(value)
+            storage_type = field.get("type", field["storage_mapping"].get("type"))
+            source_key = get_source_key(field)
+            self.operations.append(
+                (
+                    get_processed_crash_key(source_key),
+                    build_getter(source_key),
+                    FIXERS.get(storage_type, copy_value),
+                    build_setter(dest_keys),
+                )
+            )
+
+    def build(self, src, crash_document):
+        """Fill the crash document from the source document.
+
+        :param dict src: the source document with "processed_crash" key
+        :param dict crash_document: the document to fill
+
+        """
+        for _, getter, fixer, setter in self.operations:
+            value = getter(src)
             if value is None:
                 continue
 
-        elif storage_type == "date":
-            value = fix_datetime(value)
+            # Fix values so they index correctly
+            value = fixer(value)
             if value is None:
                 continue
 
-        elif storage_type == "boolean":
-            value = fix_boolean(value)
+            setter(crash_document, value)
+
+    def build_changes(self, src, crash_document, changed_keys):
+        """Fill the crash document with the fields for changed processed crash keys.
+
+        Fields that don't have a value are set to None so that updating a document
+        with the crash document clears them.
+
+        :param dict src: the source document with "processed_crash" key
+        :param dict crash_document: the document to fill
+        :param changed_keys: set of top-level processed crash keys that changed
+
+        """
+        for processed_crash_key, getter, fixer, setter in self.operations:
+            if processed_crash_key not in changed_keys:
+                continue
+
+            value = getter(src)
+            if value is not None:
+                # Fix values so they index correctly
+                value = fixer(value)
+
+            setter(crash_document, value)
+
+
+def get_processed_crash_key(source_key):
+    """Return the top-level processed crash key for a source key
+
+    :param str source_key: the source key in "namespace.key" format
+
+    :returns: the processed crash key or None if the source isn't the processed crash
+
+    """
+    namespace, _, key = source_key.partition(".")
+    if namespace != "processed_crash":
+        return None
+    return key.split(".")[0]
+
+
+# Serializes documents the same way the Elasticsearch client does
+JSON_SERIALIZER = JsonSerializer()
+
+
+def serialize_document(crash_document, action="index"):
+    """Serialize a crash document to the bytes that get sent to Elasticsearch
+
+    :arg dict crash_document: the document to serialize
+    :arg str action: "index" for a whole document or "update" for a partial
+        document to update an existing document with
+
+    :returns: bytes
+
+    """
+    if action == "update":
+        return JSON_SERIALIZER.dumps({"doc": crash_document})
+    return JSON_SERIALIZER.dumps(crash_document)
+
+
+class DocumentMissingError(Exception):
+    """Crash document to update doesn't exist"""
 
-        for dest_key in get_destination_keys(field):
-            if dest_key in all_keys:
-                glom.assign(crash_document, dest_key, value, missing=dict)
+
+def is_document_missing(error):
+    """Return whether an Elasticsearch error is for a document that doesn't exist
+
+    :arg error: the "error" structure from an Elasticsearch error response
+
+    """
+    return isinstance(error, dict) and error.get("type") == "document_missing_exception"
+
+
+def is_index_not_found(error):
+    """Return whether an Elasticsearch error is for an index that doesn't exist
+
+    :arg error: the "error" structure from an Elasticsearch error response
+
+    """
+    return isinstance(error, dict) and error.get("type") == "index_not_found_exception"
+
+
+def remove_field(crash_document, field_name):
+    """Removes a field from a crash document and notes it in removed_fields
+
+    :arg dict crash_document: the document to remove the field from
+    :arg str field_name: the field to remove in "namespace.key" format
+
+    """
+    if field_name.endswith(".full"):
+        # Remove the `.full` at the end, that is a special mapping construct
+        # that is not part of the real field name.
+        field_name = field_name.removesuffix(".full")
+
+    # Now remove that field from the document before trying again.
+    field_path = field_name.split(".")
+    parent = crash_document
+    for i, field in enumerate(field_path):
+        if i == len(field_path) - 1:
+            # This is the last level, so `field` contains the name
+            # of the field that we want to remove from `parent`.
+            del parent[field]
+        else:
+            parent = parent[field]
+
+    # Add a note in the document that a field has been removed.
+    if crash_document.get("removed_fields"):
+        crash_document["removed_fields"] = "{} {}".format(
+            crash_document["removed_fields"], field_name
+        )
+    else:
+        crash_document["removed_fields"] = field_name
 
 
 class ESCrashStorage(CrashStorageBase):
@@ -304,10 +492,13 @@ class ESCrashStorage(CrashStorageBase):
         timeout=30,
         shards_per_index=10,
         ca_certs=None,
+        connections=10,
     ):
         super().__init__()
 
-        self.client = self.build_client(url=url, timeout=timeout, ca_certs=ca_certs)
+        self.client = self.build_client(
+            url=url, timeout=timeout, ca_certs=ca_certs, connections=connections
+        )
 
         # Create a MetricsInterface that includes the base prefix plus the prefix passed
         # into __init__
@@ -325,10 +516,17 @@ class ESCrashStorage(CrashStorageBase):
         self._keys_for_indexable_fields_cache = None
         self._keys_for_mapping_cache = {}
         self._mapping_cache = {}
+        self._document_builders = {}
+
+        # Registry of indices that are known to exist; None until it's warmed
+        self._known_indices = None
+        self._known_indices_lock = threading.Lock()
 
     @classmethod
-    def build_client(cls, url, timeout, ca_certs=None):
-        return ConnectionContext(url=url, timeout=timeout, ca_certs=ca_certs)
+    def build_client(cls, url, timeout, ca_certs=None, connections=10):
+        return ConnectionContext(
+            url=url, timeout=timeout, ca_certs=ca_certs, connections=connections
+        )
 
     def build_query(self):
         """Return new instance of Query."""
@@ -425,7 +623,73 @@ class ESCrashStorage(CrashStorageBase):
             index_settings=index_settings,
         )
 
+    def ensure_index(self, index_name):
+        """Make sure an index exists, creating it if it doesn't.
+
+        Indices that are known to exist are kept in a registry on this instance. The
+        registry is warmed with the existing indices the first time this is called, so
+        after that this only talks to Elasticsearch for indices it hasn't seen.
+
+        If the index template is date-based, this also creates the next index a day
+        before it's needed so that processors aren't all trying to create it when the
+        week rolls over.
+
+        :arg index_name: the name of the index
+
+        """
+        with self._known_indices_lock:
+            known_indices = self._known_indices
+        if known_indices is None:
+            indices = set(self.get_indices())
+            with self._known_indices_lock:
+                if self._known_indices is None:
+                    self._known_indices = indices
+
+        index_names = [index_name]
+        if "%" in self.get_index_template():
+            index_names.append(
+                self.get_index_for_date(utc_now() + NEXT_INDEX_LEAD_TIME)
+            )
+
+        for name in index_names:
+            # Only hold the lock to check the registry so saving to known indices
+            # doesn't wait on creating an index
+            with self._known_indices_lock:
+                is_known = name in self._known_indices
+            if not is_known:
+                self._create_known_index(name)
+
+    def _create_known_index(self, index_name):
+        """Create an index and add it to the registry of known indices.
+
+        If another thread creates the index at the same time, Elasticsearch tells one
+        of them it already exists and both add it to the registry.
+
+        """
+        mappings = build_mapping()
+        if self.create_index(index_name, mappings=mappings):
+            # We created it, so we know the mapping without having to ask for it
+            self._keys_for_mapping_cache[index_name] = parse_mapping(
+                mappings["properties"], None
+            )
+            self.metrics.incr("create_index")
+        with self._known_indices_lock:
+            self._known_indices.add(index_name)
+
+    def forget_index(self, index_name):
+        """Remove an index from the registry of known indices.
+
+        :arg index_name: the name of the index
+
+        """
+        with self._known_indices_lock:
+            if self._known_indices is not None:
+                self._known_indices.discard(index_name)
+        self._keys_for_mapping_cache.pop(index_name, None)
+        self._mapping_cache.pop(index_name, None)
+
     def delete_index(self, index_name):
+        self.forget_index(index_name)
         return self.client.delete_index(index_name=index_name)
 
     def get_indices(self):
@@ -456,7 +720,7 @@ class ESCrashStorage(CrashStorageBase):
             if index_name > cutoff:
                 continue
 
-            self.client.delete_index(index_name)
+            self.delete_index(index_name)
             was_deleted.append(index_name)
 
         return was_deleted
@@ -525,44 +789,94 @@ class ESCrashStorage(CrashStorageBase):
         )
         all_valid_keys = self.get_keys(index_name)
 
-        src = {"processed_crash": copy.deepcopy(processed_crash)}
-
         crash_document = {
             "crash_id": crash_id,
             "processed_crash": {},
         }
-        build_document(
-            src, crash_document, fields=self.SUPERSEARCH_FIELDS, all_keys=all_valid_keys
+        self.get_document_builder(all_valid_keys).build(
+            {"processed_crash": processed_crash}, crash_document
         )
 
-        # Capture crash data size metrics
-        self.capture_crash_metrics(crash_document)
-
         self._submit_crash_to_elasticsearch(
             crash_id=crash_id,
             index_name=index_name,
             crash_document=crash_document,
         )
 
-    def capture_crash_metrics(self, crash_document):
-        """Capture metrics about crash data being saved to Elasticsearch"""
+    def save_processed_crash_changes(self, raw_crash, processed_crash, changed_keys):
+        """Update the crash document in Elasticsearch with the changed fields
 
-        def _capture(key, data):
-            try:
-                self.metrics.histogram(
-                    key, value=len(json.dumps(data, cls=JsonDTEncoder))
-                )
-            except Exception:
-                # NOTE(willkg): An error here shouldn't screw up saving data. Log it so
-                # we can fix it later.
-                self.logger.exception(f"something went wrong when capturing {key}")
+        The whole crash document is indexed if the changes move the crash report to
+        another index or if the crash document doesn't exist.
+
+        """
+        if "uuid" in changed_keys or "date_processed" in changed_keys:
+            self.metrics.incr("save_changes", tags=["outcome:full"])
+            self.save_processed_crash(raw_crash, processed_crash)
+            return
+
+        crash_id = processed_crash["uuid"]
+
+        index_name = self.get_index_for_date(
+            string_to_datetime(processed_crash["date_processed"])
+        )
+        all_valid_keys = self.get_keys(index_name)
+
+        crash_document = {}
+        self.get_document_builder(all_valid_keys).build_changes(
+            {"processed_crash": processed_crash}, crash_document, changed_keys
+        )
+        if not crash_document:
+            # None of the changes are indexed
+            self.metrics.incr("save_changes", tags=["outcome:unchanged"])
+            return
+
+        try:
+            self._submit_crash_to_elasticsearch(
+                crash_id=crash_id,
+                index_name=index_name,
+                crash_document=crash_document,
+                action="update",
+            )
+        except DocumentMissingError:
+            self.metrics.incr("save_changes", tags=["outcome:full"])
+            self.save_processed_crash(raw_crash, processed_crash)
+            return
+
+        self.metrics.incr("save_changes", tags=["outcome:update"])
+
+    def get_document_builder(self, all_keys):
+        """Return the DocumentBuilder for a set of valid keys
+
+        Builders are cached on this ESCrashStorage instance.
+
+        :arg set all_keys: the set of valid keys
+
+        :returns: DocumentBuilder
+
+        """
+        all_keys = frozenset(all_keys)
+        builder = self._document_builders.get(all_keys)
+        if builder is None:
+            builder = DocumentBuilder(self.SUPERSEARCH_FIELDS, all_keys)
+            self._document_builders[all_keys] = builder
+        return builder
+
+    def capture_crash_metrics(self, body):
+        """Capture metrics about crash data being saved to Elasticsearch
 
-        _capture("crash_document_size", crash_document)
+        :arg bytes body: the serialized crash document
 
-    def _index_crash(self, connection, es_index, crash_document, crash_id):
+        """
+        self.metrics.histogram("crash_document_size", value=len(body))
+
+    def _index_crash(self, connection, es_index, body, crash_id, action="index"):
         try:
             start_time = time.time()
-            connection.index(index=es_index, body=crash_document, id=crash_id)
+            if action == "update":
+                connection.update(index=es_index, body=body, id=crash_id)
+            else:
+                connection.index(index=es_index, body=body, id=crash_id)
             index_outcome = "successful"
         except Exception:
             index_outcome = "failed"
@@ -573,13 +887,75 @@ class ESCrashStorage(CrashStorageBase):
                 "index", value=elapsed_time * 1000.0, tags=["outcome:" + index_outcome]
             )
 
-    def _submit_crash_to_elasticsearch(self, crash_id, index_name, crash_document):
-        """Submit a crash report to elasticsearch"""
-        # Attempt to create the index; it's OK if it already exists.
+    def get_field_name_from_error(self, error):
+        """Figure out which field caused an indexing error
+
+        :arg dict error: the "error" structure from an Elasticsearch error response
+            for a document
+
+        :returns: the name of the field to remove from the document to fix the error
+            or None if the error isn't one we can fix
+
+        """
+        field_name = None
+        caused_by_type = error.get("caused_by", {}).get("type")
+
+        if (
+            error["type"] == "document_parsing_exception"
+            and caused_by_type == "illegal_argument_exception"
+            and error["reason"].startswith(
+                "Document contains at least one immense term"
+            )
+        ):
+            # This is caused by a string that is way too long for
+            # Elasticsearch, specifically 32_766 bytes when UTF8 encoded.
+            matches = self.field_name_string_error_re.findall(error["reason"])
+            if matches:
+                field_name = matches[0]
+                self.metrics.incr("indexerror", tags=["error:maxbyteslengthexceeded"])
+
+        elif (
+            error["type"] == "document_parsing_exception"
+            and caused_by_type == "number_format_exception"
+        ):
+            # This is caused by a number that is either too big for
+            # Elasticsearch or just not a number.
+            matches = self.field_name_number_error_re.findall(error["reason"])
+            if matches:
+                field_name = matches[0]
+                self.metrics.incr("indexerror", tags=["error:numberformatexception"])
+
+        elif (
+            error["type"] == "document_parsing_exception"
+            and caused_by_type == "illegal_argument_exception"
+        ):
+            # This is caused by field values that are nested for a field where a
+            # previously indexed value was a string. For example, the processor
+            # first indexes ModuleSignatureInfo value as a string, then tries to
+            # index ModuleSignatureInfo as a nested dict.
+            matches = self.field_name_unknown_property_error_re.findall(error["reason"])
+            if matches:
+                field_name = matches[0]
+                self.metrics.incr("indexerror", tags=["error:unknownproperty"])
+
+        return field_name
+
+    def _submit_crash_to_elasticsearch(
+        self, crash_id, index_name, crash_document, action="index"
+    ):
+        """Submit a crash report to elasticsearch
+
+        :arg action: "index" to index the whole crash document or "update" to update
+            an existing crash document with a partial crash document
+
+        :raises DocumentMissingError: if updating a crash document that doesn't exist
+
+        """
+        self.ensure_index(index_name)
 
-        # FIXME(willkg): we shouldn't do this--instead we should try to index and create
-        # the index if the index doesn't exist
-        self.create_index(index_name)
+        # Serialize the document once and send those bytes
+        body = serialize_document(crash_document, action=action)
+        self.capture_crash_metrics(body)
 
         # Submit the crash for indexing.
         # Don't retry more than 5 times. That is to avoid infinite loops in
@@ -587,62 +963,28 @@ class ESCrashStorage(CrashStorageBase):
         for _ in range(5):
             try:
                 with self.client() as conn:
-                    return self._index_crash(conn, index_name, crash_document, crash_id)
+                    return self._index_crash(
+                        conn, index_name, body, crash_id, action=action
+                    )
 
             except elasticsearch.ConnectionError:
                 # If this is a connection error, sleep a second and then try again
                 time.sleep(1.0)
 
+            except NotFoundError as exc:
+                error = exc.body.get("error")
+                if action == "update" and is_document_missing(error):
+                    raise DocumentMissingError(crash_id) from exc
+                if not is_index_not_found(error):
+                    raise
+                # The index was deleted after we saw it, so create it and try again
+                self.forget_index(index_name)
+                self.ensure_index(index_name)
+
             except elasticsearch.BadRequestError as e:
                 # If this is a BadRequestError, we try to figure out what the error
                 # is and fix the document and try again
-                field_name = None
-
-                error = e.body["error"]
-
-                if (
-                    error["type"] == "document_parsing_exception"
-                    and error["caused_by"]["type"] == "illegal_argument_exception"
-                    and error["reason"].startswith(
-                        "Document contains at least one immense term"
-                    )
-                ):
-                    # This is caused by a string that is way too long for
-                    # Elasticsearch, specifically 32_766 bytes when UTF8 encoded.
-                    matches = self.field_name_string_error_re.findall(error["reason"])
-                    if matches:
-                        field_name = matches[0]
-                        self.metrics.incr(
-                            "indexerror", tags=["error:maxbyteslengthexceeded"]
-                        )
-
-                elif (
-                    error["type"] == "document_parsing_exception"
-                    and error["caused_by"]["type"] == "number_format_exception"
-                ):
-                    # This is caused by a number that is either too big for
-                    # Elasticsearch or just not a number.
-                    matches = self.field_name_number_error_re.findall(error["reason"])
-                    if matches:
-                        field_name = matches[0]
-                        self.metrics.incr(
-                            "indexerror", tags=["error:numberformatexception"]
-                        )
-
-                elif (
-                    error["type"] == "document_parsing_exception"
-                    and error["caused_by"]["type"] == "illegal_argument_exception"
-                ):
-                    # This is caused by field values that are nested for a field where a
-                    # previously indexed value was a string. For example, the processor
-                    # first indexes ModuleSignatureInfo value as a string, then tries to
-                    # index ModuleSignatureInfo as a nested dict.
-                    matches = self.field_name_unknown_property_error_re.findall(
-                        error["reason"]
-                    )
-                    if matches:
-                        field_name = matches[0]
-                        self.metrics.incr("indexerror", tags=["error:unknownproperty"])
+                field_name = self.get_field_name_from_error(e.body["error"])
 
                 if not field_name:
                     # We are unable to parse which field to remove, we cannot
@@ -656,29 +998,8 @@ class ESCrashStorage(CrashStorageBase):
                     self.metrics.incr("indexerror", tags=["error:unhandled"])
                     raise
 
-                if field_name.endswith(".full"):
-                    # Remove the `.full` at the end, that is a special mapping construct
-                    # that is not part of the real field name.
-                    field_name = field_name.removesuffix(".full")
-
-                # Now remove that field from the document before trying again.
-                field_path = field_name.split(".")
-                parent = crash_document
-                for i, field in enumerate(field_path):
-                    if i == len(field_path) - 1:
-                        # This is the last level, so `field` contains the name
-                        # of the field that we want to remove from `parent`.
-                        del parent[field]
-                    else:
-                        parent = parent[field]
-
-                # Add a note in the document that a field has been removed.
-                if crash_document.get("removed_fields"):
-                    crash_document["removed_fields"] = "{} {}".format(
-                        crash_document["removed_fields"], field_name
-                    )
-                else:
-                    crash_document["removed_fields"] = field_name
+                remove_field(crash_document, field_name)
+                body = serialize_document(crash_document, action=action)
 
             except elasticsearch.ApiError as exc:
                 self.logger.critical(
@@ -717,3 +1038,335 @@ class ESCrashStorage(CrashStorageBase):
                     self.client.refresh()
             except Exception:
                 self.logger.exception(f"ERROR: es: when deleting {crash_id}")
+
+
+class BulkItem:
+    """A crash document waiting to be indexed with the bulk API."""
+
+    def __init__(self, crash_id, index_name, crash_document, body, action="index"):
+        self.crash_id = crash_id
+        self.index_name = index_name
+        self.crash_document = crash_document
+        # "index" or "update"
+        self.action = action
+        # The serialized crash document that gets sent
+        self.body = body
+        self.size = len(body)
+        self.enqueued_at = time.monotonic()
+
+        self.error = None
+        self.done = threading.Event()
+
+    def finish(self, error=None):
+        self.error = error
+        self.done.set()
+
+
+class ESBulkCrashStorage(ESCrashStorage):
+    """Indexes documents to Elasticsearch in batches using the bulk API.
+
+    Crash documents are added to a buffer. A flusher thread indexes the buffered
+    documents with a single bulk request when the buffer has ``bulk_max_documents``
+    documents, when it has ``bulk_max_bytes`` bytes, or when the oldest document has
+    been waiting ``bulk_max_latency`` seconds--whichever comes first.
+
+    ``save_processed_crash`` blocks until the batch that has the document is flushed
+    and raises an error if the document failed to index. This way the processor only
+    acknowledges a crash report after the document has been indexed.
+
+    Because savers block, a batch can never have more documents than there are threads
+    saving crash reports. The flusher keeps track of the threads that are saving and
+    flushes as soon as all of them are waiting on the buffer, so batches are as large
+    as the number of concurrent savers and a lone saver doesn't wait
+    ``bulk_max_latency`` seconds.
+
+    """
+
+    def __init__(
+        self,
+        url="http://localhost:9200",
+        index="socorro%Y%W",
+        index_regex=r"^socorro[0-9]{6}$",
+        retention_policy=26,
+        metrics_prefix="processor.es",
+        timeout=30,
+        shards_per_index=10,
+        ca_certs=None,
+        connections=10,
+        bulk_max_documents=100,
+        bulk_max_bytes=5_000_000,
+        bulk_max_latency=0.5,
+    ):
+        """
+        :arg bulk_max_documents: flush when there are this many documents buffered
+        :arg bulk_max_bytes: flush when the buffered documents are this many bytes
+        :arg bulk_max_latency: flush when the oldest buffered document has been waiting
+            this many seconds
+        """
+        super().__init__(
+            url=url,
+            index=index,
+            index_regex=index_regex,
+            retention_policy=retention_policy,
+            metrics_prefix=metrics_prefix,
+            timeout=timeout,
+            shards_per_index=shards_per_index,
+            ca_certs=ca_certs,
+            connections=connections,
+        )
+        self.bulk_max_documents = bulk_max_documents
+        self.bulk_max_bytes = bulk_max_bytes
+        self.bulk_max_latency = bulk_max_latency
+
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._condition = threading.Condition()
+        self._closing = False
+        self._flusher = None
+        # Number of threads that are saving a crash report
+        self._savers = 0
+        self._local = threading.local()
+
+    def close(self):
+        """Flush any buffered documents and stop the flusher thread."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._flusher is not None and self._flusher.is_alive():
+            self._flusher.join()
+
+    def _start_flusher(self):
+        """Start the flusher thread if it's not running.
+
+        This must be called with the condition held.
+
+        """
+        # Threads don't survive forking, so this also starts a new flusher thread in
+        # worker processes of the ProcessPoolTaskManager
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(
+                name="esBulkFlusher", target=self._flusher_loop, daemon=True
+            )
+            self._flusher.start()
+
+    @contextlib.contextmanager
+    def _saving(self):
+        """Count this thread as a saver while it's saving a crash report
+
+        Saving can nest--``save_processed_crash_changes`` falls back to
+        ``save_processed_crash``--so only the outermost call counts.
+
+        """
+        if getattr(self._local, "saving", False):
+            yield
+            return
+
+        self._local.saving = True
+        with self._condition:
+            self._savers += 1
+        try:
+            yield
+        finally:
+            self._local.saving = False
+            with self._condition:
+                self._savers -= 1
+                # This saver might have been the last one the flusher was waiting on
+                self._condition.notify_all()
+
+    def save_processed_crash(self, raw_crash, processed_crash):
+        with self._saving():
+            super().save_processed_crash(raw_crash, processed_crash)
+
+    def save_processed_crash_changes(self, raw_crash, processed_crash, changed_keys):
+        with self._saving():
+            super().save_processed_crash_changes(
+                raw_crash, processed_crash, changed_keys
+            )
+
+    def _submit_crash_to_elasticsearch(
+        self, crash_id, index_name, crash_document, action="index"
+    ):
+        """Add a crash report to the buffer and wait for it to be indexed"""
+        with self._saving():
+            body = serialize_document(crash_document, action=action)
+            self.capture_crash_metrics(body)
+            item = BulkItem(
+                crash_id=crash_id,
+                index_name=index_name,
+                crash_document=crash_document,
+                body=body,
+                action=action,
+            )
+
+            with self._condition:
+                if self._closing:
+                    raise RuntimeError("ESBulkCrashStorage is closed")
+                self._start_flusher()
+                self._buffer.append(item)
+                self._buffer_bytes += item.size
+                self._condition.notify_all()
+
+            item.done.wait()
+            if item.error is not None:
+                raise item.error
+
+    def _is_buffer_full(self):
+        return (
+            len(self._buffer) >= self.bulk_max_documents
+            or self._buffer_bytes >= self.bulk_max_bytes
+        )
+
+    def _is_batch_ready(self):
+        # Every thread that's saving is waiting on the buffer, so no more documents
+        # are coming until this batch is flushed
+        return self._is_buffer_full() or len(self._buffer) >= self._savers
+
+    def _flusher_loop(self):
+        """Main function for the flusher thread"""
+        while True:
+            with self._condition:
+                while not self._buffer and not self._closing:
+                    self._condition.wait()
+
+                if not self._buffer:
+                    # We're closing and there's nothing left to flush
+                    return
+
+                # Wait until the batch is ready or the oldest document has waited long
+                # enough
+                deadline = self._buffer[0].enqueued_at + self.bulk_max_latency
+                while not self._closing and not self._is_batch_ready():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = self._buffer[: self.bulk_max_documents]
+                self._buffer = self._buffer[self.bulk_max_documents :]
+                self._buffer_bytes = sum(item.size for item in self._buffer)
+
+            try:
+                self._flush(batch)
+            except Exception as exc:
+                # Make sure the threads waiting on these documents are released
+                self.logger.exception("error: bulk flush failed")
+                for item in batch:
+                    if not item.done.is_set():
+                        item.finish(exc)
+
+    def _bulk_index(self, connection, operations, num_documents):
+        try:
+            start_time = time.time()
+            resp = connection.bulk(operations=operations)
+            bulk_outcome = "successful"
+        except Exception:
+            bulk_outcome = "failed"
+            raise
+        finally:
+            elapsed_time = time.time() - start_time
+            self.metrics.histogram(
+                "bulk", value=elapsed_time * 1000.0, tags=["outcome:" + bulk_outcome]
+            )
+            self.metrics.histogram("bulk_documents", value=num_documents)
+        return resp
+
+    def _flush(self, batch):
+        """Index a batch of crash documents with the bulk API
+
+        Documents that fail to index because of a field we can fix are fixed and
+        retried. Every item in the batch is finished when this returns.
+
+        """
+        for index_name in sorted({item.index_name for item in batch}):
+            self.ensure_index(index_name)
+
+        pending = batch
+
+        # Don't retry more than 5 times. That is to avoid infinite loops in
+        # case of an unhandled exception.
+        for _ in range(5):
+            if not pending:
+                return
+
+            operations = []
+            for item in pending:
+                operations.append(
+                    {item.action: {"_index": item.index_name, "_id": item.crash_id}}
+                )
+                operations.append(item.body)
+
+            try:
+                with self.client() as conn:
+                    resp = self._bulk_index(conn, operations, len(pending))
+
+            except elasticsearch.ConnectionError:
+                # If this is a connection error, sleep a second and then try again
+                time.sleep(1.0)
+                continue
+
+            except elasticsearch.ApiError as exc:
+                self.logger.critical(
+                    "Bulk submission to Elasticsearch failed (%s)", exc, exc_info=True
+                )
+                for item in pending:
+                    item.finish(exc)
+                return
+
+            retry = []
+            for item, result in zip(pending, resp["items"], strict=True):
+                error = result[item.action].get("error")
+                if not error:
+                    self.metrics.histogram(
+                        "index",
+                        value=(time.monotonic() - item.enqueued_at) * 1000.0,
+                        tags=["outcome:successful"],
+                    )
+                    item.finish()
+                    continue
+
+                if item.action == "update" and is_document_missing(error):
+                    item.finish(DocumentMissingError(item.crash_id))
+                    continue
+
+                if is_index_not_found(error):
+                    # The index was deleted after we saw it, so create it and try
+                    # again
+                    self.forget_index(item.index_name)
+                    self.ensure_index(item.index_name)
+                    retry.append(item)
+                    continue
+
+                # Try to figure out what the error is and fix the document and try
+                # again
+                field_name = self.get_field_name_from_error(error)
+                if not field_name:
+                    # We are unable to parse which field to remove, we cannot
+                    # try to fix the document.
+                    self.logger.critical(
+                        "Submission to Elasticsearch failed for %s (%s)",
+                        item.crash_id,
+                        error,
+                    )
+                    self.metrics.incr("indexerror", tags=["error:unhandled"])
+                    item.finish(
+                        BulkIndexError(
+                            f"Submission to Elasticsearch failed for {item.crash_id}",
+                            [result],
+                        )
+                    )
+                    continue
+
+                remove_field(item.crash_document, field_name)
+                item.body = serialize_document(item.crash_document, action=item.action)
+                retry.append(item)
+
+            pending = retry
+
+        for item in pending:
+            item.finish(
+                BulkIndexError(
+                    f"Submission to Elasticsearch failed for {item.crash_id}: "
+                    + "too many retries",
+                    [],
+                )
+            )
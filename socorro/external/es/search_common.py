@@ -85,6 +85,8 @@ class SearchBase:
         SearchFilter("_aggs.product.version"),
         SearchFilter("_aggs.product.version.platform"),  # convenient for tests
         SearchFilter("_aggs.android_cpu_abi.android_manufacturer.android_model"),
+        # Used by the topcrashers rollup job
+        SearchFilter("_aggs.product.version.process_type.report_type.signature"),
         SearchFilter(
             "_columns", default=["uuid", "date", "signature", "product", "version"]
         ),
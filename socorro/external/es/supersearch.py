@@ -7,8 +7,13 @@ import re
 from collections import defaultdict
 from contextlib import suppress
 
-from elasticsearch.dsl import A, AggResponse, Q, Search
-from elasticsearch.exceptions import BadRequestError, ConnectionTimeout, NotFoundError
+from elasticsearch.dsl import A, AggResponse, MultiSearch, Q, Search
+from elasticsearch.exceptions import (
+    ApiError,
+    BadRequestError,
+    ConnectionTimeout,
+    NotFoundError,
+)
 
 from socorro.external.es.base import generate_list_of_indexes
 from socorro.external.es.search_common import SearchBase
@@ -18,6 +23,9 @@ from socorro.lib import BadArgumentError, MissingArgumentError, libdatetime
 BAD_INDEX_REGEX = re.compile(r"\[\[(.*)\] missing\]")
 ELASTICSEARCH_PARSE_EXCEPTION_REGEX = re.compile(r"\[([^\]]+)\] could not be parsed")
 
+# How long Elasticsearch keeps a point in time alive between pages in iter_hits
+PIT_KEEP_ALIVE = "2m"
+
 
 def prune_invalid_indices(indices, policy, template):
     """Prunes given indices by ones that were prior to the cutoff
@@ -71,8 +79,13 @@ class SuperSearch(SearchBase):
             start_date, end_date, self.crashstorage.get_index_template()
         )
 
-    def format_field_names(self, hit):
-        """Return hit with field's search_key replaced with name"""
+    def format_field_names(self, hit, columns):
+        """Return hit with field's search_key replaced with name
+
+        :arg hit: the hit from Elasticsearch
+        :arg columns: the names of the requested columns
+
+        """
         # unnest hit one level and update keys
         hit = {
             f"{namespace}.{key}": item
@@ -81,21 +94,21 @@ class SuperSearch(SearchBase):
         }
 
         new_hit = {}
-        for field_name in self.request_columns:
+        for field_name in columns:
             field = self.all_fields[field_name]
             search_key = get_search_key(field)
             new_hit[field_name] = hit.get(search_key)
 
         return new_hit
 
-    def format_fields(self, hit):
+    def format_fields(self, hit, columns):
         """Return a well formatted document.
 
         Elasticsearch returns values as lists when using the `fields` option.
         This function removes the list when it contains zero or one element.
         It also calls `format_field_names` to correct all the field names.
         """
-        hit = self.format_field_names(hit)
+        hit = self.format_field_names(hit, columns)
 
         for field in hit:
             if isinstance(hit[field], (list, tuple)):
@@ -175,11 +188,17 @@ class SuperSearch(SearchBase):
 
         return aggs
 
-    def get(self, **kwargs):
-        """Return a list of results and aggregations based on parameters.
+    def _build_search(self, kwargs):
+        """Build the search for the given parameters.
+
+        This builds the filters, returned columns, and sorting. Pagination and
+        aggregations are left to the caller.
+
+        :arg kwargs: the search parameters
+
+        :returns: tuple of (search, params, indices, options) where options is a
+            dict of the meta parameter values
 
-        The list of accepted parameters (with types and default values) is in
-        the database and can be accessed with the super_search_fields service.
         """
         # Require that the list of fields be passed.
         if not kwargs.get("_fields"):
@@ -349,13 +368,13 @@ class SuperSearch(SearchBase):
 
         # We keep track of the requested columns in order to make sure we
         # return those column names and not aliases for example.
-        self.request_columns = []
+        request_columns = []
         for param in params["_columns"]:
             for value in param.value:
                 if not value:
                     continue
 
-                self.request_columns.append(value)
+                request_columns.append(value)
                 field_name = self.get_field_name(value, full=False)
                 fields.append(field_name)
 
@@ -389,6 +408,31 @@ class SuperSearch(SearchBase):
 
         search = search.sort(*sort_fields)
 
+        options = {
+            "results_from": results_from,
+            "results_number": results_number,
+            "facets_size": facets_size,
+            "histogram_intervals": histogram_intervals,
+            "sort_fields": sort_fields,
+            "columns": request_columns,
+        }
+        return search, params, indices, options
+
+    def _build_paginated_search(self, kwargs):
+        """Build the search for the given parameters including pagination and
+        aggregations.
+
+        :arg kwargs: the search parameters
+
+        :returns: tuple of (search, params, indices, columns)
+
+        """
+        search, params, indices, options = self._build_search(kwargs)
+        results_from = options["results_from"]
+        results_number = options["results_number"]
+        facets_size = options["facets_size"]
+        histogram_intervals = options["histogram_intervals"]
+
         # Pagination.
         results_to = results_from + results_number
         if results_to > 10_000:
@@ -404,6 +448,84 @@ class SuperSearch(SearchBase):
         if facets_size:
             self._create_aggregations(params, search, facets_size, histogram_intervals)
 
+        return search, params, indices, options["columns"]
+
+    def _raise_for_bad_request(self, exc, kwargs):
+        """Raise a BadArgumentError if we can find out what input was bad
+
+        :arg exc: the exception with the Elasticsearch error in its body
+        :arg kwargs: the search parameters
+
+        """
+        # Not an ElasticsearchParseException exception
+        with suppress(IndexError):
+            if (
+                exc.body["error"]["type"] == "x_content_parse_exception"
+                and exc.body["error"]["caused_by"]["type"]
+                == "illegal_argument_exception"
+            ):
+                bad_input = ELASTICSEARCH_PARSE_EXCEPTION_REGEX.findall(
+                    exc.body["error"]["caused_by"]["reason"]
+                )[-1]
+
+                # Loop over the original parameters to try to figure
+                # out which *key* had the bad input.
+                for key, value in kwargs.items():
+                    if value == bad_input:
+                        raise BadArgumentError(key) from exc
+
+        with suppress(KeyError):
+            if (
+                exc.body["error"]["caused_by"]["type"]
+                == "too_complex_to_determinize_exception"
+            ):
+                raise BadArgumentError(
+                    "query",
+                    msg=(
+                        "Search query is too complex to execute. "
+                        "Simplify the search pattern and try again."
+                    ),
+                ) from exc
+
+    def _get_shard_errors(self, shards):
+        """Return errors for shards that failed
+
+        :arg shards: the ``_shards`` part of the response
+
+        :returns: list of error dicts
+
+        """
+        errors = []
+        if not shards or not shards.failed:
+            return errors
+
+        # Some shards failed. We want to explain what happened in the
+        # results, so the client can decide what to do.
+        failed_indices = defaultdict(int)
+        for failure in shards.failures:
+            # If it's a search parse exception we don't know what key is the
+            # problem, so raise a general BadArgumentError
+            if (
+                failure.reason.type == "query_shard_exception"
+                and failure.reason.caused_by.type == "illegal_argument_exception"
+            ):
+                raise BadArgumentError(f"Malformed supersearch query: {failure}")
+            failed_indices[failure.index] += 1
+
+        for index, shards_count in failed_indices.items():
+            errors.append(
+                {"type": "shards", "index": index, "shards_count": shards_count}
+            )
+        return errors
+
+    def get(self, **kwargs):
+        """Return a list of results and aggregations based on parameters.
+
+        The list of accepted parameters (with types and default values) is in
+        the database and can be accessed with the super_search_fields service.
+        """
+        search, params, indices, columns = self._build_paginated_search(kwargs)
+
         # Query and compute results.
         hits = []
 
@@ -422,7 +544,7 @@ class SuperSearch(SearchBase):
             try:
                 results = search.execute()
                 for hit in results:
-                    hits.append(self.format_fields(hit.to_dict()))
+                    hits.append(self.format_fields(hit.to_dict(), columns))
 
                 total = search.count()
 
@@ -467,35 +589,7 @@ class SuperSearch(SearchBase):
             except BadRequestError as exc:
                 # Try to handle it gracefully if we can find out what
                 # input was bad and caused the exception.
-                # Not an ElasticsearchParseException exception
-                with suppress(IndexError):
-                    if (
-                        exc.body["error"]["type"] == "x_content_parse_exception"
-                        and exc.body["error"]["caused_by"]["type"]
-                        == "illegal_argument_exception"
-                    ):
-                        bad_input = ELASTICSEARCH_PARSE_EXCEPTION_REGEX.findall(
-                            exc.body["error"]["caused_by"]["reason"]
-                        )[-1]
-
-                        # Loop over the original parameters to try to figure
-                        # out which *key* had the bad input.
-                        for key, value in kwargs.items():
-                            if value == bad_input:
-                                raise BadArgumentError(key) from exc
-
-                with suppress(KeyError):
-                    if (
-                        exc.body["error"]["caused_by"]["type"]
-                        == "too_complex_to_determinize_exception"
-                    ):
-                        raise BadArgumentError(
-                            "query",
-                            msg=(
-                                "Search query is too complex to execute. "
-                                "Simplify the search pattern and try again."
-                            ),
-                        ) from exc
+                self._raise_for_bad_request(exc, kwargs)
 
                 # Re-raise the original exception
                 raise
@@ -509,27 +603,260 @@ class SuperSearch(SearchBase):
                     ),
                 ) from exc
 
-        if shards and shards.failed:
-            # Some shards failed. We want to explain what happened in the
-            # results, so the client can decide what to do.
-            failed_indices = defaultdict(int)
-            for failure in shards.failures:
-                # If it's a search parse exception we don't know what key is the
-                # problem, so raise a general BadArgumentError
-                if (
-                    failure.reason.type == "query_shard_exception"
-                    and failure.reason.caused_by.type == "illegal_argument_exception"
-                ):
-                    raise BadArgumentError(f"Malformed supersearch query: {failure}")
-                failed_indices[failure.index] += 1
-
-            for index, shards_count in failed_indices.items():
-                errors.append(
-                    {"type": "shards", "index": index, "shards_count": shards_count}
-                )
+        errors.extend(self._get_shard_errors(shards))
 
         return {"hits": hits, "total": total, "facets": aggregations, "errors": errors}
 
+    def msearch(self, queries):
+        """Return results for several searches made with one request.
+
+        Each search is run on its own like with ``get``, but all of them are sent
+        to Elasticsearch in a single multi search request. Indices that don't exist
+        are skipped instead of being listed in the errors.
+
+        :arg queries: list of dicts of search parameters like ``get`` takes
+
+        :returns: list of results like ``get`` returns in the same order as queries
+
+        """
+        if not queries:
+            return []
+
+        multi_search = MultiSearch(using=self.get_connection())
+        # Each search has its own columns to format its hits with
+        all_columns = []
+        for kwargs in queries:
+            search, _, _, columns = self._build_paginated_search(kwargs)
+            all_columns.append(columns)
+            multi_search = multi_search.add(
+                search.params(ignore_unavailable=True).extra(track_total_hits=True)
+            )
+
+        try:
+            responses = multi_search.execute()
+        except ApiError as exc:
+            # The error for a search in the multi search has the same structure as
+            # the error for a single search, but we don't know which search it
+            # was, so look for the bad input in all of them
+            for kwargs in queries:
+                self._raise_for_bad_request(exc, kwargs)
+            raise
+        except ConnectionTimeout as exc:
+            raise BadArgumentError(
+                "query",
+                msg="Search query timed out. Simplify the search pattern and try again.",
+            ) from exc
+
+        all_results = []
+        for response, columns in zip(responses, all_columns):
+            aggregations = getattr(response, "aggregations", {})
+            if isinstance(aggregations, AggResponse):
+                aggregations = self.format_aggregations(aggregations)
+
+            all_results.append(
+                {
+                    "hits": [
+                        self.format_fields(hit.to_dict(), columns) for hit in response
+                    ],
+                    "total": response.hits.total.value,
+                    "facets": aggregations,
+                    "errors": self._get_shard_errors(getattr(response, "_shards", {})),
+                }
+            )
+        return all_results
+
+    def iter_hits(self, page_size=1000, **kwargs):
+        """Yield all hits matching parameters.
+
+        This takes the same parameters as ``get``, but rather than returning a page of
+        results, it walks the entire result set using a point in time and
+        ``search_after`` and yields hits one at a time. Memory use is bounded by the
+        page size no matter how many hits there are.
+
+        ``_results_offset``, ``_results_number``, facets, and aggregations are
+        ignored.
+
+        :arg page_size: number of hits to fetch from Elasticsearch per request
+        :arg kwargs: search parameters
+
+        :returns: generator of hits
+
+        :raises BadArgumentError: if the page size is invalid or the query times out
+
+        """
+        if page_size < 1 or page_size > 10_000:
+            raise BadArgumentError(
+                "page_size", msg="page_size must be between 1 and 10,000"
+            )
+
+        search, params, indices, options = self._build_search(kwargs)
+        if not indices:
+            return
+
+        conn = self.get_connection()
+        try:
+            pit_id = conn.open_point_in_time(
+                index=indices, keep_alive=PIT_KEEP_ALIVE, ignore_unavailable=True
+            )["id"]
+        except NotFoundError:
+            return
+
+        # A point in time search can't specify indices. Sorting by _shard_doc last
+        # gives every hit a unique sort position so search_after never skips or
+        # repeats hits.
+        search = search.index().sort(*options["sort_fields"], "_shard_doc")
+        search = search.extra(size=page_size, track_total_hits=False)
+
+        search_after = None
+        try:
+            while True:
+                page = search.extra(pit={"id": pit_id, "keep_alive": PIT_KEEP_ALIVE})
+                if search_after is not None:
+                    page = page.extra(search_after=search_after)
+
+                try:
+                    results = page.execute()
+                except ConnectionTimeout as exc:
+                    raise BadArgumentError(
+                        "query",
+                        msg=(
+                            "Search query timed out. "
+                            "Simplify the search pattern and try again."
+                        ),
+                    ) from exc
+
+                # Elasticsearch can hand back a new point in time id with each
+                # response and we should use the latest one
+                pit_id = getattr(results, "pit_id", pit_id)
+
+                if not results.hits:
+                    break
+
+                for hit in results:
+                    yield self.format_fields(hit.to_dict(), options["columns"])
+
+                if len(results.hits) < page_size:
+                    break
+
+                search_after = list(results.hits[-1].meta.sort)
+
+        finally:
+            with suppress(NotFoundError):
+                conn.close_point_in_time(id=pit_id)
+
+    def iter_buckets(
+        self, field, aggs=(), page_size=1000, include_missing=False, **kwargs
+    ):
+        """Yield all terms for a field in documents matching parameters.
+
+        This takes the same parameters as ``get``, but rather than returning the top
+        ``_facets_size`` terms for a field, it walks all the terms using a composite
+        aggregation and yields buckets one at a time. Buckets look like facets
+        buckets. Memory use is bounded by the page size no matter how many terms
+        there are.
+
+        Buckets are yielded in term order. Documents that don't have a value for the
+        field are skipped unless ``include_missing`` is True, in which case they're
+        counted in buckets with a ``None`` term.
+
+        Pass a list of fields to bucket on every combination of values of those
+        fields. Bucket terms are then tuples of values in the same order as the
+        fields. This walks nested dimensions without building a nested terms
+        aggregation that can run into the Elasticsearch ``search.max_buckets``
+        limit.
+
+        ``_results_offset``, ``_results_number``, and facets are ignored.
+
+        :arg field: the field to bucket on or a list of fields
+        :arg aggs: second level aggregations to compute for each bucket like
+            ``_min.build_id`` or ``_cardinality.install_time``
+        :arg page_size: number of buckets to fetch from Elasticsearch per request
+        :arg include_missing: whether to count documents that don't have a value for
+            a field in buckets with ``None`` for that value
+        :arg kwargs: search parameters
+
+        :returns: generator of buckets
+
+        :raises BadArgumentError: if the field or page size is invalid or the query
+            times out
+
+        """
+        if page_size < 1 or page_size > 10_000:
+            raise BadArgumentError(
+                "page_size", msg="page_size must be between 1 and 10,000"
+            )
+
+        fields = [field] if isinstance(field, str) else list(field)
+        if not fields:
+            raise BadArgumentError("field", msg="at least one field is required")
+
+        search, params, indices, options = self._build_search(kwargs)
+        for name in fields:
+            if name not in self.all_fields:
+                raise BadArgumentError("field", msg=f"{name} is not a valid field")
+        if not indices:
+            return
+
+        search = search.extra(size=0, track_total_hits=False).params(
+            ignore_unavailable=True
+        )
+
+        sub_aggs = []
+        for agg_field in aggs:
+            agg = self._get_second_level_agg(
+                agg_field, page_size, options["histogram_intervals"]
+            )
+            if agg is not None:
+                sub_aggs.append(agg)
+
+        sources = []
+        for name in fields:
+            terms = {"field": self.get_field_name(name)}
+            if include_missing:
+                terms["missing_bucket"] = True
+            sources.append({name: {"terms": terms}})
+        agg_name = "iter_buckets"
+
+        after_key = None
+        while True:
+            composite_kwargs = {"size": page_size, "sources": sources}
+            if after_key is not None:
+                composite_kwargs["after"] = after_key
+            composite = A("composite", **composite_kwargs)
+            for bucket_name, bucket in sub_aggs:
+                composite.bucket(bucket_name, bucket)
+
+            page = search._clone()
+            page.aggs.bucket(agg_name, composite)
+
+            try:
+                results = page.execute()
+            except ConnectionTimeout as exc:
+                raise BadArgumentError(
+                    "query",
+                    msg=(
+                        "Search query timed out. "
+                        "Simplify the search pattern and try again."
+                    ),
+                ) from exc
+
+            aggregations = getattr(results, "aggregations", None)
+            if not aggregations or agg_name not in aggregations:
+                break
+
+            after_key = aggregations[agg_name].to_dict().get("after_key")
+            buckets = self.format_aggregations(aggregations)[agg_name]
+            for bucket in buckets:
+                # Composite aggregation keys are a dict of source name to value
+                if isinstance(field, str):
+                    bucket["term"] = bucket["term"][field]
+                else:
+                    bucket["term"] = tuple(bucket["term"][name] for name in fields)
+                yield bucket
+
+            if after_key is None or len(buckets) < page_size:
+                break
+
     def _create_aggregations(self, params, search, facets_size, histogram_intervals):
         # Create facets.
         for param in params["_facets"]:
@@ -606,6 +933,31 @@ class SuperSearch(SearchBase):
             size=facets_size,
         )
 
+    def _get_min_agg(self, field):
+        return A("min", field=self.get_field_name(field))
+
+    def _get_second_level_agg(self, field, facets_size, histogram_intervals):
+        """Return (bucket name, aggregation) for a second level aggregation or None"""
+        if field.startswith("_histogram"):
+            field_name = field[len("_histogram.") :]
+            if field_name not in self.histogram_fields:
+                return None
+
+            return (
+                f"histogram_{field_name}",
+                self._get_histogram_agg(field_name, histogram_intervals),
+            )
+
+        if field.startswith("_cardinality"):
+            field_name = field[len("_cardinality.") :]
+            return f"cardinality_{field_name}", self._get_cardinality_agg(field_name)
+
+        if field.startswith("_min"):
+            field_name = field[len("_min.") :]
+            return f"min_{field_name}", self._get_min_agg(field_name)
+
+        return field, self._get_fields_agg(field, facets_size)
+
     def _add_second_level_aggs(
         self, param, recipient, facets_size, histogram_intervals
     ):
@@ -613,22 +965,9 @@ class SuperSearch(SearchBase):
             if not field:
                 continue
 
-            if field.startswith("_histogram"):
-                field_name = field[len("_histogram.") :]
-                if field_name not in self.histogram_fields:
-                    continue
-
-                bucket_name = f"histogram_{field_name}"
-                bucket = self._get_histogram_agg(field_name, histogram_intervals)
-
-            elif field.startswith("_cardinality"):
-                field_name = field[len("_cardinality.") :]
-
-                bucket_name = f"cardinality_{field_name}"
-                bucket = self._get_cardinality_agg(field_name)
-
-            else:
-                bucket_name = field
-                bucket = self._get_fields_agg(field, facets_size)
+            agg = self._get_second_level_agg(field, facets_size, histogram_intervals)
+            if agg is None:
+                continue
 
+            bucket_name, bucket = agg
             recipient.bucket(bucket_name, bucket)
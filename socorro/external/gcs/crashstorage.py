@@ -2,17 +2,25 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
 import json
 import os
+import threading
 
+import google.auth
 from google.auth.credentials import AnonymousCredentials
+from google.auth.transport.requests import AuthorizedSession
 from google.api_core.exceptions import NotFound
 from google.cloud import storage
 from more_itertools import chunked
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
 from socorro.external.crashstorage_base import (
     CrashStorageBase,
     CrashIDNotFound,
+    FileDumpsMapping,
+    LazyFileDumpsMapping,
     MemoryDumpsMapping,
     get_datestamp,
     dict_to_str,
@@ -68,12 +76,15 @@ class GcsCrashStorage(CrashStorageBase):
         bucket="crashstats",
         dump_file_suffix=".dump",
         metrics_prefix="processor.gcs",
+        fetch_workers=8,
     ):
         """
         :arg bucket: the GCS bucket to save to
         :arg dump_file_suffix: the suffix used to identify a dump file (for use in temp
             files)
         :arg metrics_prefix: the metrics prefix for markus
+        :arg fetch_workers: the number of threads used to fetch crash data files
+            concurrently; this is shared by all threads using this crash storage
 
         """
         super().__init__()
@@ -83,16 +94,45 @@ class GcsCrashStorage(CrashStorageBase):
                 "STORAGE_EMULATOR_HOST detected, connecting to emulator: %s",
                 emulator,
             )
-            self.client = storage.Client(
-                credentials=AnonymousCredentials(),
-                project=os.environ.get("STORAGE_PROJECT_ID"),
-            )
+            credentials = AnonymousCredentials()
+            project = os.environ.get("STORAGE_PROJECT_ID")
         else:
-            self.client = storage.Client()
+            credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+
+        # Size the HTTP connection pool so the fetch threads can reuse connections
+        # rather than opening a new one for each request; it's never smaller than the
+        # requests default because other callers share it
+        self.fetch_workers = fetch_workers
+        adapter = HTTPAdapter(pool_maxsize=max(fetch_workers, DEFAULT_POOLSIZE))
+        http = AuthorizedSession(credentials)
+        http.mount("https://", adapter)
+        http.mount("http://", adapter)
+
+        self.client = storage.Client(
+            credentials=credentials, project=project, _http=http
+        )
 
         self.bucket = bucket
         self.dump_file_suffix = dump_file_suffix
 
+        self._fetch_executor = None
+        self._fetch_executor_lock = threading.Lock()
+
+    def close(self):
+        if self._fetch_executor is not None:
+            self._fetch_executor.shutdown(wait=True)
+            self._fetch_executor = None
+
+    def get_fetch_executor(self):
+        """Return the thread pool for fetching crash data files concurrently."""
+        with self._fetch_executor_lock:
+            if self._fetch_executor is None:
+                self._fetch_executor = ThreadPoolExecutor(
+                    max_workers=self.fetch_workers,
+                    thread_name_prefix="gcsFetch",
+                )
+            return self._fetch_executor
+
     def delete_file(self, path):
         bucket = self.client.bucket(self.bucket)
         blob = bucket.blob(path)
@@ -103,6 +143,12 @@ class GcsCrashStorage(CrashStorageBase):
         blob = bucket.blob(path)
         return blob.download_as_bytes()
 
+    def load_file_to_filename(self, path, filename):
+        """Download a file and stream it to a file on disk."""
+        bucket = self.client.bucket(self.bucket)
+        blob = bucket.blob(path)
+        blob.download_to_filename(filename)
+
     def save_file(self, path, data):
         bucket = self.client.bucket(self.bucket)
         blob = bucket.blob(path)
@@ -207,10 +253,10 @@ class GcsCrashStorage(CrashStorageBase):
         except NotFound as exc:
             raise CrashIDNotFound(f"{crash_id} not found: {exc}") from exc
 
-    def get_dumps(self, crash_id):
-        """Get all the dump files for a given crash id.
+    def get_dump_names(self, crash_id):
+        """Get the list of dump names for a given crash id.
 
-        :returns MemoryDumpsMapping:
+        :returns: list of dump names
 
         :raises CrashIDNotFound: if file does not exist
 
@@ -218,33 +264,145 @@ class GcsCrashStorage(CrashStorageBase):
         try:
             path = build_keys("dump_names", crash_id)[0]
             dump_names_as_string = self.load_file(path)
-            dump_names = str_to_list(dump_names_as_string)
+        except NotFound as exc:
+            raise CrashIDNotFound(f"{crash_id} not found: {exc}") from exc
+        return str_to_list(dump_names_as_string)
 
-            dumps = MemoryDumpsMapping()
-            for dump_name in dump_names:
-                if dump_name in (None, "", "upload_file_minidump"):
-                    dump_name = "dump"
-                path = build_keys(dump_name, crash_id)[0]
-                dumps[dump_name] = self.load_file(path)
-            return dumps
+    def _wait_for_all(self, crash_id, futures):
+        """Wait for all futures to finish and return their results.
+
+        This waits for all futures to finish even if one of them fails, so nothing is
+        still writing to the tmpdir after this returns.
+
+        :raises CrashIDNotFound: if any of the files do not exist
+
+        """
+        wait(futures)
+        try:
+            return [future.result() for future in futures]
         except NotFound as exc:
             raise CrashIDNotFound(f"{crash_id} not found: {exc}") from exc
 
-    def get_dumps_as_files(self, crash_id, tmpdir):
+    def get_dumps(self, crash_id):
+        """Get all the dump files for a given crash id.
+
+        Dump files are fetched concurrently.
+
+        :returns MemoryDumpsMapping:
+
+        :raises CrashIDNotFound: if file does not exist
+
+        """
+        dump_names = []
+        for dump_name in self.get_dump_names(crash_id):
+            if dump_name in (None, "", "upload_file_minidump"):
+                dump_name = "dump"
+            dump_names.append(dump_name)
+
+        executor = self.get_fetch_executor()
+        futures = [
+            executor.submit(self.load_file, build_keys(dump_name, crash_id)[0])
+            for dump_name in dump_names
+        ]
+        data = self._wait_for_all(crash_id, futures)
+        return MemoryDumpsMapping(zip(dump_names, data, strict=True))
+
+    def get_file_dump_names(self, crash_id):
+        """Get the list of dump names used in FileDumpsMapping for a given crash id.
+
+        :returns: list of dump names
+
+        :raises CrashIDNotFound: if file does not exist
+
+        """
+        return [
+            (
+                "upload_file_minidump"
+                if dump_name in (None, "", "dump", "upload_file_minidump")
+                else dump_name
+            )
+            for dump_name in self.get_dump_names(crash_id)
+        ]
+
+    def get_dumps_as_files(self, crash_id, tmpdir, dump_names=None):
         """Get the dump files for given crash id and save them to tmp.
 
+        Dump files are fetched concurrently and streamed to files in tmpdir without
+        holding the whole dump in memory.
+
+        :arg dump_names: names of the dumps to get as returned by
+            ``get_file_dump_names``; None gets all the dumps
+
         :returns: dict of dumpname -> file path
 
         :raises CrashIDNotFound: if file does not exist
 
         """
-        in_memory_dumps = self.get_dumps(crash_id)
-        # convert our native memory dump mapping into a file dump mapping.
-        return in_memory_dumps.as_file_dumps_mapping(
-            crash_id,
-            tmpdir,
-            self.dump_file_suffix,
+        if dump_names is None:
+            dump_names = self.get_file_dump_names(crash_id)
+
+        executor = self.get_fetch_executor()
+        dumps = FileDumpsMapping()
+        futures = []
+        for dump_name in dump_names:
+            if dump_name == "upload_file_minidump":
+                key_name = "dump"
+            else:
+                key_name = dump_name
+            dump_pathname = os.path.join(
+                tmpdir, f"{crash_id}.{dump_name}.TEMPORARY{self.dump_file_suffix}"
+            )
+            dumps[dump_name] = dump_pathname
+            futures.append(
+                executor.submit(
+                    self.load_file_to_filename,
+                    build_keys(key_name, crash_id)[0],
+                    dump_pathname,
+                )
+            )
+        self._wait_for_all(crash_id, futures)
+        return dumps
+
+    def get_lazy_dumps_as_files(self, crash_id, tmpdir):
+        """Return dumps for a crash id that are saved to tmp when accessed.
+
+        The list of dump names is fetched when it's first needed and each dump is
+        fetched when it's first accessed.
+
+        :returns: LazyFileDumpsMapping
+
+        """
+        return LazyFileDumpsMapping(
+            get_names=partial(self.get_file_dump_names, crash_id),
+            fetch=partial(self.get_dumps_as_files, crash_id, tmpdir),
+        )
+
+    def _get_processed_crash_or_none(self, crash_id):
+        try:
+            return self.get_processed_crash(crash_id)
+        except CrashIDNotFound:
+            return None
+
+    def get_crash_data_as_files(self, crash_id, tmpdir):
+        """Fetch raw crash, dumps as files, and processed crash concurrently.
+
+        :returns: tuple of (raw crash, dict of dumpname -> file path, processed crash);
+            processed crash is None if the crash report hasn't been processed, yet
+
+        :raises CrashIDNotFound: if the raw crash or dumps don't exist
+
+        """
+        executor = self.get_fetch_executor()
+        raw_crash_future = executor.submit(self.get_raw_crash, crash_id)
+        processed_crash_future = executor.submit(
+            self._get_processed_crash_or_none, crash_id
         )
+        try:
+            # This fetches the dump names and then the dumps using the executor
+            dumps = self.get_dumps_as_files(crash_id, tmpdir)
+        finally:
+            wait([raw_crash_future, processed_crash_future])
+        return raw_crash_future.result(), dumps, processed_crash_future.result()
 
     def get_processed_crash(self, crash_id):
         """Get the processed crash.
@@ -407,6 +565,11 @@ class TelemetryGcsCrashStorage(GcsCrashStorage):
             schema=TELEMETRY_SOCORRO_CRASH_SCHEMA
         )
 
+        # Top-level processed crash keys that end up in the crash report
+        self.telemetry_source_keys = frozenset(
+            TELEMETRY_SOCORRO_CRASH_SCHEMA["properties"]
+        ) | frozenset(source_key for source_key, _ in self.HISTORICAL_MANUAL_KEYS)
+
     # List of source -> target keys which have different names for historical reasons
     HISTORICAL_MANUAL_KEYS = [
         # processed crash source key, crash report target key
@@ -442,6 +605,16 @@ class TelemetryGcsCrashStorage(GcsCrashStorage):
         path = build_keys("crash_report", crash_id)[0]
         self.save_file(path, data)
 
+    def save_processed_crash_changes(self, raw_crash, processed_crash, changed_keys):
+        """Save the crash report if any of the changes are in it.
+
+        The crash report is a single file, so it's saved in full if anything in it
+        changed.
+
+        """
+        if changed_keys & self.telemetry_source_keys:
+            self.save_processed_crash(raw_crash, processed_crash)
+
     def get_processed_crash(self, crash_id):
         """Get a crash report from the GCS bucket.
 
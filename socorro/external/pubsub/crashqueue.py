@@ -2,9 +2,12 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+from collections import defaultdict
 from functools import partial
 import logging
 import os
+import threading
+import time
 
 from google.cloud.pubsub_v1 import PublisherClient, SubscriberClient
 from google.cloud.pubsub_v1.types import BatchSettings, PublisherOptions
@@ -17,6 +20,11 @@ from socorro.external.crashqueue_base import CrashQueueBase
 logger = logging.getLogger(__name__)
 
 
+# Maximum number of ack ids to send in a single acknowledge or modify_ack_deadline
+# request
+ACK_IDS_MAX = 1000
+
+
 class CrashIdsFailedToPublish(Exception):
     """Crash ids that failed to publish."""
 
@@ -190,6 +198,25 @@ class PubSubCrashQueue(CrashQueueBase):
         self.subscriber.acknowledge(subscription=subscription_path, ack_ids=[ack_id])
         logger.debug("ack %s from %s", ack_id, subscription_path)
 
+    def get_pull_size(self, subscription_path, pull_max_messages, has_msgs):
+        """Return the number of messages to pull from a subscription.
+
+        :arg subscription_path: the subscription path for the queue
+        :arg pull_max_messages: the configured maximum for the subscription
+        :arg has_msgs: map of subscription path -> whether that subscription may
+            have more messages for the subscriptions pulled so far in this round
+
+        """
+        return pull_max_messages
+
+    def lease(self, subscription_path, ack_id):
+        """Called for every message pulled that's handed to the caller.
+
+        :arg subscription_path: the subscription path for the queue
+        :arg ack_id: the ack_id for the message
+
+        """
+
     def __iter__(self):
         """Return iterator over crash ids from Pub/Sub.
 
@@ -204,16 +231,19 @@ class PubSubCrashQueue(CrashQueueBase):
                 if subscription_path is None:
                     continue
 
+                pull_size = self.get_pull_size(
+                    subscription_path, pull_max_messages, has_msgs
+                )
                 resp = self.subscriber.pull(
                     subscription=subscription_path,
-                    max_messages=pull_max_messages,
+                    max_messages=pull_size,
                     return_immediately=True,
                 )
                 msgs = resp.received_messages
 
                 # if pull returned the max number of messages, this subscription
                 # may have more messages.
-                has_msgs[subscription_path] = len(msgs) == pull_max_messages
+                has_msgs[subscription_path] = len(msgs) == pull_size
 
                 if not msgs:
                     continue
@@ -226,6 +256,7 @@ class PubSubCrashQueue(CrashQueueBase):
                         # Ack and drop any test crash ids
                         self.ack_crash(subscription_path, ack_id)
                         continue
+                    self.lease(subscription_path, ack_id)
                     yield (
                         (crash_id,),
                         {
@@ -279,3 +310,192 @@ class PubSubCrashQueue(CrashQueueBase):
 
         if failed:
             raise CrashIdsFailedToPublish(f"Crashids failed to publish: {failed!r}")
+
+
+class AdaptivePubSubCrashQueue(PubSubCrashQueue):
+    """PubSubCrashQueue that sizes pulls to free capacity and batches acks.
+
+    Rather than pulling a fixed number of messages, this pulls as many messages as the
+    caller has capacity for (see ``set_capacity_func``) up to ``max_pull_messages``.
+
+    The priority subscription is pulled first. While it has a backlog, pulls from the
+    other subscriptions are capped at their ``*_pull_max_messages`` values so they
+    don't take up capacity that priority crash reports need.
+
+    Acks are buffered and a background thread sends them in batches every
+    ``ack_interval`` seconds. The background thread also extends the ack deadline for
+    messages that are taking a long time to process so they don't get redelivered
+    while they're still being worked on.
+
+    Buffered acks are sent when the crash queue is closed. If the process dies before
+    that, those messages are redelivered and processed again.
+
+    """
+
+    def __init__(
+        self,
+        project_id,
+        standard_topic_name,
+        standard_subscription_name,
+        priority_topic_name,
+        priority_subscription_name,
+        reprocessing_topic_name,
+        reprocessing_subscription_name,
+        standard_pull_max_messages=5,
+        priority_pull_max_messages=5,
+        reprocessing_pull_max_messages=1,
+        publish_max_messages=10,
+        publish_timeout=5,
+        max_pull_messages=100,
+        ack_interval=1.0,
+        ack_deadline_seconds=300,
+    ):
+        """
+        :arg max_pull_messages: maximum number of messages to pull from Google
+            Pub/Sub in a single request; the ``*_pull_max_messages`` values are used
+            when the capacity is unknown
+        :arg ack_interval: seconds between sending batches of acks
+        :arg ack_deadline_seconds: the ack deadline to extend leases to for
+            messages that are still being processed; this should match the
+            subscription's ack deadline
+
+        """
+        super().__init__(
+            project_id=project_id,
+            standard_topic_name=standard_topic_name,
+            standard_subscription_name=standard_subscription_name,
+            priority_topic_name=priority_topic_name,
+            priority_subscription_name=priority_subscription_name,
+            reprocessing_topic_name=reprocessing_topic_name,
+            reprocessing_subscription_name=reprocessing_subscription_name,
+            standard_pull_max_messages=standard_pull_max_messages,
+            priority_pull_max_messages=priority_pull_max_messages,
+            reprocessing_pull_max_messages=reprocessing_pull_max_messages,
+            publish_max_messages=publish_max_messages,
+            publish_timeout=publish_timeout,
+        )
+        self.max_pull_messages = max_pull_messages
+        self.ack_interval = ack_interval
+
+        # Pull priority first so priority crash reports get the free capacity
+        self.subscription_paths = [
+            (self.priority_subscription_path, priority_pull_max_messages),
+            (self.standard_subscription_path, standard_pull_max_messages),
+            (self.reprocessing_subscription_path, reprocessing_pull_max_messages),
+        ]
+        self.ack_deadline_seconds = ack_deadline_seconds
+
+        self._lock = threading.Lock()
+        # subscription path -> list of ack ids to acknowledge
+        self._pending_acks = defaultdict(list)
+        # ack id -> (subscription path, time the lease was last extended)
+        self._leases = {}
+        self._closing = threading.Event()
+        self._flusher = None
+
+    def close(self):
+        """Stop the flusher thread and send any buffered acks."""
+        self._closing.set()
+        if self._flusher is not None and self._flusher.is_alive():
+            self._flusher.join()
+        self.flush_acks()
+
+    def get_pull_size(self, subscription_path, pull_max_messages, has_msgs):
+        if self.capacity_func is None:
+            return pull_max_messages
+
+        capacity = self.capacity_func()
+        if capacity is None:
+            return pull_max_messages
+
+        # Always pull at least one message; if the caller has no capacity, it'll block
+        # until it does which is the same as the fixed-size behavior
+        pull_size = max(1, min(capacity, self.max_pull_messages))
+
+        if subscription_path != self.priority_subscription_path and has_msgs.get(
+            self.priority_subscription_path
+        ):
+            # The priority subscription has a backlog, so leave the capacity for it
+            pull_size = min(pull_size, pull_max_messages)
+
+        return pull_size
+
+    def lease(self, subscription_path, ack_id):
+        with self._lock:
+            self._leases[ack_id] = (subscription_path, time.monotonic())
+            self._start_flusher()
+
+    def ack_crash(self, subscription_path, ack_id):
+        """Buffers an ack for a crash
+
+        :arg subscription_path: the subscription path for the queue
+        :arg ack_id: the ack_id for the message to acknowledge
+
+        """
+        with self._lock:
+            self._leases.pop(ack_id, None)
+            self._pending_acks[subscription_path].append(ack_id)
+            self._start_flusher()
+
+    def _start_flusher(self):
+        """Start the flusher thread if it's not running.
+
+        This must be called with the lock held.
+
+        """
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(
+                name="pubsubAckFlusher", target=self._flusher_loop, daemon=True
+            )
+            self._flusher.start()
+
+    def _flusher_loop(self):
+        """Main function for the flusher thread"""
+        while not self._closing.wait(self.ack_interval):
+            try:
+                self.flush_acks()
+                self.extend_leases()
+            except Exception as exc:
+                # Keep the flusher thread running; messages that don't get acked are
+                # redelivered
+                sentry_sdk.capture_exception(exc)
+                logger.exception("error: flushing acks failed")
+
+    def flush_acks(self):
+        """Send all buffered acks in batches."""
+        with self._lock:
+            pending_acks = self._pending_acks
+            self._pending_acks = defaultdict(list)
+
+        for subscription_path, ack_ids in pending_acks.items():
+            for batch in chunked(ack_ids, ACK_IDS_MAX):
+                self.subscriber.acknowledge(
+                    subscription=subscription_path, ack_ids=batch
+                )
+                logger.debug("ack %d from %s", len(batch), subscription_path)
+
+    def extend_leases(self):
+        """Extend ack deadlines for messages that are still being processed.
+
+        Leases are extended when half the ack deadline has passed since the message
+        was pulled or the lease was last extended.
+
+        """
+        now = time.monotonic()
+        cutoff = now - (self.ack_deadline_seconds / 2)
+
+        to_extend = defaultdict(list)
+        with self._lock:
+            for ack_id, (subscription_path, extended_at) in list(self._leases.items()):
+                if extended_at <= cutoff:
+                    to_extend[subscription_path].append(ack_id)
+                    self._leases[ack_id] = (subscription_path, now)
+
+        for subscription_path, ack_ids in to_extend.items():
+            for batch in chunked(ack_ids, ACK_IDS_MAX):
+                self.subscriber.modify_ack_deadline(
+                    subscription=subscription_path,
+                    ack_ids=batch,
+                    ack_deadline_seconds=self.ack_deadline_seconds,
+                )
+                logger.debug("extend %d from %s", len(batch), subscription_path)
@@ -8,6 +8,13 @@ Utilities for working with jsonschemas.
 
 import copy
 
+from socorro.lib.libreducer import (
+    build_array_reducer,
+    build_invalid_type_reducer,
+    identity,
+    ReducerError,
+)
+
 
 class InvalidDocumentError(Exception):
     """Raised when the document is invalid"""
@@ -188,6 +195,110 @@ def convert_to(document_part, target_format):
     raise UnknownConvertFormat(f"{target_format!r} is an unknown format")
 
 
+def _compile_array_reducer(schema_part):
+    return build_array_reducer(
+        _compile_reducer(schema_part.get("items", {"type": "string"}))
+    )
+
+
+def _compile_object_reducer(schema_part):
+    property_reducers = {
+        name: _compile_reducer(property_schema)
+        for name, property_schema in (schema_part.get("properties") or {}).items()
+    }
+
+    def _reduce_object(document_part):
+        new_doc = {}
+        for name, document_property in document_part.items():
+            reducer = property_reducers.get(name)
+
+            # If the item is in the document, but not in the schema, we don't add
+            # this part of the document to the new document
+            if reducer is None:
+                continue
+
+            try:
+                new_doc[name] = reducer(document_property)
+            except ReducerError as exc:
+                exc.path.append(name)
+                raise
+        return new_doc
+
+    return _reduce_object
+
+
+def _compile_reducer(schema_part):
+    """Compiles a schema part into a reducer function
+
+    The reducer function takes a document part, validates its type, and returns the
+    reduced document part. Invalid document parts raise a ``ReducerError``.
+
+    :arg dict schema_part: the part of the schema with references resolved
+
+    :returns: reducer function
+
+    """
+    schema_part_types = listify(schema_part.get("type", "string"))
+
+    # FIXME(willkg): maybe implement:
+    #
+    # * string: minLength, maxLength, pattern
+    # * integer/number: minimum, maximum, exclusiveMaximum, exclusiveMinimum,
+    #   multipleOf
+    # * array: maxItems, minItems, uniqueItems
+    # * object: additionalProperties, minProperties, maxProperties, dependencies,
+    #   regexp
+
+    # Dispatch table of Python type -> reducer function for that type
+    handlers = {}
+
+    # If the document_part is a basic type (string, number, etc) and it matches what's
+    # in the schema, then return it so it's included in the reduced document
+    for python_type, type_name in BASIC_TYPES.items():
+        if type_name in schema_part_types:
+            handlers[python_type] = identity
+        else:
+            handlers[python_type] = build_invalid_type_reducer(
+                type_name, schema_part_types
+            )
+
+    if "array" in schema_part_types:
+        handlers[list] = _compile_array_reducer(schema_part)
+    else:
+        handlers[list] = build_invalid_type_reducer("array", schema_part_types)
+
+    if "object" in schema_part_types:
+        handlers[dict] = _compile_object_reducer(schema_part)
+    else:
+        handlers[dict] = build_invalid_type_reducer("object", schema_part_types)
+
+    def _reduce(document_part):
+        handler = handlers.get(type(document_part))
+        if handler is None:
+            # Handle subclasses of the types we know about
+            for python_type, type_handler in handlers.items():
+                if isinstance(document_part, python_type):
+                    handler = type_handler
+                    break
+            else:
+                # Things we don't know how to reduce are dropped
+                return None
+        return handler(document_part)
+
+    # Telemetry ingestion is marred by historical fun-ness, so we first look at the
+    # schema and if it defines a converter, we run the document part through that
+    # first.
+    if "socorroConvertTo" in schema_part:
+        target_format = schema_part["socorroConvertTo"]
+
+        def _convert_and_reduce(document_part):
+            return _reduce(convert_to(document_part, target_format))
+
+        return _convert_and_reduce
+
+    return _reduce
+
+
 class JsonSchemaReducer:
     """Reducer for reducing a document to the structure of the specified jsonschema
 
@@ -197,6 +308,8 @@ class JsonSchemaReducer:
        needed for our schemas.
     2. It does some light type validation and raises exceptions for documents that
        are invalid.
+    3. The schema is compiled into a tree of reducer functions when the reducer is
+       created, so create a reducer once and reuse it for all documents.
 
     """
 
@@ -206,23 +319,7 @@ class JsonSchemaReducer:
         """
         schema = resolve_references(schema)
         self.schema = schema
-
-        self._pattern_cache = {}
-
-    def get_schema_property(self, schema_part, name):
-        """Returns the matching property value
-
-        :arg dict schema_part: the part of the schema we're looking at now
-        :arg string name: the name we're looking for
-
-        :returns: property schema or None
-
-        """
-        properties = schema_part.get("properties", {})
-        if name in properties:
-            return schema_part["properties"][name]
-
-        return None
+        self._reducer = _compile_reducer(schema)
 
     def traverse(self, document):
         """Following the schema, traverses the document
@@ -235,97 +332,12 @@ class JsonSchemaReducer:
 
         :returns: new document
 
-        """
-        return self._traverse(schema_part=self.schema, document_part=document)
-
-    def _traverse(self, schema_part, document_part, path="", general_path=""):
-        """Following the schema, traverses the document
-
-        This validates types and some type-related restrictions while reducing the
-        document to the schema.
-
-        :arg dict schema_part: the part of the schema we're looking at now
-        :arg dict document_part: the part of the document we're looking at now
-        :arg string path: the path in the structure
-        :arg string general_path: the generalized path in the structure where array
-            indexes are replaced with `[]`
-
-        :returns: new document
+        :raises InvalidDocumentError: if the document is invalid
 
         """
-        # Telemetry ingestion is marred by historical fun-ness, so we first look at the
-        # schema and if it defines a converter, we run the document part through that
-        # first.
-        if "socorroConvertTo" in schema_part:
-            document_part = convert_to(document_part, schema_part["socorroConvertTo"])
-
-        schema_part_types = listify(schema_part.get("type", "string"))
-
-        # FIXME(willkg): maybe implement:
-        #
-        # * string: minLength, maxLength, pattern
-        # * integer/number: minimum, maximum, exclusiveMaximum, exclusiveMinimum,
-        #   multipleOf
-        # * array: maxItems, minItems, uniqueItems
-        # * object: additionalProperties, minProperties, maxProperties, dependencies,
-        #   regexp
-
-        # If the document_part is a basic type (string, number, etc) and it matches
-        # what's in the schema, then return it so it's included in the reduced document
-        if isinstance(document_part, BASIC_TYPES_KEYS):
-            valid_schema_part_type = BASIC_TYPES[type(document_part)]
-            if valid_schema_part_type in schema_part_types:
-                return document_part
-
+        try:
+            return self._reducer(document)
+        except ReducerError as exc:
             raise InvalidDocumentError(
-                f"invalid: {path}: type {valid_schema_part_type} not in "
-                + f"{schema_part_types}"
-            )
-
-        if isinstance(document_part, list):
-            if "array" not in schema_part_types:
-                raise InvalidDocumentError(
-                    f"invalid: {path}: type array not in {schema_part_types}"
-                )
-
-            schema_item = schema_part.get("items", {"type": "string"})
-
-            new_doc = []
-            for i in range(0, len(document_part)):
-                new_part = self._traverse(
-                    schema_part=schema_item,
-                    document_part=document_part[i],
-                    path=f"{path}.[{i}]",
-                    general_path=f"{path}.[]",
-                )
-                new_doc.append(new_part)
-            return new_doc
-
-        if isinstance(document_part, dict):
-            if "object" not in schema_part_types:
-                raise InvalidDocumentError(
-                    f"invalid: {path}: type object not in {schema_part_types}"
-                )
-
-            new_doc = {}
-            for name, document_property in document_part.items():
-                properties = schema_part.get("properties", {})
-
-                # If the item is in the document, but not in the schema, we don't add
-                # this part of the document to the new document
-                if name not in properties:
-                    continue
-
-                schema_property = schema_part["properties"][name]
-
-                path_name = f"{path}.{name}"
-                general_path_name = f"{general_path}.{name}"
-
-                new_doc[name] = self._traverse(
-                    schema_part=schema_property,
-                    document_part=document_property,
-                    path=path_name,
-                    general_path=general_path_name,
-                )
-
-            return new_doc
+                f"invalid: {exc.build_path()}: {exc.msg}"
+            ) from None
@@ -0,0 +1,53 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Building blocks for the compiled document reducers in libjsonschema and
+libsocorrodataschema.
+"""
+
+
+class ReducerError(Exception):
+    """Raised by compiled reducers
+
+    The path is built up as the error unwinds through the compiled reducers so we only
+    pay for building paths when a document is invalid.
+
+    """
+
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.msg = msg
+        # Path parts from the invalid item up to the root
+        self.path = []
+
+    def build_path(self):
+        return "".join(f".{part}" for part in reversed(self.path))
+
+
+def identity(document_part):
+    return document_part
+
+
+def build_invalid_type_reducer(type_name, schema_part_types):
+    def _invalid_type(document_part):
+        raise ReducerError(f"type {type_name} not in {schema_part_types}")
+
+    return _invalid_type
+
+
+def build_array_reducer(item_reducer):
+    """Return a reducer for arrays that reduces each item with item_reducer"""
+
+    def _reduce_array(document_part):
+        new_doc = []
+        for i, item in enumerate(document_part):
+            try:
+                new_doc.append(item_reducer(item))
+            except ReducerError as exc:
+                exc.path.append(f"[{i}]")
+                raise
+        return new_doc
+
+    return _reduce_array
@@ -11,6 +11,12 @@ import re
 
 import jsonschema
 
+from socorro.lib.libreducer import (
+    build_array_reducer,
+    build_invalid_type_reducer,
+    identity,
+    ReducerError,
+)
 from socorro.schemas import get_file_content
 
 
@@ -357,6 +363,127 @@ def compile_pattern_re(pattern):
     return PATTERN_CACHE[pattern]
 
 
+def _compile_array_reducer(schema_part):
+    return build_array_reducer(_compile_reducer(schema_part["items"]))
+
+
+# Maximum number of property names to remember pattern_properties matches for per
+# object in the schema
+MAX_PATTERN_MATCH_CACHE_SIZE = 1000
+
+
+def _compile_object_reducer(schema_part):
+    property_reducers = {
+        name: _compile_reducer(property_schema)
+        for name, property_schema in (schema_part.get("properties") or {}).items()
+    }
+    pattern_reducers = [
+        (compile_pattern_re(pattern), _compile_reducer(property_schema))
+        for pattern, property_schema in (
+            schema_part.get("pattern_properties") or {}
+        ).items()
+    ]
+
+    # Cache of name -> reducer (or None) for names matched against pattern_properties
+    pattern_match_cache = {}
+
+    def _get_pattern_reducer(name):
+        if name in pattern_match_cache:
+            return pattern_match_cache[name]
+
+        reducer = None
+        for pattern_re, pattern_reducer in pattern_reducers:
+            if pattern_re.match(name):
+                reducer = pattern_reducer
+                break
+
+        if len(pattern_match_cache) < MAX_PATTERN_MATCH_CACHE_SIZE:
+            pattern_match_cache[name] = reducer
+        return reducer
+
+    def _reduce_object(document_part):
+        new_doc = {}
+        for name, document_property in document_part.items():
+            reducer = property_reducers.get(name)
+            if reducer is None:
+                if not pattern_reducers:
+                    continue
+                reducer = _get_pattern_reducer(name)
+
+                # If the item is in the document, but not in the schema, we don't add
+                # this part of the document to the new document
+                if reducer is None:
+                    continue
+
+            try:
+                new_doc[name] = reducer(document_property)
+            except ReducerError as exc:
+                exc.path.append(name)
+                raise
+        return new_doc
+
+    return _reduce_object
+
+
+def _compile_reducer(schema_part):
+    """Compiles a schema part into a reducer function
+
+    The reducer function takes a document part, validates its type, and returns the
+    reduced document part. Invalid document parts raise a ``ReducerError``.
+
+    :arg dict schema_part: the part of the schema with references resolved
+
+    :returns: reducer function
+
+    """
+    schema_part_types = listify(schema_part["type"])
+
+    if "any" in schema_part_types:
+        # This item can be anything, so we're not going to traverse it or type check
+        # it.
+        #
+        # NOTE(willkg): This means that any properties of the document at this point
+        # hold true for children including required permissions.
+        return copy.deepcopy
+
+    # Dispatch table of Python type -> reducer function for that type
+    handlers = {}
+
+    # If the document_part is a basic type (string, number, etc) and it matches what's
+    # in the schema, then return it so it's included in the reduced document
+    for python_type, type_name in BASIC_TYPES.items():
+        if type_name in schema_part_types:
+            handlers[python_type] = identity
+        else:
+            handlers[python_type] = build_invalid_type_reducer(
+                type_name, schema_part_types
+            )
+
+    if "array" in schema_part_types:
+        handlers[list] = _compile_array_reducer(schema_part)
+    else:
+        handlers[list] = build_invalid_type_reducer("array", schema_part_types)
+
+    if "object" in schema_part_types:
+        handlers[dict] = _compile_object_reducer(schema_part)
+    else:
+        handlers[dict] = build_invalid_type_reducer("object", schema_part_types)
+
+    def _reduce(document_part):
+        handler = handlers.get(type(document_part))
+        if handler is None:
+            # Handle subclasses of the types we know about
+            for python_type, type_handler in handlers.items():
+                if isinstance(document_part, python_type):
+                    handler = type_handler
+                    break
+            else:
+                raise ReducerError(f"type {type(document_part)} not recognized")
+        return handler(document_part)
+
+    return _reduce
+
+
 class SocorroDataReducer:
     """Reducer for reducing a document to the structure of the specified socorro-data
     schema
@@ -364,6 +491,9 @@ class SocorroDataReducer:
     This does some light type validation and raises exceptions for documents that
     are invalid.
 
+    The schema is compiled into a tree of reducer functions when the reducer is
+    created, so create a reducer once and reuse it for all documents.
+
     """
 
     def __init__(self, schema):
@@ -375,28 +505,7 @@ class SocorroDataReducer:
             schema = resolve_references(schema)
 
         self.schema = schema
-        self._pattern_cache = {}
-
-    def get_schema_property(self, schema_part, name):
-        """Returns the matching property or pattern_properties value
-
-        :arg dict schema_part: the part of the schema we're looking at now
-        :arg string name: the name we're looking for
-
-        :returns: property schema or None
-
-        """
-        properties = schema_part.get("properties", {})
-        if name in properties:
-            return schema_part["properties"][name]
-
-        pattern_properties = schema_part.get("pattern_properties", {})
-        for pattern, property_schema in pattern_properties.items():
-            pattern_re = compile_pattern_re(pattern)
-            if pattern_re.match(name):
-                return property_schema
-
-        return None
+        self._reducer = _compile_reducer(schema)
 
     def traverse(self, document):
         """Following the schema, traverses the document
@@ -409,89 +518,15 @@ class SocorroDataReducer:
 
         :returns: new document
 
-        """
-        return self._traverse(schema_part=self.schema, document_part=document)
-
-    def _traverse(self, schema_part, document_part, path=""):
-        """Following the schema, traverses the document
-
-        This validates types and some type-related restrictions while reducing the
-        document to the schema.
-
-        :arg dict schema_part: the part of the schema we're looking at now
-        :arg dict document_part: the part of the document we're looking at now
-        :arg string path: the path in the structure
-
-        :returns: new document
+        :raises InvalidDocumentError: if the document is invalid
 
         """
-        schema_part_types = listify(schema_part["type"])
-
-        # If the document_part is a basic type (string, number, etc) and it matches
-        # what's in the schema, then return it so it's included in the reduced document
-        if "any" in schema_part_types:
-            # This item can be anything, so we're not going to traverse it or type
-            # check it.
-            #
-            # NOTE(willkg): This means that any properties of the document at this point
-            # hold true for children including required permissions.
-            return copy.deepcopy(document_part)
-
-        elif isinstance(document_part, BASIC_TYPES_KEYS):
-            valid_schema_part_type = BASIC_TYPES[type(document_part)]
-            if valid_schema_part_type in schema_part_types:
-                return document_part
-
-            raise InvalidDocumentError(
-                f"invalid: {path}: type {valid_schema_part_type} not in "
-                + f"{schema_part_types}"
-            )
-
-        elif isinstance(document_part, list):
-            if "array" not in schema_part_types:
-                raise InvalidDocumentError(
-                    f"invalid: {path}: type array not in {schema_part_types}"
-                )
-
-            schema_item = schema_part["items"]
-
-            new_doc = []
-            for i in range(0, len(document_part)):
-                new_part = self._traverse(
-                    schema_part=schema_item,
-                    document_part=document_part[i],
-                    path=f"{path}.[{i}]",
-                )
-                new_doc.append(new_part)
-            return new_doc
-
-        elif isinstance(document_part, dict):
-            if "object" not in schema_part_types:
-                raise InvalidDocumentError(
-                    f"invalid: {path}: type object not in {schema_part_types}"
-                )
-
-            new_doc = {}
-            for name, document_property in document_part.items():
-                schema_property = self.get_schema_property(schema_part, name)
-
-                # If the item is in the document, but not in the schema, we don't add
-                # this part of the document to the new document
-                if schema_property is None:
-                    continue
-
-                new_doc[name] = self._traverse(
-                    schema_part=schema_property,
-                    document_part=document_property,
-                    path=f"{path}.{name}",
-                )
-
-            return new_doc
-
-        else:
+        try:
+            return self._reducer(document)
+        except ReducerError as exc:
             raise InvalidDocumentError(
-                f"invalid: {path}: type {type(document_part)} not recognized"
-            )
+                f"invalid: {exc.build_path()}: {exc.msg}"
+            ) from None
 
 
 def validate_instance(instance, schema):
@@ -0,0 +1,338 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""Defines the ProcessPoolTaskManager.
+
+This module defines a producer/consumer system where a single iterator thread in the
+parent process pulls jobs and hands them to a pool of worker processes. This lets
+CPU-bound task functions use all the cores on a node rather than being serialized by
+the GIL.
+
+Worker processes are forked from the parent so they inherit the task function and the
+state it needs. A worker initialization function can be passed in to rebuild anything
+that shouldn't be shared across processes (network clients, the processing pipeline,
+etc).
+
+If a job's kwargs include a ``finished_func``, it is not sent to the worker process.
+Instead, it's called in the parent process after the job completes--successfully or
+not. This matches the acknowledgement semantics of the ``ThreadedTaskManager``.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from socorro.lib.task_manager import (
+    default_iterator,
+    default_task_func,
+    TaskManager,
+)
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+# Task function for the worker process; this is set in the worker by
+# _worker_initializer
+_WORKER_TASK_FUNC = None
+
+
+def _worker_initializer(task_func, worker_init_func):
+    """Initializes a worker process.
+
+    This runs in the worker process after it has been forked.
+
+    """
+    global _WORKER_TASK_FUNC
+
+    # The parent process handles KeyboardInterrupt and shuts the pool down; workers
+    # should ignore SIGINT so they finish the job they're working on
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Workers inherit the parent's SIGTERM handler when they're forked; reset it so
+    # SIGTERM terminates the worker rather than running the parent's shutdown code
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    _WORKER_TASK_FUNC = task_func
+    if worker_init_func is not None:
+        worker_init_func()
+
+
+def _worker_noop():
+    """Does nothing; used to make sure the worker processes have started."""
+    return os.getpid()
+
+
+def _worker_run_task(args, kwargs):
+    """Runs a task in the worker process.
+
+    Errors are logged here and not returned so that unpicklable exceptions don't break
+    the pool.
+
+    """
+    try:
+        _WORKER_TASK_FUNC(*args, **kwargs)
+    except Exception:
+        LOGGER.error("Error in processing a job", exc_info=True)
+
+
+class ProcessPoolTaskManager(TaskManager):
+    """Task manager that runs tasks in a pool of worker processes."""
+
+    def __init__(
+        self,
+        idle_delay=7,
+        quit_on_empty_queue=False,
+        number_of_processes=None,
+        maximum_queue_size=8,
+        job_source_iterator=default_iterator,
+        task_func=default_task_func,
+        worker_init_func=None,
+    ):
+        """
+        :arg idle_delay: the delay in seconds if no job is found
+        :arg quit_on_empty_queue: stop if the queue is empty
+        :arg number_of_processes: number of worker processes to run; defaults to the
+            number of cpus
+        :arg maximum_queue_size: maximum number of jobs waiting for a worker process
+            in addition to the ones being worked on
+        :arg job_source_iterator: an iterator to serve as the source of data. it can
+            be of the form of a generator or iterator; a function that returns an
+            iterator; a instance of an iterable object; or a class that when
+            instantiated with a config object can be iterated. The iterator must
+            yield a tuple consisting of a function's tuple of args and, optionally,
+            a mapping of kwargs. Ex:  (('a', 17), {'x': 23})
+        :arg task_func: a function that will accept the args and kwargs yielded
+            by the job_source_iterator; this is run in the worker processes
+        :arg worker_init_func: a function that takes no arguments and is run once in
+            each worker process when it starts
+        """
+
+        # If number of processes is None, set it to default
+        if number_of_processes is None:
+            number_of_processes = os.cpu_count() or 1
+
+        # If maximum queue size is None, set it to default
+        if maximum_queue_size is None:
+            maximum_queue_size = 8
+
+        super().__init__(
+            idle_delay=idle_delay,
+            quit_on_empty_queue=quit_on_empty_queue,
+            job_source_iterator=job_source_iterator,
+            task_func=task_func,
+        )
+        self.number_of_processes = number_of_processes
+        self.maximum_queue_size = maximum_queue_size
+        self.worker_init_func = worker_init_func
+
+        # Limits the number of jobs that are in the pool; either being worked on or
+        # waiting for a worker process
+        self._capacity = threading.BoundedSemaphore(
+            number_of_processes + maximum_queue_size
+        )
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+        self.executor = None
+        self.queueing_thread = None
+
+    def _build_executor(self):
+        """Builds the process pool and starts all the worker processes.
+
+        Worker processes are forked so they inherit the task function. They are all
+        started here before the queueing thread starts pulling jobs.
+
+        """
+        executor = ProcessPoolExecutor(
+            max_workers=self.number_of_processes,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_worker_initializer,
+            initargs=(self.task_func, self.worker_init_func),
+        )
+        executor.submit(_worker_noop).result()
+        return executor
+
+    def start(self):
+        """Starts the worker processes and the queueing thread.
+
+        The queueing thread executes the iterator and feeds jobs into the process pool.
+
+        """
+        self.logger.debug("start")
+        self.executor = self._build_executor()
+
+        self.queueing_thread = threading.Thread(
+            name="queueingThread", target=self._queueing_thread_func
+        )
+        self.queueing_thread.start()
+
+    def wait_for_completion(self):
+        """Blocks on queueing thread completion."""
+        if self.queueing_thread is None:
+            return
+
+        self.logger.debug("waiting to join queueing_thread")
+        while True:
+            try:
+                self.queueing_thread.join(1.0)
+                if not self.queueing_thread.is_alive():
+                    break
+            except KeyboardInterrupt:
+                self.logger.debug("quit detected by wait_for_completion")
+
+    def stop(self):
+        """Stop all worker processes."""
+        self.quit = True
+        self.wait_for_completion()
+
+    def blocking_start(self):
+        """Starts queueing thread and waits for it to complete.
+
+        If run by the main thread, it will detect the KeyboardInterrupt exception and
+        will stop worker processes.
+
+        """
+        try:
+            self.start()
+            self.wait_for_completion()
+        except KeyboardInterrupt:
+            while True:
+                try:
+                    self.stop()
+                    break
+                except KeyboardInterrupt:
+                    pass
+
+    def free_capacity(self):
+        """Return the number of jobs the task manager can take right now.
+
+        This is the number of jobs that can be added to the pool without blocking.
+
+        """
+        with self._in_flight_lock:
+            in_flight = self._in_flight
+        return max(0, self.number_of_processes + self.maximum_queue_size - in_flight)
+
+    def wait_for_empty_queue(self, wait_log_interval=0, wait_reason=""):
+        """Wait for all submitted jobs to complete.
+
+        :arg wait_log_interval: While sleeping, it is helpful if the thread periodically
+            announces itself so that we know that it is still alive. This number is the
+            time in seconds between log entries.
+        :arg wait_reason: The is for the explanation of why the thread is sleeping.
+            This is likely to be a message like: 'there is no work to do'.
+
+        """
+        seconds = 0
+        while True:
+            with self._in_flight_lock:
+                if self._in_flight == 0:
+                    break
+            if wait_log_interval and not seconds % wait_log_interval:
+                self.logger.info("%s: %dsec so far", wait_reason, seconds)
+            seconds += 1
+            time.sleep(1.0)
+
+    def _job_done(self, finished_func, future):
+        """Done callback for a submitted job; runs in the parent process."""
+        try:
+            # Errors in the task are logged in the worker; anything here is a problem
+            # with the pool itself like a worker process dying
+            exc = future.exception()
+            if exc is not None:
+                self.logger.error("Error in processing a job", exc_info=exc)
+
+            if finished_func is not None:
+                try:
+                    finished_func()
+                except Exception:
+                    self.logger.exception("Error calling finished_func()")
+        finally:
+            with self._in_flight_lock:
+                self._in_flight -= 1
+            self._capacity.release()
+
+    def _submit(self, job_params):
+        """Submit a job to the process pool, rebuilding the pool if it broke."""
+        try:
+            args, kwargs = job_params
+        except ValueError:
+            args = job_params
+            kwargs = {}
+
+        kwargs = dict(kwargs)
+        finished_func = kwargs.pop("finished_func", None)
+
+        # Block until there's room in the pool
+        self._capacity.acquire()
+        with self._in_flight_lock:
+            self._in_flight += 1
+
+        while True:
+            try:
+                future = self.executor.submit(_worker_run_task, args, kwargs)
+                break
+            except BrokenProcessPool:
+                self.logger.error("process pool is broken; rebuilding")
+                self.executor.shutdown(wait=False)
+                self.executor = self._build_executor()
+        future.add_done_callback(lambda fut: self._job_done(finished_func, fut))
+
+    def _stop_worker_processes(self):
+        """Stop worker processes.
+
+        This waits for all jobs in the pool to finish and then shuts down the worker
+        processes.
+
+        This is a blocking call.
+
+        """
+        self.logger.debug("waiting for worker processes to stop")
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def _queueing_thread_func(self):
+        """Main function for queueing thread
+
+        This is the function responsible for reading the iterator and submitting jobs
+        to the process pool. It loops as long as there are items in the iterator. Should
+        something go wrong with this thread, or it detects the quit flag, it will stop
+        workers and then quit.
+
+        """
+        self.logger.debug("_queueing_thread_func start")
+        try:
+            # May never exhaust
+            for job_params in self._get_iterator():
+                if self.quit:
+                    raise KeyboardInterrupt
+
+                if job_params is None:
+                    if self.quit_on_empty_queue:
+                        self.wait_for_empty_queue(
+                            wait_log_interval=10,
+                            wait_reason="waiting for queue to drain",
+                        )
+                        raise KeyboardInterrupt
+
+                    self._responsive_sleep(self.idle_delay)
+                    continue
+
+                self.logger.debug("received %r", job_params)
+                self._submit(job_params)
+        except Exception:
+            self.logger.error("queueing jobs has failed", exc_info=True)
+        except KeyboardInterrupt:
+            self.logger.debug("queueing_thread gets quit request")
+        finally:
+            self.logger.debug("we're quitting queueing_thread")
+            self._stop_worker_processes()
+            self.logger.debug("all worker processes stopped")
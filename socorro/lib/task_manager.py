@@ -129,6 +129,14 @@ class TaskManager:
                 self.logger.info("%s: %dsec of %dsec", wait_reason, x, seconds)
             time.sleep(1.0)
 
+    def free_capacity(self):
+        """Return the number of jobs the task manager can take right now.
+
+        This task manager runs one job at a time in the calling thread.
+
+        """
+        return 1
+
     def blocking_start(self):
         """This function starts the task manager running to do tasks."""
         self.logger.debug("threadless start")
@@ -133,6 +133,14 @@ class ThreadedTaskManager(TaskManager):
                 except KeyboardInterrupt:
                     pass
 
+    def free_capacity(self):
+        """Return the number of jobs the task manager can take right now.
+
+        This is the number of free slots in the internal queue.
+
+        """
+        return max(0, self.task_queue.maxsize - self.task_queue.qsize())
+
     def wait_for_empty_queue(self, wait_log_interval=0, wait_reason=""):
         """Wait for queue to become empty.
 
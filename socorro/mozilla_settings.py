@@ -29,6 +29,18 @@ def or_none(parser):
     return _or_none
 
 
+def one_of(choices):
+    """Return a parser that only allows values in choices"""
+
+    def _one_of(val):
+        val = val.strip()
+        if val not in choices:
+            raise ValueError(f"{val!r} is not one of {', '.join(sorted(choices))}")
+        return val
+
+    return _one_of
+
+
 TOOL_ENV = _config(
     "TOOL_ENV",
     default="False",
@@ -80,25 +92,64 @@ STATSD_PORT = _config("STATSD_PORT", default="8125", parser=int, doc="statsd por
 
 
 # Processor configuration
-PROCESSOR = {
-    "task_manager": {
-        "class": "socorro.lib.threaded_task_manager.ThreadedTaskManager",
-        "options": {
-            "idle_delay": 7,
-            "number_of_threads": _config(
-                "PROCESSOR_NUMBER_OF_THREADS",
-                default="4",
-                parser=or_none(int),
-                doc="Number of worker threads for the processor.",
-            ),
-            "maximum_queue_size": _config(
-                "PROCESSOR_MAXIMUM_QUEUE_SIZE",
-                default="8",
-                parser=or_none(int),
-                doc="Number of items to queue up from the processing queues.",
+PROCESSOR_MAXIMUM_QUEUE_SIZE = _config(
+    "PROCESSOR_MAXIMUM_QUEUE_SIZE",
+    default="8",
+    parser=or_none(int),
+    doc="Number of items to queue up from the processing queues.",
+)
+
+# Task manager that runs processing in worker threads
+TASK_MANAGER_THREADED = {
+    "class": "socorro.lib.threaded_task_manager.ThreadedTaskManager",
+    "options": {
+        "idle_delay": 7,
+        "number_of_threads": _config(
+            "PROCESSOR_NUMBER_OF_THREADS",
+            default="4",
+            parser=or_none(int),
+            doc="Number of worker threads for the processor.",
+        ),
+        "maximum_queue_size": PROCESSOR_MAXIMUM_QUEUE_SIZE,
+    },
+}
+
+# Task manager that runs processing in worker processes
+TASK_MANAGER_PROCESS_POOL = {
+    "class": "socorro.lib.process_pool_task_manager.ProcessPoolTaskManager",
+    "options": {
+        "idle_delay": 7,
+        "number_of_processes": _config(
+            "PROCESSOR_NUMBER_OF_PROCESSES",
+            default="",
+            parser=or_none(int),
+            doc=(
+                "Number of worker processes for the processor when using the "
+                "process_pool task manager. Defaults to the number of cpus."
             ),
-        },
+        ),
+        "maximum_queue_size": PROCESSOR_MAXIMUM_QUEUE_SIZE,
     },
+}
+
+TASK_MANAGERS = {
+    "threaded": TASK_MANAGER_THREADED,
+    "process_pool": TASK_MANAGER_PROCESS_POOL,
+}
+
+PROCESSOR = {
+    "task_manager": TASK_MANAGERS[
+        _config(
+            "PROCESSOR_TASK_MANAGER",
+            default="threaded",
+            parser=one_of(TASK_MANAGERS),
+            doc=(
+                "Task manager for running processing: ``threaded`` runs processing "
+                "in worker threads; ``process_pool`` runs processing in worker "
+                "processes."
+            ),
+        )
+    ],
     "pipeline": {
         "class": "socorro.processor.pipeline.Pipeline",
         "options": {
@@ -111,6 +162,33 @@ PROCESSOR = {
         default=tempfile.gettempdir(),
         doc="Directory to use as a workspace for crash report processing.",
     ),
+    "prefetch": {
+        "maximum_jobs": _config(
+            "PROCESSOR_PREFETCH_MAXIMUM_JOBS",
+            default="0",
+            parser=int,
+            doc=(
+                "Maximum number of crash reports to fetch crash data for ahead of "
+                "processing. 0 disables prefetching. Prefetching only works with the "
+                "threaded task manager."
+            ),
+        ),
+        "maximum_bytes": _config(
+            "PROCESSOR_PREFETCH_MAXIMUM_BYTES",
+            default="0",
+            parser=int,
+            doc=(
+                "Maximum number of bytes of prefetched dumps to hold on disk. 0 for "
+                "no maximum."
+            ),
+        ),
+        "number_of_threads": _config(
+            "PROCESSOR_PREFETCH_NUMBER_OF_THREADS",
+            default="2",
+            parser=int,
+            doc="Number of threads fetching crash data ahead of processing.",
+        ),
+    },
 }
 
 # Crash report processing queue configuration
@@ -155,6 +233,47 @@ QUEUE_PUBSUB = {
     },
 }
 
+# Crash report processing queue configuration that sizes pulls to the processor's
+# free capacity and acks in batches
+QUEUE_PUBSUB_ADAPTIVE = {
+    "class": "socorro.external.pubsub.crashqueue.AdaptivePubSubCrashQueue",
+    "options": {
+        **QUEUE_PUBSUB["options"],
+        "max_pull_messages": _config(
+            "PUBSUB_MAX_PULL_MESSAGES",
+            default="100",
+            parser=int,
+            doc="Maximum number of messages to pull from a subscription at a time.",
+        ),
+        "ack_interval": _config(
+            "PUBSUB_ACK_INTERVAL",
+            default="1.0",
+            parser=float,
+            doc="Seconds between sending batches of acks.",
+        ),
+        "ack_deadline_seconds": _config(
+            "PUBSUB_ACK_DEADLINE_SECONDS",
+            default="300",
+            parser=int,
+            doc=(
+                "Ack deadline in seconds to extend to for crash reports that are "
+                "still being processed. This should match the subscription's ack "
+                "deadline."
+            ),
+        ),
+    },
+}
+
+PUBSUB_ADAPTIVE_PULL = _config(
+    "PUBSUB_ADAPTIVE_PULL",
+    default="False",
+    parser=bool,
+    doc=(
+        "Whether or not the processor sizes Pub/Sub pulls to its free capacity and "
+        "acks crash reports in batches."
+    ),
+)
+
 # Crash report storage configuration
 GCS_STORAGE = {
     "class": "socorro.external.gcs.crashstorage.GcsCrashStorage",
@@ -165,6 +284,15 @@ GCS_STORAGE = {
             default="",
             doc="GCS bucket name for crash report data.",
         ),
+        "fetch_workers": _config(
+            "CRASHSTORAGE_GCS_FETCH_WORKERS",
+            default="8",
+            parser=int,
+            doc=(
+                "Number of threads for fetching crash report data files concurrently. "
+                "This is also the size of the HTTP connection pool."
+            ),
+        ),
     },
 }
 
@@ -196,9 +324,60 @@ ES_STORAGE = {
                 "clusters that use self-issued certificates."
             ),
         ),
+        "connections": _config(
+            "ELASTICSEARCH_CONNECTIONS",
+            default="10",
+            parser=int,
+            doc=(
+                "Maximum number of connections to each Elasticsearch node. The "
+                "connection pool is shared by all threads in a process."
+            ),
+        ),
+    },
+}
+
+# Elasticsearch crash storage configuration for indexing with the bulk API
+ES_BULK_STORAGE = {
+    "class": "socorro.external.es.crashstorage.ESBulkCrashStorage",
+    "options": {
+        **ES_STORAGE["options"],
+        "bulk_max_documents": _config(
+            "ELASTICSEARCH_BULK_MAX_DOCUMENTS",
+            default="100",
+            parser=int,
+            doc="Maximum number of crash documents to index in one bulk request.",
+        ),
+        "bulk_max_bytes": _config(
+            "ELASTICSEARCH_BULK_MAX_BYTES",
+            default="5mb",
+            parser=parse_data_size,
+            doc=(
+                "Maximum size of crash documents to index in one bulk request. You "
+                "can use units like kb, mb, etc."
+            ),
+        ),
+        "bulk_max_latency": _config(
+            "ELASTICSEARCH_BULK_MAX_LATENCY",
+            default="0.5",
+            parser=float,
+            doc=(
+                "Maximum time in seconds a crash document waits to be indexed before "
+                "the bulk request is sent."
+            ),
+        ),
     },
 }
 
+ES_BULK_INDEXING = _config(
+    "ELASTICSEARCH_BULK_INDEXING",
+    default="False",
+    parser=bool,
+    doc=(
+        "Whether or not the processor indexes crash documents in batches using the "
+        "Elasticsearch bulk API."
+    ),
+)
+
 # Telemetry crash report storage configuration
 TELEMETRY_GCS_STORAGE = {
     "class": "socorro.external.gcs.crashstorage.TelemetryGcsCrashStorage",
@@ -212,7 +391,7 @@ TELEMETRY_GCS_STORAGE = {
     },
 }
 
-QUEUE = QUEUE_PUBSUB
+QUEUE = QUEUE_PUBSUB_ADAPTIVE if PUBSUB_ADAPTIVE_PULL else QUEUE_PUBSUB
 STORAGE = GCS_STORAGE
 TELEMETRY_STORAGE = TELEMETRY_GCS_STORAGE
 
@@ -224,7 +403,7 @@ CRASH_SOURCE = STORAGE
 CRASH_DESTINATIONS_ORDER = ["storage", "es", "telemetry"]
 CRASH_DESTINATIONS = {
     "storage": STORAGE,
-    "es": ES_STORAGE,
+    "es": ES_BULK_STORAGE if ES_BULK_INDEXING else ES_STORAGE,
     "telemetry": TELEMETRY_STORAGE,
 }
 
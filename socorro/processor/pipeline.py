@@ -16,6 +16,7 @@ from attrs import define, field
 import sentry_sdk
 
 from socorro.libclass import import_class
+from socorro.processor.rules.base import ALL_INPUTS
 from socorro.lib.libdatetime import date_to_string, utc_now
 
 
@@ -55,6 +56,22 @@ class Pipeline:
             for rule in ruleset:
                 self.logger.info("Loaded rule: %r", rule)
 
+    def get_inputs(self, ruleset_name):
+        """Returns the inputs the rules in a ruleset need
+
+        :arg ruleset_name: the name of the ruleset
+
+        :returns: frozenset of inputs; all inputs if the ruleset doesn't exist
+
+        """
+        ruleset = self.rulesets.get(ruleset_name)
+        if ruleset is None:
+            return ALL_INPUTS
+        inputs = set()
+        for rule in ruleset:
+            inputs.update(getattr(rule, "inputs", ALL_INPUTS))
+        return frozenset(inputs)
+
     def process_crash(self, ruleset_name, raw_crash, dumps, processed_crash, tmpdir):
         """Process a crash
 
@@ -76,7 +93,9 @@ class Pipeline:
 
         processed_crash["signature"] = "EMPTY: crash failed to process"
 
-        crash_id = raw_crash["uuid"]
+        # Get the crash id from the processed crash if there is one so the raw crash
+        # isn't fetched if the ruleset doesn't need it
+        crash_id = processed_crash.get("uuid") or raw_crash["uuid"]
 
         ruleset = self.rulesets.get(ruleset_name)
         if ruleset is None:
@@ -0,0 +1,207 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""Prefetching stage for crash report processing.
+
+Without prefetching, each processor worker thread fetches, processes, and saves a crash
+report in sequence, so a worker that's waiting on storage isn't stackwalking. The
+prefetcher fetches the crash data for crash reports that are waiting to be processed
+using a small pool of fetch threads. By the time a worker gets to a crash report, the
+crash data is staged in a temporary directory and ready to go.
+
+The prefetcher has budgets for how much staged crash data it holds:
+
+* ``maximum_jobs``: the maximum number of crash reports that are being fetched or are
+  staged; this bounds the memory used by crash annotations and processed crashes
+* ``maximum_bytes``: the maximum number of bytes of dumps staged on disk
+
+When either budget is used up, ``submit`` blocks until workers finish with staged crash
+reports. This pushes back on the queue so the processor doesn't pull more crash reports
+than it can hold.
+
+"""
+
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+import os
+import shutil
+import tempfile
+import threading
+
+from socorro.libmarkus import METRICS
+
+
+def get_directory_size(path):
+    """Return the total size of the files in a directory in bytes."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                # The file was removed while we were looking at it
+                pass
+    return total
+
+
+class StagedJob:
+    """Crash data for a crash report that's being fetched or has been fetched.
+
+    Use this as a context manager. When the context exits, the temporary directory is
+    removed and the job's share of the budgets is released.
+
+    """
+
+    def __init__(self, crash_id, ruleset_name, tmpdir, release_func):
+        """
+        :arg crash_id: the crash id of the crash report
+        :arg ruleset_name: the ruleset the crash report will be processed with
+        :arg tmpdir: the temporary directory the crash data is staged in
+        :arg release_func: function called with this job when it's cleaned up
+        """
+        self.crash_id = crash_id
+        self.ruleset_name = ruleset_name
+        self.tmpdir = tmpdir
+        self.release_func = release_func
+        self.future = None
+        self.size = 0
+        self.cleaned_up = False
+
+    def result(self):
+        """Return the crash data waiting for the fetch to finish if needed.
+
+        :returns: the return value of the fetch function
+
+        :raises: the exception the fetch function raised, if any
+
+        """
+        with METRICS.timer("processor.prefetch.wait"):
+            return self.future.result()
+
+    def cleanup(self):
+        """Remove the temporary directory and release this job's budget."""
+        if self.cleaned_up:
+            return
+        self.cleaned_up = True
+
+        if self.future is not None and not self.future.cancel():
+            # Wait for the fetch to finish so nothing is writing to the temporary
+            # directory when it's removed
+            try:
+                self.future.exception()
+            except CancelledError:
+                pass
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        self.release_func(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.cleanup()
+
+
+class CrashPrefetcher:
+    """Fetches crash data ahead of processing with a bounded pool of fetch threads."""
+
+    def __init__(
+        self,
+        fetch_func,
+        temporary_path,
+        number_of_threads=2,
+        maximum_jobs=8,
+        maximum_bytes=0,
+    ):
+        """
+        :arg fetch_func: function that takes ``crash_id``, ``ruleset_name``, and
+            ``tmpdir`` arguments and returns the crash data
+        :arg temporary_path: directory to create temporary directories in
+        :arg number_of_threads: number of threads fetching crash data
+        :arg maximum_jobs: maximum number of crash reports that are being fetched or
+            are staged
+        :arg maximum_bytes: maximum number of bytes of dumps staged on disk; 0 for no
+            maximum
+        """
+        self.fetch_func = fetch_func
+        self.temporary_path = temporary_path
+        self.maximum_jobs = max(1, maximum_jobs)
+        self.maximum_bytes = maximum_bytes
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=number_of_threads, thread_name_prefix="prefetch"
+        )
+        self.condition = threading.Condition()
+        self.jobs = set()
+        self.staged_bytes = 0
+        self.closed = False
+
+    def has_capacity(self):
+        if len(self.jobs) >= self.maximum_jobs:
+            return False
+        if self.maximum_bytes and self.staged_bytes >= self.maximum_bytes:
+            return False
+        return True
+
+    def submit(self, crash_id, ruleset_name):
+        """Start fetching the crash data for a crash report.
+
+        This blocks until there's room in the budgets.
+
+        :arg crash_id: the crash id of the crash report
+        :arg ruleset_name: the ruleset the crash report will be processed with
+
+        :returns: a StagedJob
+
+        :raises RuntimeError: if the prefetcher is closed
+
+        """
+        with self.condition:
+            if not self.has_capacity():
+                METRICS.incr("processor.prefetch.backpressure")
+                self.condition.wait_for(lambda: self.closed or self.has_capacity())
+            if self.closed:
+                raise RuntimeError("prefetcher is closed")
+
+            tmpdir = tempfile.mkdtemp(dir=self.temporary_path)
+            job = StagedJob(
+                crash_id=crash_id,
+                ruleset_name=ruleset_name,
+                tmpdir=tmpdir,
+                release_func=self._release,
+            )
+            self.jobs.add(job)
+
+        job.future = self.executor.submit(self._fetch, job)
+        return job
+
+    def _fetch(self, job):
+        try:
+            return self.fetch_func(
+                crash_id=job.crash_id,
+                ruleset_name=job.ruleset_name,
+                tmpdir=job.tmpdir,
+            )
+        finally:
+            size = get_directory_size(job.tmpdir)
+            with self.condition:
+                if job in self.jobs:
+                    job.size = size
+                    self.staged_bytes += size
+
+    def _release(self, job):
+        with self.condition:
+            if job in self.jobs:
+                self.jobs.discard(job)
+                self.staged_bytes -= job.size
+                self.condition.notify_all()
+
+    def close(self):
+        """Stop fetching and clean up all staged crash data."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            jobs = list(self.jobs)
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for job in jobs:
+            job.cleanup()
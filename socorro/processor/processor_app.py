@@ -9,7 +9,8 @@
 It uses a fetch/transform/save model.
 
 1. fetch: a queue class determines which crash report to process next and
-   crash storage fetches the data from a crash storage source
+   crash storage fetches the data from a crash storage source; if prefetching
+   is enabled, this happens ahead of processing in a separate set of threads
 2. transform: a pipeline class runs the crash report through a set of
    processing rules which results in a processed crash
 3. save: crash storage saves the data to crash storage destinations
@@ -36,25 +37,47 @@ from sentry_sdk.integrations.stdlib import StdlibIntegration
 from sentry_sdk.integrations.threading import ThreadingIntegration
 
 from socorro import settings
-from socorro.external.crashstorage_base import CrashIDNotFound
-from socorro.libclass import build_instance, build_instance_from_settings
+from socorro.external.crashstorage_base import (
+    CrashIDNotFound,
+    LazyRawCrash,
+    TrackedProcessedCrash,
+)
+from socorro.libclass import build_instance, build_instance_from_settings, import_class
 from socorro.libmarkus import set_up_metrics, METRICS
 from socorro.lib.libdatetime import isoformat_to_time
 from socorro.lib.libdockerflow import get_release_name, get_version_info
 from socorro.lib.liblogging import set_up_logging
+from socorro.lib.process_pool_task_manager import ProcessPoolTaskManager
 from socorro.lib.task_manager import respond_to_SIGTERM
+from socorro.processor.prefetcher import CrashPrefetcher
+from socorro.processor.rules.base import DUMP_INPUT_PREFIX, DUMPS, RAW_CRASH
 
 
 def count_sentry_scrub_error(msg):
     METRICS.incr("sentry_scrub_error", value=1, tags=["service:processor"])
 
 
+def parse_task(task):
+    """Split a processing task into a crash id and a ruleset name.
+
+    :arg task: ``<crash_id>`` or ``<crash_id>:<ruleset_name>``
+
+    :returns: tuple of (crash_id, ruleset_name)
+
+    """
+    if ":" in task:
+        crash_id, ruleset_name = task.split(":", 1)
+        return crash_id, ruleset_name
+    return task, "default"
+
+
 class ProcessorApp:
     """App that transforms raw crashes into processed crashes."""
 
     def __init__(self):
         self.basedir = Path(__file__).resolve().parent.parent.parent
         self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self.prefetcher = None
 
     def log_config(self):
         version_info = get_version_info(self.basedir)
@@ -100,10 +123,11 @@ class ProcessorApp:
         """Yields an infinite list of processing tasks."""
         try:
             for x in self.queue.new_crashes():
-                if x is None or isinstance(x, tuple):
-                    yield x
-                else:
-                    yield ((x,), {})
+                if x is not None and not isinstance(x, tuple):
+                    x = ((x,), {})
+                if x is not None and self.prefetcher is not None:
+                    x = self._stage(x)
+                yield x
             yield None
         except Exception as exc:
             # NOTE(willkg): Queue code should not be throwing unhandled exceptions. If
@@ -113,17 +137,29 @@ class ProcessorApp:
             self.logger.exception("error in crash id iterator")
             raise
 
+    def _stage(self, job_params):
+        """Start prefetching the crash data for a processing task.
+
+        This blocks when the prefetcher's budgets are used up.
+
+        :arg job_params: tuple of (args, kwargs) for a processing task
+
+        :returns: tuple of (args, kwargs) with the staged job added to kwargs
+
+        """
+        args, kwargs = job_params
+        crash_id, ruleset_name = parse_task(args[0])
+        staged_job = self.prefetcher.submit(crash_id, ruleset_name)
+        return (args, {**kwargs, "staged_job": staged_job})
+
     def source_iterator(self):
         """Iterate infinitely yielding tasks."""
         while True:
             yield from self._basic_iterator()
 
-    def transform(self, task, finished_func=(lambda: None)):
+    def transform(self, task, finished_func=(lambda: None), staged_job=None):
         try:
-            if ":" in task:
-                crash_id, ruleset_name = task.split(":", 1)
-            else:
-                crash_id, ruleset_name = task, "default"
+            crash_id, ruleset_name = parse_task(task)
 
             # Set up metrics and sentry scopes
             with METRICS.timer(
@@ -138,14 +174,27 @@ class ProcessorApp:
                         },
                     )
 
-                    # Create temporary directory context
-                    with tempfile.TemporaryDirectory(dir=self.temporary_path) as tmpdir:
-                        # Process the crash report
-                        self.process_crash(
-                            crash_id=crash_id,
-                            ruleset_name=ruleset_name,
-                            tmpdir=tmpdir,
-                        )
+                    if staged_job is not None:
+                        # The crash data was prefetched; the staged job cleans up
+                        # its temporary directory
+                        with staged_job:
+                            self.process_crash(
+                                crash_id=crash_id,
+                                ruleset_name=ruleset_name,
+                                tmpdir=staged_job.tmpdir,
+                                staged_job=staged_job,
+                            )
+                    else:
+                        # Create temporary directory context
+                        with tempfile.TemporaryDirectory(
+                            dir=self.temporary_path
+                        ) as tmpdir:
+                            # Process the crash report
+                            self.process_crash(
+                                crash_id=crash_id,
+                                ruleset_name=ruleset_name,
+                                tmpdir=tmpdir,
+                            )
 
         finally:
             # no matter what causes this method to end, we need to make sure
@@ -160,22 +209,80 @@ class ProcessorApp:
                 # so that we can continue.
                 self.logger.exception("Error calling finishing_func() on %s", task)
 
-    def process_crash(self, crash_id, ruleset_name, tmpdir):
+    def fetch_crash_data(self, crash_id, ruleset_name, tmpdir):
+        """Fetch the crash data the ruleset needs to process a crash report.
+
+        If the ruleset needs the raw crash and all the dumps, everything is fetched
+        up front. Otherwise, only the processed crash and the inputs the rules
+        declared are fetched up front. The raw crash and dumps are fetched when
+        they're first accessed.
+
+        :arg crash_id: unique identifier for the crash report
+        :arg ruleset_name: the name of the ruleset to process the crash report with
+        :arg tmpdir: the temporary directory to save dumps in
+
+        :returns: tuple of (raw crash, dumps, processed crash); processed crash is
+            None if the crash report hasn't been processed, yet
+
+        :raises CrashIDNotFound: if the crash report doesn't exist
+
+        """
+        inputs = self.pipeline.get_inputs(ruleset_name)
+        if RAW_CRASH in inputs and DUMPS in inputs:
+            return self.source.get_crash_data_as_files(crash_id, tmpdir)
+
+        try:
+            processed_crash = self.source.get_processed_crash(crash_id)
+        except CrashIDNotFound:
+            processed_crash = None
+
+        if RAW_CRASH in inputs or processed_crash is None:
+            # Crash reports that haven't been processed need the raw crash for the
+            # crash id and this makes sure the crash report exists
+            raw_crash = self.source.get_raw_crash(crash_id)
+        else:
+            raw_crash = LazyRawCrash(partial(self.source.get_raw_crash, crash_id))
+
+        dumps = self.source.get_lazy_dumps_as_files(crash_id, tmpdir)
+        if DUMPS in inputs:
+            dumps.prefetch()
+        else:
+            dump_names = [
+                item[len(DUMP_INPUT_PREFIX) :]
+                for item in inputs
+                if item.startswith(DUMP_INPUT_PREFIX)
+            ]
+            if dump_names:
+                dumps.prefetch(dump_names)
+
+        METRICS.incr(
+            "processor.fetch_crash_data.partial", tags=[f"ruleset:{ruleset_name}"]
+        )
+        return raw_crash, dumps, processed_crash
+
+    def process_crash(self, crash_id, ruleset_name, tmpdir, staged_job=None):
         """Processed crash data using a specified ruleset into a processed crash.
 
         :arg crash_id: unique identifier for the crash report used to fetch the data and
             save the processed data
         :arg ruleset_name: the name of the ruleset to process the crash report with
         :arg tmpdir: the temporary directory to use as a workspace
+        :arg staged_job: the StagedJob with the prefetched crash data or None if the
+            crash data should be fetched now
 
         """
         self.logger.info("starting %s with %s", crash_id, ruleset_name)
 
         self.logger.debug("fetching data %s", crash_id)
-        # Fetch crash annotations and dumps
+        # Fetch crash annotations, dumps, and processed crash data--there won't be any
+        # processed crash data if this crash hasn't been processed, yet
         try:
-            raw_crash = self.source.get_raw_crash(crash_id)
-            dumps = self.source.get_dumps_as_files(crash_id, tmpdir)
+            if staged_job is not None:
+                raw_crash, dumps, processed_crash = staged_job.result()
+            else:
+                raw_crash, dumps, processed_crash = self.fetch_crash_data(
+                    crash_id, ruleset_name, tmpdir
+                )
         except CrashIDNotFound:
             # If the crash isn't found, we just reject it--no need to capture
             # errors here
@@ -189,14 +296,13 @@ class ProcessorApp:
             self.pipeline.reject_raw_crash(crash_id, f"error in loading: {exc}")
             return
 
-        # Fetch processed crash data--there won't be any if this crash hasn't
-        # been processed, yet
-        try:
-            processed_crash = self.source.get_processed_crash(crash_id)
-            new_crash = False
-        except CrashIDNotFound:
-            new_crash = True
+        new_crash = processed_crash is None
+        if new_crash:
             processed_crash = {}
+        elif ruleset_name != "default":
+            # Reprocessing rulesets change a few things in the processed crash, so
+            # keep track of what changed so destinations can save only that
+            processed_crash = TrackedProcessedCrash(processed_crash)
 
         # Process the crash to generate a processed crash
         self.logger.debug("processing %s", crash_id)
@@ -208,6 +314,10 @@ class ProcessorApp:
             tmpdir=tmpdir,
         )
 
+        changed_keys = None
+        if isinstance(processed_crash, TrackedProcessedCrash):
+            changed_keys = processed_crash.changed_keys
+
         # Save data to crash storage destinations
         self.logger.debug("saving %s", crash_id)
         for dest in self.destinations:
@@ -215,7 +325,12 @@ class ProcessorApp:
                 with METRICS.timer(
                     f"processor.{dest.crash_destination_name}.save_processed_crash"
                 ):
-                    dest.save_processed_crash(raw_crash, processed_crash)
+                    if changed_keys is None:
+                        dest.save_processed_crash(raw_crash, processed_crash)
+                    else:
+                        dest.save_processed_crash_changes(
+                            raw_crash, processed_crash, changed_keys
+                        )
             except Exception as storage_error:
                 self.logger.error(
                     "error: crash id %s: %r (%s)",
@@ -246,6 +361,47 @@ class ProcessorApp:
     def _set_up_source_and_destination(self):
         """Instantiate classes necessary for processing."""
         self.queue = build_instance_from_settings(settings.QUEUE)
+        if getattr(self, "task_manager", None) is not None:
+            # Let the queue size what it fetches to what the task manager can take
+            self.queue.set_capacity_func(self.task_manager.free_capacity)
+        self._set_up_processing()
+
+        self.temporary_path = settings.PROCESSOR["temporary_path"]
+        os.makedirs(self.temporary_path, exist_ok=True)
+
+        self._set_up_prefetcher()
+
+    def _set_up_prefetcher(self):
+        """Create the prefetcher if prefetching is enabled."""
+        self.prefetcher = None
+        prefetch_settings = settings.PROCESSOR.get("prefetch", {})
+        if not prefetch_settings.get("maximum_jobs"):
+            return
+
+        if isinstance(getattr(self, "task_manager", None), ProcessPoolTaskManager):
+            # Staged crash data lives in this process, so worker processes can't
+            # get to it
+            self.logger.warning(
+                "prefetching is not supported with ProcessPoolTaskManager; disabled"
+            )
+            return
+
+        self.prefetcher = CrashPrefetcher(
+            fetch_func=self.fetch_crash_data,
+            temporary_path=self.temporary_path,
+            number_of_threads=prefetch_settings.get("number_of_threads", 2),
+            maximum_jobs=prefetch_settings["maximum_jobs"],
+            maximum_bytes=prefetch_settings.get("maximum_bytes", 0),
+        )
+
+    def _set_up_processing(self):
+        """Instantiate crash storage source, destinations, and pipeline.
+
+        When using the ProcessPoolTaskManager, this is also run in each worker process
+        after it's forked so that each worker process has its own crash storage
+        clients and pipeline rather than sharing them with the main process.
+
+        """
         self.source = build_instance_from_settings(settings.CRASH_SOURCE)
         destinations = []
         for key in settings.CRASH_DESTINATIONS_ORDER:
@@ -256,9 +412,6 @@ class ProcessorApp:
 
         self.pipeline = build_instance_from_settings(settings.PROCESSOR["pipeline"])
 
-        self.temporary_path = settings.PROCESSOR["temporary_path"]
-        os.makedirs(self.temporary_path, exist_ok=True)
-
     def _set_up_task_manager(self):
         """Create and set up task manager."""
         self.logger.info("installing signal handers")
@@ -277,6 +430,8 @@ class ProcessorApp:
                 "task_func": self.transform,
             }
         )
+        if issubclass(import_class(manager_class), ProcessPoolTaskManager):
+            manager_settings["worker_init_func"] = self._set_up_processing
         self.task_manager = build_instance(
             class_path=manager_class, kwargs=manager_settings
         )
@@ -286,11 +441,15 @@ class ProcessorApp:
         with suppress(AttributeError):
             self.queue.close()
 
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+
         with suppress(AttributeError):
             self.source.close()
 
-        with suppress(AttributeError):
-            self.destination.close()
+        for dest in getattr(self, "destinations", []):
+            with suppress(AttributeError):
+                dest.close()
 
         with suppress(AttributeError):
             self.pipeline.close()
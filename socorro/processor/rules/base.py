@@ -7,14 +7,51 @@ import logging
 from socorro.libmarkus import METRICS
 
 
+# Inputs rules can declare in Rule.inputs
+
+#: The raw crash
+RAW_CRASH = "raw_crash"
+
+#: The names of the dumps, but not the dumps themselves
+DUMP_NAMES = "dump_names"
+
+#: All the dumps
+DUMPS = "dumps"
+
+#: The processed crash from previous processing
+PROCESSED_CRASH = "processed_crash"
+
+ALL_INPUTS = frozenset([RAW_CRASH, DUMP_NAMES, DUMPS, PROCESSED_CRASH])
+
+DUMP_INPUT_PREFIX = "dump:"
+
+
+def dump_input(dump_name):
+    """Returns the input for a specific dump
+
+    :arg dump_name: the name of the dump, e.g. "upload_file_minidump"
+
+    :returns: input name
+
+    """
+    return DUMP_INPUT_PREFIX + dump_name
+
+
 class Rule:
     """Base class for transform rules
 
     Provides structure for calling rules during the processor pipeline and also
     has some useful utilities for rules.
 
+    Rules declare the inputs they need in ``inputs`` so the processor only fetches
+    those before running a ruleset. Inputs that weren't declared are fetched when
+    they're first accessed.
+
     """
 
+    #: Inputs this rule needs
+    inputs = ALL_INPUTS
+
     def __init__(self):
         self.logger = logging.getLogger(self.name)
 
@@ -427,10 +427,24 @@ class MinidumpStackwalkRule(Rule):
         }
         return self.command_line.format(**params)
 
+    def execute_stackwalker(self, command_line, output_path):
+        """Runs the stackwalker on a single minidump
+
+        :arg command_line: the complete command line to run
+        :arg output_path: the absolute path to where the output will go
+
+        :returns: dict with stdout (bytes), stderr (bytes), and returncode (signed
+            smallint) keys like ``execute_process``
+
+        """
+        return execute_process(command_line, timeout=self.kill_timeout)
+
     def run_stackwalker(
         self, crash_id, command_path, command_line, output_path, log_path, status
     ):
-        ret = execute_process(command_line, timeout=self.kill_timeout)
+        ret = self.execute_stackwalker(
+            command_line=command_line, output_path=output_path
+        )
         returncode = ret["returncode"]
 
         # Grab any log data
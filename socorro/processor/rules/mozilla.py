@@ -23,7 +23,7 @@ from socorro.lib.libjsonschema import InvalidSchemaError, resolve_references
 from socorro.lib.librequests import session_with_retries
 from socorro.lib.libsocorrodataschema import SocorroDataReducer, validate_instance
 from socorro.libmarkus import METRICS
-from socorro.processor.rules.base import Rule
+from socorro.processor.rules.base import PROCESSED_CRASH, Rule
 from socorro.signature.generator import SignatureGenerator
 from socorro.signature.utils import convert_to_crash_data
 
@@ -1099,6 +1099,9 @@ class ThemePrettyNameRule(Rule):
 class SignatureGeneratorRule(Rule):
     """Generates a Socorro crash signature."""
 
+    # Signatures are generated from the processed crash only
+    inputs = frozenset([PROCESSED_CRASH])
+
     def __init__(self):
         super().__init__()
         self.generator = SignatureGenerator(error_handler=self._error_handler)
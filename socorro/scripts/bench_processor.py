@@ -0,0 +1,524 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import argparse
+import contextlib
+import copy
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from socorro.external.crashstorage_base import InMemoryCrashStorage
+from socorro.external.gcs.crashstorage import build_keys
+from socorro.libclass import import_class
+from socorro.processor.pipeline import Pipeline
+from socorro.processor.rules.breakpad import MinidumpStackwalkRule
+from socorro.processor.rules.mozilla import BetaVersionRule
+from socorro.scripts import FlagAction, WrappedTextHelpFormatter
+
+
+DESCRIPTION = """
+Benchmarks the processor pipeline and each rule in a ruleset
+"""
+
+EPILOG = """
+Replays a corpus of crash reports through the processor pipeline and reports
+per-rule p50/p95/p99 wall time, memory allocations, and crashes/sec.
+
+The corpus is a CRASHDIR as created by "socorro-cmd fetch_crash_data". Fetch
+processed crash data, too ("--processed"), because the recorded
+minidump-stackwalk output in the processed crash is replayed instead of running
+minidump-stackwalk. BetaVersionRule lookups are replayed from the recorded
+processed crashes, too, so the benchmark runs offline.
+
+Use "--output" to write machine-readable results and "--baseline" to compare
+results with a previous run. For example::
+
+    socorro-cmd bench_processor --output=before.json CRASHDIR
+    socorro-cmd bench_processor --baseline=before.json CRASHDIR
+
+"""
+
+DEFAULT_RULESETS = "socorro.mozilla_rulesets.RULESETS"
+DEFAULT_STACKWALKER_OUTPUT = {"status": "OK"}
+
+
+class ReplayMinidumpStackwalkRule(MinidumpStackwalkRule):
+    """MinidumpStackwalkRule that replays recorded minidump-stackwalk output
+
+    Everything other than running minidump-stackwalk is the same as
+    MinidumpStackwalkRule.
+
+    """
+
+    def __init__(self, recorded_outputs, **kwargs):
+        """
+        :arg recorded_outputs: map of output filename (``{crash_id}.{dump_name}.json``)
+            -> recorded minidump-stackwalk output
+        """
+        self.recorded_outputs = recorded_outputs
+        super().__init__(**kwargs)
+
+    def get_version(self):
+        return "replay"
+
+    def build_directories(self):
+        pass
+
+    def execute_stackwalker(self, command_line, output_path):
+        output = self.recorded_outputs.get(
+            os.path.basename(output_path), DEFAULT_STACKWALKER_OUTPUT
+        )
+        with open(output_path, "w") as fp:
+            json.dump(output, fp)
+        return {"stdout": b"", "stderr": b"", "returncode": 0}
+
+
+@contextlib.contextmanager
+def replaying_stackwalker():
+    """Keeps MinidumpStackwalkRule from running minidump-stackwalk
+
+    Building MinidumpStackwalkRule runs ``minidump-stackwalk --version`` and creates
+    symbols directories. Rulesets are built when they're imported, so import them
+    in this context to build them offline.
+
+    """
+    get_version = MinidumpStackwalkRule.get_version
+    build_directories = MinidumpStackwalkRule.build_directories
+    MinidumpStackwalkRule.get_version = ReplayMinidumpStackwalkRule.get_version
+    MinidumpStackwalkRule.build_directories = (
+        ReplayMinidumpStackwalkRule.build_directories
+    )
+    try:
+        yield
+    finally:
+        MinidumpStackwalkRule.get_version = get_version
+        MinidumpStackwalkRule.build_directories = build_directories
+
+
+class ReplayBetaVersionRule(BetaVersionRule):
+    """BetaVersionRule that replays versions from recorded processed crashes"""
+
+    def __init__(self, recorded_versions):
+        """
+        :arg recorded_versions: map of (product, channel, build_id) -> version
+        """
+        super().__init__(version_string_api="")
+        self.recorded_versions = recorded_versions
+
+    def _get_real_version(self, product, channel, build_id):
+        return self.recorded_versions.get((product, channel, build_id))
+
+
+def load_json(path):
+    with open(path, "r") as fp:
+        return json.load(fp)
+
+
+def load_corpus(crashdir, storage):
+    """Loads crash data from a CRASHDIR into crash storage
+
+    :arg crashdir: a directory created by fetch_crash_data
+    :arg storage: the crash storage to save the crash data in
+
+    :returns: sorted list of crash ids
+
+    """
+    raw_crash_root = os.path.join(crashdir, "v1", "raw_crash")
+    crash_ids = []
+    for _, _, filenames in os.walk(raw_crash_root):
+        crash_ids.extend(filenames)
+    crash_ids.sort()
+
+    for crash_id in crash_ids:
+        raw_crash = load_json(
+            os.path.join(crashdir, build_keys("raw_crash", crash_id)[0])
+        )
+
+        dumps = {}
+        dump_names_path = os.path.join(crashdir, build_keys("dump_names", crash_id)[0])
+        if os.path.exists(dump_names_path):
+            for dump_name in load_json(dump_names_path):
+                # We store "upload_file_minidump" as "dump"
+                file_name = "dump" if dump_name == "upload_file_minidump" else dump_name
+                with open(
+                    os.path.join(crashdir, build_keys(file_name, crash_id)[0]), "rb"
+                ) as fp:
+                    dumps[dump_name] = fp.read()
+
+        processed_crash_path = os.path.join(
+            crashdir, build_keys("processed_crash", crash_id)[0]
+        )
+        processed_crash = None
+        if os.path.exists(processed_crash_path):
+            processed_crash = load_json(processed_crash_path)
+
+            # If we don't have dumps, but we have recorded minidump-stackwalk output,
+            # then add placeholder dumps so the stackwalker rule runs
+            if "json_dump" in processed_crash:
+                dumps.setdefault("upload_file_minidump", b"MDMP")
+            for dump_name in processed_crash.get("additional_minidumps") or []:
+                dumps.setdefault(dump_name, b"MDMP")
+
+        storage.save_raw_crash(raw_crash=raw_crash, dumps=dumps, crash_id=crash_id)
+        if processed_crash is not None:
+            storage.save_processed_crash(raw_crash, processed_crash)
+
+    return crash_ids
+
+
+def get_recorded_data(storage, crash_ids):
+    """Extracts recorded data to replay from processed crashes
+
+    :returns: tuple of (stackwalker outputs, beta versions)
+
+    """
+    recorded_outputs = {}
+    recorded_versions = {}
+    for crash_id in crash_ids:
+        try:
+            processed_crash = storage.get_processed_crash(crash_id)
+        except Exception:
+            continue
+
+        if "json_dump" in processed_crash:
+            recorded_outputs[f"{crash_id}.upload_file_minidump.json"] = processed_crash[
+                "json_dump"
+            ]
+        for dump_name in processed_crash.get("additional_minidumps") or []:
+            json_dump = (processed_crash.get(dump_name) or {}).get("json_dump")
+            if json_dump is not None:
+                recorded_outputs[f"{crash_id}.{dump_name}.json"] = json_dump
+
+        key = (
+            processed_crash.get("product"),
+            (processed_crash.get("release_channel") or "").lower(),
+            str(processed_crash.get("build") or ""),
+        )
+        if processed_crash.get("version"):
+            recorded_versions[key] = processed_crash["version"]
+
+    return recorded_outputs, recorded_versions
+
+
+def build_replay_ruleset(ruleset, recorded_outputs, recorded_versions):
+    """Returns a copy of the ruleset with rules that shell out or use the network
+    replaced with replaying versions
+
+    """
+    new_ruleset = []
+    for rule in ruleset:
+        if isinstance(rule, MinidumpStackwalkRule):
+            rule = ReplayMinidumpStackwalkRule(
+                recorded_outputs=recorded_outputs,
+                dump_field=rule.dump_field,
+                symbols_urls=rule.symbols_urls,
+                command_path=rule.command_path,
+                command_line=rule.command_line,
+                kill_timeout=rule.kill_timeout,
+                symbol_tmp_path=rule.symbol_tmp_path,
+                symbol_cache_path=rule.symbol_cache_path,
+            )
+        elif isinstance(rule, BetaVersionRule):
+            rule = ReplayBetaVersionRule(recorded_versions=recorded_versions)
+        new_ruleset.append(rule)
+    return new_ruleset
+
+
+class RuleRecorder:
+    """Records timings and allocations for the rules in a ruleset"""
+
+    def __init__(self, ruleset, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        # rule name -> list of seconds
+        self.timings = {}
+        # rule name -> list of bytes
+        self.allocations = {}
+        for rule in ruleset:
+            self.timings[rule.name] = []
+            self.allocations[rule.name] = []
+            self.wrap(rule)
+
+    def wrap(self, rule):
+        act = rule.act
+        timings = self.timings[rule.name]
+        allocations = self.allocations[rule.name]
+
+        def _timed_act(**kwargs):
+            # Timings are recorded in the timing passes and allocations are recorded
+            # in the allocation tracing pass
+            if self.trace_allocations:
+                tracemalloc.reset_peak()
+                start_memory = tracemalloc.get_traced_memory()[0]
+                try:
+                    return act(**kwargs)
+                finally:
+                    allocations.append(
+                        tracemalloc.get_traced_memory()[1] - start_memory
+                    )
+
+            start_time = time.perf_counter()
+            try:
+                return act(**kwargs)
+            finally:
+                timings.append(time.perf_counter() - start_time)
+
+        rule.act = _timed_act
+
+
+def percentile(sorted_values, pct):
+    """Returns the nearest-rank percentile of a sorted list of values"""
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize_timings(values):
+    """Summarizes a list of seconds into milliseconds"""
+    values = sorted(values)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "total_ms": total * 1000,
+        "mean_ms": (total / len(values) * 1000) if values else 0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+    }
+
+
+def run_crashes(pipeline, ruleset_name, storage, crash_ids, iterations):
+    """Runs all the crashes through the pipeline iterations times
+
+    :returns: list of seconds it took to process each crash
+
+    """
+    timings = []
+    for _ in range(iterations):
+        for crash_id in crash_ids:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # Copy so rules that mutate the raw crash don't affect the next
+                # iteration
+                raw_crash = copy.deepcopy(storage.get_raw_crash(crash_id))
+                dumps = storage.get_dumps_as_files(crash_id, tmpdir)
+
+                start_time = time.perf_counter()
+                pipeline.process_crash(
+                    ruleset_name=ruleset_name,
+                    raw_crash=raw_crash,
+                    dumps=dumps,
+                    processed_crash={},
+                    tmpdir=tmpdir,
+                )
+                timings.append(time.perf_counter() - start_time)
+    return timings
+
+
+def run_benchmark(
+    ruleset, storage, crash_ids, iterations=5, warmup=1, trace_allocations=True
+):
+    """Benchmarks a ruleset against crashes in storage
+
+    :arg ruleset: list of rules
+    :arg storage: crash storage holding the corpus
+    :arg crash_ids: the crash ids to process
+    :arg iterations: number of times to process the corpus for timings
+    :arg warmup: number of times to process the corpus before timing to warm up
+        caches
+    :arg trace_allocations: whether to do an additional pass over the corpus tracing
+        memory allocations
+
+    :returns: results dict
+
+    """
+    ruleset_name = "bench"
+    pipeline = Pipeline(rulesets={ruleset_name: ruleset}, hostname="bench")
+    recorder = RuleRecorder(ruleset)
+
+    run_crashes(pipeline, ruleset_name, storage, crash_ids, warmup)
+    for values in recorder.timings.values():
+        values.clear()
+
+    start_time = time.perf_counter()
+    crash_timings = run_crashes(pipeline, ruleset_name, storage, crash_ids, iterations)
+    elapsed = time.perf_counter() - start_time
+
+    if trace_allocations:
+        # Allocation tracing slows everything down, so it's a separate pass that
+        # doesn't affect timings
+        recorder.trace_allocations = True
+        tracemalloc.start()
+        try:
+            run_crashes(pipeline, ruleset_name, storage, crash_ids, 1)
+        finally:
+            tracemalloc.stop()
+            recorder.trace_allocations = False
+
+    rules = {}
+    for rule_name, values in recorder.timings.items():
+        rules[rule_name] = summarize_timings(values)
+        allocations = recorder.allocations[rule_name]
+        if allocations:
+            rules[rule_name]["alloc_peak_kb_mean"] = (
+                sum(allocations) / len(allocations) / 1024
+            )
+            rules[rule_name]["alloc_peak_kb_max"] = max(allocations) / 1024
+
+    return {
+        "python": platform.python_version(),
+        "crashes": len(crash_ids),
+        "iterations": iterations,
+        "pipeline": {
+            **summarize_timings(crash_timings),
+            "crashes_per_sec": (len(crash_timings) / elapsed) if elapsed else 0,
+        },
+        "rules": rules,
+    }
+
+
+def format_delta(value, baseline_value):
+    if not baseline_value:
+        return ""
+    return f"{(value - baseline_value) / baseline_value * 100:+.1f}%"
+
+
+def print_results(results, baseline=None):
+    """Prints results as a table; if there's a baseline, includes p50 deltas"""
+    baseline = baseline or {}
+    pipeline = results["pipeline"]
+    baseline_pipeline = baseline.get("pipeline", {})
+
+    print(
+        f"crashes: {results['crashes']}  iterations: {results['iterations']}  "
+        + f"crashes/sec: {pipeline['crashes_per_sec']:.1f} "
+        + format_delta(
+            pipeline["crashes_per_sec"], baseline_pipeline.get("crashes_per_sec")
+        )
+    )
+    print(
+        f"pipeline: p50 {pipeline['p50_ms']:.3f}ms  p95 {pipeline['p95_ms']:.3f}ms  "
+        + f"p99 {pipeline['p99_ms']:.3f}ms "
+        + format_delta(pipeline["p50_ms"], baseline_pipeline.get("p50_ms"))
+    )
+    print("")
+
+    header = f"{'rule':<40} {'p50ms':>9} {'p95ms':>9} {'p99ms':>9} {'allocKB':>9}"
+    if baseline:
+        header += f" {'p50 delta':>10}"
+    print(header)
+
+    baseline_rules = baseline.get("rules", {})
+    rules = sorted(
+        results["rules"].items(), key=lambda item: item[1]["total_ms"], reverse=True
+    )
+    for rule_name, stats in rules:
+        short_name = rule_name.rsplit(".", 1)[-1]
+        line = (
+            f"{short_name:<40} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+            + f"{stats['p99_ms']:>9.3f} {stats.get('alloc_peak_kb_mean', 0):>9.1f}"
+        )
+        if baseline:
+            baseline_p50 = baseline_rules.get(rule_name, {}).get("p50_ms")
+            line += f" {format_delta(stats['p50_ms'], baseline_p50):>10}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=WrappedTextHelpFormatter,
+        description=DESCRIPTION.strip(),
+        epilog=EPILOG.strip(),
+    )
+    parser.add_argument(
+        "--rulesets",
+        default=DEFAULT_RULESETS,
+        help="Python dotted path to the dict of name -> list of rules",
+    )
+    parser.add_argument(
+        "--ruleset", default="default", help="name of ruleset to benchmark"
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=5,
+        help="number of times to process the corpus",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1,
+        help="number of times to process the corpus before measuring",
+    )
+    parser.add_argument(
+        "--allocations",
+        "--no-allocations",
+        dest="allocations",
+        action=FlagAction,
+        default=True,
+        help="whether or not to measure memory allocations in a separate pass",
+    )
+    parser.add_argument("--output", help="file to write JSON results to")
+    parser.add_argument(
+        "--baseline", help="JSON results file from a previous run to compare with"
+    )
+    parser.add_argument("crashdir", help="directory of crash data to replay")
+
+    if argv is None:
+        args = parser.parse_args()
+    else:
+        args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.crashdir):
+        print(f"{args.crashdir} is not a directory. Exiting.")
+        return 1
+
+    storage = InMemoryCrashStorage()
+    crash_ids = load_corpus(args.crashdir, storage)
+    if not crash_ids:
+        print(f"No crash data in {args.crashdir}. Exiting.")
+        return 1
+
+    # The MinidumpStackwalkRule instances are replaced with replaying rules, so
+    # they're built without minidump-stackwalk
+    with replaying_stackwalker():
+        rulesets = import_class(args.rulesets)
+    if args.ruleset not in rulesets:
+        print(f"{args.ruleset!r} is not a valid ruleset. Exiting.")
+        return 1
+
+    recorded_outputs, recorded_versions = get_recorded_data(storage, crash_ids)
+    ruleset = build_replay_ruleset(
+        rulesets[args.ruleset],
+        recorded_outputs=recorded_outputs,
+        recorded_versions=recorded_versions,
+    )
+
+    results = run_benchmark(
+        ruleset=ruleset,
+        storage=storage,
+        crash_ids=crash_ids,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        trace_allocations=args.allocations,
+    )
+    results["ruleset"] = args.ruleset
+
+    baseline = None
+    if args.baseline:
+        baseline = load_json(args.baseline)
+
+    print_results(results, baseline=baseline)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+        print("")
+        print(f"Results written to {args.output}")
+
+    return 0
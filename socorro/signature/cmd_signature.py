@@ -3,7 +3,12 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import csv
+import gzip
+import json
+import multiprocessing
 import os
 import sys
 
@@ -16,6 +21,12 @@ from .utils import convert_to_crash_data, parse_crashid
 DESCRIPTION = """
 Given one or more crash ids via command line or stdin (one per line), pulls down information from
 Socorro, generates signatures, and prints signature information.
+
+Alternatively, given one or more paths with --processed-crashes, reads processed crashes from local
+files and generates signatures in parallel. Paths can be JSONL files with one processed crash per
+line, JSON files, or directories which are searched recursively for processed crash files. This
+covers directories created by "socorro-cmd fetch_crash_data --processed" and FSPermanentStorage
+trees.
 """
 
 # FIXME(willkg): This hits production. We might want it configurable.
@@ -50,6 +61,16 @@ class OutputBase:
         """Output a separator between two crash signature generations"""
         pass
 
+    def error(self, crash_id, msg):
+        """Outputs an error for a crash that couldn't be handled
+
+        :arg str crash_id: the crash id, or the file and line for items that couldn't
+            be loaded
+        :arg str msg: the error message
+
+        """
+        self.warning(f"{crash_id}: {msg}")
+
     def data(self, crash_id, old_sig, result, verbose):
         """Outputs a data point
 
@@ -115,6 +136,24 @@ class CSVOutput(OutputBase):
         )
 
 
+class JSONLOutput(OutputBase):
+    def error(self, crash_id, msg):
+        print(json.dumps({"crashid": crash_id, "error": msg}))
+
+    def data(self, crash_id, old_sig, result, verbose):
+        data = {
+            "crashid": crash_id,
+            "old": old_sig,
+            "new": result.signature,
+            "same": old_sig == result.signature,
+            "notes": result.notes,
+        }
+        if verbose:
+            data["debug_log"] = result.debug_log
+            data["extra"] = result.extra
+        print(json.dumps(data))
+
+
 class MarkdownOutput(OutputBase):
     """Output in Markdown for use in Bugzilla and GitHub"""
 
@@ -153,6 +192,185 @@ def fetch(endpoint, crash_id, api_token=None):
     return requests.get(API_URL + endpoint, **kwargs)
 
 
+# Signature generator for the worker process; this is set in the worker by
+# _worker_initializer
+_WORKER_GENERATOR = None
+
+
+def _worker_initializer(generator_kwargs):
+    global _WORKER_GENERATOR
+    _WORKER_GENERATOR = SignatureGenerator(**generator_kwargs)
+
+
+def iter_processed_crash_items(paths):
+    """Yields items for processed crashes in the specified paths
+
+    Items are ``("line", source, text)`` for lines in JSONL files and
+    ``("file", source, path)`` for files that might be processed crashes. ``source``
+    identifies where the item came from in errors. Items are loaded and parsed in the
+    worker processes.
+
+    :arg paths: list of JSONL files, JSON files, and directories
+
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    # FSPermanentStorage stores processed crashes as .jsonz;
+                    # fetch_crash_data stores them without an extension
+                    _, ext = os.path.splitext(filename)
+                    if ext in ("", ".json", ".jsonz"):
+                        filepath = os.path.join(dirpath, filename)
+                        yield ("file", filepath, filepath)
+
+        elif path.endswith(".jsonl"):
+            with open(path, "r") as fp:
+                for lineno, line in enumerate(fp, start=1):
+                    if line.strip():
+                        yield ("line", f"{path}:{lineno}", line)
+
+        else:
+            yield ("file", path, path)
+
+
+def load_processed_crash(item):
+    """Loads a processed crash from an item
+
+    :arg item: an item from ``iter_processed_crash_items``
+
+    :returns: processed crash or None if the item isn't a processed crash
+
+    """
+    kind, _, value = item
+    if kind == "line":
+        processed_crash = json.loads(value)
+
+    elif value.endswith(".jsonz"):
+        with gzip.open(value, "rb") as fp:
+            processed_crash = json.load(fp)
+
+    else:
+        with open(value, "rb") as fp:
+            # Skip files that aren't JSON objects like minidumps
+            if fp.read(1) != b"{":
+                return None
+            fp.seek(0)
+            processed_crash = json.load(fp)
+
+    # Skip JSON files that aren't processed crashes like raw crashes
+    if (
+        not isinstance(processed_crash, dict)
+        or "signature" not in processed_crash
+        or "uuid" not in processed_crash
+    ):
+        return None
+    return processed_crash
+
+
+def generate_for_item(item, generator=None):
+    """Loads a processed crash and generates a signature for it
+
+    :arg item: an item from ``iter_processed_crash_items``
+    :arg generator: the SignatureGenerator to use; defaults to the worker process'
+        generator
+
+    :returns: ``None`` if the item is not a processed crash, ``(crash_id, error)`` if
+        there was an error, or ``(crash_id, old_signature, result)``; if the item
+        couldn't be loaded, ``crash_id`` is the item's source
+
+    """
+    generator = generator or _WORKER_GENERATOR
+    try:
+        processed_crash = load_processed_crash(item)
+    except (OSError, ValueError) as exc:
+        return (item[1], f"error loading processed crash: {exc!r}")
+
+    if processed_crash is None:
+        return None
+
+    crash_id = processed_crash["uuid"]
+    try:
+        crash_data = convert_to_crash_data(processed_crash)
+        result = generator.generate(crash_data)
+    except Exception as exc:
+        # Report the error and keep going so one bad crash doesn't end the run
+        return (crash_id, f"error generating signature: {exc!r}")
+    return (crash_id, processed_crash["signature"], result)
+
+
+def bounded_map(executor, fn, iterable, window):
+    """Like ``executor.map``, but keeps at most window tasks in flight
+
+    This yields results in order and only pulls items from the iterable as results
+    are consumed, so it can stream through very large inputs.
+
+    """
+    futures = deque()
+    for item in iterable:
+        if len(futures) >= window:
+            yield futures.popleft().result()
+        futures.append(executor.submit(fn, item))
+
+    while futures:
+        yield futures.popleft().result()
+
+
+def bulk_main(args, outputter, generator_kwargs):
+    """Generates signatures for processed crashes in local files"""
+    items = iter_processed_crash_items(args.processed_crashes)
+
+    workers = args.workers or os.cpu_count() or 1
+    if workers == 1:
+        generator = SignatureGenerator(**generator_kwargs)
+        results = (generate_for_item(item, generator) for item in items)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_worker_initializer,
+            initargs=(generator_kwargs,),
+        )
+        results = bounded_map(executor, generate_for_item, items, window=workers * 16)
+
+    total = 0
+    different = 0
+    errors = 0
+    printed = 0
+    try:
+        with outputter() as out:
+            for ret in results:
+                if ret is None:
+                    continue
+
+                if len(ret) == 2:
+                    out.error(*ret)
+                    errors += 1
+                    continue
+
+                crash_id, old_signature, result = ret
+                total += 1
+                if old_signature != result.signature:
+                    different += 1
+
+                if not args.different or old_signature != result.signature:
+                    if printed > 0:
+                        out.separator()
+                    out.data(crash_id, old_signature, result, args.verbose)
+                    printed += 1
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    print(
+        f"{total} crashes, {different} different signatures, {errors} errors",
+        file=sys.stderr,
+    )
+    return 0
+
+
 def main(argv=None):
     """Takes crash data via args and generates a Socorro signature"""
     parser = argparse.ArgumentParser(description=DESCRIPTION)
@@ -160,7 +378,7 @@ def main(argv=None):
         "-v", "--verbose", help="increase output verbosity", action="store_true"
     )
     parser.add_argument(
-        "--format", help="specify output format: csv, markdown, text (default)"
+        "--format", help="specify output format: csv, jsonl, markdown, text (default)"
     )
     parser.add_argument(
         "--different-only",
@@ -176,6 +394,25 @@ def main(argv=None):
             + "included signature list files"
         ),
     )
+    parser.add_argument(
+        "--processed-crashes",
+        action="append",
+        metavar="PATH",
+        help=(
+            "JSONL file, JSON file, or directory of processed crashes to generate "
+            + "signatures for instead of fetching processed crashes from Socorro; "
+            + "can be specified multiple times"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help=(
+            "number of worker processes to use with --processed-crashes; defaults to "
+            + "the number of cpus"
+        ),
+    )
     parser.add_argument(
         "crashids",
         metavar="crashid",
@@ -190,6 +427,8 @@ def main(argv=None):
 
     if args.format == "csv":
         outputter = CSVOutput
+    elif args.format == "jsonl":
+        outputter = JSONLOutput
     elif args.format == "markdown":
         outputter = MarkdownOutput
     else:
@@ -202,6 +441,10 @@ def main(argv=None):
         generator_kwargs = {
             "signature_list_dir": args.signature_list_dir,
         }
+
+    if args.processed_crashes:
+        return bulk_main(args, outputter, generator_kwargs)
+
     generator = SignatureGenerator(**generator_kwargs)
 
     if args.crashids:
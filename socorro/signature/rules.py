@@ -2,7 +2,6 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-from contextlib import suppress
 from functools import partial
 from itertools import islice
 import json
@@ -10,7 +9,7 @@ import re
 
 from glom import glom
 
-from .siglists_utils import get_signature_list_content
+from .siglists_utils import get_signature_list_content, SignatureListMatcher
 from .utils import (
     replace_enclosed_slices,
     collapse_arguments,
@@ -109,7 +108,15 @@ class CSignatureTool:
         self.fixup_lambda_numbers = re.compile(r"::\$_\d+::")
 
     def build_re(self, lines):
-        return re.compile("|".join(lines))
+        """Builds a matcher for a signature list
+
+        :arg lines: the regular expressions in the signature list
+
+        :returns: a SignatureListMatcher which has a ``match(text)`` method like a
+            compiled regular expression
+
+        """
+        return SignatureListMatcher(lines)
 
     def normalize_rust_function(self, function, line):
         """Normalizes a single Rust frame with a function."""
@@ -341,14 +348,22 @@ class CSignatureTool:
             debug_notes.append(f"using signature lists from {self.datadir}")
 
         # Shorten source_list to the first sentinel found
+        frame_indexes = {}
+        for i, a_signature in enumerate(source_list):
+            frame_indexes.setdefault(a_signature, i)
+
         sentinel_locations = []
         for a_sentinel in self.signature_sentinels:
+            condition_fn = None
             if type(a_sentinel) is tuple:
                 a_sentinel, condition_fn = a_sentinel
-                if not condition_fn(source_list):
-                    continue
-            with suppress(ValueError):
-                sentinel_locations.append(source_list.index(a_sentinel))
+
+            index = frame_indexes.get(a_sentinel)
+            if index is None:
+                continue
+            if condition_fn is not None and not condition_fn(source_list):
+                continue
+            sentinel_locations.append(index)
 
         if sentinel_locations:
             min_index = min(sentinel_locations)
@@ -2,6 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+from functools import lru_cache
 from pathlib import Path
 import re
 
@@ -99,3 +100,97 @@ def get_signature_list_content(name, source=INCLUDED):
         lines = lines + _SPECIAL_EXTENDED_VALUES[source]
 
     return tuple(lines)
+
+
+# Characters that have special meaning in regular expressions when not escaped
+_REGEX_SPECIAL_CHARACTERS = frozenset(".^$*+?{}[]|()")
+
+
+def parse_literal(pattern):
+    """Returns the literal string a regular expression matches or None
+
+    A regular expression is a literal if it has no special characters other than
+    escaped punctuation like ``\\[``.
+
+    :arg pattern: a regular expression
+
+    :returns: the literal string or None if the regular expression isn't a literal
+
+    """
+    chars = []
+    escaped = False
+    for c in pattern:
+        if escaped:
+            # Escapes like \d and \w are character classes, not literals
+            if c.isalnum():
+                return None
+            chars.append(c)
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif c in _REGEX_SPECIAL_CHARACTERS:
+            return None
+        else:
+            chars.append(c)
+
+    if escaped:
+        return None
+    return "".join(chars)
+
+
+class SignatureListMatcher:
+    """Matches strings against a signature list of regular expressions
+
+    This is equivalent to ``re.compile("|".join(lines)).match(text)``, but faster:
+
+    1. Lines that are literal strings are indexed by first character and matched
+       with ``str.startswith`` and only the remaining lines are matched with the
+       regular expression engine.
+    2. Results are cached in a bounded LRU cache keyed by text. Frames repeat heavily
+       across crash reports, so most lookups are cache hits.
+
+    """
+
+    def __init__(self, lines, cache_size=10_000):
+        """
+        :arg lines: iterable of regular expressions
+        :arg cache_size: maximum number of match results to cache
+        """
+        lines = tuple(lines)
+        self.pattern = "|".join(lines)
+
+        # first character -> tuple of literals starting with that character
+        literals_by_first_char = {}
+        self._match_all = False
+        regex_lines = []
+        for line in lines:
+            literal = parse_literal(line)
+            if literal is None:
+                regex_lines.append(line)
+            elif not literal:
+                # An empty line matches everything
+                self._match_all = True
+            else:
+                literals_by_first_char.setdefault(literal[0], set()).add(literal)
+
+        self._literals_by_first_char = {
+            first_char: tuple(sorted(literals))
+            for first_char, literals in literals_by_first_char.items()
+        }
+        self._regex = re.compile("|".join(regex_lines)) if regex_lines else None
+
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def __repr__(self):
+        return f"<SignatureListMatcher {self.pattern[:50]!r}>"
+
+    def _match(self, text):
+        """Returns True if the beginning of the text matches a line"""
+        if self._match_all:
+            return True
+
+        literals = self._literals_by_first_char.get(text[:1])
+        if literals and text.startswith(literals):
+            return True
+
+        return self._regex is not None and self._regex.match(text) is not None
@@ -0,0 +1,159 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import gzip
+import importlib
+import json
+
+import pytest
+
+
+# NOTE(willkg): We do this so that we can extract signature generation into its
+# own namespace as an external library. This allows the tests to run if it's in
+# "siggen" or "socorro.signature".
+BASE_MODULE = ".".join(__name__.split(".")[:-2])
+cmd_signature = importlib.import_module(BASE_MODULE + ".cmd_signature")
+
+
+def build_processed_crash(crash_id, signature, function):
+    return {
+        "uuid": crash_id,
+        "signature": signature,
+        "json_dump": {
+            "crash_info": {"crashing_thread": 0},
+            "threads": [{"frames": [{"frame": 0, "function": function}]}],
+        },
+    }
+
+
+CRASH_1 = build_processed_crash(
+    "11111111-1111-1111-1111-111111111111", "SomeFunction", "SomeFunction"
+)
+CRASH_2 = build_processed_crash(
+    "22222222-2222-2222-2222-222222222222", "OldSignature", "NewSignature"
+)
+
+
+class TestBulk:
+    def test_iter_items(self, tmp_path):
+        # fetch_crash_data layout
+        crashdir = tmp_path / "crashdir"
+        (crashdir / "v1" / "processed_crash").mkdir(parents=True)
+        (crashdir / "v1" / "processed_crash" / CRASH_1["uuid"]).write_text(
+            json.dumps(CRASH_1)
+        )
+        (crashdir / "v1" / "dump").mkdir(parents=True)
+        (crashdir / "v1" / "dump" / CRASH_1["uuid"]).write_bytes(b"MDMP")
+
+        # FSPermanentStorage layout
+        fsroot = tmp_path / "fsroot"
+        (fsroot / "20241017" / "name").mkdir(parents=True)
+        with gzip.open(fsroot / "20241017" / "name" / "crash.jsonz", "wb") as fp:
+            fp.write(json.dumps(CRASH_2).encode("utf-8"))
+
+        jsonl = tmp_path / "crashes.jsonl"
+        jsonl.write_text(json.dumps(CRASH_1) + "\n\n" + json.dumps(CRASH_2) + "\n")
+
+        items = list(
+            cmd_signature.iter_processed_crash_items(
+                [str(crashdir), str(fsroot), str(jsonl)]
+            )
+        )
+        processed_crashes = [cmd_signature.load_processed_crash(item) for item in items]
+        # The minidump is not a processed crash
+        assert processed_crashes == [None, CRASH_1, CRASH_2, CRASH_1, CRASH_2]
+
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_bulk_jsonl(self, tmp_path, capsys, workers):
+        jsonl = tmp_path / "crashes.jsonl"
+        jsonl.write_text(json.dumps(CRASH_1) + "\n" + json.dumps(CRASH_2) + "\n")
+
+        ret = cmd_signature.main(
+            [
+                "--format=jsonl",
+                f"--workers={workers}",
+                f"--processed-crashes={jsonl}",
+            ]
+        )
+        assert ret == 0
+
+        captured = capsys.readouterr()
+        lines = [json.loads(line) for line in captured.out.splitlines()]
+        assert [(line["crashid"], line["old"], line["new"]) for line in lines] == [
+            (CRASH_1["uuid"], "SomeFunction", "SomeFunction"),
+            (CRASH_2["uuid"], "OldSignature", "NewSignature"),
+        ]
+        assert "2 crashes, 1 different signatures" in captured.err
+
+    def test_bulk_different_only(self, tmp_path, capsys):
+        jsonl = tmp_path / "crashes.jsonl"
+        jsonl.write_text(json.dumps(CRASH_1) + "\n" + json.dumps(CRASH_2) + "\n")
+
+        ret = cmd_signature.main(
+            [
+                "--format=csv",
+                "--workers=1",
+                "--different-only",
+                f"--processed-crashes={jsonl}",
+            ]
+        )
+        assert ret == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 2
+        assert lines[1].startswith(f'"{CRASH_2["uuid"]}","OldSignature","NewSignature"')
+
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_bulk_errors(self, tmp_path, capsys, monkeypatch, workers):
+        generate = cmd_signature.SignatureGenerator.generate
+
+        def broken_generate(self, crash_data):
+            if crash_data["crashing_thread"] is None:
+                raise ValueError("broken crash")
+            return generate(self, crash_data)
+
+        monkeypatch.setattr(
+            cmd_signature.SignatureGenerator, "generate", broken_generate
+        )
+
+        broken_crash = build_processed_crash(
+            "33333333-3333-3333-3333-333333333333", "Broken", "Broken"
+        )
+        del broken_crash["json_dump"]["crash_info"]
+        jsonl = tmp_path / "crashes.jsonl"
+        jsonl.write_text(
+            json.dumps(CRASH_1)
+            + "\n"
+            + "{not json\n"
+            + json.dumps(broken_crash)
+            + "\n"
+            + json.dumps(CRASH_2)
+            + "\n"
+        )
+
+        ret = cmd_signature.main(
+            [
+                "--format=jsonl",
+                f"--workers={workers}",
+                f"--processed-crashes={jsonl}",
+            ]
+        )
+        assert ret == 0
+
+        # Errors are reported with the crash id or where the item came from and the
+        # rest of the crashes are still handled
+        captured = capsys.readouterr()
+        lines = [json.loads(line) for line in captured.out.splitlines()]
+        assert [line["crashid"] for line in lines] == [
+            CRASH_1["uuid"],
+            f"{jsonl}:2",
+            broken_crash["uuid"],
+            CRASH_2["uuid"],
+        ]
+        assert lines[1]["error"].startswith("error loading processed crash")
+        assert (
+            lines[2]["error"]
+            == "error generating signature: ValueError('broken crash')"
+        )
+        assert "2 crashes, 1 different signatures, 2 errors" in captured.err
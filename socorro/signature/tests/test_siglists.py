@@ -3,6 +3,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import importlib
+import re
 from pathlib import Path
 
 import pytest
@@ -55,3 +56,67 @@ class TestSigLists:
         assert "BadRegularExpressionLineError: Regex error: " in msg
         assert msg.endswith("at line 3")
         assert "test-invalid-sig-list.txt" in msg
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("fooBarStuff", "fooBarStuff"),
+        ("Allocator<T>::malloc", "Allocator<T>::malloc"),
+        (
+            r"core::slice::index::<impl Index<I> for \[T\]>",
+            "core::slice::index::<impl Index<I> for [T]>",
+        ),
+        ("moz::.*", None),
+        ("@0x[0-9a-fA-F]{2,}", None),
+        (r"foo\d", None),
+        ("foo$", None),
+        ("foo|bar", None),
+    ],
+)
+def test_parse_literal(pattern, expected):
+    assert siglists_utils.parse_literal(pattern) == expected
+
+
+class TestSignatureListMatcher:
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "fooBarStuff",
+            "fooBarStuffAndMore",
+            "fooBar",
+            "xfooBarStuff",
+            "moz::",
+            "moz::dom::Foo",
+            "@0x0",
+            "@0x00",
+            "@0xabc",
+            "[T]",
+            "[T]::index",
+            "",
+        ],
+    )
+    def test_matches_like_regex(self, text):
+        lines = ("fooBarStuff", "moz::.*", "@0x[0-9a-fA-F]{2,}", r"\[T\]")
+        matcher = siglists_utils.SignatureListMatcher(lines)
+        expected = re.compile("|".join(lines)).match(text) is not None
+        assert matcher.match(text) == expected
+
+    def test_pattern(self):
+        matcher = siglists_utils.SignatureListMatcher(("pre1", "pre2"))
+        assert matcher.pattern == "pre1|pre2"
+
+    def test_empty_line_matches_everything(self):
+        matcher = siglists_utils.SignatureListMatcher(("foo", ""))
+        assert matcher.match("bar")
+
+    def test_cache(self):
+        matcher = siglists_utils.SignatureListMatcher(("foo",), cache_size=2)
+        assert matcher.match("foo::bar")
+        assert matcher.match("foo::bar")
+        assert not matcher.match("bar")
+        assert not matcher.match("baz")
+
+        info = matcher.match.cache_info()
+        assert info.hits == 1
+        assert info.currsize == 2
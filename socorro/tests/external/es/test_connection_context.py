@@ -2,11 +2,99 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import http.server
+import json
+import threading
+
+from markus.testing import MetricsMock
+import pytest
+
 from socorro import settings
+from socorro.external.es import connection_context
+from socorro.external.es.connection_context import close_clients, get_client
 from socorro.libclass import build_instance
 from socorro.lib.libdatetime import utc_now
 
 
+@pytest.fixture
+def es_server():
+    """Fake Elasticsearch server that responds to every request with {}"""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("X-Elastic-Product", "Elasticsearch")
+            self.end_headers()
+            self.wfile.write(json.dumps({}).encode("utf-8"))
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    with server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}"
+        finally:
+            server.shutdown()
+            close_clients()
+
+
+class TestGetClient:
+    def test_shared(self):
+        try:
+            client = get_client(url="http://localhost:9200")
+            assert get_client(url="http://localhost:9200") is client
+
+            # Different settings get a different client
+            assert get_client(url="http://localhost:9201") is not client
+            assert (
+                get_client(url="http://localhost:9200", connections_per_node=2)
+                is not client
+            )
+        finally:
+            close_clients()
+
+    def test_new_clients_after_fork(self, monkeypatch):
+        try:
+            client = get_client(url="http://localhost:9200")
+
+            # Pretend this is a forked process
+            monkeypatch.setattr(connection_context, "_CLIENTS_PID", -1)
+            with MetricsMock() as mm:
+                assert get_client(url="http://localhost:9200") is not client
+                mm.assert_incr("socorro.es.pool.reset")
+        finally:
+            close_clients()
+
+    def test_pool_metrics(self, es_server):
+        client = get_client(url=es_server)
+        with MetricsMock() as mm:
+            client.info()
+            mm.assert_histogram_once("socorro.es.pool.wait_time")
+            mm.assert_gauge_once("socorro.es.pool.in_use", value=1)
+
+
+class TestConnectionContextPooled:
+    def test_connection_is_pooled(self, es_server):
+        conn = build_instance(
+            class_path="socorro.external.es.connection_context.ConnectionContext",
+            kwargs={"url": es_server, "timeout": 10},
+        )
+        client = get_client(url=es_server)
+
+        # Connections share the transport with the process-wide client and set
+        # the request timeout
+        conn1 = conn.connection()
+        conn2 = conn.connection(timeout=3)
+        assert conn1.transport is client.transport
+        assert conn2.transport is client.transport
+        assert conn1._request_timeout == 10
+        assert conn2._request_timeout == 3
+
+
 class TestConnectionContext:
     def build_conn(self):
         return build_instance(
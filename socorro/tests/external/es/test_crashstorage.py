@@ -3,15 +3,23 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 from copy import deepcopy
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
+import json
+import threading
+import time
 from unittest import mock
 
+import elasticsearch
+from elasticsearch.helpers import BulkIndexError
+import freezegun
 import glom
 from markus.testing import AnyTagValue, MetricsMock
 import pytest
 
 from socorro import settings
 from socorro.external.es.crashstorage import (
+    DocumentBuilder,
+    DocumentMissingError,
     fix_boolean,
     fix_double,
     fix_integer,
@@ -272,6 +280,105 @@ class TestESCrashStorage:
 
             mm.assert_histogram("socorro.processor.es.crash_document_size", value=169)
 
+    def test_save_processed_crash_doesnt_change_processed_crash(self):
+        processed_crash = deepcopy(SAMPLE_PROCESSED_CRASH)
+        processed_crash["date_processed"] = date_to_string(utc_now())
+        original = deepcopy(processed_crash)
+
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = [crashstorage.get_index_for_date(utc_now())]
+        conn = client.return_value.__enter__.return_value
+
+        crashstorage.save_processed_crash(raw_crash={}, processed_crash=processed_crash)
+        assert processed_crash == original
+
+        # The document is sent as the serialized bytes
+        body = conn.index.call_args.kwargs["body"]
+        assert isinstance(body, bytes)
+        doc = json.loads(body)
+        assert doc["crash_id"] == processed_crash["uuid"]
+        assert doc["processed_crash"]["json_dump"] == {"system_info": {"cpu_count": 42}}
+
+    def test_save_processed_crash_changes(self):
+        processed_crash = deepcopy(SAMPLE_PROCESSED_CRASH)
+        processed_crash["date_processed"] = date_to_string(utc_now())
+        processed_crash["signature"] = "new signature"
+        del processed_crash["cpu_arch"]
+
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = [crashstorage.get_index_for_date(utc_now())]
+        conn = client.return_value.__enter__.return_value
+
+        with MetricsMock() as mm:
+            crashstorage.save_processed_crash_changes(
+                raw_crash={},
+                processed_crash=processed_crash,
+                changed_keys={"signature", "cpu_arch", "not_indexed"},
+            )
+            mm.assert_incr(
+                "socorro.processor.es.save_changes",
+                tags=["outcome:update", AnyTagValue("host")],
+            )
+
+        # Only the changed fields are sent and deleted fields are cleared
+        assert conn.index.call_count == 0
+        assert conn.update.call_args.kwargs["id"] == processed_crash["uuid"]
+        doc = json.loads(conn.update.call_args.kwargs["body"])
+        assert doc == {
+            "doc": {"processed_crash": {"signature": "new signature", "cpu_arch": None}}
+        }
+
+    def test_save_processed_crash_changes_unindexed(self):
+        processed_crash = deepcopy(SAMPLE_PROCESSED_CRASH)
+        processed_crash["date_processed"] = date_to_string(utc_now())
+
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = [crashstorage.get_index_for_date(utc_now())]
+        conn = client.return_value.__enter__.return_value
+
+        crashstorage.save_processed_crash_changes(
+            raw_crash={}, processed_crash=processed_crash, changed_keys={"not_indexed"}
+        )
+        assert conn.update.call_count == 0
+        assert conn.index.call_count == 0
+
+    @pytest.mark.parametrize(
+        "changed_keys, update_error",
+        [
+            pytest.param({"date_processed"}, None, id="index_changed"),
+            pytest.param(
+                {"signature"},
+                elasticsearch.NotFoundError(
+                    message="document_missing_exception",
+                    meta=mock.MagicMock(status=404),
+                    body={"error": {"type": "document_missing_exception"}},
+                ),
+                id="document_missing",
+            ),
+        ],
+    )
+    def test_save_processed_crash_changes_full(self, changed_keys, update_error):
+        processed_crash = deepcopy(SAMPLE_PROCESSED_CRASH)
+        processed_crash["date_processed"] = date_to_string(utc_now())
+
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = [crashstorage.get_index_for_date(utc_now())]
+        conn = client.return_value.__enter__.return_value
+        conn.update.side_effect = update_error
+
+        crashstorage.save_processed_crash_changes(
+            raw_crash={}, processed_crash=processed_crash, changed_keys=changed_keys
+        )
+
+        # The whole document is indexed
+        doc = json.loads(conn.index.call_args.kwargs["body"])
+        assert doc["crash_id"] == processed_crash["uuid"]
+        assert doc["processed_crash"]["product"] == "Firefox"
+
     def test_index_data_capture(self, es_helper):
         """Verify we capture index data in ES crashstorage"""
         crashstorage = self.build_crashstorage()
@@ -303,6 +410,125 @@ class TestESCrashStorage:
                 tags=["outcome:failed", AnyTagValue("host")],
             )
 
+    def test_ensure_index(self):
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = ["testsocorro202401"]
+        client.create_index.return_value = True
+
+        # Middle of the week, so the next index isn't created yet
+        with freezegun.freeze_time(datetime(2024, 1, 3, tzinfo=timezone.utc)):
+            # Known indices are warmed once and aren't created
+            crashstorage.ensure_index("testsocorro202401")
+            crashstorage.ensure_index("testsocorro202401")
+            assert client.get_indices.call_count == 1
+            assert client.create_index.call_count == 0
+
+            # Unknown indices are created once and the mapping keys are known
+            # without asking Elasticsearch for the mapping
+            with MetricsMock() as mm:
+                crashstorage.ensure_index("testsocorro202402")
+                crashstorage.ensure_index("testsocorro202402")
+                mm.assert_incr_once("socorro.processor.es.create_index")
+            assert client.create_index.call_count == 1
+            assert "processed_crash.uuid" in crashstorage.get_keys_for_mapping(
+                "testsocorro202402"
+            )
+            assert client.get_mapping.call_count == 0
+
+    def test_ensure_index_creates_next_index(self):
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = ["testsocorro202401"]
+        client.create_index.return_value = True
+
+        # Less than a day before the week rolls over, so the next index is created
+        with freezegun.freeze_time(datetime(2024, 1, 7, 12, tzinfo=timezone.utc)):
+            crashstorage.ensure_index("testsocorro202401")
+            crashstorage.ensure_index("testsocorro202401")
+        assert [
+            call.kwargs["index_name"] for call in client.create_index.call_args_list
+        ] == ["testsocorro202402"]
+
+    def test_ensure_index_creating_doesnt_block_known_indices(self):
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = ["testsocorro202401"]
+        creating = threading.Event()
+        release = threading.Event()
+
+        def create_index(index_name, index_settings):
+            creating.set()
+            release.wait(10)
+            return True
+
+        client.create_index.side_effect = create_index
+
+        with freezegun.freeze_time(datetime(2024, 1, 3, tzinfo=timezone.utc)):
+            crashstorage.ensure_index("testsocorro202401")
+            thread = threading.Thread(
+                target=crashstorage.ensure_index, args=("testsocorro202402",)
+            )
+            thread.start()
+            try:
+                assert creating.wait(10)
+
+                # Known indices don't wait on the index being created
+                ensured = threading.Thread(
+                    target=crashstorage.ensure_index, args=("testsocorro202401",)
+                )
+                ensured.start()
+                ensured.join(5)
+                assert not ensured.is_alive()
+            finally:
+                release.set()
+                thread.join()
+
+        assert client.create_index.call_count == 1
+
+    def test_save_ensures_index_once(self):
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = ["testsocorro202401"]
+
+        with freezegun.freeze_time(datetime(2024, 1, 3, tzinfo=timezone.utc)):
+            with mock.patch.object(
+                crashstorage, "ensure_index", wraps=crashstorage.ensure_index
+            ) as ensure_index:
+                crashstorage.save_processed_crash(
+                    raw_crash={},
+                    processed_crash={
+                        "uuid": "0bba929f-8721-460c-dead-a43c20240103",
+                        "date_processed": "2024-01-03T00:00:00+00:00",
+                    },
+                )
+        ensure_index.assert_called_once_with("testsocorro202401")
+
+    def test_index_not_found_recreates_index(self):
+        crashstorage = self.build_crashstorage()
+        crashstorage.client = client = mock.MagicMock()
+        client.get_indices.return_value = ["testsocorro202401"]
+        conn = client.return_value.__enter__.return_value
+        conn.index.side_effect = [
+            elasticsearch.NotFoundError(
+                message="index_not_found_exception",
+                meta=mock.MagicMock(status=404),
+                body={"error": {"type": "index_not_found_exception"}},
+            ),
+            None,
+        ]
+
+        with freezegun.freeze_time(datetime(2024, 1, 3, tzinfo=timezone.utc)):
+            crashstorage._submit_crash_to_elasticsearch(
+                crash_id="abc",
+                index_name="testsocorro202401",
+                crash_document={"crash_id": "abc", "processed_crash": {}},
+            )
+        assert conn.index.call_count == 2
+        assert [
+            call.kwargs["index_name"] for call in client.create_index.call_args_list
+        ] == ["testsocorro202401"]
+
     def test_delete_expired_indices(self, es_helper):
         # Delete any existing indices first
         es_helper.delete_indices()
@@ -454,6 +680,266 @@ class TestESCrashStorage:
         assert glom.glom(doc, key, default=REMOVED_VALUE) == REMOVED_VALUE
 
 
+class TestESBulkCrashStorage:
+    def build_crashstorage(self, **kwargs):
+        options = dict(settings.ES_STORAGE["options"])
+        options.update(kwargs)
+        return build_instance_from_settings(
+            {
+                "class": "socorro.external.es.crashstorage.ESBulkCrashStorage",
+                "options": options,
+            }
+        )
+
+    def build_mock_client(self, crashstorage, bulk_side_effect):
+        client = mock.MagicMock()
+        conn = client.return_value.__enter__.return_value
+        conn.bulk.side_effect = bulk_side_effect
+        crashstorage.client = client
+        return conn
+
+    def submit_in_threads(self, crashstorage, crash_documents):
+        errors = {}
+        # Every thread is saving before any of them submits, so the flusher waits for
+        # all of the documents
+        barrier = threading.Barrier(len(crash_documents))
+
+        def _submit(crash_document):
+            try:
+                with crashstorage._saving():
+                    barrier.wait()
+                    crashstorage._submit_crash_to_elasticsearch(
+                        crash_id=crash_document["crash_id"],
+                        index_name="testsocorro202401",
+                        crash_document=crash_document,
+                    )
+            except Exception as exc:
+                errors[crash_document["crash_id"]] = exc
+
+        threads = [
+            threading.Thread(target=_submit, args=(crash_document,))
+            for crash_document in crash_documents
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_index_crash(self, es_helper):
+        """Test indexing a crash document."""
+        processed_crash = deepcopy(SAMPLE_PROCESSED_CRASH)
+        processed_crash["date_processed"] = date_to_string(utc_now())
+
+        crashstorage = self.build_crashstorage(bulk_max_latency=0.01)
+        crashstorage.save_processed_crash(
+            raw_crash={},
+            processed_crash=processed_crash,
+        )
+        crashstorage.close()
+
+        with es_helper.conn() as conn:
+            assert conn.get(
+                index=crashstorage.get_index_for_date(utc_now()),
+                id=SAMPLE_PROCESSED_CRASH["uuid"],
+            )
+
+    @pytest.mark.parametrize(
+        "key, value",
+        [
+            pytest.param(
+                "processed_crash.mac_available_memory_sysctl",
+                "not a number",
+                id="number_format_exception",
+            ),
+            pytest.param(
+                "processed_crash.user_comments",
+                "a" * 32_767,  # max string lengthis 32_766 bytes
+                id="max_bytes_length_exceeded",
+            ),
+            pytest.param(
+                "processed_crash.user_comments", {"foo": "bar"}, id="unknown_property"
+            ),
+        ],
+    )
+    def test_invalid_fields_removed(self, key, value, es_helper):
+        # create crash document
+        crash_id = create_new_ooid()
+        doc = {
+            "crash_id": crash_id,
+            "processed_crash": {
+                "date_processed": date_from_ooid(crash_id),
+                "uuid": crash_id,
+            },
+        }
+        glom.assign(doc, key, value, missing=dict)
+
+        # Save the crash data and then fetch it and verify the value is removed
+        crashstorage = self.build_crashstorage(bulk_max_latency=0.01)
+        index_name = crashstorage.get_index_for_date(
+            string_to_datetime(doc["processed_crash"]["date_processed"])
+        )
+        crashstorage._submit_crash_to_elasticsearch(
+            crash_id=crash_id,
+            index_name=index_name,
+            crash_document=doc,
+        )
+        crashstorage.close()
+        es_helper.refresh()
+
+        doc = es_helper.get_crash_data(crash_id)
+        assert glom.glom(doc, key, default=REMOVED_VALUE) == REMOVED_VALUE
+
+    def test_flush_by_count(self):
+        """Documents are sent in a single bulk request when the buffer is full"""
+        crashstorage = self.build_crashstorage(
+            bulk_max_documents=3, bulk_max_latency=60
+        )
+
+        def bulk(operations):
+            return {
+                "errors": False,
+                "items": [{"index": {"status": 201}} for _ in operations[::2]],
+            }
+
+        conn = self.build_mock_client(crashstorage, bulk)
+        crash_documents = [
+            {"crash_id": create_new_ooid(), "processed_crash": {}} for _ in range(3)
+        ]
+        errors = self.submit_in_threads(crashstorage, crash_documents)
+        crashstorage.close()
+
+        assert errors == {}
+        assert conn.bulk.call_count == 1
+        operations = conn.bulk.call_args.kwargs["operations"]
+        assert len(operations) == 6
+        assert sorted(op["index"]["_id"] for op in operations[::2]) == sorted(
+            doc["crash_id"] for doc in crash_documents
+        )
+
+    def test_flush_when_savers_waiting(self):
+        """Documents are flushed when every saver is waiting without waiting for
+        bulk_max_latency"""
+        crashstorage = self.build_crashstorage(
+            bulk_max_documents=100, bulk_max_latency=60
+        )
+
+        def bulk(operations):
+            return {
+                "errors": False,
+                "items": [{"index": {"status": 201}} for _ in operations[::2]],
+            }
+
+        conn = self.build_mock_client(crashstorage, bulk)
+        crash_documents = [
+            {"crash_id": create_new_ooid(), "processed_crash": {}} for _ in range(2)
+        ]
+        start_time = time.monotonic()
+        errors = self.submit_in_threads(crashstorage, crash_documents)
+        elapsed_time = time.monotonic() - start_time
+        crashstorage.close()
+
+        assert errors == {}
+        assert elapsed_time < 10
+        assert conn.bulk.call_count == 1
+        assert crashstorage._savers == 0
+
+    def test_item_error_fixed_and_retried(self):
+        """Per-item errors that can be fixed remove the field and retry the document"""
+        crashstorage = self.build_crashstorage(bulk_max_latency=0.01)
+
+        bad_error = {
+            "type": "document_parsing_exception",
+            "reason": (
+                "[1:11] failed to parse field [processed_crash.uptime] of type "
+                + "[long] in document with id 'abc'."
+            ),
+            "caused_by": {"type": "number_format_exception"},
+        }
+
+        def bulk(operations):
+            items = []
+            for doc in operations[1::2]:
+                if "uptime" in json.loads(doc)["processed_crash"]:
+                    items.append({"index": {"status": 400, "error": bad_error}})
+                else:
+                    items.append({"index": {"status": 201}})
+            return {"errors": True, "items": items}
+
+        conn = self.build_mock_client(crashstorage, bulk)
+        crash_document = {
+            "crash_id": create_new_ooid(),
+            "processed_crash": {"uptime": "abc", "product": "Firefox"},
+        }
+        errors = self.submit_in_threads(crashstorage, [crash_document])
+        crashstorage.close()
+
+        assert errors == {}
+        assert conn.bulk.call_count == 2
+        assert crash_document == {
+            "crash_id": crash_document["crash_id"],
+            "processed_crash": {"product": "Firefox"},
+            "removed_fields": "processed_crash.uptime",
+        }
+
+    def test_update_document_missing(self):
+        """Updates for documents that don't exist raise DocumentMissingError"""
+        crashstorage = self.build_crashstorage(bulk_max_latency=0.01)
+
+        def bulk(operations):
+            return {
+                "errors": True,
+                "items": [
+                    {
+                        "update": {
+                            "status": 404,
+                            "error": {"type": "document_missing_exception"},
+                        }
+                    }
+                    for _ in operations[::2]
+                ],
+            }
+
+        conn = self.build_mock_client(crashstorage, bulk)
+        crash_id = create_new_ooid()
+        with pytest.raises(DocumentMissingError):
+            crashstorage._submit_crash_to_elasticsearch(
+                crash_id=crash_id,
+                index_name="testsocorro202401",
+                crash_document={"processed_crash": {"signature": "OOM"}},
+                action="update",
+            )
+        crashstorage.close()
+
+        operations = conn.bulk.call_args.kwargs["operations"]
+        assert operations[0] == {
+            "update": {"_index": "testsocorro202401", "_id": crash_id}
+        }
+        assert json.loads(operations[1]) == {
+            "doc": {"processed_crash": {"signature": "OOM"}}
+        }
+
+    def test_item_error_unhandled(self):
+        """Per-item errors that can't be fixed are raised to the caller"""
+        crashstorage = self.build_crashstorage(bulk_max_latency=0.01)
+
+        def bulk(operations):
+            return {
+                "errors": True,
+                "items": [
+                    {"index": {"status": 400, "error": {"type": "weird_exception"}}}
+                    for _ in operations[::2]
+                ],
+            }
+
+        self.build_mock_client(crashstorage, bulk)
+        crash_document = {"crash_id": create_new_ooid(), "processed_crash": {}}
+        errors = self.submit_in_threads(crashstorage, [crash_document])
+        crashstorage.close()
+
+        assert isinstance(errors[crash_document["crash_id"]], BulkIndexError)
+
+
 @pytest.mark.parametrize(
     "value, expected",
     [
@@ -564,3 +1050,93 @@ def test_fix_long(value, expected):
 def test_fix_double(value, expected):
     new_value = fix_double(value)
     assert new_value == expected
+
+
+class TestDocumentBuilder:
+    FIELDS = {
+        "product": {
+            "name": "product",
+            "namespace": "processed_crash",
+            "in_database_name": "product",
+            "storage_mapping": {"type": "keyword"},
+        },
+        "uptime": {
+            "name": "uptime",
+            "namespace": "processed_crash",
+            "in_database_name": "uptime",
+            "storage_mapping": {"type": "long"},
+        },
+        "cpu_count": {
+            "name": "cpu_count",
+            "namespace": "processed_crash.json_dump.system_info",
+            "in_database_name": "cpu_count",
+            "storage_mapping": {"type": "short"},
+        },
+        "not_indexed": {
+            "name": "not_indexed",
+            "namespace": "processed_crash",
+            "in_database_name": "not_indexed",
+            "storage_mapping": None,
+        },
+    }
+
+    def test_build(self):
+        builder = DocumentBuilder(
+            self.FIELDS,
+            all_keys={
+                "processed_crash.product",
+                "processed_crash.uptime",
+                "processed_crash.json_dump.system_info.cpu_count",
+            },
+        )
+        src = {
+            "processed_crash": {
+                "product": 5,
+                "uptime": "not a number",
+                "json_dump": {"system_info": {"cpu_count": 4}},
+                "not_indexed": "abc",
+            }
+        }
+        crash_document = {}
+        builder.build(src, crash_document)
+        assert crash_document == {
+            "processed_crash": {
+                "product": "BAD DATA",
+                "json_dump": {"system_info": {"cpu_count": 4}},
+            }
+        }
+
+    def test_build_changes(self):
+        builder = DocumentBuilder(
+            self.FIELDS,
+            all_keys={
+                "processed_crash.product",
+                "processed_crash.uptime",
+                "processed_crash.json_dump.system_info.cpu_count",
+            },
+        )
+        src = {
+            "processed_crash": {
+                "product": "Firefox",
+                "uptime": 10,
+                "json_dump": {},
+            }
+        }
+        crash_document = {}
+        builder.build_changes(src, crash_document, {"uptime", "json_dump"})
+        assert crash_document == {
+            "processed_crash": {
+                "uptime": 10,
+                "json_dump": {"system_info": {"cpu_count": None}},
+            }
+        }
+
+    def test_invalid_keys_dropped(self):
+        builder = DocumentBuilder(self.FIELDS, all_keys={"processed_crash.product"})
+        assert len(builder.operations) == 1
+
+        crash_document = {}
+        builder.build(
+            {"processed_crash": {"product": "Firefox", "uptime": 10}}, crash_document
+        )
+        assert crash_document == {"processed_crash": {"product": "Firefox"}}
@@ -57,6 +57,20 @@ class SuperSearchWithFields(SuperSearch):
             kwargs["_fields"] = FIELDS
         return super().get(**kwargs)
 
+    def iter_hits(self, page_size=1000, **kwargs):
+        if "_fields" not in kwargs:
+            kwargs["_fields"] = FIELDS
+        return super().iter_hits(page_size=page_size, **kwargs)
+
+    def iter_buckets(self, field, aggs=(), page_size=1000, **kwargs):
+        if "_fields" not in kwargs:
+            kwargs["_fields"] = FIELDS
+        return super().iter_buckets(field, aggs=aggs, page_size=page_size, **kwargs)
+
+    def msearch(self, queries):
+        queries = [{"_fields": FIELDS, **kwargs} for kwargs in queries]
+        return super().msearch(queries)
+
 
 class TestIntegrationSuperSearch:
     """Test SuperSearch with an elasticsearch database containing fake data."""
@@ -648,6 +662,245 @@ class TestIntegrationSuperSearch:
         assert res["total"] == number_of_crashes
         assert len(res["hits"]) == 0
 
+    def test_iter_hits(self, es_helper):
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+        number_of_crashes = 21
+        processed_crash = {"signature": "something"}
+        es_helper.index_many_crashes(number_of_crashes, processed_crash=processed_crash)
+
+        # Page size that doesn't evenly divide the number of crashes
+        hits = list(api.iter_hits(page_size=5, _columns=["uuid", "signature"]))
+        assert len(hits) == number_of_crashes
+        assert len({hit["uuid"] for hit in hits}) == number_of_crashes
+        assert {hit["signature"] for hit in hits} == {"something"}
+
+        # Page size that evenly divides the number of crashes, _results_number is
+        # ignored
+        hits = list(api.iter_hits(page_size=7, _results_number=1))
+        assert len(hits) == number_of_crashes
+
+        # Filters are applied
+        hits = list(api.iter_hits(signature="=nothing"))
+        assert hits == []
+
+    def test_iter_hits_with_sorting(self, es_helper):
+        now = utc_now()
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+        for product in ["WaterWolf", "NightTrain", "WaterWolf", "NightTrain"]:
+            es_helper.index_crash(
+                processed_crash={
+                    "uuid": create_new_ooid(timestamp=now),
+                    "product": product,
+                    "date_processed": now,
+                },
+            )
+        es_helper.refresh()
+
+        hits = list(api.iter_hits(page_size=1, _sort="-product", _columns=["product"]))
+        assert [hit["product"] for hit in hits] == [
+            "WaterWolf",
+            "WaterWolf",
+            "NightTrain",
+            "NightTrain",
+        ]
+
+    def test_iter_hits_against_nonexistent_index(self, es_helper):
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+
+        es_helper.delete_indices()
+
+        assert list(api.iter_hits()) == []
+
+    def test_iter_hits_with_bad_page_size(self, es_helper):
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+
+        with pytest.raises(BadArgumentError):
+            list(api.iter_hits(page_size=0))
+
+        with pytest.raises(BadArgumentError):
+            list(api.iter_hits(page_size=10_001))
+
+    def test_iter_buckets(self, es_helper):
+        now = utc_now()
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+        for signature, build_id in [
+            ("OOM | small", 20180420000000),
+            ("OOM | large", 20180320000000),
+            ("OOM | large", 20180120000000),
+            ("shutdownhang", 20180220000000),
+        ]:
+            es_helper.index_crash(
+                processed_crash={
+                    "uuid": create_new_ooid(timestamp=now),
+                    "signature": signature,
+                    "build": build_id,
+                    "date_processed": now,
+                },
+            )
+        es_helper.refresh()
+
+        # Page size that doesn't evenly divide the number of terms
+        buckets = list(
+            api.iter_buckets("signature", aggs=["_min.build_id"], page_size=2)
+        )
+        assert [
+            (bucket["term"], bucket["count"], bucket["facets"]["min_build_id"]["value"])
+            for bucket in buckets
+        ] == [
+            ("OOM | large", 2, 20180120000000),
+            ("OOM | small", 1, 20180420000000),
+            ("shutdownhang", 1, 20180220000000),
+        ]
+
+        # Filters are applied
+        buckets = list(api.iter_buckets("signature", signature="=OOM | small"))
+        assert [bucket["term"] for bucket in buckets] == ["OOM | small"]
+
+    def test_iter_buckets_multiple_fields(self, es_helper):
+        now = utc_now()
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+        for product, signature in [
+            ("Firefox", "OOM | small"),
+            ("Firefox", "OOM | small"),
+            ("Firefox", "shutdownhang"),
+            ("Thunderbird", "OOM | small"),
+        ]:
+            es_helper.index_crash(
+                processed_crash={
+                    "uuid": create_new_ooid(timestamp=now),
+                    "product": product,
+                    "signature": signature,
+                    "date_processed": now,
+                },
+            )
+        es_helper.refresh()
+
+        buckets = list(api.iter_buckets(["product", "signature"], page_size=2))
+        assert [(bucket["term"], bucket["count"]) for bucket in buckets] == [
+            (("Firefox", "OOM | small"), 2),
+            (("Firefox", "shutdownhang"), 1),
+            (("Thunderbird", "OOM | small"), 1),
+        ]
+
+    def test_iter_buckets_include_missing(self, es_helper):
+        now = utc_now()
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+        for process_type in ["parent", "parent", None]:
+            processed_crash = {
+                "uuid": create_new_ooid(timestamp=now),
+                "product": "Firefox",
+                "signature": "OOM | small",
+                "date_processed": now,
+            }
+            if process_type is not None:
+                processed_crash["process_type"] = process_type
+            es_helper.index_crash(processed_crash=processed_crash)
+        es_helper.refresh()
+
+        # Documents missing a field are skipped by default
+        buckets = list(api.iter_buckets(["product", "process_type"]))
+        assert [(bucket["term"], bucket["count"]) for bucket in buckets] == [
+            (("Firefox", "parent"), 2),
+        ]
+
+        # With include_missing, they're counted in buckets with None terms
+        buckets = list(
+            api.iter_buckets(["product", "process_type"], include_missing=True)
+        )
+        assert [(bucket["term"], bucket["count"]) for bucket in buckets] == [
+            (("Firefox", None), 1),
+            (("Firefox", "parent"), 2),
+        ]
+
+    def test_iter_buckets_against_nonexistent_index(self, es_helper):
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+
+        es_helper.delete_indices()
+
+        assert list(api.iter_buckets("signature")) == []
+
+    def test_iter_buckets_with_bad_arguments(self, es_helper):
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+
+        with pytest.raises(BadArgumentError):
+            list(api.iter_buckets("signature", page_size=0))
+
+        with pytest.raises(BadArgumentError):
+            list(api.iter_buckets("not_a_field"))
+
+        with pytest.raises(BadArgumentError):
+            list(api.iter_buckets(["signature", "not_a_field"]))
+
+    def test_msearch(self, es_helper):
+        now = utc_now()
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+        for signature, product in [
+            ("OOM | small", "WaterWolf"),
+            ("OOM | small", "NightTrain"),
+            ("shutdownhang", "WaterWolf"),
+        ]:
+            es_helper.index_crash(
+                processed_crash={
+                    "uuid": create_new_ooid(timestamp=now),
+                    "signature": signature,
+                    "product": product,
+                    "date_processed": now,
+                },
+            )
+        es_helper.refresh()
+
+        queries = [
+            {"signature": "=OOM | small", "_columns": ["uuid", "product"]},
+            {"_results_number": 0, "_facets": ["signature"]},
+            {"signature": "=nothing"},
+        ]
+        results = api.msearch(queries)
+        assert len(results) == len(queries)
+        for query, result in zip(queries, results, strict=True):
+            expected = api.get(**query)
+            assert result["total"] == expected["total"]
+            assert sorted(result["hits"], key=lambda hit: hit["uuid"]) == sorted(
+                expected["hits"], key=lambda hit: hit["uuid"]
+            )
+            assert result["facets"] == expected["facets"]
+
+        assert results[0]["total"] == 2
+        assert all(set(hit) == {"uuid", "product"} for hit in results[0]["hits"])
+        assert results[1]["hits"] == []
+        assert results[1]["facets"]["signature"] == [
+            {"term": "OOM | small", "count": 2},
+            {"term": "shutdownhang", "count": 1},
+        ]
+        assert results[2]["total"] == 0
+
+        assert api.msearch([]) == []
+
+    def test_msearch_against_nonexistent_index(self, es_helper):
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+
+        es_helper.delete_indices()
+
+        results = api.msearch([{}, {"_facets": ["signature"]}])
+        assert [result["total"] for result in results] == [0, 0]
+
+    def test_msearch_with_bad_arguments(self, es_helper):
+        crashstorage = self.build_crashstorage()
+        api = SuperSearchWithFields(crashstorage=crashstorage)
+
+        with pytest.raises(BadArgumentError):
+            api.msearch([{}, {"_results_number": 10_001}])
+
     def test_get_with_sorting(self, es_helper):
         """Test a search with sort returns expected results"""
         now = utc_now()
@@ -1955,6 +2208,91 @@ class TestIntegrationSuperSearch:
                 with pytest.raises(BadArgumentError):
                     api.get(signature="@a?a?a?a?a?")
 
+    def test_msearch_with_too_complex_query(self):
+        ip, port = "127.0.0.1", 9997
+        msearch_response = {
+            "took": 1,
+            "responses": [
+                {
+                    "took": 1,
+                    "timed_out": False,
+                    "_shards": {"total": 1, "successful": 1, "failed": 0},
+                    "hits": {
+                        "total": {"value": 0, "relation": "eq"},
+                        "hits": [],
+                    },
+                },
+                {
+                    "error": {
+                        "type": "search_phase_execution_exception",
+                        "reason": "all shards failed",
+                        "caused_by": {
+                            "type": "too_complex_to_determinize_exception",
+                            "reason": "Determinizing automaton would require "
+                            + "more than 10000 effort.",
+                        },
+                    },
+                    "status": 400,
+                },
+            ],
+        }
+        with settings.override(**{"ES_STORAGE.options.url": f"http://{ip}:{port}"}):
+            crashstorage = self.build_crashstorage()
+            api = SuperSearchWithFields(crashstorage=crashstorage)
+
+            with mock_es_server(ip, port, msearch_response):
+                with pytest.raises(BadArgumentError):
+                    api.msearch([{}, {"signature": "@a?a?a?a?a?"}])
+
+    def test_msearch_columns_per_query(self):
+        ip, port = "127.0.0.1", 9996
+        source = {
+            "processed_crash": {
+                "uuid": create_new_ooid(),
+                "product": "WaterWolf",
+                "signature": "OOM | small",
+                "user_comments": "it crashed",
+            }
+        }
+
+        def search_response():
+            return {
+                "took": 1,
+                "timed_out": False,
+                "_shards": {"total": 1, "successful": 1, "failed": 0},
+                "hits": {
+                    "total": {"value": 1, "relation": "eq"},
+                    "hits": [
+                        {
+                            "_index": "testsocorro202401",
+                            "_id": source["processed_crash"]["uuid"],
+                            "_source": deepcopy(source),
+                        }
+                    ],
+                },
+            }
+
+        msearch_response = {
+            "took": 1,
+            "responses": [search_response(), search_response()],
+        }
+        with settings.override(**{"ES_STORAGE.options.url": f"http://{ip}:{port}"}):
+            crashstorage = self.build_crashstorage()
+            api = SuperSearchWithFields(crashstorage=crashstorage)
+
+            with mock_es_server(ip, port, msearch_response):
+                results = api.msearch(
+                    [
+                        {"_columns": ["uuid", "user_comments"]},
+                        {"_columns": ["uuid", "product", "signature"]},
+                    ]
+                )
+
+        # Each search's hits have the columns that search asked for
+        assert list(results[0]["hits"][0]) == ["uuid", "user_comments"]
+        assert results[0]["hits"][0]["user_comments"] == "it crashed"
+        assert list(results[1]["hits"][0]) == ["uuid", "product", "signature"]
+
     def test_get_with_connection_timeout(self, es_helper):
         ip, port = "127.0.0.1", 9999
         with settings.override(
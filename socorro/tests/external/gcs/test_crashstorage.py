@@ -6,6 +6,7 @@ import json
 import os.path
 import os
 
+from google.auth.transport.requests import AuthorizedSession
 import pytest
 
 from socorro.external.gcs.crashstorage import build_keys, dict_to_str
@@ -71,6 +72,30 @@ def test_build_keys(kind, crashid, expected):
 
 
 class TestGcsCrashStorage:
+    @pytest.mark.parametrize(
+        "fetch_workers, pool_maxsize",
+        [
+            pytest.param(4, 10, id="requests_default"),
+            pytest.param(32, 32, id="fetch_workers"),
+        ],
+    )
+    def test_http_connection_pool(self, fetch_workers, pool_maxsize):
+        crashstorage = build_instance_from_settings(
+            {
+                "class": CRASHSTORAGE_SETTINGS["class"],
+                "options": {
+                    **CRASHSTORAGE_SETTINGS["options"],
+                    "fetch_workers": fetch_workers,
+                },
+            }
+        )
+        # The client uses the session with the sized connection pool
+        http = crashstorage.client._http
+        assert isinstance(http, AuthorizedSession)
+        for prefix in ("https://", "http://"):
+            adapter = http.get_adapter(prefix + "storage.googleapis.com")
+            assert adapter.poolmanager.connection_pool_kw["maxsize"] == pool_maxsize
+
     def test_save_raw_crash_no_dumps(self, gcs_helper):
         crashstorage = build_instance_from_settings(CRASHSTORAGE_SETTINGS)
         bucket = CRASHSTORAGE_SETTINGS["options"]["bucket"]
@@ -352,6 +377,131 @@ class TestGcsCrashStorage:
         }
         assert result == expected
 
+    def test_get_lazy_dumps_as_files(self, gcs_helper, tmp_path):
+        crashstorage = build_instance_from_settings(CRASHSTORAGE_SETTINGS)
+        bucket = CRASHSTORAGE_SETTINGS["options"]["bucket"]
+        crash_id = create_new_ooid()
+
+        gcs_helper.create_bucket(bucket)
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/dump_names/{crash_id}",
+            data=b'["dump", "content_dump"]',
+        )
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/dump/{crash_id}",
+            data=b'this is "dump", the first one',
+        )
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/content_dump/{crash_id}",
+            data=b'this is "content_dump", the second one',
+        )
+
+        dumps = crashstorage.get_lazy_dumps_as_files(
+            crash_id=crash_id, tmpdir=str(tmp_path)
+        )
+
+        # Dump names are known, but nothing has been saved to files, yet
+        assert sorted(dumps.keys()) == ["content_dump", "upload_file_minidump"]
+        assert os.listdir(str(tmp_path)) == []
+
+        # Accessing a dump saves only that dump to a file
+        path = dumps["content_dump"]
+        assert path == os.path.join(
+            str(tmp_path), f"{crash_id}.content_dump.TEMPORARY.dump"
+        )
+        assert os.listdir(str(tmp_path)) == [os.path.basename(path)]
+        with open(path, "rb") as fp:
+            assert fp.read() == b'this is "content_dump", the second one'
+
+    def test_get_crash_data_as_files(self, gcs_helper, tmp_path):
+        crashstorage = build_instance_from_settings(CRASHSTORAGE_SETTINGS)
+        bucket = CRASHSTORAGE_SETTINGS["options"]["bucket"]
+        crash_id = create_new_ooid()
+
+        gcs_helper.create_bucket(bucket)
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/raw_crash/20{crash_id[-6:]}/{crash_id}",
+            data=b'{"submitted_timestamp": "2013-01-09T22:21:18.646733+00:00"}',
+        )
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/dump_names/{crash_id}",
+            data=b'["dump", "content_dump"]',
+        )
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/dump/{crash_id}",
+            data=b'this is "dump", the first one',
+        )
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/content_dump/{crash_id}",
+            data=b'this is "content_dump", the second one',
+        )
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/processed_crash/{crash_id}",
+            data=b'{"uuid": "%s"}' % crash_id.encode("utf-8"),
+        )
+
+        raw_crash, dumps, processed_crash = crashstorage.get_crash_data_as_files(
+            crash_id=crash_id, tmpdir=str(tmp_path)
+        )
+
+        assert raw_crash == {"submitted_timestamp": "2013-01-09T22:21:18.646733+00:00"}
+        assert dumps == {
+            "content_dump": os.path.join(
+                str(tmp_path),
+                f"{crash_id}.content_dump.TEMPORARY.dump",
+            ),
+            "upload_file_minidump": os.path.join(
+                str(tmp_path),
+                f"{crash_id}.upload_file_minidump.TEMPORARY.dump",
+            ),
+        }
+        with open(dumps["content_dump"], "rb") as fp:
+            assert fp.read() == b'this is "content_dump", the second one'
+        assert processed_crash == {"uuid": crash_id}
+
+    def test_get_crash_data_as_files_no_processed_crash(self, gcs_helper, tmp_path):
+        crashstorage = build_instance_from_settings(CRASHSTORAGE_SETTINGS)
+        bucket = CRASHSTORAGE_SETTINGS["options"]["bucket"]
+        crash_id = create_new_ooid()
+
+        gcs_helper.create_bucket(bucket)
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/raw_crash/20{crash_id[-6:]}/{crash_id}",
+            data=b"{}",
+        )
+        gcs_helper.upload(
+            bucket_name=bucket,
+            key=f"v1/dump_names/{crash_id}",
+            data=b"[]",
+        )
+
+        raw_crash, dumps, processed_crash = crashstorage.get_crash_data_as_files(
+            crash_id=crash_id, tmpdir=str(tmp_path)
+        )
+        assert raw_crash == {}
+        assert dumps == {}
+        assert processed_crash is None
+
+    def test_get_crash_data_as_files_not_found(self, gcs_helper, tmp_path):
+        crashstorage = build_instance_from_settings(CRASHSTORAGE_SETTINGS)
+        bucket = CRASHSTORAGE_SETTINGS["options"]["bucket"]
+        crash_id = create_new_ooid()
+
+        gcs_helper.create_bucket(bucket)
+        with pytest.raises(CrashIDNotFound):
+            crashstorage.get_crash_data_as_files(
+                crash_id=crash_id, tmpdir=str(tmp_path)
+            )
+
     def test_get_processed_crash(self, gcs_helper):
         crashstorage = build_instance_from_settings(CRASHSTORAGE_SETTINGS)
         bucket = CRASHSTORAGE_SETTINGS["options"]["bucket"]
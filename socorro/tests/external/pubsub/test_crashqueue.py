@@ -5,6 +5,7 @@
 # This is tested using test settings (docker/config/test.env) and Pub/Sub emulator.
 
 import time
+from unittest import mock
 
 import pytest
 
@@ -184,3 +185,143 @@ class TestPubSubCrashQueue:
             ]
 
             assert "NotFound Topic not found" in errors
+
+
+class TestAdaptivePubSubCrashQueue:
+    def test_pull_size_uses_capacity(self, pubsub_helper):
+        standard_crashids = []
+        for _ in range(10):
+            crashid = create_new_ooid()
+            standard_crashids.append(crashid)
+            pubsub_helper.publish("standard", crashid)
+
+        # wait for published messages to become available before pulling
+        time.sleep(PUBSUB_DELAY_PULL)
+
+        crashqueue = build_instance_from_settings(settings.QUEUE_PUBSUB_ADAPTIVE)
+        crashqueue.set_capacity_func(lambda: 8)
+        with mock.patch.object(
+            crashqueue.subscriber, "pull", wraps=crashqueue.subscriber.pull
+        ) as mock_pull:
+            new_crashes = [item[0][0] for item in crashqueue.new_crashes()]
+
+        assert list(sorted(new_crashes)) == list(sorted(standard_crashids))
+        assert mock_pull.call_args_list[0].kwargs["max_messages"] == 8
+        crashqueue.close()
+
+    def test_pull_size(self):
+        crashqueue = build_instance_from_settings(settings.QUEUE_PUBSUB_ADAPTIVE)
+        crashqueue.max_pull_messages = 50
+        standard = crashqueue.standard_subscription_path
+
+        # No capacity function uses the per-subscription value
+        assert crashqueue.get_pull_size(standard, 5, {}) == 5
+
+        crashqueue.set_capacity_func(lambda: None)
+        assert crashqueue.get_pull_size(standard, 5, {}) == 5
+
+        crashqueue.set_capacity_func(lambda: 20)
+        assert crashqueue.get_pull_size(standard, 5, {}) == 20
+
+        crashqueue.set_capacity_func(lambda: 1000)
+        assert crashqueue.get_pull_size(standard, 5, {}) == 50
+
+        crashqueue.set_capacity_func(lambda: 0)
+        assert crashqueue.get_pull_size(standard, 5, {}) == 1
+
+    def test_pull_size_priority_backlog(self):
+        crashqueue = build_instance_from_settings(settings.QUEUE_PUBSUB_ADAPTIVE)
+        crashqueue.max_pull_messages = 50
+        crashqueue.set_capacity_func(lambda: 20)
+        priority = crashqueue.priority_subscription_path
+        standard = crashqueue.standard_subscription_path
+
+        # Standard pulls are capped while priority has a backlog
+        assert crashqueue.get_pull_size(standard, 5, {priority: True}) == 5
+        assert crashqueue.get_pull_size(standard, 5, {priority: False}) == 20
+        assert crashqueue.get_pull_size(priority, 5, {priority: True}) == 20
+
+    def test_pull_priority_first(self):
+        crashqueue = build_instance_from_settings(settings.QUEUE_PUBSUB_ADAPTIVE)
+        crashqueue.max_pull_messages = 50
+        crashqueue.set_capacity_func(lambda: 8)
+        priority = crashqueue.priority_subscription_path
+        standard = crashqueue.standard_subscription_path
+
+        def build_msg(crash_id):
+            msg = mock.Mock(ack_id=f"ack{crash_id}")
+            msg.message.data = crash_id.encode("utf-8")
+            return msg
+
+        # Priority has a backlog the first round and is empty the second
+        priority_ids = [f"p{i}" for i in range(8)]
+        responses = {
+            priority: [[build_msg(crash_id) for crash_id in priority_ids], []],
+            standard: [[build_msg("s1")], []],
+        }
+
+        def pull(subscription, max_messages, return_immediately):
+            msgs = responses.get(subscription, [[]])
+            return mock.Mock(received_messages=msgs.pop(0) if msgs else [])
+
+        with mock.patch.object(crashqueue, "subscriber") as mock_subscriber:
+            mock_subscriber.pull.side_effect = pull
+            crash_ids = [item[0][0] for item in crashqueue.new_crashes()]
+            pulls = [
+                (call.kwargs["subscription"], call.kwargs["max_messages"])
+                for call in mock_subscriber.pull.call_args_list
+            ]
+            crashqueue.close()
+
+        assert crash_ids == priority_ids + ["s1"]
+        # Priority is pulled first and the standard pull is capped at
+        # standard_pull_max_messages while priority has a backlog
+        assert pulls[0] == (priority, 8)
+        assert pulls[1] == (standard, 5)
+
+    def test_acks_are_batched(self):
+        crashqueue = build_instance_from_settings(settings.QUEUE_PUBSUB_ADAPTIVE)
+        crashqueue.ack_interval = 60
+        subscription_path = crashqueue.standard_subscription_path
+
+        with mock.patch.object(crashqueue, "subscriber") as mock_subscriber:
+            for i in range(3):
+                crashqueue.lease(subscription_path, f"ackid{i}")
+            for i in range(3):
+                crashqueue.ack_crash(subscription_path, f"ackid{i}")
+
+            # Nothing is acked until the acks are flushed
+            mock_subscriber.acknowledge.assert_not_called()
+
+            crashqueue.close()
+            mock_subscriber.acknowledge.assert_called_once_with(
+                subscription=subscription_path,
+                ack_ids=["ackid0", "ackid1", "ackid2"],
+            )
+
+    def test_extend_leases(self):
+        crashqueue = build_instance_from_settings(settings.QUEUE_PUBSUB_ADAPTIVE)
+        crashqueue.ack_interval = 60
+        crashqueue.ack_deadline_seconds = 10
+        subscription_path = crashqueue.standard_subscription_path
+
+        with mock.patch.object(crashqueue, "subscriber") as mock_subscriber:
+            crashqueue.lease(subscription_path, "ackid0")
+            crashqueue.lease(subscription_path, "ackid1")
+            crashqueue.ack_crash(subscription_path, "ackid1")
+
+            # Too early to extend anything
+            crashqueue.extend_leases()
+            mock_subscriber.modify_ack_deadline.assert_not_called()
+
+            # Pretend the message was pulled a while ago; only the unacked message
+            # gets extended
+            crashqueue._leases["ackid0"] = (subscription_path, time.monotonic() - 6)
+            crashqueue.extend_leases()
+            mock_subscriber.modify_ack_deadline.assert_called_once_with(
+                subscription=subscription_path,
+                ack_ids=["ackid0"],
+                ack_deadline_seconds=10,
+            )
+
+            crashqueue.close()
@@ -2,11 +2,19 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import copy
+import json
+from unittest import mock
+
 import pytest
 
 from socorro.external.crashstorage_base import (
     CrashStorageBase,
+    InMemoryCrashStorage,
+    LazyFileDumpsMapping,
+    LazyRawCrash,
     MemoryDumpsMapping,
+    TrackedProcessedCrash,
 )
 
 
@@ -44,3 +52,192 @@ class TestDumpsMappings:
         fdm = mdm.as_file_dumps_mapping("a", "/tmp", "dump")
         assert fdm.as_file_dumps_mapping() is fdm
         assert fdm.as_memory_dumps_mapping() == mdm
+
+
+class TestLazyFileDumpsMapping:
+    def test_fetch_on_access(self):
+        get_names = mock.Mock(return_value=["upload_file_minidump", "memory_report"])
+        fetch = mock.Mock(
+            side_effect=lambda names: {name: f"/tmp/{name}" for name in names}
+        )
+        dumps = LazyFileDumpsMapping(get_names=get_names, fetch=fetch)
+
+        # Nothing is fetched until it's needed
+        assert get_names.call_count == 0
+
+        assert "memory_report" in dumps
+        assert sorted(dumps.keys()) == ["memory_report", "upload_file_minidump"]
+        assert get_names.call_count == 1
+        assert fetch.call_count == 0
+
+        # Dumps are fetched once when they're accessed
+        assert dumps["memory_report"] == "/tmp/memory_report"
+        assert dumps["memory_report"] == "/tmp/memory_report"
+        fetch.assert_called_once_with(["memory_report"])
+
+        with pytest.raises(KeyError):
+            dumps["nonexistent"]
+
+        # Prefetching fetches the rest with one call
+        dumps.prefetch()
+        fetch.assert_called_with(["upload_file_minidump"])
+        assert dict(dumps.items()) == {
+            "upload_file_minidump": "/tmp/upload_file_minidump",
+            "memory_report": "/tmp/memory_report",
+        }
+        assert fetch.call_count == 2
+
+    def test_get_lazy_dumps_as_files(self, tmp_path):
+        crash_id = "0bba929f-8721-460c-dead-a43c20071025"
+        crashstorage = InMemoryCrashStorage()
+        crashstorage.save_raw_crash(
+            raw_crash={},
+            dumps={"upload_file_minidump": b"abc", "memory_report": b"def"},
+            crash_id=crash_id,
+        )
+
+        dumps = crashstorage.get_lazy_dumps_as_files(crash_id, str(tmp_path))
+        assert list(tmp_path.iterdir()) == []
+        with open(dumps["memory_report"], "rb") as fp:
+            assert fp.read() == b"def"
+
+
+class TestLazyRawCrash:
+    def test_fetch_on_access(self):
+        fetch = mock.Mock(return_value={"uuid": "1"})
+        raw_crash = LazyRawCrash(fetch)
+        assert not raw_crash.is_loaded
+        assert fetch.call_count == 0
+
+        assert raw_crash["uuid"] == "1"
+        raw_crash["ProductName"] = "Firefox"
+        assert dict(raw_crash) == {"uuid": "1", "ProductName": "Firefox"}
+        assert raw_crash.is_loaded
+        assert fetch.call_count == 1
+
+
+class TestTrackedProcessedCrash:
+    def test_changes(self):
+        processed_crash = TrackedProcessedCrash(
+            {"a": 1, "b": 2, "c": 3, "d": {"e": 4}, "f": 5}
+        )
+        assert processed_crash.changed_keys == frozenset()
+
+        # Reading plain values isn't a change
+        assert processed_crash["a"] == 1
+        assert processed_crash.get("b") == 2
+        assert processed_crash.changed_keys == frozenset()
+
+        processed_crash["a"] = 10
+        processed_crash.setdefault("g", 6)
+        processed_crash.setdefault("b", 20)
+        processed_crash.pop("c")
+        del processed_crash["f"]
+        assert processed_crash.changed_keys == frozenset({"a", "c", "f", "g"})
+        assert processed_crash.deleted_keys == frozenset({"c", "f"})
+
+        # Changing a dict value in place is a change
+        processed_crash["d"]["e"] = 40
+        assert "d" in processed_crash.changed_keys
+
+        # Setting a deleted key again means it's no longer deleted
+        processed_crash["c"] = 30
+        assert processed_crash.deleted_keys == frozenset({"f"})
+
+    def test_reading_nested_values(self):
+        processed_crash = TrackedProcessedCrash(
+            {
+                "json_dump": {
+                    "crashing_thread": 0,
+                    "threads": [{"frames": [{"function": "foo"}]}],
+                },
+                "modules": [{"filename": "xul.dll"}],
+            }
+        )
+
+        # Reading nested values in every way isn't a change
+        assert processed_crash["json_dump"]["threads"][0]["frames"][0] == {
+            "function": "foo"
+        }
+        assert processed_crash.get("json_dump").get("crashing_thread") == 0
+        for thread in processed_crash["json_dump"]["threads"]:
+            for frame in thread["frames"]:
+                assert frame["function"] == "foo"
+        assert [module["filename"] for module in processed_crash["modules"]] == [
+            "xul.dll"
+        ]
+        assert list(processed_crash.items())
+        assert processed_crash.changed_keys == frozenset()
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            pytest.param(lambda pc: pc["json_dump"].update(extra=1), id="dict_update"),
+            pytest.param(lambda pc: pc["json_dump"].pop("threads"), id="dict_pop"),
+            pytest.param(
+                lambda pc: pc["json_dump"]["threads"].append({}), id="list_append"
+            ),
+            pytest.param(
+                lambda pc: pc["json_dump"]["threads"][0]["frames"].clear(),
+                id="nested_list_clear",
+            ),
+            pytest.param(
+                lambda pc: pc["json_dump"]["threads"][0]["frames"][0].update(
+                    function="bar"
+                ),
+                id="nested_dict_update",
+            ),
+            pytest.param(
+                lambda pc: [
+                    frame.update(function="bar")
+                    for frame in pc["json_dump"]["threads"][0]["frames"]
+                ],
+                id="iterate_and_update",
+            ),
+            pytest.param(
+                lambda pc: dict(pc.items())["json_dump"].update(extra=1),
+                id="items",
+            ),
+            pytest.param(lambda pc: pc.copy()["json_dump"]["threads"].pop(), id="copy"),
+            pytest.param(
+                lambda pc: pc["json_dump"]["threads"][:1][0].clear(), id="slice"
+            ),
+        ],
+    )
+    def test_changing_nested_values(self, change):
+        processed_crash = TrackedProcessedCrash(
+            {
+                "json_dump": {
+                    "crashing_thread": 0,
+                    "threads": [{"frames": [{"function": "foo"}]}],
+                },
+                "signature": "OOM | small",
+            }
+        )
+        change(processed_crash)
+        assert processed_crash.changed_keys == frozenset({"json_dump"})
+        assert processed_crash.deleted_keys == frozenset()
+
+    def test_copies_are_plain(self):
+        processed_crash = TrackedProcessedCrash({"json_dump": {"threads": [{}]}})
+        threads = processed_crash["json_dump"]["threads"]
+
+        # Deep copies aren't tracked and are plain dicts and lists
+        json_dump = copy.deepcopy(processed_crash["json_dump"])
+        assert type(json_dump) is dict
+        assert type(json_dump["threads"]) is list
+        json_dump["threads"].append({})
+        assert processed_crash.changed_keys == frozenset()
+
+        assert type(threads.copy()) is list
+
+        # Deep copies of the processed crash are plain, too
+        processed_crash_copy = copy.deepcopy(processed_crash)
+        assert type(processed_crash_copy) is dict
+        assert type(processed_crash_copy["json_dump"]["threads"]) is list
+        assert processed_crash_copy == {"json_dump": {"threads": [{}]}}
+        processed_crash_copy["json_dump"]["threads"].append({})
+        assert processed_crash.changed_keys == frozenset()
+        assert json.loads(json.dumps(processed_crash)) == {
+            "json_dump": {"threads": [{}]}
+        }
@@ -383,6 +383,36 @@ class TestSocorroDataReducer:
         }
         assert self.schema_reduce(schema, document) == expected_document
 
+    def test_invalid_nested_path(self):
+        schema = {
+            "$schema": "moz://mozilla.org/schemas/socorro/socorro-data/1-0-0",
+            "type": "object",
+            "properties": {
+                "threads": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "pattern_properties": {
+                            r"^r.*$": {"type": "string"},
+                        },
+                    },
+                },
+            },
+        }
+        self.validate_schema(schema)
+
+        reducer = SocorroDataReducer(schema=schema)
+
+        # The compiled reducer is reused across documents
+        document = {"threads": [{"r8": "0x0"}, {"r9": "0x1", "pc": "0x2"}]}
+        expected_document = {"threads": [{"r8": "0x0"}, {"r9": "0x1"}]}
+        assert reducer.traverse(document) == expected_document
+
+        document = {"threads": [{"r8": "0x0"}, {"r9": 5}]}
+        msg_pattern = r"invalid: .threads.\[1\].r9: type integer not in \['string'\]"
+        with pytest.raises(InvalidDocumentError, match=msg_pattern):
+            reducer.traverse(document)
+
     def test_array(self):
         schema = {
             "$schema": "moz://mozilla.org/schemas/socorro/socorro-data/1-0-0",
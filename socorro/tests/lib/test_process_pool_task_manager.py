@@ -0,0 +1,141 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import os
+import signal
+import time
+
+from socorro.lib.process_pool_task_manager import ProcessPoolTaskManager
+
+
+class TestProcessPoolTaskManager:
+    def test_blocking_start_with_quit_on_empty(self, tmp_path):
+        def task_func(index):
+            (tmp_path / str(index)).write_text(str(os.getpid()))
+
+        tm = ProcessPoolTaskManager(
+            number_of_processes=2,
+            maximum_queue_size=2,
+            quit_on_empty_queue=True,
+            task_func=task_func,
+        )
+
+        tm.blocking_start()
+        assert sorted(int(path.name) for path in tmp_path.iterdir()) == list(range(10))
+
+        # Tasks ran in the worker processes
+        pids = {path.read_text() for path in tmp_path.iterdir()}
+        assert str(os.getpid()) not in pids
+
+    def test_finished_func_called_in_parent(self):
+        finished = []
+
+        def task_func(index):
+            pass
+
+        def job_source_iterator():
+            for index in range(5):
+                yield (
+                    (index,),
+                    {"finished_func": lambda index=index: finished.append(index)},
+                )
+
+        tm = ProcessPoolTaskManager(
+            number_of_processes=2,
+            maximum_queue_size=2,
+            quit_on_empty_queue=True,
+            task_func=task_func,
+            job_source_iterator=job_source_iterator,
+        )
+
+        tm.blocking_start()
+        assert sorted(finished) == list(range(5))
+
+    def test_finished_func_called_on_error(self):
+        finished = []
+
+        def task_func(index):
+            raise ValueError("bad task")
+
+        def job_source_iterator():
+            for index in range(3):
+                yield (
+                    (index,),
+                    {"finished_func": lambda index=index: finished.append(index)},
+                )
+
+        tm = ProcessPoolTaskManager(
+            number_of_processes=1,
+            maximum_queue_size=1,
+            quit_on_empty_queue=True,
+            task_func=task_func,
+            job_source_iterator=job_source_iterator,
+        )
+
+        tm.blocking_start()
+        assert sorted(finished) == list(range(3))
+
+    def test_worker_init_func(self, tmp_path):
+        def worker_init_func():
+            (tmp_path / f"init-{os.getpid()}").write_text("")
+
+        tm = ProcessPoolTaskManager(
+            number_of_processes=2,
+            maximum_queue_size=2,
+            quit_on_empty_queue=True,
+            worker_init_func=worker_init_func,
+        )
+
+        tm.blocking_start()
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_worker_resets_sigterm_handler(self, tmp_path):
+        def worker_init_func():
+            handler = signal.getsignal(signal.SIGTERM)
+            (tmp_path / f"init-{os.getpid()}").write_text(
+                str(handler == signal.SIG_DFL)
+            )
+
+        def parent_handler(signum, frame):
+            pass
+
+        tm = ProcessPoolTaskManager(
+            number_of_processes=2,
+            maximum_queue_size=2,
+            quit_on_empty_queue=True,
+            worker_init_func=worker_init_func,
+        )
+
+        old_handler = signal.signal(signal.SIGTERM, parent_handler)
+        try:
+            tm.blocking_start()
+        finally:
+            signal.signal(signal.SIGTERM, old_handler)
+
+        # Workers don't run the parent's SIGTERM handler
+        assert [path.read_text() for path in tmp_path.iterdir()] == ["True", "True"]
+
+    def test_free_capacity(self):
+        capacities = []
+
+        def task_func(index):
+            time.sleep(0.5)
+
+        def job_source_iterator():
+            capacities.append(tm.free_capacity())
+            for index in range(2):
+                yield ((index,), {})
+                capacities.append(tm.free_capacity())
+
+        tm = ProcessPoolTaskManager(
+            number_of_processes=2,
+            maximum_queue_size=2,
+            quit_on_empty_queue=True,
+            task_func=task_func,
+            job_source_iterator=job_source_iterator,
+        )
+
+        tm.blocking_start()
+        assert capacities == [4, 3, 2]
+        assert tm.free_capacity() == 4
@@ -26,6 +26,16 @@ class TestThreadedTaskManager:
             # we got threads to join
             ttm.wait_for_completion()
 
+    def test_free_capacity(self):
+        ttm = ThreadedTaskManager(
+            idle_delay=1,
+            number_of_threads=1,
+            maximum_queue_size=3,
+        )
+        assert ttm.free_capacity() == 3
+        ttm.task_queue.put((None, ((1,), {})))
+        assert ttm.free_capacity() == 2
+
     def test_doing_work_with_one_worker(self):
         my_list = []
 
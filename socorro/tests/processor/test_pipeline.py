@@ -2,6 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+from unittest import mock
 from unittest.mock import ANY
 
 import freezegun
@@ -11,7 +12,14 @@ from socorro.lib.libdatetime import date_to_string, utc_now
 from socorro.processor.processor_app import ProcessorApp
 from socorro.processor.pipeline import Pipeline
 from socorro.processor.rules.general import CPUInfoRule, OSInfoRule
-from socorro.processor.rules.base import Rule
+from socorro.processor.rules.base import (
+    ALL_INPUTS,
+    PROCESSED_CRASH,
+    RAW_CRASH,
+    Rule,
+    dump_input,
+)
+from socorro.processor.rules.mozilla import SignatureGeneratorRule
 
 
 class BadRule(Rule):
@@ -19,6 +27,10 @@ class BadRule(Rule):
         raise KeyError("pii")
 
 
+class MemoryReportRule(Rule):
+    inputs = frozenset([RAW_CRASH, dump_input("memory_report")])
+
+
 # NOTE(willkg): If this changes, we should update it and look for new things that should
 # be scrubbed. Use ANY for things that change between tests like timestamps, source code
 # data (line numbers, file names, post/pre_context), event ids, build ids, versions,
@@ -171,3 +183,40 @@ class TestPipeline:
         assert "previousnotes" not in processed_crash["processor_notes"]
         processor_history = "".join(processed_crash["processor_history"])
         assert "previousnotes" in processor_history
+
+    def test_get_inputs(self):
+        rulesets = {
+            "default": [CPUInfoRule(), SignatureGeneratorRule()],
+            "regenerate_signature": [SignatureGeneratorRule()],
+            "memory_report": [MemoryReportRule(), SignatureGeneratorRule()],
+        }
+        pipeline = Pipeline(rulesets=rulesets, hostname="testhost")
+
+        assert pipeline.get_inputs("default") == ALL_INPUTS
+        assert pipeline.get_inputs("regenerate_signature") == {PROCESSED_CRASH}
+        assert pipeline.get_inputs("memory_report") == {
+            RAW_CRASH,
+            PROCESSED_CRASH,
+            "dump:memory_report",
+        }
+        assert pipeline.get_inputs("nonexistent") == ALL_INPUTS
+
+    def test_process_crash_crash_id_from_processed_crash(self, tmp_path):
+        # The raw crash isn't accessed when the ruleset doesn't need it
+        raw_crash = mock.MagicMock()
+        processed_crash = {"uuid": "1", "processor_notes": "previousnotes"}
+
+        rulesets = {"regenerate_signature": [SignatureGeneratorRule()]}
+        pipeline = Pipeline(rulesets=rulesets, hostname="testhost")
+
+        processed_crash = pipeline.process_crash(
+            ruleset_name="regenerate_signature",
+            raw_crash=raw_crash,
+            dumps={},
+            processed_crash=processed_crash,
+            tmpdir=str(tmp_path),
+        )
+
+        assert processed_crash["success"] is True
+        assert processed_crash["signature"] == "EMPTY: no frame data available"
+        assert raw_crash.mock_calls == []
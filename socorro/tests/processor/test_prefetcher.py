@@ -0,0 +1,100 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import os
+import threading
+
+from markus.testing import MetricsMock
+import pytest
+
+from socorro.processor.prefetcher import CrashPrefetcher
+
+
+def write_dump(crash_id, ruleset_name, tmpdir, size=10):
+    path = os.path.join(tmpdir, f"{crash_id}.dump")
+    with open(path, "wb") as fp:
+        fp.write(b"x" * size)
+    return {"uuid": crash_id}, {"upload_file_minidump": path}, None
+
+
+class TestCrashPrefetcher:
+    def test_fetch(self, tmp_path):
+        prefetcher = CrashPrefetcher(fetch_func=write_dump, temporary_path=tmp_path)
+        try:
+            job = prefetcher.submit("crash1", "default")
+            with job:
+                raw_crash, dumps, processed_crash = job.result()
+                assert raw_crash == {"uuid": "crash1"}
+                assert os.path.exists(dumps["upload_file_minidump"])
+                assert prefetcher.staged_bytes == 10
+
+            # Leaving the context removes the crash data and releases the budget
+            assert not os.path.exists(job.tmpdir)
+            assert prefetcher.jobs == set()
+            assert prefetcher.staged_bytes == 0
+        finally:
+            prefetcher.close()
+
+    def test_fetch_error(self, tmp_path):
+        def fetch(crash_id, ruleset_name, tmpdir):
+            raise ValueError("bad crash")
+
+        prefetcher = CrashPrefetcher(fetch_func=fetch, temporary_path=tmp_path)
+        try:
+            with prefetcher.submit("crash1", "default") as job:
+                with pytest.raises(ValueError, match="bad crash"):
+                    job.result()
+            assert list(tmp_path.iterdir()) == []
+        finally:
+            prefetcher.close()
+
+    @pytest.mark.parametrize(
+        "maximum_jobs, maximum_bytes",
+        [
+            pytest.param(1, 0, id="jobs"),
+            pytest.param(5, 10, id="bytes"),
+        ],
+    )
+    def test_backpressure(self, tmp_path, maximum_jobs, maximum_bytes):
+        prefetcher = CrashPrefetcher(
+            fetch_func=write_dump,
+            temporary_path=tmp_path,
+            maximum_jobs=maximum_jobs,
+            maximum_bytes=maximum_bytes,
+        )
+        try:
+            job1 = prefetcher.submit("crash1", "default")
+            job1.result()
+
+            # The budget is used up, so submitting another crash report blocks until
+            # the first one is done
+            submitted = []
+            thread = threading.Thread(
+                target=lambda: submitted.append(prefetcher.submit("crash2", "default"))
+            )
+            with MetricsMock() as mm:
+                thread.start()
+                thread.join(0.2)
+                assert submitted == []
+
+                job1.cleanup()
+                thread.join(5)
+                assert len(submitted) == 1
+                mm.assert_incr("socorro.processor.prefetch.backpressure")
+
+            submitted[0].result()
+            submitted[0].cleanup()
+        finally:
+            prefetcher.close()
+
+    def test_close(self, tmp_path):
+        prefetcher = CrashPrefetcher(fetch_func=write_dump, temporary_path=tmp_path)
+        job = prefetcher.submit("crash1", "default")
+        job.result()
+        prefetcher.close()
+
+        # Closing cleans up crash data nothing finished with
+        assert list(tmp_path.iterdir()) == []
+        with pytest.raises(RuntimeError):
+            prefetcher.submit("crash2", "default")
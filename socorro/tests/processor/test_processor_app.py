@@ -2,6 +2,7 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import os
 from unittest import mock
 from unittest.mock import ANY
 
@@ -12,6 +13,7 @@ import pytest
 from socorro import settings
 from socorro.external.crashstorage_base import CrashIDNotFound
 from socorro.processor.processor_app import ProcessorApp, count_sentry_scrub_error
+from socorro.processor.rules.mozilla import SignatureGeneratorRule
 
 
 def sequencer(*args):
@@ -106,6 +108,177 @@ class TestProcessorApp:
         )
         assert finished_func.call_count == 1
 
+    def test_transform_fetches_declared_inputs(self, processor_settings):
+        app = ProcessorApp()
+        app._set_up_source_and_destination()
+        app.pipeline.rulesets = {
+            "regenerate_signature": [SignatureGeneratorRule()],
+        }
+
+        crash_id = "930b08ba-e425-49bf-adbd-7c9172220721"
+        app.source.save_raw_crash(
+            crash_id=crash_id,
+            raw_crash={"uuid": crash_id},
+            dumps={"upload_file_minidump": b"abc"},
+        )
+        app.source.save_processed_crash(
+            raw_crash={}, processed_crash={"uuid": crash_id, "signature": "OLD"}
+        )
+        app.source.get_raw_crash = mock.Mock(wraps=app.source.get_raw_crash)
+        app.source.get_dumps_as_files = mock.Mock(wraps=app.source.get_dumps_as_files)
+
+        with MetricsMock() as mm:
+            app.transform(f"{crash_id}:regenerate_signature")
+
+        # The ruleset only needs the processed crash, so the raw crash and dumps
+        # weren't fetched
+        assert app.source.get_raw_crash.call_count == 0
+        assert app.source.get_dumps_as_files.call_count == 0
+        mm.assert_incr(
+            "socorro.processor.fetch_crash_data.partial",
+            tags=["ruleset:regenerate_signature", AnyTagValue("host")],
+        )
+
+        processed_crash = get_destination(app, "dest1").get_processed_crash(crash_id)
+        assert processed_crash["signature"] == "EMPTY: no frame data available"
+
+    def test_transform_saves_changes(self, processor_settings):
+        app = ProcessorApp()
+        app._set_up_source_and_destination()
+        app.pipeline.rulesets = {
+            "regenerate_signature": [SignatureGeneratorRule()],
+        }
+
+        crash_id = "930b08ba-e425-49bf-adbd-7c9172220721"
+        app.source.save_raw_crash(
+            crash_id=crash_id, raw_crash={"uuid": crash_id}, dumps={}
+        )
+        app.source.save_processed_crash(
+            raw_crash={},
+            processed_crash={"uuid": crash_id, "signature": "OLD", "product": "Fx"},
+        )
+        dest = get_destination(app, "dest1")
+        dest.save_processed_crash_changes = mock.Mock(
+            wraps=dest.save_processed_crash_changes
+        )
+
+        app.transform(f"{crash_id}:regenerate_signature")
+
+        # Only the keys the rules touched are passed along as changed
+        assert dest.save_processed_crash_changes.call_count == 1
+        changed_keys = dest.save_processed_crash_changes.call_args.args[2]
+        assert "signature" in changed_keys
+        assert "product" not in changed_keys
+
+    def test_transform_regenerate_signature_changes(self, processor_settings):
+        # Use the regenerate_signature ruleset the processor is configured with
+        app = ProcessorApp()
+        app._set_up_source_and_destination()
+
+        crash_id = "930b08ba-e425-49bf-adbd-7c9172220721"
+        app.source.save_raw_crash(
+            crash_id=crash_id, raw_crash={"uuid": crash_id}, dumps={}
+        )
+        app.source.save_processed_crash(
+            raw_crash={},
+            processed_crash={
+                "uuid": crash_id,
+                "product": "Firefox",
+                "os_name": "Windows NT",
+                "signature": "OLD",
+                "crashing_thread": 0,
+                "json_dump": {
+                    "crash_info": {"crashing_thread": 0},
+                    "crashing_thread": {
+                        "frames": [
+                            {"frame": 0, "function": "NtWaitForMultipleObjects"},
+                            {"frame": 1, "function": "mozilla::Crash"},
+                        ]
+                    },
+                    "threads": [
+                        {
+                            "frames": [
+                                {"frame": 0, "function": "NtWaitForMultipleObjects"},
+                                {"frame": 1, "function": "mozilla::Crash"},
+                            ]
+                        }
+                    ],
+                    "modules": [{"filename": "xul.dll"}],
+                },
+                "processor_notes": "previous notes",
+            },
+        )
+        dest = get_destination(app, "dest1")
+        dest.save_processed_crash_changes = mock.Mock(
+            wraps=dest.save_processed_crash_changes
+        )
+
+        app.transform(f"{crash_id}:regenerate_signature")
+
+        # Generating the signature reads the stack, but only the signature fields and
+        # the processing bookkeeping fields change
+        changed_keys = dest.save_processed_crash_changes.call_args.args[2]
+        assert changed_keys == {
+            "completed_datetime",
+            "processor_history",
+            "processor_notes",
+            "proto_signature",
+            "signature",
+            "signature_debug",
+            "started_datetime",
+            "success",
+        }
+        processed_crash = dest.get_processed_crash(crash_id)
+        assert processed_crash["signature"] != "OLD"
+
+    def test_transform_prefetched(self, processor_settings, tmp_path):
+        prefetch = {"maximum_jobs": 2, "maximum_bytes": 0, "number_of_threads": 1}
+        with settings.override(
+            **{
+                "PROCESSOR.temporary_path": str(tmp_path),
+                "PROCESSOR.prefetch": prefetch,
+            }
+        ):
+            app = ProcessorApp()
+            app._set_up_source_and_destination()
+        assert app.prefetcher is not None
+
+        crash_id = "930b08ba-e425-49bf-adbd-7c9172220721"
+        app.source.save_raw_crash(
+            crash_id=crash_id,
+            raw_crash={"uuid": crash_id},
+            dumps={"upload_file_minidump": b"abc"},
+        )
+        app.queue.new_crashes = lambda: iter([((crash_id,), {})])
+        app.pipeline.process_crash = mock.Mock(return_value={"uuid": crash_id})
+        app.source.get_crash_data_as_files = mock.Mock(
+            wraps=app.source.get_crash_data_as_files
+        )
+
+        try:
+            # The crash data is fetched when the task comes off the queue
+            args, kwargs = next(app.source_iterator())
+            staged_job = kwargs["staged_job"]
+            staged_job.result()
+            app.source.get_crash_data_as_files.assert_called_once_with(
+                crash_id, staged_job.tmpdir
+            )
+
+            app.transform(*args, **kwargs)
+
+            # The crash was processed with the staged crash data and the staged data
+            # was cleaned up
+            assert app.source.get_crash_data_as_files.call_count == 1
+            dumps = app.pipeline.process_crash.call_args.kwargs["dumps"]
+            assert dumps["upload_file_minidump"].startswith(staged_job.tmpdir)
+            assert not os.path.exists(staged_job.tmpdir)
+            assert app.prefetcher.jobs == set()
+            assert get_destination(app, "dest1").get_processed_crash(crash_id) == {
+                "uuid": crash_id
+            }
+        finally:
+            app.close()
+
     def test_transform_crash_id_missing(self, processor_settings):
         app = ProcessorApp()
         app._set_up_source_and_destination()
@@ -0,0 +1,170 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+import os
+
+from socorro.external.crashstorage_base import InMemoryCrashStorage
+from socorro.external.gcs.crashstorage import build_keys
+from socorro.processor.rules.breakpad import MinidumpStackwalkRule, ThreadCountRule
+from socorro.processor.rules.general import CPUInfoRule
+from socorro.scripts.bench_processor import (
+    get_recorded_data,
+    load_corpus,
+    main,
+    percentile,
+    ReplayMinidumpStackwalkRule,
+)
+
+
+RULESETS = {
+    "default": [
+        ReplayMinidumpStackwalkRule(recorded_outputs={}),
+        ThreadCountRule(),
+        CPUInfoRule(),
+    ],
+}
+
+CRASH_ID = "de1bb258-cbbf-4589-a673-34f800160918"
+
+
+def save_file(crashdir, key, data):
+    path = os.path.join(crashdir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fp:
+        json.dump(data, fp)
+
+
+def build_crashdir(crashdir):
+    save_file(
+        crashdir,
+        build_keys("raw_crash", CRASH_ID)[0],
+        {"uuid": CRASH_ID, "ProductName": "Firefox"},
+    )
+    save_file(
+        crashdir,
+        build_keys("processed_crash", CRASH_ID)[0],
+        {
+            "uuid": CRASH_ID,
+            "json_dump": {"status": "OK", "thread_count": 5},
+        },
+    )
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0
+
+
+def test_load_corpus(tmp_path):
+    build_crashdir(str(tmp_path))
+    storage = InMemoryCrashStorage()
+
+    crash_ids = load_corpus(str(tmp_path), storage)
+    assert crash_ids == [CRASH_ID]
+    assert storage.get_raw_crash(CRASH_ID)["ProductName"] == "Firefox"
+
+    # There's no dump, but there's recorded stackwalker output, so there's a
+    # placeholder dump
+    assert list(storage.get_dumps(CRASH_ID).keys()) == ["upload_file_minidump"]
+
+    recorded_outputs, _ = get_recorded_data(storage, crash_ids)
+    assert recorded_outputs == {
+        f"{CRASH_ID}.upload_file_minidump.json": {"status": "OK", "thread_count": 5}
+    }
+
+
+def test_main(tmp_path, capsys):
+    crashdir = tmp_path / "crashdir"
+    build_crashdir(str(crashdir))
+    output_path = tmp_path / "results.json"
+
+    ret = main(
+        [
+            f"--rulesets={__name__}.RULESETS",
+            "--iterations=2",
+            "--warmup=0",
+            f"--output={output_path}",
+            str(crashdir),
+        ]
+    )
+    assert ret == 0
+
+    results = json.loads(output_path.read_text())
+    assert results["crashes"] == 1
+    assert results["pipeline"]["count"] == 2
+    assert results["pipeline"]["crashes_per_sec"] > 0
+    assert sorted(results["rules"]) == [
+        "socorro.processor.rules.breakpad.ThreadCountRule",
+        "socorro.processor.rules.general.CPUInfoRule",
+        "socorro.scripts.bench_processor.ReplayMinidumpStackwalkRule",
+    ]
+    for stats in results["rules"].values():
+        assert stats["count"] == 2
+        assert "alloc_peak_kb_mean" in stats
+
+    # Compare with a baseline
+    ret = main(
+        [
+            f"--rulesets={__name__}.RULESETS",
+            "--iterations=1",
+            "--warmup=0",
+            "--no-allocations",
+            f"--baseline={output_path}",
+            str(crashdir),
+        ]
+    )
+    assert ret == 0
+    stdout = capsys.readouterr().out
+    assert "p50 delta" in stdout
+
+
+def test_main_builds_rulesets_offline(tmp_path, monkeypatch):
+    # Importing this ruleset builds a MinidumpStackwalkRule with a minidump-stackwalk
+    # that doesn't exist
+    module_path = tmp_path / "modules"
+    module_path.mkdir()
+    (module_path / "bench_offline_rulesets.py").write_text(
+        "from socorro.processor.rules.breakpad import MinidumpStackwalkRule\n"
+        + "RULESETS = {\n"
+        + "    'default': [\n"
+        + "        MinidumpStackwalkRule(\n"
+        + "            command_path='/nonexistent/minidump-stackwalk',\n"
+        + f"            symbol_tmp_path='{tmp_path}/symbols-tmp',\n"
+        + f"            symbol_cache_path='{tmp_path}/symbols',\n"
+        + "        ),\n"
+        + "    ],\n"
+        + "}\n"
+    )
+    monkeypatch.syspath_prepend(str(module_path))
+
+    crashdir = tmp_path / "crashdir"
+    build_crashdir(str(crashdir))
+    output_path = tmp_path / "results.json"
+
+    ret = main(
+        [
+            "--rulesets=bench_offline_rulesets.RULESETS",
+            "--iterations=1",
+            "--warmup=0",
+            "--no-allocations",
+            f"--output={output_path}",
+            str(crashdir),
+        ]
+    )
+    assert ret == 0
+
+    results = json.loads(output_path.read_text())
+    assert sorted(results["rules"]) == [
+        "socorro.scripts.bench_processor.ReplayMinidumpStackwalkRule"
+    ]
+    assert not (tmp_path / "symbols").exists()
+
+    # MinidumpStackwalkRule is back to normal
+    assert (
+        MinidumpStackwalkRule.get_version is not ReplayMinidumpStackwalkRule.get_version
+    )
@@ -2,10 +2,15 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import functools
 import re
 import warnings
 
 
+# Allowlist items with any of these characters are patterns rather than keys
+PATTERN_CHARS = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
 class Cleaner:
     """
     This class takes care of cleaning up a chunk of data that is some sort of
@@ -31,6 +36,13 @@ class Cleaner:
         >>> print data
         {"Firefox": [{"foo": 1}, {"foo": 3}], "TB": [{"foo": 5}, {"foo": 7}]}
 
+    ``start`` cleans the data in place. ``clean`` leaves the data alone and returns
+    a cleaned copy that shares values with the original, which is useful when the
+    data is shared with other things like cached results.
+
+    The allowlist is compiled into a plan once and the plan is shared by all the
+    cleaners with the same allowlist.
+
     """
 
     ANY = "__any__"
@@ -38,39 +50,42 @@ class Cleaner:
     def __init__(self, allowlist, debug=False):
         self.allowlist = allowlist
         self.debug = debug
+        self.plan = compile_allowlist(allowlist)
 
     def start(self, data):
-        self._scrub(data, self.allowlist)
+        self._scrub(data, self.plan)
 
-    def _scrub(self, result, api_allowlist):
-        if isinstance(api_allowlist, (list, tuple)):
+    def clean(self, data):
+        return self._clean(data, self.plan)
+
+    def _scrub(self, result, plan):
+        if isinstance(plan, SmartAllowlistMatcher):
             if isinstance(result, dict):
-                self._scrub_item(result, api_allowlist)
+                self._scrub_item(result, plan)
             else:
-                self._scrub_list(result, api_allowlist)
+                self._scrub_list(result, plan)
         else:
-            for result_key, allowlist in api_allowlist.items():
+            for result_key, sub_plan in plan:
                 if result_key == self.ANY:
-                    if isinstance(allowlist, (list, tuple)):
+                    if isinstance(sub_plan, SmartAllowlistMatcher):
                         if isinstance(result, dict):
                             for _, thing in result.items():
                                 if isinstance(thing, dict):
-                                    self._scrub_item(thing, allowlist)
+                                    self._scrub_item(thing, sub_plan)
                                 elif isinstance(thing, (list, tuple)):
-                                    self._scrub_list(thing, allowlist)
+                                    self._scrub_list(thing, sub_plan)
 
                     else:
                         for datum in result.values():
-                            self._scrub(datum, allowlist)
+                            self._scrub(datum, sub_plan)
                 else:
                     data = result[result_key]
                     if isinstance(data, dict):
-                        self._scrub(data, allowlist)
+                        self._scrub(data, sub_plan)
                     elif isinstance(data, list):
-                        self._scrub_list(data, allowlist)
+                        self._scrub_list(data, sub_plan)
 
-    def _scrub_item(self, data, allowlist):
-        matcher = SmartAllowlistMatcher(allowlist)
+    def _scrub_item(self, data, matcher):
         for key in list(data.keys()):
             if key not in matcher:
                 # warnings.warn() never redirects the same message to
@@ -82,19 +97,104 @@ class Cleaner:
                     warnings.warn(msg, stacklevel=2)
                 del data[key]
 
-    def _scrub_list(self, sequence, allowlist):
-        for i, data in enumerate(sequence):
-            self._scrub_item(data, allowlist)
-            sequence[i] = data
+    def _scrub_list(self, sequence, matcher):
+        for data in sequence:
+            self._scrub_item(data, matcher)
+
+    def _clean(self, result, plan):
+        if isinstance(plan, SmartAllowlistMatcher):
+            if isinstance(result, dict):
+                return self._clean_item(result, plan)
+            return self._clean_list(result, plan)
+
+        if not isinstance(result, dict):
+            return result
+
+        result = dict(result)
+        for result_key, sub_plan in plan:
+            if result_key == self.ANY:
+                if isinstance(sub_plan, SmartAllowlistMatcher):
+                    for key, thing in result.items():
+                        if isinstance(thing, dict):
+                            result[key] = self._clean_item(thing, sub_plan)
+                        elif isinstance(thing, (list, tuple)):
+                            result[key] = self._clean_list(thing, sub_plan)
+
+                else:
+                    for key, datum in result.items():
+                        result[key] = self._clean(datum, sub_plan)
+            else:
+                data = result[result_key]
+                if isinstance(data, dict):
+                    result[result_key] = self._clean(data, sub_plan)
+                elif isinstance(data, list):
+                    result[result_key] = self._clean_list(data, sub_plan)
+        return result
+
+    def _clean_item(self, data, matcher):
+        cleaned = {}
+        for key, value in data.items():
+            if key in matcher:
+                cleaned[key] = value
+            elif self.debug:
+                msg = "Skipping %r" % (key,)
+                warnings.warn(msg, stacklevel=2)
+        return cleaned
+
+    def _clean_list(self, sequence, matcher):
+        return [self._clean_item(data, matcher) for data in sequence]
 
 
 class SmartAllowlistMatcher:
+    """Matches keys against an allowlist where ``*`` matches any word characters
+
+    Plain keys are matched with a set lookup. Only allowlist items that are
+    patterns are matched with a regex.
+
+    """
+
     def __init__(self, allowlist):
         def format(item):
             return "^" + item.replace("*", r"[\w-]*") + "$"
 
-        items = [format(x) for x in allowlist]
-        self.regex = re.compile("|".join(items))
+        self.keys = frozenset(x for x in allowlist if not PATTERN_CHARS.search(x))
+        patterns = [format(x) for x in allowlist if PATTERN_CHARS.search(x)]
+        self.regex = re.compile("|".join(patterns)) if patterns else None
 
     def __contains__(self, key):
-        return bool(self.regex.match(key))
+        if key in self.keys:
+            return True
+        return self.regex is not None and bool(self.regex.match(key))
+
+
+def _freeze_allowlist(allowlist):
+    """Convert an allowlist into a hashable equivalent"""
+    if isinstance(allowlist, (list, tuple)):
+        return ("keys", tuple(allowlist))
+    return (
+        "map",
+        tuple((key, _freeze_allowlist(value)) for key, value in allowlist.items()),
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_frozen_allowlist(frozen_allowlist):
+    kind, items = frozen_allowlist
+    if kind == "keys":
+        return SmartAllowlistMatcher(items)
+    return tuple((key, _compile_frozen_allowlist(value)) for key, value in items)
+
+
+def compile_allowlist(allowlist):
+    """Compile an allowlist into a cleaning plan
+
+    Lists of keys become SmartAllowlistMatcher instances and dicts become tuples of
+    (key, plan) pairs. Plans are cached, so compiling the same allowlist again is
+    cheap.
+
+    :arg allowlist: a list or tuple of keys or a dict of key to allowlist
+
+    :returns: plan
+
+    """
+    return _compile_frozen_allowlist(_freeze_allowlist(allowlist))
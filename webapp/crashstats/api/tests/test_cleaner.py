@@ -2,9 +2,10 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import copy
 from unittest import mock
 
-from crashstats.api.cleaner import Cleaner, SmartAllowlistMatcher
+from crashstats.api.cleaner import Cleaner, SmartAllowlistMatcher, compile_allowlist
 
 
 class TestCleaner:
@@ -102,6 +103,67 @@ class TestCleaner:
         }
         assert data == expect
 
+    def test_clean_doesnt_change_data(self):
+        allowlist = {"hits": ("foo", "bar*"), "facets": {Cleaner.ANY: ("term",)}}
+        data = {
+            "hits": [
+                {"foo": 1, "bar": 2, "barbaz": 3, "baz": 4},
+                {"foo": 5, "bar": 6, "barbaz": 7, "baz": 8},
+            ],
+            "facets": {
+                "signature": [{"term": "OOM | small", "count": 1}],
+                "product": [{"term": "WaterWolf", "count": 1}],
+            },
+            "total": 2,
+        }
+        original = copy.deepcopy(data)
+        cleaner = Cleaner(allowlist)
+        cleaned = cleaner.clean(data)
+        assert cleaned == {
+            "hits": [
+                {"foo": 1, "bar": 2, "barbaz": 3},
+                {"foo": 5, "bar": 6, "barbaz": 7},
+            ],
+            "facets": {
+                "signature": [{"term": "OOM | small"}],
+                "product": [{"term": "WaterWolf"}],
+            },
+            "total": 2,
+        }
+        assert data == original
+
+        # clean and start produce the same data
+        cleaner.start(data)
+        assert data == cleaned
+
+    def test_clean_all_dict_data_deeper(self):
+        allowlist = {Cleaner.ANY: {Cleaner.ANY: ("foo", "bar")}}
+        data = {
+            "WaterWolf": {
+                "2012": {"foo": 1, "bar": 2, "baz": 3},
+                "2013": {"foo": 4, "bar": 5, "baz": 6},
+            },
+        }
+        cleaner = Cleaner(allowlist)
+        assert cleaner.clean(data) == {
+            "WaterWolf": {"2012": {"foo": 1, "bar": 2}, "2013": {"foo": 4, "bar": 5}},
+        }
+        assert data["WaterWolf"]["2012"]["baz"] == 3
+
+    @mock.patch("warnings.warn")
+    def test_clean_with_warning(self, p_warn):
+        allowlist = {"hits": ("foo", "bar")}
+        data = {"hits": [{"foo": 1, "bar": 2, "baz": 3}]}
+        cleaner = Cleaner(allowlist, debug=True)
+        cleaner.clean(data)
+        p_warn.assert_called_with("Skipping 'baz'", stacklevel=2)
+
+    def test_compile_allowlist_is_cached(self):
+        plan = compile_allowlist({"hits": ["foo", "bar"]})
+        assert compile_allowlist({"hits": ["foo", "bar"]}) is plan
+        assert Cleaner({"hits": ["foo", "bar"]}).plan is plan
+        assert compile_allowlist({"hits": ["foo"]}) is not plan
+
 
 class TestSmartAllowlistMatcher:
     def test_basic_in(self):
@@ -113,3 +175,19 @@ class TestSmartAllowlistMatcher:
         assert "thing" in matcher
         assert "things" in matcher
         assert "nothing" not in matcher
+
+    def test_exact_keys_dont_use_regex(self):
+        matcher = SmartAllowlistMatcher(["some", "thing"])
+        assert matcher.regex is None
+        assert "some" in matcher
+        assert "thing" in matcher
+        assert "things" not in matcher
+
+    def test_patterns(self):
+        matcher = SmartAllowlistMatcher(["some", "thing*", "a.b"])
+        assert matcher.keys == {"some"}
+        assert "thing-a_b" in matcher
+        assert "thing.a" not in matcher
+        # Items aren't escaped, so "." matches any character
+        assert "a.b" in matcher
+        assert "axb" in matcher
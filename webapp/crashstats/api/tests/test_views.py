@@ -37,6 +37,7 @@ from django.urls import reverse
 from django.utils.encoding import smart_str
 from markus.testing import MetricsMock
 
+from socorro.lib import BadArgumentError
 from socorro.lib.libooid import create_new_ooid
 
 
@@ -689,6 +690,107 @@ class TestSuperSearchUnredacted(BaseTestViews):
         assert response.status_code == 200
 
 
+class TestSuperSearchExport(BaseTestViews):
+    HITS = [
+        {
+            "uuid": "de1bb258-cbbf-4589-a673-34f800160918",
+            "signature": "OOM | small",
+            "url": "http://embarrassing.website.com",
+        },
+        {
+            "uuid": "e35dfc49-fabb-4603-b5d3-a5bd30160918",
+            "signature": "shutdownhang",
+            "url": None,
+        },
+    ]
+
+    def mock_iter_hits(self, mock_implementation, hits):
+        params_before_query = {}
+
+        def mocked_iter_hits(page_size, **params):
+            params_before_query.clear()
+            params_before_query.update(params)
+            for hit in hits:
+                yield {
+                    key: value
+                    for key, value in hit.items()
+                    if key in params["_columns"]
+                }
+
+        mock_implementation.return_value.iter_hits.side_effect = mocked_iter_hits
+        return params_before_query
+
+    @mock.patch("crashstats.supersearch.models.SuperSearch.get_implementation")
+    def test_jsonl(self, mock_implementation):
+        params_before_query = self.mock_iter_hits(mock_implementation, self.HITS)
+
+        url = reverse("api:supersearch_export")
+        response = self.client.get(
+            url,
+            {"product": "WaterWolf", "_columns": ["uuid", "signature", "url"]},
+        )
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        # url is a protected field, so it's redacted
+        assert [json.loads(line) for line in lines] == [
+            {"uuid": hit["uuid"], "signature": hit["signature"]} for hit in self.HITS
+        ]
+        assert params_before_query["product"] == ["WaterWolf"]
+        assert params_before_query["_columns"] == ["uuid", "signature"]
+
+    @mock.patch("crashstats.supersearch.models.SuperSearch.get_implementation")
+    def test_csv_with_view_pii(self, mock_implementation):
+        self.mock_iter_hits(mock_implementation, self.HITS)
+        user = self._login()
+        self._add_permission(user, "view_pii")
+
+        url = reverse("api:supersearch_export")
+        response = self.client.get(
+            url, {"_format": "csv", "_columns": ["uuid", "signature", "url"]}
+        )
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+
+        content = b"".join(response.streaming_content).decode("utf-8")
+        assert content.splitlines() == [
+            "uuid,signature,url",
+            "de1bb258-cbbf-4589-a673-34f800160918,OOM | small,"
+            + "http://embarrassing.website.com",
+            "e35dfc49-fabb-4603-b5d3-a5bd30160918,shutdownhang,",
+        ]
+
+    @mock.patch("crashstats.supersearch.models.SuperSearch.get_implementation")
+    def test_no_hits(self, mock_implementation):
+        self.mock_iter_hits(mock_implementation, [])
+
+        url = reverse("api:supersearch_export")
+        response = self.client.get(url, {"_format": "csv"})
+        assert response.status_code == 200
+        content = b"".join(response.streaming_content).decode("utf-8")
+        assert content.splitlines() == [
+            "uuid,date,signature,product,version,build_id,platform"
+        ]
+
+    @mock.patch("crashstats.supersearch.models.SuperSearch.get_implementation")
+    def test_bad_arguments(self, mock_implementation):
+        def mocked_iter_hits(page_size, **params):
+            raise BadArgumentError("date")
+            yield
+
+        mock_implementation.return_value.iter_hits.side_effect = mocked_iter_hits
+
+        url = reverse("api:supersearch_export")
+        response = self.client.get(url, {"_format": "xml"})
+        assert response.status_code == 400
+
+        response = self.client.get(url, {"date": ">=2000-01-01"})
+        assert response.status_code == 400
+        assert "BadArgumentError" in json.loads(response.content)["error"]
+
+
 class TestReprocessing(BaseTestViews):
     @mock.patch("crashstats.crashstats.models.Reprocessing.get_implementation")
     def test_api(self, mock_implementation):
@@ -1035,6 +1137,7 @@ API_MODEL_NAMES = [
     "SignatureFirstDate",
     "SignaturesByBugs",
     "SuperSearch",
+    "SuperSearchExport",
     "SuperSearchFields",
     "SuperSearchUnredacted",
     "VersionString",
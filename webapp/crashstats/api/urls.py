@@ -17,5 +17,10 @@ urlpatterns = [
         views.MissingProcessedCrashAPI.as_view(),
         name="missing_processed_crash",
     ),
+    path(
+        "SuperSearchExport/",
+        views.SuperSearchExportAPI.as_view(),
+        name="supersearch_export",
+    ),
     path("<str:model_name>/", views.model_wrapper, name="model_wrapper"),
 ]
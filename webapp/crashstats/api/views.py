@@ -2,9 +2,12 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import csv
 import datetime
 from functools import wraps
 import inspect
+import itertools
+import json
 import re
 
 from django_ratelimit.decorators import ratelimit
@@ -296,7 +299,9 @@ def model_wrapper(request, model_name, model):
                         # not allowlisted
                         debug=settings.DEBUG,
                     )
-                    cleaner.start(result)
+                    # Clean a copy because the result can be shared with other
+                    # requests through the models cache
+                    result = cleaner.clean(result)
 
         else:
             return http.JsonResponse({"errors": dict(form.errors)}, status=400)
@@ -761,3 +766,134 @@ class CrashSignatureAPI(SocorroAPIView):
             results.append(result)
 
         return Response({"results": results})
+
+
+class Echo:
+    """File-like object that returns what's written to it for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+class SuperSearchExportAPI(SocorroAPIView):
+    API_NAME = "SuperSearchExport"
+
+    IS_PUBLIC = True
+
+    # Number of hits to get from Elasticsearch at a time
+    PAGE_SIZE = 1_000
+
+    FORMATS = ("jsonl", "csv")
+
+    DEFAULT_COLUMNS = (
+        "uuid",
+        "date",
+        "signature",
+        "product",
+        "version",
+        "build_id",
+        "platform",
+    )
+
+    HELP_TEXT = """
+    Exports all the crash reports matching a search.
+
+    This takes the same filters as ``SuperSearch``, but rather than returning a
+    page of results, it streams every matching crash report. Facets, aggregations,
+    ``_results_offset``, and ``_results_number`` are ignored.
+
+    :Method: HTTP GET
+    :Argument: (optional) ``_format``: ``jsonl`` (default) or ``csv``
+    :Argument: (optional) ``_columns``: fields to export; defaults to uuid, date,
+        signature, product, version, build_id, and platform
+    :Argument: (optional) ``_sort``: fields to sort by
+
+    For ``jsonl``, this returns one JSON object per line with a key for each column.
+    For ``csv``, this returns a header row followed by a row for each crash report.
+
+    Fields you don't have permission to see are left out.
+    """
+
+    def get_columns(self, api, params, allowlist_matcher):
+        """Return the columns to export after redaction"""
+        allowed_fields = api.fields_spec.get_allowed_search_fields(api.api_user)
+        columns = dict.fromkeys(params.get("_columns") or self.DEFAULT_COLUMNS)
+        return [
+            column
+            for column in columns
+            if column in allowed_fields
+            and (allowlist_matcher is None or column in allowlist_matcher)
+        ]
+
+    def iter_jsonl(self, hits):
+        for hit in hits:
+            yield json.dumps(hit, cls=utils.DateTimeEncoder) + "\n"
+
+    def iter_csv(self, hits, columns):
+        writer = csv.DictWriter(Echo(), fieldnames=columns, extrasaction="ignore")
+        yield writer.writeheader()
+        for hit in hits:
+            yield writer.writerow(hit)
+
+    @method_decorator(csrf_exempt)
+    @method_decorator(
+        ratelimit(key="ip", method=["GET"], rate=utils.ratelimit_rate, block=True)
+    )
+    def get(self, request):
+        export_format = request.GET.get("_format", "jsonl")
+        if export_format not in self.FORMATS:
+            return http.JsonResponse(
+                {"error": f"_format must be one of {', '.join(self.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        form = MiddlewareModelForm(supersearch_models.SuperSearch, request.GET)
+        if not form.is_valid():
+            return http.JsonResponse(
+                {"errors": dict(form.errors)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        api = supersearch_models.SuperSearch()
+        api.api_user = request.user
+
+        # Redact fields per hit the same way the SuperSearch API does
+        cleaner = None
+        allowlist_matcher = None
+        if not request.user.has_perm("crashstats.view_pii"):
+            cleaner = Cleaner(api.API_ALLOWLIST["hits"])
+            allowlist_matcher = cleaner.plan
+
+        params = form.cleaned_data
+        params["_columns"] = self.get_columns(api, params, allowlist_matcher)
+
+        try:
+            hits = api.iter_hits(page_size=self.PAGE_SIZE, **params)
+            # Get the first hit now so bad arguments are reported as a 400 instead
+            # of breaking the stream
+            first_hit = next(hits, None)
+        except BAD_REQUEST_EXCEPTIONS as exception:
+            return http.JsonResponse(
+                {"error": f"Bad request: {type(exception).__name__}: {exception}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if first_hit is not None:
+            hits = itertools.chain([first_hit], hits)
+        else:
+            hits = iter(())
+
+        if cleaner is not None:
+            hits = (cleaner.clean(hit) for hit in hits)
+
+        if export_format == "csv":
+            content = self.iter_csv(hits, params["_columns"])
+            content_type = "text/csv; charset=utf-8"
+        else:
+            content = self.iter_jsonl(hits)
+            content_type = "application/x-ndjson"
+
+        response = http.StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="supersearch.{export_format}"'
+        )
+        return response
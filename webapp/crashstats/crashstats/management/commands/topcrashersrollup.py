@@ -0,0 +1,223 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Roll up hourly topcrashers counts using crash data in Elasticsearch.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from crashstats.crashstats.models import (
+    TopCrashersRollup,
+    TopCrashersRollupHour,
+    TopCrashersRollupTotal,
+)
+from crashstats.supersearch.models import SuperSearchUnredacted
+from crashstats.supersearch.libsupersearch import get_supersearch_fields
+from crashstats.topcrashers.utils import SIGNATURE_FACETS, truncate_to_hour
+
+
+# Dimensions of the rollup
+DIMENSIONS = ["product", "version", "process_type", "report_type", "signature"]
+
+# Dimensions of the rollup totals
+TOTAL_DIMENSIONS = DIMENSIONS[:-1]
+
+# Value stored for dimensions a crash report doesn't have a value for
+MISSING = ""
+
+# Uptime in seconds below which a crash is in the startup window
+STARTUP_WINDOW = 60
+
+# Hours before the last success to roll up again to pick up crash reports that
+# were processed late
+OVERLAP_HOURS = 3
+
+# Number of days of rollups to keep; the previous window for the 28-day topcrashers
+# report goes back 56 days
+RETENTION_DAYS = 60
+
+# Number of buckets to get from Elasticsearch per request; each bucket has a handful
+# of facet buckets, so this keeps requests well under search.max_buckets
+DEFAULT_PAGE_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Rolls up hourly topcrashers counts using crash data from Elasticsearch"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--last-success",
+            default="",
+            help=(
+                "The start of the window to roll up in YYYY-mm-ddTHH:MM format in "
+                "UTC. Defaults to run-time value minus 3 hours."
+            ),
+        )
+        parser.add_argument(
+            "--run-time",
+            default="",
+            help=(
+                "The end of the window to roll up in YYYY-mm-ddTHH:MM format in UTC. "
+                "Defaults to now. Only complete hours are rolled up."
+            ),
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=DEFAULT_PAGE_SIZE,
+            help="Number of buckets to get from Elasticsearch per request.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Whether or not to do a dry run."
+        )
+
+    def iter_buckets(self, api, hour, fields, page_size, aggs=(), **extra):
+        params = {
+            "date": [
+                f">={hour.isoformat()}",
+                f"<{(hour + datetime.timedelta(hours=1)).isoformat()}",
+            ],
+            "_fields": self.all_fields,
+            **extra,
+        }
+        # Crash reports missing a dimension still count towards the totals and the
+        # signature counts like they do in the live topcrashers query
+        buckets = api.iter_buckets(
+            fields, aggs=aggs, page_size=page_size, include_missing=True, **params
+        )
+        for bucket in buckets:
+            bucket["term"] = tuple(
+                MISSING if value is None else value for value in bucket["term"]
+            )
+            yield bucket
+
+    def rollup_hour(self, api, hour, page_size):
+        """Roll up one hour of crash reports
+
+        This pages through every combination of the dimensions with composite
+        aggregations, so it doesn't matter how many signatures there are in an hour.
+
+        :returns: tuple of (totals, rollups) lists of unsaved model instances
+
+        """
+        totals = []
+        for bucket in self.iter_buckets(api, hour, TOTAL_DIMENSIONS, page_size):
+            key = bucket["term"]
+            totals.append(
+                TopCrashersRollupTotal(
+                    hour=hour,
+                    product=key[0],
+                    version=key[1],
+                    process_type=key[2],
+                    report_type=key[3],
+                    count=bucket["count"],
+                )
+            )
+
+        # Count crash reports in the startup window with a second pass so we don't
+        # need an uptime histogram for every signature
+        startup_counts = {
+            bucket["term"]: bucket["count"]
+            for bucket in self.iter_buckets(
+                api, hour, DIMENSIONS, page_size, uptime=[f"<{STARTUP_WINDOW}"]
+            )
+        }
+
+        rollups = []
+        buckets = self.iter_buckets(
+            api, hour, DIMENSIONS, page_size, aggs=SIGNATURE_FACETS
+        )
+        for bucket in buckets:
+            key = bucket["term"]
+            sub_facets = bucket.get("facets", {})
+            facets = {
+                field: {
+                    str(row["term"]): row["count"] for row in sub_facets.get(field, [])
+                }
+                for field in SIGNATURE_FACETS
+            }
+            facets["startup_window"] = startup_counts.get(key, 0)
+            rollups.append(
+                TopCrashersRollup(
+                    hour=hour,
+                    product=key[0],
+                    version=key[1],
+                    process_type=key[2],
+                    report_type=key[3],
+                    signature=key[4],
+                    count=bucket["count"],
+                    facets=facets,
+                )
+            )
+
+        return totals, rollups
+
+    def save_hour(self, hour, totals, rollups):
+        with transaction.atomic():
+            TopCrashersRollupTotal.objects.filter(hour=hour).delete()
+            TopCrashersRollup.objects.filter(hour=hour).delete()
+            TopCrashersRollupTotal.objects.bulk_create(totals, batch_size=1000)
+            TopCrashersRollup.objects.bulk_create(rollups, batch_size=1000)
+            TopCrashersRollupHour.objects.update_or_create(hour=hour)
+
+    def delete_expired(self, now):
+        cutoff = truncate_to_hour(now - datetime.timedelta(days=RETENTION_DAYS))
+        for model in (TopCrashersRollupHour, TopCrashersRollupTotal, TopCrashersRollup):
+            model.objects.filter(hour__lt=cutoff).delete()
+
+    def handle(self, **options):
+        start_datetime = options.get("last_success")
+        end_datetime = options.get("run_time")
+
+        if end_datetime:
+            end_datetime = parse_datetime(end_datetime)
+        else:
+            end_datetime = timezone.now()
+
+        if start_datetime:
+            start_datetime = parse_datetime(start_datetime)
+        else:
+            start_datetime = end_datetime
+
+        # Times are in UTC
+        if timezone.is_naive(end_datetime):
+            end_datetime = timezone.make_aware(end_datetime, datetime.timezone.utc)
+        if timezone.is_naive(start_datetime):
+            start_datetime = timezone.make_aware(start_datetime, datetime.timezone.utc)
+
+        # Roll up complete hours and roll up the last few hours again to pick up
+        # crash reports that were processed after the last run
+        end_datetime = truncate_to_hour(end_datetime)
+        start_datetime = truncate_to_hour(start_datetime) - datetime.timedelta(
+            hours=OVERLAP_HOURS
+        )
+
+        if not end_datetime > start_datetime:
+            raise CommandError("start time must be before end time.")
+
+        self.all_fields = get_supersearch_fields()
+        api = SuperSearchUnredacted().get_implementation()
+
+        hour = start_datetime
+        while hour < end_datetime:
+            totals, rollups = self.rollup_hour(api, hour, options["page_size"])
+            if options["dry_run"]:
+                self.stdout.write(
+                    "%s: %d totals, %d signature rollups"
+                    % (hour.isoformat(), len(totals), len(rollups))
+                )
+            else:
+                self.save_hour(hour, totals, rollups)
+            hour += datetime.timedelta(hours=1)
+
+        if not options["dry_run"]:
+            self.delete_expired(end_datetime)
+
+        self.stdout.write("Rolled up %s to %s" % (start_datetime, end_datetime))
@@ -8,18 +8,45 @@ Maintain Signature data using crash data in Elasticsearch.
 
 import datetime
 
+from more_itertools import chunked
+
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
 from crashstats.crashstats.models import Signature
 from crashstats.supersearch.models import SuperSearch
 from crashstats.supersearch.libsupersearch import get_supersearch_fields
-from socorro.lib.libdatetime import string_to_datetime
 
 
-# Maximum number of results returned for a super search query
-MAX_PAGE = 1000
+# Number of signature buckets to get from Elasticsearch per request
+PAGE_SIZE = 1000
+
+# Number of signatures to upsert per statement
+BATCH_SIZE = 1000
+
+
+def upsert_signatures(items):
+    """Insert signatures or move first build and first date earlier
+
+    :arg items: list of (signature, first_build, first_date) tuples
+
+    """
+    if not items:
+        return
+
+    table = Signature._meta.db_table
+    values = ", ".join(["(%s, %s, %s)"] * len(items))
+    sql = (
+        f"INSERT INTO {table} (signature, first_build, first_date) VALUES {values} "
+        "ON CONFLICT (signature) DO UPDATE SET "
+        f"first_build = LEAST({table}.first_build, EXCLUDED.first_build), "
+        f"first_date = LEAST({table}.first_date, EXCLUDED.first_date)"
+    )
+    params = [value for item in items for value in item]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, params)
 
 
 class Command(BaseCommand):
@@ -46,18 +73,30 @@ class Command(BaseCommand):
             "--dry-run", action="store_true", help="Whether or not to do a dry run."
         )
 
-    def update_crashstats_signature(self, signature, report_date, report_build):
-        report_build = int(report_build)
-        report_date = string_to_datetime(report_date)
-        try:
-            sig = Signature.objects.get(signature=signature)
-            sig.first_build = min(report_build, sig.first_build)
-            sig.first_date = min(report_date, sig.first_date)
-        except Signature.DoesNotExist:
-            sig = Signature.objects.create(
-                signature=signature, first_build=report_build, first_date=report_date
+    def iter_signature_data(self, api, params):
+        """Yield (signature, first_build, first_date) for signatures in the window"""
+        buckets = api.iter_buckets(
+            "signature",
+            aggs=["_min.build_id", "_min.date"],
+            page_size=PAGE_SIZE,
+            **params,
+        )
+        for bucket in buckets:
+            facets = bucket["facets"]
+            first_build = facets["min_build_id"]["value"]
+            first_date = facets["min_date"]["value"]
+            if first_build is None or first_date is None:
+                continue
+
+            # Elasticsearch returns min values as floats; dates are milliseconds
+            # since the epoch
+            yield (
+                bucket["term"],
+                int(first_build),
+                datetime.datetime.fromtimestamp(
+                    first_date / 1000, tz=datetime.timezone.utc
+                ),
             )
-        sig.save()
 
     def handle(self, **options):
         start_datetime = options.get("last_success")
@@ -85,10 +124,10 @@ class Command(BaseCommand):
         if not end_datetime > start_datetime:
             raise CommandError("start time must be before end time.")
 
-        # Do a super search and get the signature, buildid, and date processed for
-        # every crash in the range
+        # Aggregate the earliest build id and date processed for each signature for
+        # crashes in the range
         all_fields = get_supersearch_fields()
-        api = SuperSearch()
+        api = SuperSearch().get_implementation()
         self.stdout.write("Looking at %s to %s" % (start_datetime, end_datetime))
 
         params = {
@@ -96,67 +135,21 @@ class Command(BaseCommand):
                 f">={start_datetime.isoformat()}",
                 f"<{end_datetime.isoformat()}",
             ],
-            "_columns": ["signature", "build_id", "date"],
-            "_facets_size": 0,
+            # Not all crashes have a build id, so skip the ones that don't
+            "build_id": ["!__null__"],
             "_fields": all_fields,
-            # Set up first page
-            "_results_offset": 0,
-            "_results_number": MAX_PAGE,
         }
 
-        results = {}
-        crashids_count = 0
-
-        while True:
-            resp = api.get(**params)
-            hits = resp["hits"]
-            for hit in hits:
-                crashids_count += 1
-
-                if not hit["build_id"]:
-                    # Not all crashes have a build id, so skip the ones that don't.
-                    continue
-
-                if hit["signature"] in results:
-                    data = results[hit["signature"]]
-                    data["build_id"] = min(data["build_id"], hit["build_id"])
-                    data["date"] = min(data["date"], hit["date"])
-                else:
-                    data = {
-                        "signature": hit["signature"],
-                        "build_id": hit["build_id"],
-                        "date": hit["date"],
-                    }
-                results[hit["signature"]] = data
-
-            # If there are no more crash ids to get, we return
-            total = resp["total"]
-            if not hits or crashids_count >= total:
-                break
-
-            # Get the next page, but only as many results as we need
-            params["_results_offset"] += MAX_PAGE
-            params["_results_number"] = min(
-                # MAX_PAGE is the maximum we can request
-                MAX_PAGE,
-                # The number of results Super Search can return to us that is hasn't returned so far
-                total - crashids_count,
-            )
-
-        signature_data = results.values()
-
-        # Save signature data to the db
-        for item in signature_data:
+        count = 0
+        for batch in chunked(self.iter_signature_data(api, params), BATCH_SIZE):
+            count += len(batch)
             if options["dry_run"]:
-                self.stdout.write(
-                    "Inserting/updating signature (%s, %s, %s)"
-                    % (item["signature"], item["date"], item["build_id"])
-                )
+                for signature, first_build, first_date in batch:
+                    self.stdout.write(
+                        "Inserting/updating signature (%s, %s, %s)"
+                        % (signature, first_date, first_build)
+                    )
             else:
-                self.update_crashstats_signature(
-                    signature=item["signature"],
-                    report_date=item["date"],
-                    report_build=item["build_id"],
-                )
+                upsert_signatures(batch)
 
-        self.stdout.write("Inserted/updated %d signatures." % len(signature_data))
+        self.stdout.write("Inserted/updated %d signatures." % count)
@@ -5,8 +5,9 @@
 """
 This command verifies that all the incoming crash reports for the day before the
 specified day were processed. It does this by listing the raw crash files for the day,
-then checking to see if each of those raw crash files have corresponding processed crash
-files.
+listing the processed crash files with the same prefixes, and then checking to see if
+each of those raw crash files have corresponding processed crash files and documents in
+Elasticsearch.
 """
 
 import concurrent.futures
@@ -34,6 +35,13 @@ WORKER_TIMEOUT = 15 * 60
 # Number of prefix variations to pass to a check_crashids subprocess
 CHUNK_SIZE = 4
 
+# Number of threads in each check_crashids subprocess
+DEFAULT_NUM_THREADS = 4
+
+# Number of crash ids to look up in a single Elasticsearch query; this can't be more
+# than the maximum _results_number
+ES_BATCH_SIZE = 1000
+
 
 def is_in_storage(crash_dest, crash_id):
     """Is the processed crash in storage."""
@@ -58,6 +66,7 @@ def check_elasticsearch(supersearch, crash_ids):
         "uuid": crash_ids,
         "date": [">=%s" % start_date, "<=%s" % end_date],
         "_columns": ["uuid"],
+        "_results_number": len(crash_ids),
         "_facets": [],
         "_facets_size": 0,
     }
@@ -67,39 +76,72 @@ def check_elasticsearch(supersearch, crash_ids):
     return set(crash_ids) - set(crash_ids_in_es)
 
 
-def check_crashids_for_date(firstchars_chunk, date):
+def list_crashids(crash_storage, prefix):
+    """Return set of crash ids for keys in storage with the specified prefix"""
+    crash_ids = set()
+    for page in crash_storage.list_objects_paginator(prefix=prefix):
+        # NOTE(willkg): Keys here look like /v1/raw_crash/DATE/CRASHID or
+        # /v1/processed_crash/CRASHID
+        crash_ids.update(item.split("/")[-1] for item in page)
+    return crash_ids
+
+
+def find_missing_in_storage(crash_source, crash_dest, firstchars, date):
+    """Find raw crashes for a date and prefix that have no processed crash
+
+    This lists the processed crashes with the same prefix rather than checking each
+    crash id with a separate request. Processed crash keys don't have a date, so the
+    processed crash listing covers all dates and gets filtered by the date embedded
+    in the crash id.
+
+    :returns: tuple of (crash ids in storage, crash ids missing in storage)
+
+    """
+    raw_crash_ids = list_crashids(crash_source, f"v1/raw_crash/{date}/{firstchars}")
+    if not raw_crash_ids:
+        return set(), set()
+
+    # Crash ids end with the date in YYMMDD format
+    date_suffix = date[2:]
+    processed_crash_ids = {
+        crash_id
+        for crash_id in list_crashids(crash_dest, f"v1/processed_crash/{firstchars}")
+        if crash_id.endswith(date_suffix)
+    }
+
+    return (
+        raw_crash_ids & processed_crash_ids,
+        raw_crash_ids - processed_crash_ids,
+    )
+
+
+def check_crashids_for_date(firstchars_chunk, date, num_threads=DEFAULT_NUM_THREADS):
     """Check crash ids for a given firstchars and date"""
     crash_source = build_instance_from_settings(socorro_settings.CRASH_SOURCE)
     crash_dest = build_instance_from_settings(socorro_settings.STORAGE)
 
     supersearch = SuperSearchUnredacted()
 
-    missing = []
+    in_storage = set()
+    missing = set()
 
-    for firstchars in firstchars_chunk:
-        # Grab all the crash ids at the given date directory
-        page_iterator = crash_source.list_objects_paginator(
-            prefix=f"v1/raw_crash/{date}/{firstchars}",
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
+        # Check storage by listing raw and processed crashes for each prefix
+        find_missing = partial(
+            find_missing_in_storage, crash_source, crash_dest, date=date
         )
+        for found, missing_in_storage in executor.map(find_missing, firstchars_chunk):
+            in_storage.update(found)
+            missing.update(missing_in_storage)
 
-        for page in page_iterator:
-            # NOTE(willkg): Keys here look like /v1/raw_crash/DATE/CRASHID
-            crash_ids = [item.split("/")[-1] for item in page]
-
-            if not crash_ids:
-                continue
-
-            # Check storage first
-            for crash_id in crash_ids:
-                if not is_in_storage(crash_dest, crash_id):
-                    missing.append(crash_id)
-
-            # Check Elasticsearch in batches
-            for crash_ids_batch in chunked(crash_ids, 100):
-                missing_in_es = check_elasticsearch(supersearch, crash_ids_batch)
-                missing.extend(missing_in_es)
+        # Check Elasticsearch in batches for the crash ids that are in storage;
+        # ones missing in storage are already going to get reprocessed
+        check_es = partial(check_elasticsearch, supersearch)
+        batches = chunked(sorted(in_storage), ES_BATCH_SIZE)
+        for missing_in_es in executor.map(check_es, batches):
+            missing.update(missing_in_es)
 
-    return list(set(missing))
+    return list(missing)
 
 
 class Command(BaseCommand):
@@ -117,6 +159,12 @@ class Command(BaseCommand):
             type=int,
             help="Number of concurrent workers to list raw_crashes.",
         )
+        parser.add_argument(
+            "--num-threads",
+            default=DEFAULT_NUM_THREADS,
+            type=int,
+            help="Number of threads in each worker for storage and Elasticsearch checks.",
+        )
 
     def get_threechars(self):
         """Generate all combinations of 3 hex digits."""
@@ -126,8 +174,10 @@ class Command(BaseCommand):
                 for z in chars:
                     yield x + y + z
 
-    def find_missing(self, num_workers, date):
-        check_crashids = partial(check_crashids_for_date, date=date)
+    def find_missing(self, num_workers, date, num_threads=DEFAULT_NUM_THREADS):
+        check_crashids = partial(
+            check_crashids_for_date, date=date, num_threads=num_threads
+        )
 
         missing = []
         firstchars_chunked = chunked(self.get_threechars(), CHUNK_SIZE)
@@ -189,7 +239,11 @@ class Command(BaseCommand):
         )
 
         # Find new missing crashes.
-        missing = self.find_missing(options["num_workers"], check_date_formatted)
+        missing = self.find_missing(
+            options["num_workers"],
+            check_date_formatted,
+            num_threads=options["num_threads"],
+        )
         self.handle_missing(check_date_formatted, missing)
 
         self.stdout.write("Done!")
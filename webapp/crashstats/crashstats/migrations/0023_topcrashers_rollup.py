@@ -0,0 +1,110 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("crashstats", "0022_auto_20210317_2220"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TopCrashersRollupHour",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "hour",
+                    models.DateTimeField(
+                        help_text="the start of the hour", unique=True
+                    ),
+                ),
+                (
+                    "rolled_up_at",
+                    models.DateTimeField(
+                        auto_now=True, help_text="when the hour was last rolled up"
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TopCrashersRollupTotal",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField(help_text="the start of the hour")),
+                ("product", models.TextField(help_text="the product")),
+                ("version", models.TextField(help_text="the version")),
+                ("process_type", models.TextField(help_text="the process type")),
+                ("report_type", models.TextField(help_text="the report type")),
+                ("count", models.IntegerField(help_text="number of crash reports")),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["product", "hour"],
+                        name="tcrolluptotal_product_hour",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="TopCrashersRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField(help_text="the start of the hour")),
+                ("product", models.TextField(help_text="the product")),
+                ("version", models.TextField(help_text="the version")),
+                ("process_type", models.TextField(help_text="the process type")),
+                ("report_type", models.TextField(help_text="the report type")),
+                (
+                    "signature",
+                    models.TextField(help_text="the crash report signature"),
+                ),
+                ("count", models.IntegerField(help_text="number of crash reports")),
+                (
+                    "facets",
+                    models.JSONField(
+                        default=dict,
+                        help_text=(
+                            "map of facet name -> term -> count plus startup window "
+                            "count"
+                        ),
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["product", "hour"],
+                        name="tcrollup_product_hour",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("crashstats", "0023_topcrashers_rollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="topcrashersrollup",
+            index=models.Index(
+                fields=["product", "version", "process_type", "report_type", "hour"],
+                name="tcrollup_filters",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="topcrashersrolluptotal",
+            index=models.Index(
+                fields=["product", "version", "process_type", "report_type", "hour"],
+                name="tcrolluptotal_filters",
+            ),
+        ),
+    ]
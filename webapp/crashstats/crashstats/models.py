@@ -11,10 +11,13 @@ import datetime
 import functools
 import hashlib
 import logging
+import threading
+import time
+import uuid
 
 from django.conf import settings
 from django.core.cache import cache
-from django.db import models
+from django.db import connection, models
 from django.template.defaultfilters import slugify
 from django.urls import reverse, NoReverseMatch
 from django.utils.encoding import iri_to_uri
@@ -224,6 +227,62 @@ class MissingProcessedCrash(models.Model):
         verbose_name_plural = "missing processed crashes"
 
 
+class TopCrashersRollupHour(models.Model):
+    """Bookkeeping table to keep track of which hours have been rolled up."""
+
+    hour = models.DateTimeField(unique=True, help_text="the start of the hour")
+    rolled_up_at = models.DateTimeField(
+        auto_now=True, help_text="when the hour was last rolled up"
+    )
+
+
+class TopCrashersRollupTotal(models.Model):
+    """Number of crash reports in an hour."""
+
+    hour = models.DateTimeField(help_text="the start of the hour")
+    product = models.TextField(help_text="the product")
+    version = models.TextField(help_text="the version")
+    process_type = models.TextField(help_text="the process type")
+    report_type = models.TextField(help_text="the report type")
+    count = models.IntegerField(help_text="number of crash reports")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "hour"], name="tcrolluptotal_product_hour"),
+            # Covers the filters the topcrashers view uses
+            models.Index(
+                fields=["product", "version", "process_type", "report_type", "hour"],
+                name="tcrolluptotal_filters",
+            ),
+        ]
+
+
+class TopCrashersRollup(models.Model):
+    """Number of crash reports and facets for a signature in an hour."""
+
+    hour = models.DateTimeField(help_text="the start of the hour")
+    product = models.TextField(help_text="the product")
+    version = models.TextField(help_text="the version")
+    process_type = models.TextField(help_text="the process type")
+    report_type = models.TextField(help_text="the report type")
+    signature = models.TextField(help_text="the crash report signature")
+    count = models.IntegerField(help_text="number of crash reports")
+    facets = models.JSONField(
+        default=dict,
+        help_text="map of facet name -> term -> count plus startup window count",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "hour"], name="tcrollup_product_hour"),
+            # Covers the filters the topcrashers view uses
+            models.Index(
+                fields=["product", "version", "process_type", "report_type", "hour"],
+                name="tcrollup_filters",
+            ),
+        ]
+
+
 # Socorro x-middleware models
 
 
@@ -270,6 +329,110 @@ def _clean_query(query, max_length=30):
     return cleaned
 
 
+def canonicalize_params(params, ordered_params=()):
+    """Return a canonical form of params for building cache keys
+
+    Dict keys are sorted and list, tuple, and set values are sorted so equivalent
+    queries like ``{"product": ["Firefox", "Fenix"]}`` and
+    ``{"product": ["Fenix", "Firefox"]}`` have the same canonical form. Values of
+    top-level parameters in ``ordered_params`` keep their order.
+
+    :arg params: the params to canonicalize
+    :arg ordered_params: names of top-level parameters where order matters
+
+    :returns: canonical form of params
+
+    """
+
+    def _canonicalize(value):
+        if isinstance(value, dict):
+            return tuple(
+                sorted((str(key), _canonicalize(val)) for key, val in value.items())
+            )
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return tuple(sorted((_canonicalize(item) for item in value), key=repr))
+        return value
+
+    if not isinstance(params, dict):
+        return _canonicalize(params)
+
+    return tuple(
+        sorted(
+            (
+                str(key),
+                tuple(_canonicalize(item) for item in value)
+                if key in ordered_params and isinstance(value, (list, tuple))
+                else _canonicalize(value),
+            )
+            for key, value in params.items()
+        )
+    )
+
+
+class _Call:
+    """An in-flight call in a SingleFlight"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key in this process
+
+    The first caller for a key runs the function. Callers that come in while it's
+    running wait for it and get the same result or exception.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        """Return whether there's a call running for this key"""
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, func):
+        """Run func or wait for the call already running for this key
+
+        :arg key: the key
+        :arg func: function that takes no arguments
+
+        :returns: ``(result, coalesced)`` tuple where coalesced is True if this
+            waited for another caller's call
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+# Implementation fetches running in this process
+FETCHES = SingleFlight()
+
+
 class SocorroCommon:
     # by default, we don't need username and password
     username = password = None
@@ -279,6 +442,10 @@ class SocorroCommon:
     # Default cache expiration time if applicable (5 minutes)
     cache_seconds = 5 * 60
 
+    # Parameters where the order of list values matters; values of other list
+    # parameters are sorted when building cache keys
+    cache_ordered_params = ()
+
     # By default, the model is not called with an API user. This is applicable when the
     # models are used from views that originate from pure class instantiation instead of
     # from web GET or POST requests
@@ -297,32 +464,157 @@ class SocorroCommon:
         retries=None,
         retry_sleeptime=None,
     ):
-        cache_key = None
+        implementation_method = getattr(implementation, method)
 
         if (
-            settings.CACHE_IMPLEMENTATION_FETCHES
-            and not dont_cache
-            and self.cache_seconds > 0
+            not settings.CACHE_IMPLEMENTATION_FETCHES
+            or dont_cache
+            or self.cache_seconds <= 0
         ):
-            name = implementation.__class__.__name__
-            key_string = name + repr(params)
-            cache_key = hashlib.md5(key_string.encode("utf-8")).hexdigest()
+            return implementation_method(**params)
+
+        name = implementation.__class__.__name__
+        key_string = "fetch:" + name + repr(self.get_cache_key_params(method, params))
+        cache_key = hashlib.md5(key_string.encode("utf-8")).hexdigest()
+
+        def compute():
+            return implementation_method(**params)
+
+        if refresh_cache:
+            result = compute()
+            self._cache_set(cache_key, result)
+            return result
+
+        entry = cache.get(cache_key)
+        if entry is not None:
+            fresh_until, result = entry
+            if time.time() < fresh_until:
+                logger.debug("CACHE HIT %s", name)
+                METRICS.incr("webapp.crashstats.models.cache", tags=["result:hit"])
+                return result
+
+            # Serve the stale result and refresh it in the background
+            logger.debug("CACHE STALE %s", name)
+            METRICS.incr("webapp.crashstats.models.cache", tags=["result:stale"])
+            self._refresh_in_background(cache_key, compute)
+            return result
+
+        result, coalesced = FETCHES.do(
+            cache_key, lambda: self._compute_and_cache(cache_key, compute)
+        )
+        outcome = "coalesced" if coalesced else "miss"
+        METRICS.incr("webapp.crashstats.models.cache", tags=[f"result:{outcome}"])
+        return result
 
-            if not refresh_cache:
-                result = cache.get(cache_key)
-                if result is not None:
-                    logger.debug("CACHE HIT %s", implementation.__class__.__name__)
-                    return result
+    def get_cache_key_params(self, method, params):
+        """Return the canonical form of params used to build the cache key
 
-        implementation_method = getattr(implementation, method)
-        result = implementation_method(**params)
-        if cache_key:
+        :arg method: the name of the implementation method being called
+        :arg params: the params for the implementation method
+
+        :returns: canonical form of params
+
+        """
+        return canonicalize_params(params, self.cache_ordered_params)
+
+    def _cache_set(self, cache_key, result):
+        """Cache a result
+
+        Results are fresh for ``cache_seconds`` and then served stale for
+        ``CACHE_IMPLEMENTATION_FETCHES_STALE_SECONDS`` while they're refreshed.
+
+        """
+        entry = (time.time() + self.cache_seconds, result)
+        timeout = (
+            self.cache_seconds + settings.CACHE_IMPLEMENTATION_FETCHES_STALE_SECONDS
+        )
+        try:
+            cache.set(cache_key, entry, timeout=timeout)
+        except MemcacheServerError:
+            METRICS.incr("webapp.crashstats.models.cache_set_error")
+
+    def _compute_and_cache(self, cache_key, compute):
+        """Compute and cache a result with only one computation across processes
+
+        If another process is computing the result, this waits for it to finish
+        and uses its result. If it doesn't finish in
+        ``CACHE_IMPLEMENTATION_FETCHES_WAIT_SECONDS``, this computes the result
+        itself without taking the lock.
+
+        """
+        lock_key = f"{cache_key}:lock"
+        token = self._acquire_lock(lock_key)
+        if token is None:
+            deadline = (
+                time.monotonic() + settings.CACHE_IMPLEMENTATION_FETCHES_WAIT_SECONDS
+            )
+            while time.monotonic() < deadline and cache.get(lock_key) is not None:
+                time.sleep(0.1)
+            entry = cache.get(cache_key)
+            if entry is not None and time.time() < entry[0]:
+                return entry[1]
+
+        try:
+            result = compute()
+            self._cache_set(cache_key, result)
+            return result
+        finally:
+            if token is not None:
+                self._release_lock(lock_key, token)
+
+    def _acquire_lock(self, lock_key):
+        """Acquire the lock for computing a result across processes
+
+        :returns: the token for releasing the lock or None if another process holds it
+
+        """
+        token = uuid.uuid4().hex
+        lock_seconds = settings.CACHE_IMPLEMENTATION_FETCHES_LOCK_SECONDS
+        if cache.add(lock_key, token, timeout=lock_seconds):
+            return token
+        return None
+
+    def _release_lock(self, lock_key, token):
+        """Release a lock this process acquired
+
+        If the lock expired and another process acquired it, this leaves it alone.
+
+        """
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+    def _refresh_in_background(self, cache_key, compute):
+        """Refresh a stale cached result in a background thread
+
+        Nothing happens if this or another process is already refreshing it.
+
+        """
+        if FETCHES.in_flight(cache_key):
+            return
+
+        lock_key = f"{cache_key}:lock"
+        token = self._acquire_lock(lock_key)
+        if token is None:
+            return
+
+        def refresh():
             try:
-                cache.set(cache_key, result, timeout=self.cache_seconds)
-            except MemcacheServerError:
-                METRICS.incr("webapp.crashstats.models.cache_set_error")
+                result = compute()
+                self._cache_set(cache_key, result)
+                return result
+            finally:
+                self._release_lock(lock_key, token)
 
-        return result
+        def run():
+            try:
+                FETCHES.do(cache_key, refresh)
+            except Exception:
+                logger.exception("error refreshing stale cache entry")
+            finally:
+                # Close the database connection this thread opened, if any
+                connection.close()
+
+        threading.Thread(target=run, name="fetchRefresh", daemon=True).start()
 
     def _complete_url(self, url):
         if url.startswith("/"):
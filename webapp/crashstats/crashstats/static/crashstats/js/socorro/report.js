@@ -52,14 +52,18 @@ $(document).ready(function () {
       once = true;
       var container = $('#minidump-stackwalk-json');
       if (container.length) {
-        var jsonData = container.data('minidumpstackwalk');
-        try {
-          $('#minidump-stackwalk-json').jsonViewer(jsonData, { withLinks: false });
-        } catch (ex) {
-          console.warn('The data in the #minidump-stackwalk-json dataset is not valid JSON');
-          container.append($('<p>Error when parsing JSON. Showing raw value:</p>'));
-          container.append(document.createTextNode(jsonData));
-        }
+        // The output can be big, so it's loaded when it's shown
+        container.append($('<div>', { class: 'loader' }));
+        $.ajax({
+          url: container.data('url'),
+          dataType: 'json',
+          success: function (jsonData) {
+            container.empty().jsonViewer(jsonData, { withLinks: false });
+          },
+          error: function () {
+            container.empty().append($('<p>Error when loading the minidump-stackwalk output.</p>'));
+          },
+        });
       }
     };
   })();
@@ -100,7 +104,25 @@ $(document).ready(function () {
 
   $('a[href="#allthreads"]').on('click', function () {
     var element = $(this);
-    $('#allthreads').toggle(400);
+    var allThreads = $('#allthreads');
+    // The other threads are loaded the first time they're shown
+    if (allThreads.data('url') && !allThreads.data('loaded')) {
+      allThreads.data('loaded', true);
+      allThreads.append($('<div>', { class: 'loader' }));
+      $.ajax({
+        url: allThreads.data('url'),
+        dataType: 'html',
+        success: function (data) {
+          allThreads.empty().append($(data));
+          addExpandLinks(allThreads.find('table'));
+        },
+        error: function () {
+          allThreads.data('loaded', false);
+          allThreads.empty().append($('<p>Error when loading the other threads.</p>'));
+        },
+      });
+    }
+    allThreads.toggle(400);
     if (element.text() === element.data('show')) {
       element.text(element.data('hide'));
       return true;
@@ -125,23 +147,26 @@ $(document).ready(function () {
   };
 
   // collect all tables inside the div with id frames
-  tbls.each(function () {
-    var isExpandAdded = false;
-    var cells = $(this).find('tbody tr td:nth-child(3)');
-
-    // Loop through each 3rd cell of each row in the current table and if
-    // any cell's title atribute is not of the same length as the text
-    // content, we need to add the expand link to the table.
-    // There is a second check to ensure that the expand link has not been added already.
-    // This avoids adding multiple calls to addExpand which will add multiple links to the
-    // same header.
-    cells.each(function () {
-      if ($(this).attr('title') && $(this).attr('title').length !== $(this).text().length && !isExpandAdded) {
-        addExpand($(this).parents('tbody').find('th.signature-column'));
-        isExpandAdded = true;
-      }
+  var addExpandLinks = function (tables) {
+    tables.each(function () {
+      var isExpandAdded = false;
+      var cells = $(this).find('tbody tr td:nth-child(3)');
+
+      // Loop through each 3rd cell of each row in the current table and if
+      // any cell's title atribute is not of the same length as the text
+      // content, we need to add the expand link to the table.
+      // There is a second check to ensure that the expand link has not been added already.
+      // This avoids adding multiple calls to addExpand which will add multiple links to the
+      // same header.
+      cells.each(function () {
+        if ($(this).attr('title') && $(this).attr('title').length !== $(this).text().length && !isExpandAdded) {
+          addExpand($(this).parents('tbody').find('th.signature-column'));
+          isExpandAdded = true;
+        }
+      });
     });
-  });
+  };
+  addExpandLinks(tbls);
 
   $('#modules-list').tablesorter({ sortList: [[1, 0]], headers: { 1: { sorter: 'digit' } } });
 
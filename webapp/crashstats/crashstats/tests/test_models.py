@@ -2,7 +2,9 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import datetime
 import random
+import threading
 import time
 from urllib.parse import urlsplit, parse_qs
 from unittest import mock
@@ -11,15 +13,20 @@ import pytest
 
 from django.core.cache import cache
 from django.conf import settings
+from django.test import override_settings
 from django.utils import dateparse
+import freezegun
+from markus.testing import AnyTagValue, MetricsMock
 
 from crashstats.crashstats import models
 from crashstats.crashstats.tests.conftest import Response
 from crashstats.crashstats.tests.testbase import DjangoTestCase
+from crashstats.supersearch.models import SuperSearch
 from socorro import settings as socorro_settings
 from socorro.external.gcs.crashstorage import dict_to_str, build_keys
 from socorro.lib import BadArgumentError
 from socorro.libclass import build_instance_from_settings
+from socorro.lib.libdatetime import utc_now
 from socorro.lib.libooid import create_new_ooid, date_from_ooid
 
 # Amount of time to sleep between publish and pull so messages are available
@@ -414,6 +421,164 @@ class TestMiddlewareModels(DjangoTestCase):
         assert info
 
 
+class CountingImplementation:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def get(self, **params):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        return {"calls": calls}
+
+    def msearch(self, queries):
+        return [self.get(**query) for query in queries]
+
+
+class CachingModel(models.SocorroCommon):
+    cache_seconds = 60
+
+
+class TestFetchCache(DjangoTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_canonicalize_params(self):
+        assert models.canonicalize_params(
+            {"product": ["Firefox", "Fenix"], "_sort": ["b", "a"]},
+            ordered_params=("_sort",),
+        ) == models.canonicalize_params(
+            {"_sort": ["b", "a"], "product": ["Fenix", "Firefox"]},
+            ordered_params=("_sort",),
+        )
+        assert models.canonicalize_params(
+            {"_sort": ["b", "a"]}, ordered_params=("_sort",)
+        ) != models.canonicalize_params(
+            {"_sort": ["a", "b"]}, ordered_params=("_sort",)
+        )
+
+    def test_equivalent_params_share_entry(self):
+        impl = CountingImplementation()
+        api = CachingModel()
+        with MetricsMock() as mm:
+            assert api.fetch(impl, params={"product": ["Firefox", "Fenix"]}) == {
+                "calls": 1
+            }
+            assert api.fetch(impl, params={"product": ["Fenix", "Firefox"]}) == {
+                "calls": 1
+            }
+            mm.assert_incr_once(
+                "socorro.webapp.crashstats.models.cache",
+                tags=["result:miss", AnyTagValue("host")],
+            )
+            mm.assert_incr_once(
+                "socorro.webapp.crashstats.models.cache",
+                tags=["result:hit", AnyTagValue("host")],
+            )
+        assert impl.calls == 1
+
+    def test_msearch_cache_key(self):
+        impl = CountingImplementation()
+        api = SuperSearch()
+
+        def msearch(queries):
+            return api.fetch(impl, method="msearch", params={"queries": queries})
+
+        query_a = {"product": ["Firefox", "Fenix"], "_sort": ["-date", "product"]}
+        query_b = {"product": ["Firefox", "Fenix"], "_sort": ["product", "-date"]}
+        assert msearch([query_a, query_b]) == [{"calls": 1}, {"calls": 2}]
+
+        # Queries with the same values in a different order share the cache entry
+        assert msearch(
+            [
+                {"_sort": ["-date", "product"], "product": ["Fenix", "Firefox"]},
+                query_b,
+            ]
+        ) == [{"calls": 1}, {"calls": 2}]
+
+        # The order of the queries and of sort values in each query matters
+        assert msearch([query_b, query_a]) == [{"calls": 3}, {"calls": 4}]
+        assert msearch([query_b, query_b]) == [{"calls": 5}, {"calls": 6}]
+
+    def test_concurrent_fetches_coalesced(self):
+        impl = CountingImplementation(delay=0.2)
+        api = CachingModel()
+        results = []
+
+        def _fetch():
+            results.append(api.fetch(impl, params={"product": ["Firefox"]}))
+
+        threads = [threading.Thread(target=_fetch) for _ in range(5)]
+        with MetricsMock() as mm:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert (
+                len(
+                    mm.filter_records(
+                        "incr",
+                        "socorro.webapp.crashstats.models.cache",
+                        tags=["result:coalesced", AnyTagValue("host")],
+                    )
+                )
+                == 4
+            )
+        assert impl.calls == 1
+        assert results == [{"calls": 1}] * 5
+
+    @override_settings(CACHE_IMPLEMENTATION_FETCHES_WAIT_SECONDS=0)
+    def test_lock_held_by_another_process(self):
+        impl = CountingImplementation()
+        api = CachingModel()
+        lock_keys = []
+        cache_add = cache.add
+
+        def add(key, value, timeout):
+            if key.endswith(":lock"):
+                # Another process acquires the lock first
+                cache_add(key, "other", timeout=timeout)
+                lock_keys.append(key)
+            return cache_add(key, value, timeout=timeout)
+
+        with mock.patch.object(models.cache, "add", side_effect=add):
+            assert api.fetch(impl, params={}) == {"calls": 1}
+
+        # The result was computed after waiting, but the other process' lock was
+        # left alone
+        assert len(lock_keys) == 1
+        assert cache.get(lock_keys[0]) == "other"
+
+    def test_stale_served_and_refreshed(self):
+        impl = CountingImplementation()
+        api = CachingModel()
+        assert api.fetch(impl, params={}) == {"calls": 1}
+
+        # Once the entry is stale, the stale result is returned and refreshed in
+        # the background
+        later = utc_now() + datetime.timedelta(seconds=api.cache_seconds + 1)
+        with freezegun.freeze_time(later, tick=True):
+            with MetricsMock() as mm:
+                assert api.fetch(impl, params={}) == {"calls": 1}
+                mm.assert_incr_once(
+                    "socorro.webapp.crashstats.models.cache",
+                    tags=["result:stale", AnyTagValue("host")],
+                )
+
+            # Wait for the background refresh
+            for thread in threading.enumerate():
+                if thread.name == "fetchRefresh":
+                    thread.join()
+
+            assert impl.calls == 2
+            assert api.fetch(impl, params={}) == {"calls": 2}
+
+
 class TestProcessedCrash:
     def test_api(self, storage_helper):
         api = models.ProcessedCrash()
@@ -0,0 +1,202 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import datetime
+import io
+from unittest import mock
+
+from django.core.management import call_command
+
+from crashstats.crashstats.models import (
+    TopCrashersRollup,
+    TopCrashersRollupHour,
+    TopCrashersRollupTotal,
+)
+
+
+KEY = ("Firefox", "1.0", "parent", "crash")
+
+
+class FakeModel:
+    def __init__(self):
+        self._iter_buckets_steps = []
+        self.iter_buckets_calls = []
+
+    def add_iter_buckets_step(self, buckets):
+        self._iter_buckets_steps.append({"buckets": buckets})
+
+    def add_hour(self, count, signature_buckets, startup_buckets):
+        """Add the totals, startup window, and signature passes for an hour"""
+        self.add_iter_buckets_step([{"term": KEY, "count": count}])
+        self.add_iter_buckets_step(startup_buckets)
+        self.add_iter_buckets_step(signature_buckets)
+
+    def iter_buckets(self, field, aggs=(), page_size=1000, **kwargs):
+        if not self._iter_buckets_steps:
+            raise Exception("Unexpected call to .iter_buckets()")
+
+        self.iter_buckets_calls.append((field, aggs, kwargs))
+        step = self._iter_buckets_steps.pop(0)
+        yield from step["buckets"]
+
+
+class TestTopCrashersRollupCommand:
+    @mock.patch(
+        "crashstats.crashstats.management.commands.topcrashersrollup.SuperSearchUnredacted"
+    )
+    def test_rollup(self, mock_supersearch, db):
+        supersearch = FakeModel()
+        mock_supersearch.return_value.get_implementation.return_value = supersearch
+
+        for _ in range(3):
+            supersearch.add_hour(
+                count=5,
+                signature_buckets=[
+                    {
+                        "term": KEY + ("OOM | small",),
+                        "count": 5,
+                        "facets": {
+                            "platform": [
+                                {"term": "Windows NT", "count": 4},
+                                {"term": "Linux", "count": 1},
+                            ],
+                            "is_garbage_collecting": [{"term": "T", "count": 2}],
+                            "dom_fission_enabled": [],
+                            "startup_crash": [{"term": "F", "count": 5}],
+                        },
+                    }
+                ],
+                startup_buckets=[{"term": KEY + ("OOM | small",), "count": 2}],
+            )
+
+        out = io.StringIO()
+        call_command(
+            "topcrashersrollup",
+            last_success="2024-05-01T03:30",
+            run_time="2024-05-01T03:30",
+            stdout=out,
+        )
+
+        # Rolls up the 3 hours before the last success
+        hours = [
+            datetime.datetime(2024, 5, 1, hour, tzinfo=datetime.timezone.utc)
+            for hour in (0, 1, 2)
+        ]
+        assert (
+            list(
+                TopCrashersRollupHour.objects.order_by("hour").values_list(
+                    "hour", flat=True
+                )
+            )
+            == hours
+        )
+        totals_call, startup_call, signatures_call = supersearch.iter_buckets_calls[:3]
+        assert totals_call[0] == ["product", "version", "process_type", "report_type"]
+        assert totals_call[2]["date"] == [
+            ">=2024-05-01T00:00:00+00:00",
+            "<2024-05-01T01:00:00+00:00",
+        ]
+        assert startup_call[0] == [
+            "product",
+            "version",
+            "process_type",
+            "report_type",
+            "signature",
+        ]
+        assert startup_call[2]["uptime"] == ["<60"]
+        assert signatures_call[0] == startup_call[0]
+        assert signatures_call[1] == [
+            "platform",
+            "is_garbage_collecting",
+            "dom_fission_enabled",
+            "startup_crash",
+        ]
+
+        assert list(
+            TopCrashersRollupTotal.objects.filter(hour=hours[0]).values(
+                "product", "version", "process_type", "report_type", "count"
+            )
+        ) == [
+            {
+                "product": "Firefox",
+                "version": "1.0",
+                "process_type": "parent",
+                "report_type": "crash",
+                "count": 5,
+            }
+        ]
+        rollup = TopCrashersRollup.objects.get(hour=hours[0])
+        assert rollup.signature == "OOM | small"
+        assert rollup.count == 5
+        assert rollup.facets == {
+            "platform": {"Windows NT": 4, "Linux": 1},
+            "is_garbage_collecting": {"T": 2},
+            "dom_fission_enabled": {},
+            "startup_crash": {"F": 5},
+            "startup_window": 2,
+        }
+
+    @mock.patch(
+        "crashstats.crashstats.management.commands.topcrashersrollup.SuperSearchUnredacted"
+    )
+    def test_rollup_missing_dimensions(self, mock_supersearch, db):
+        supersearch = FakeModel()
+        mock_supersearch.return_value.get_implementation.return_value = supersearch
+
+        missing_key = ("Firefox", None, "parent", None)
+        supersearch.add_iter_buckets_step([{"term": missing_key, "count": 3}])
+        supersearch.add_iter_buckets_step(
+            [{"term": missing_key + ("OOM | small",), "count": 1}]
+        )
+        supersearch.add_iter_buckets_step(
+            [{"term": missing_key + ("OOM | small",), "count": 3, "facets": {}}]
+        )
+
+        call_command(
+            "topcrashersrollup",
+            last_success="2024-05-01T04:00",
+            run_time="2024-05-01T02:00",
+            stdout=io.StringIO(),
+        )
+
+        # Crash reports missing dimensions are counted
+        for _, _, params in supersearch.iter_buckets_calls:
+            assert params["include_missing"] is True
+
+        assert list(
+            TopCrashersRollupTotal.objects.values_list(
+                "version", "process_type", "report_type", "count"
+            )
+        ) == [("", "parent", "", 3)]
+        rollup = TopCrashersRollup.objects.get()
+        assert (rollup.version, rollup.report_type, rollup.count) == ("", "", 3)
+        assert rollup.facets["startup_window"] == 1
+
+    @mock.patch(
+        "crashstats.crashstats.management.commands.topcrashersrollup.SuperSearchUnredacted"
+    )
+    def test_rollup_replaces_hour(self, mock_supersearch, db):
+        supersearch = FakeModel()
+        mock_supersearch.return_value.get_implementation.return_value = supersearch
+
+        for count in (5, 7):
+            supersearch.add_hour(
+                count=count,
+                signature_buckets=[
+                    {"term": KEY + ("OOM | small",), "count": count, "facets": {}}
+                ],
+                startup_buckets=[],
+            )
+            call_command(
+                "topcrashersrollup",
+                last_success="2024-05-01T04:00",
+                run_time="2024-05-01T02:00",
+                stdout=io.StringIO(),
+            )
+
+        hour = datetime.datetime(2024, 5, 1, 1, tzinfo=datetime.timezone.utc)
+        assert list(TopCrashersRollup.objects.values_list("hour", "count")) == [
+            (hour, 7)
+        ]
+        assert TopCrashersRollupTotal.objects.get().count == 7
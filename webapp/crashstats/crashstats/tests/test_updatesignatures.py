@@ -8,21 +8,39 @@ from unittest import mock
 from django.core.management import call_command
 
 from crashstats.crashstats.models import Signature
+from socorro.lib.libdatetime import string_to_datetime
+
+
+def build_bucket(signature, build_id, date, count=1):
+    """Build a signature bucket like SuperSearch.iter_buckets returns"""
+    return {
+        "term": signature,
+        "count": count,
+        "facets": {
+            "min_build_id": {"value": float(build_id)},
+            "min_date": {"value": string_to_datetime(date).timestamp() * 1000},
+        },
+    }
 
 
 class FakeModel:
     def __init__(self):
-        self._get_steps = []
+        self._iter_buckets_steps = []
+        self.iter_buckets_calls = []
 
-    def add_get_step(self, response):
-        self._get_steps.append({"response": response})
+    def get_implementation(self):
+        return self
 
-    def get(self, *args, **kwargs):
-        if not self._get_steps:
-            raise Exception("Unexpected call to .get()")
+    def add_iter_buckets_step(self, buckets):
+        self._iter_buckets_steps.append({"buckets": buckets})
 
-        step = self._get_steps.pop(0)
-        return step["response"]
+    def iter_buckets(self, field, aggs=(), page_size=1000, **kwargs):
+        if not self._iter_buckets_steps:
+            raise Exception("Unexpected call to .iter_buckets()")
+
+        self.iter_buckets_calls.append((field, aggs, kwargs))
+        step = self._iter_buckets_steps.pop(0)
+        yield from step["buckets"]
 
 
 class TestUpdateSignaturesCommand:
@@ -45,8 +63,8 @@ class TestUpdateSignaturesCommand:
         supersearch = FakeModel()
         mock_supersearch.return_value = supersearch
 
-        # Mock SuperSearch to return no results
-        supersearch.add_get_step({"errors": [], "hits": [], "total": 0, "facets": {}})
+        # Mock SuperSearch to return no signatures
+        supersearch.add_iter_buckets_step([])
 
         out = io.StringIO()
         call_command("updatesignatures", stdout=out)
@@ -65,20 +83,13 @@ class TestUpdateSignaturesCommand:
         data = self.fetch_crashstats_signature_data()
         assert len(data) == 0
 
-        # Mock SuperSearch to return 1 crash
-        supersearch.add_get_step(
-            {
-                "errors": [],
-                "hits": [
-                    {
-                        "build_id": "20180420000000",
-                        "date": "2018-05-03T16:00:00.00000+00:00",
-                        "signature": "OOM | large",
-                    }
-                ],
-                "total": 1,
-                "facets": {},
-            }
+        # Mock SuperSearch to return 1 signature
+        supersearch.add_iter_buckets_step(
+            [
+                build_bucket(
+                    "OOM | large", "20180420000000", "2018-05-03T16:00:00.00000+00:00"
+                )
+            ]
         )
 
         out = io.StringIO()
@@ -94,20 +105,13 @@ class TestUpdateSignaturesCommand:
             }
         ]
 
-        # Mock SuperSearch to return 1 crash with different data
-        supersearch.add_get_step(
-            {
-                "errors": [],
-                "hits": [
-                    {
-                        "build_id": "20180320000000",
-                        "date": "2018-05-03T12:00:00.00000+00:00",
-                        "signature": "OOM | large",
-                    }
-                ],
-                "total": 1,
-                "facets": {},
-            }
+        # Mock SuperSearch to return the signature with an earlier build id and date
+        supersearch.add_iter_buckets_step(
+            [
+                build_bucket(
+                    "OOM | large", "20180320000000", "2018-05-03T12:00:00.00000+00:00"
+                )
+            ]
         )
 
         # Run updatesignatures again
@@ -124,50 +128,64 @@ class TestUpdateSignaturesCommand:
             }
         ]
 
+        # Mock SuperSearch to return the signature with a later build id and date
+        supersearch.add_iter_buckets_step(
+            [
+                build_bucket(
+                    "OOM | large", "20180520000000", "2018-05-04T12:00:00.00000+00:00"
+                )
+            ]
+        )
+
+        out = io.StringIO()
+        call_command("updatesignatures", stdout=out)
+
+        # Signature kept the earliest build id and date
+        data = self.fetch_crashstats_signature_data()
+        assert data == [
+            {
+                "first_build": "20180320000000",
+                "first_date": "2018-05-03 12:00:00+00:00",
+                "signature": "OOM | large",
+            }
+        ]
+
     @mock.patch(
         "crashstats.crashstats.management.commands.updatesignatures.SuperSearch"
     )
-    def test_multiple_crash_processing(self, mock_supersearch, db):
-        """Test processing multiple crashes with same signature."""
+    def test_multiple_signatures(self, mock_supersearch, db):
+        """Test processing multiple signatures."""
         supersearch = FakeModel()
         mock_supersearch.return_value = supersearch
 
-        # Mock SuperSearch to return 4 crashes covering two signatures
-        supersearch.add_get_step(
-            {
-                "errors": [],
-                "hits": [
-                    {
-                        "build_id": "20180426000000",
-                        # This is the earliest date of the three
-                        "date": "2018-05-03T16:00:00.00000+00:00",
-                        "signature": "OOM | large",
-                    },
-                    {
-                        # This is the earliest build id of the three
-                        "build_id": "20180322000000",
-                        "date": "2018-05-03T18:00:00.00000+00:00",
-                        "signature": "OOM | large",
-                    },
-                    {
-                        "build_id": "20180427000000",
-                        "date": "2018-05-03T19:00:00.000000+00:00",
-                        "signature": "OOM | large",
-                    },
-                    {
-                        "build_id": "20180322140748",
-                        "date": "2018-05-03T18:22:34.969718+00:00",
-                        "signature": "shutdownhang | js::DispatchTyped<T>",
-                    },
-                ],
-                "total": 4,
-                "facets": {},
-            }
+        # Mock SuperSearch to return 2 signatures with the earliest build id and
+        # date of their crashes
+        supersearch.add_iter_buckets_step(
+            [
+                build_bucket(
+                    "OOM | large",
+                    "20180322000000",
+                    "2018-05-03T16:00:00.00000+00:00",
+                    count=3,
+                ),
+                build_bucket(
+                    "shutdownhang | js::DispatchTyped<T>",
+                    "20180322140748",
+                    "2018-05-03T18:22:34.969000+00:00",
+                ),
+            ]
         )
 
         out = io.StringIO()
         call_command("updatesignatures", stdout=out)
 
+        # Crashes without a build id are filtered out and the earliest build id and
+        # date are aggregated in Elasticsearch
+        field, aggs, params = supersearch.iter_buckets_calls[0]
+        assert field == "signature"
+        assert aggs == ["_min.build_id", "_min.date"]
+        assert params["build_id"] == ["!__null__"]
+
         # Two signatures got inserted
         data = self.fetch_crashstats_signature_data()
         assert sorted(data, key=lambda item: item["first_build"]) == [
@@ -178,7 +196,7 @@ class TestUpdateSignaturesCommand:
             },
             {
                 "first_build": "20180322140748",
-                "first_date": "2018-05-03 18:22:34.969718+00:00",
+                "first_date": "2018-05-03 18:22:34.969000+00:00",
                 "signature": "shutdownhang | js::DispatchTyped<T>",
             },
         ]
@@ -186,30 +204,28 @@ class TestUpdateSignaturesCommand:
     @mock.patch(
         "crashstats.crashstats.management.commands.updatesignatures.SuperSearch"
     )
-    def test_crash_with_no_buildid(self, mock_supersearch, db):
-        """Test crashes with no build id are ignored."""
+    def test_signature_with_no_buildid(self, mock_supersearch, db):
+        """Test signatures with no build id are ignored."""
         supersearch = FakeModel()
         mock_supersearch.return_value = supersearch
 
-        # Mock SuperSearch to return 1 crash with no build id
-        supersearch.add_get_step(
-            {
-                "errors": [],
-                "hits": [
-                    {
-                        "build_id": "",
-                        "date": "2018-05-03T16:00:00.00000+00:00",
-                        "signature": "OOM | large",
-                    }
-                ],
-                "total": 1,
-                "facets": {},
-            }
+        # Mock SuperSearch to return 1 signature with no build id
+        supersearch.add_iter_buckets_step(
+            [
+                {
+                    "term": "OOM | large",
+                    "count": 1,
+                    "facets": {
+                        "min_build_id": {"value": None},
+                        "min_date": {"value": None},
+                    },
+                }
+            ]
         )
 
         out = io.StringIO()
         call_command("updatesignatures", stdout=out)
 
-        # The crash has no build id, so it gets ignored and nothing gets
+        # The signature has no build id, so it gets ignored and nothing gets
         # inserted
         assert self.fetch_crashstats_signature_data() == []
@@ -322,6 +322,39 @@ def test_enhance_json_dump():
     assert actual == expected
 
 
+def test_enhance_json_dump_thread_numbers():
+    vcs_mappings = {
+        "hg": {
+            "hg.m.org": (
+                "http://hg.m.org/%(repo)s/file/%(revision)s/%(file)s#l%(line)s"
+            )
+        }
+    }
+
+    frame = {
+        "frame": 0,
+        "module": "bad.dll",
+        "function": "Func",
+        "file": "hg:hg.m.org/repo/name:dname/fname:rev",
+        "line": 576,
+    }
+    actual = {
+        "threads": [
+            {"frames": [dict(frame)]},
+            {"frames": [dict(frame)]},
+        ]
+    }
+    utils.enhance_json_dump(actual, vcs_mappings, thread_numbers=[1])
+
+    # All threads are numbered, but only the frames of the listed threads are
+    # enhanced
+    assert [thread["thread"] for thread in actual["threads"]] == [0, 1]
+    assert actual["threads"][0]["frames"] == [frame]
+    assert actual["threads"][1]["frames"][0]["source_link"] == (
+        "http://hg.m.org/repo/name/file/rev/dname/fname#l576"
+    )
+
+
 def test_find_crash_id():
     # A good string, no prefix
     input_str = "1234abcd-ef56-7890-ab12-abcdef130802"
@@ -4,7 +4,10 @@
 
 
 from crashstats.crashstats.models import MissingProcessedCrash
-from crashstats.crashstats.management.commands.verifyprocessed import Command
+from crashstats.crashstats.management.commands.verifyprocessed import (
+    Command,
+    find_missing_in_storage,
+)
 from socorro.lib.libdatetime import utc_now
 from socorro.lib.libooid import create_new_ooid, date_from_ooid
 
@@ -21,6 +24,34 @@ def get_threechars_subset(self):
     yield from ["000", "111", "222"]
 
 
+class FakeStorage:
+    def __init__(self, keys):
+        self.keys = keys
+
+    def list_objects_paginator(self, prefix, page_size=2):
+        keys = [key for key in self.keys if key.startswith(prefix)]
+        for i in range(0, len(keys), page_size):
+            yield keys[i : i + page_size]
+
+
+def test_find_missing_in_storage():
+    crash_ids = ["000" + create_new_ooid()[3:] for _ in range(3)]
+    # Same prefix, but from a different day
+    other_day_crash_id = (
+        "000" + create_new_ooid(timestamp=utc_now().replace(year=2020))[3:]
+    )
+
+    storage = FakeStorage(
+        [f"v1/raw_crash/{TODAY}/{crash_id}" for crash_id in crash_ids]
+        + [f"v1/processed_crash/{crash_id}" for crash_id in crash_ids[:2]]
+        + [f"v1/processed_crash/{other_day_crash_id}"]
+    )
+
+    in_storage, missing = find_missing_in_storage(storage, storage, "000", TODAY)
+    assert in_storage == set(crash_ids[:2])
+    assert missing == {crash_ids[2]}
+
+
 class TestVerifyProcessed:
     def fetch_crashids(self):
         return MissingProcessedCrash.objects.order_by("crash_id").values_list(
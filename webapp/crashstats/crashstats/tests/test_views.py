@@ -1307,7 +1307,47 @@ class Test_report_index:
         assert "Crashing Thread (1), Name: I am a Crashing Thread" in smart_str(
             response.content
         )
+        # Other threads are loaded on demand
+        assert "I am a Regular Thread" not in smart_str(response.content)
+        threads_url = reverse("crashstats:report_threads", args=[crash_id])
+        assert threads_url in smart_str(response.content)
+
+        response = client.get(threads_url)
+        assert response.status_code == 200
         assert "Thread 0, Name: I am a Regular Thread" in smart_str(response.content)
+        assert "I am a Crashing Thread" not in smart_str(response.content)
+
+    def test_report_threads_not_found(self, client, db, storage_helper):
+        crash_id = create_new_ooid()
+        url = reverse("crashstats:report_threads", args=[crash_id])
+        response = client.get(url)
+        assert response.status_code == 404
+
+    def test_report_stackwalker_output(self, client, db, storage_helper):
+        json_dump = {
+            "crash_info": {"crashing_thread": 0},
+            "status": "OK",
+            "threads": [{"frame_count": 0, "frames": []}],
+        }
+        crash_id, raw_crash, processed_crash = build_crash_data()
+        processed_crash["json_dump"] = json_dump
+        upload_crash_data(
+            storage_helper, raw_crash=raw_crash, processed_crash=processed_crash
+        )
+
+        url = reverse("crashstats:report_index", args=[crash_id])
+        response = client.get(url)
+        stackwalker_url = reverse(
+            "crashstats:report_stackwalker_output", args=[crash_id]
+        )
+        assert stackwalker_url in smart_str(response.content)
+
+        response = client.get(stackwalker_url)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        data = json.loads(response.content)
+        assert data["status"] == "OK"
+        assert data["crash_info"] == {"crashing_thread": 0}
 
     def test_soft_errors(self, client, db, storage_helper, user_helper):
         crash_id, raw_crash, processed_crash = build_crash_data()
@@ -35,6 +35,16 @@ urlpatterns = [
     path("favicon.ico", views.favicon_ico, name="favicon_ico"),
     path("robots.txt", views.robots_txt, name="robots_txt"),
     path("report/index/<crashid:crash_id>", views.report_index, name="report_index"),
+    path(
+        "report/threads/<crashid:crash_id>",
+        views.report_threads,
+        name="report_threads",
+    ),
+    path(
+        "report/stackwalker/<crashid:crash_id>",
+        views.report_stackwalker_output,
+        name="report_stackwalker_output",
+    ),
     path("search/quick/", views.quick_search, name="quick_search"),
     path("buginfo/bug", views.buginfo, name="buginfo"),
     path("login/", views.login, name="login"),
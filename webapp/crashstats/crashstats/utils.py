@@ -341,22 +341,30 @@ def enhance_frame(frame, vcs_mappings):
                 frame["file"] = path_parts.pop()
 
 
-def enhance_json_dump(dump, vcs_mappings):
+def enhance_thread(thread, vcs_mappings):
+    """Add some information to the frames of a thread for display."""
+    for frame in thread["frames"]:
+        enhance_frame(frame, vcs_mappings)
+        for inline in frame.get("inlines") or []:
+            enhance_frame(inline, vcs_mappings)
+    return thread
+
+
+def enhance_json_dump(dump, vcs_mappings, thread_numbers=None):
     """
     Add some information to the stackwalker's json_dump output
     for display. Mostly applying vcs_mappings to stack frames.
+
+    Every thread gets its number. Enhancing frames is expensive for crash reports
+    with lots of threads, so ``thread_numbers`` limits it to the threads that get
+    displayed. If it's None, all threads are enhanced.
     """
     for thread_index, thread in enumerate(dump.get("threads", [])):
         if "thread" not in thread:
             thread["thread"] = thread_index
 
-        frames = thread["frames"]
-        for frame in frames:
-            enhance_frame(frame, vcs_mappings)
-            for inline in frame.get("inlines") or []:
-                enhance_frame(inline, vcs_mappings)
-
-        thread["frames"] = frames
+        if thread_numbers is None or thread_index in thread_numbers:
+            enhance_thread(thread, vcs_mappings)
     return dump
 
 
@@ -760,6 +768,13 @@ def ratelimit_rate(group, request):
         else:
             return settings.RATELIMIT_SUPERSEARCH
 
+    if group.startswith("crashstats.api.views.SuperSearchExportAPI"):
+        # exports stream all the matching crash reports, so they get a lower limit
+        if request.user.is_active:
+            return settings.API_EXPORT_RATE_LIMIT_AUTHENTICATED
+        else:
+            return settings.API_EXPORT_RATE_LIMIT
+
     if request.user.is_active:
         return settings.API_RATE_LIMIT_AUTHENTICATED
     else:
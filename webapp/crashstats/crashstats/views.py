@@ -2,16 +2,20 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import concurrent.futures
+import hashlib
 import json
 from pathlib import Path
 from urllib.parse import quote
 
 import glom
+from pymemcache.exceptions import MemcacheServerError
 from requests.exceptions import RetryError
 
 from django import http
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
 from django.http import FileResponse, HttpResponse
 from django.shortcuts import redirect, render
 from django.template import loader
@@ -26,10 +30,15 @@ from crashstats.crashstats.decorators import track_view, pass_default_context
 from crashstats.supersearch.models import SuperSearchFields
 from socorro.external.crashstorage_base import CrashIDNotFound
 from socorro.lib.libsocorrodataschema import InvalidDocumentError
+from socorro.libmarkus import METRICS
 from socorro.signature.generator import SignatureGenerator
 from socorro.signature.utils import convert_to_crash_data
 
 
+# Seconds to cache the rendered threads of a crash report
+REPORT_THREADS_CACHE_SECONDS = 60 * 60
+
+
 def ratelimit_blocked(request, exception):
     # http://tools.ietf.org/html/rfc6585#page-3
     status = 429
@@ -109,32 +118,45 @@ def report_index(request, crash_id, default_context=None):
 
     raw_api = models.RawCrash()
     raw_api.api_user = request.user
-    try:
-        context["raw"] = raw_api.get(crash_id=crash_id)
-    except InvalidDocumentError:
-        # If the user does not have protected data access, then the document is
-        # redacted. However, if it's invalid because the world is a terrible place and
-        # things working right is not the norm, then we want to display a "This crash
-        # report is broken in some way. Please report a bug." message instead
-        # of throwing an HTTP 500 error. We definitely can't gloss over this because
-        # the brokenness prevents the document from being redacted correctly.
-        return render(
-            request,
-            "crashstats/report_index_malformed_raw_crash.html",
-            context,
-            status=500,
-        )
-    except CrashIDNotFound:
-        # If the raw crash can't be found, we can't do much.
-        return render(
-            request, "crashstats/report_index_not_found.html", context, status=404
-        )
-    utils.enhance_raw(context["raw"])
 
     api = models.ProcessedCrash()
     api.api_user = request.user
+
+    # Check permissions now so they're cached on the user before the processed
+    # crash is redacted in another thread
+    request.user.has_perm("crashstats.view_pii")
+
+    # Fetch the processed crash while fetching the raw crash
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        processed_future = executor.submit(
+            _call_and_close_connection, api.get, crash_id=crash_id
+        )
+
+        try:
+            context["raw"] = raw_api.get(crash_id=crash_id)
+        except InvalidDocumentError:
+            # If the user does not have protected data access, then the document is
+            # redacted. However, if it's invalid because the world is a terrible
+            # place and things working right is not the norm, then we want to
+            # display a "This crash report is broken in some way. Please report a
+            # bug." message instead of throwing an HTTP 500 error. We definitely
+            # can't gloss over this because the brokenness prevents the document
+            # from being redacted correctly.
+            return render(
+                request,
+                "crashstats/report_index_malformed_raw_crash.html",
+                context,
+                status=500,
+            )
+        except CrashIDNotFound:
+            # If the raw crash can't be found, we can't do much.
+            return render(
+                request, "crashstats/report_index_not_found.html", context, status=404
+            )
+        utils.enhance_raw(context["raw"])
+
     try:
-        context["report"] = api.get(crash_id=crash_id)
+        context["report"] = processed_future.result()
     except CrashIDNotFound:
         # ...if we haven't already done so.
         cache_key = f"priority_job:{crash_id}"
@@ -155,22 +177,26 @@ def report_index(request, crash_id, default_context=None):
     except libproduct.ProductDoesNotExist:
         context["product_details"] = {}
 
+    context["crashing_thread"] = context["report"].get("crashing_thread")
+
     # For C++/Rust crashes
     if "json_dump" in context["report"]:
         json_dump = context["report"]["json_dump"]
-        # This is for the "Raw data and minidumps" tab
-        context["raw_stackwalker_output"] = json.dumps(
-            json_dump, sort_keys=True, indent=4, separators=(",", ": ")
+        # This is for displaying on the "Details" tab. The other threads are shown
+        # on demand with report_threads, so only the crashing thread is enhanced
+        # unless there isn't one. The "Raw data and minidumps" tab gets the
+        # minidump-stackwalk output from report_stackwalker_output.
+        if context["crashing_thread"] is not None:
+            thread_numbers = [context["crashing_thread"]]
+        else:
+            thread_numbers = None
+        utils.enhance_json_dump(
+            json_dump, settings.VCS_MAPPINGS, thread_numbers=thread_numbers
         )
-        # This is for displaying on the "Details" tab
-        utils.enhance_json_dump(json_dump, settings.VCS_MAPPINGS)
         parsed_dump = json_dump
     else:
-        context["raw_stackwalker_output"] = ""
         parsed_dump = {}
 
-    context["crashing_thread"] = context["report"].get("crashing_thread")
-
     context["parsed_dump"] = parsed_dump
 
     # For Java crashes
@@ -323,6 +349,111 @@ def report_index(request, crash_id, default_context=None):
     return HttpResponse(utf8_content, charset="utf-8")
 
 
+def _call_and_close_connection(func, **kwargs):
+    """Call a function in a thread other than the request thread
+
+    Django only closes database connections for the request thread, so this closes
+    the one this thread opened, if any.
+
+    """
+    try:
+        return func(**kwargs)
+    finally:
+        connection.close()
+
+
+def get_processed_crash_for_display(request, crash_id):
+    """Return the processed crash redacted for the user or an error response
+
+    :arg request: the request
+    :arg crash_id: the crash id from the url
+
+    :returns: tuple of (processed crash, None) or (None, error response)
+
+    """
+    valid_crash_id = utils.find_crash_id(crash_id)
+    if not valid_crash_id or valid_crash_id != crash_id:
+        return None, http.HttpResponseBadRequest("Invalid crash ID")
+
+    api = models.ProcessedCrash()
+    api.api_user = request.user
+    try:
+        return api.get(crash_id=crash_id), None
+    except CrashIDNotFound:
+        return None, http.HttpResponseNotFound("Crash report not found")
+
+
+@track_view
+def report_threads(request, crash_id):
+    """Return the threads of a crash report other than the crashing thread
+
+    The report index page loads these when the user wants to see them. Crash
+    reports can have hundreds of threads and enhancing their frames is slow, so
+    the rendered threads are cached.
+
+    """
+    report, error_response = get_processed_crash_for_display(request, crash_id)
+    if error_response:
+        return error_response
+
+    # Key on when the crash report was processed so reprocessing it shows new
+    # threads and on the permissions the processed crash was redacted with
+    permission = (
+        "protected" if request.user.has_perm("crashstats.view_pii") else "public"
+    )
+    cache_key = hashlib.md5(
+        f"{crash_id}:{report.get('completed_datetime')}:{permission}".encode("utf-8")
+    ).hexdigest()
+    cache_key = f"report_threads:{cache_key}"
+
+    content = cache.get(cache_key)
+    if content is None:
+        json_dump = report.get("json_dump") or {}
+        crashing_thread = report.get("crashing_thread")
+        thread_numbers = [
+            thread_index
+            for thread_index in range(len(json_dump.get("threads", [])))
+            if thread_index != crashing_thread
+        ]
+        utils.enhance_json_dump(
+            json_dump, settings.VCS_MAPPINGS, thread_numbers=thread_numbers
+        )
+        context = {
+            "threads": json_dump.get("threads", []),
+            "crashing_thread": crashing_thread,
+        }
+        content = loader.render_to_string(
+            "crashstats/report_threads.html", context, request
+        )
+        try:
+            cache.set(cache_key, content, timeout=REPORT_THREADS_CACHE_SECONDS)
+        except MemcacheServerError:
+            # The rendered threads can be bigger than the largest item memcached
+            # takes
+            METRICS.incr("webapp.crashstats.report_threads.cache_set_error")
+
+    utf8_content = content.encode("utf-8", errors="backslashreplace")
+    return HttpResponse(utf8_content, charset="utf-8")
+
+
+@track_view
+def report_stackwalker_output(request, crash_id):
+    """Return the minidump-stackwalk output of a crash report as JSON
+
+    This is shown on the "Raw data and minidumps" tab of the report index page when
+    the user goes to that tab.
+
+    """
+    report, error_response = get_processed_crash_for_display(request, crash_id)
+    if error_response:
+        return error_response
+
+    return HttpResponse(
+        json.dumps(report.get("json_dump") or {}, sort_keys=True),
+        content_type="application/json",
+    )
+
+
 @pass_default_context
 def login(request, default_context=None):
     context = default_context or {}
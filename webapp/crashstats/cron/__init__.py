@@ -76,6 +76,12 @@ JOBS = [
         "cmd": "archivescraper",
         "frequency": "1h",
     },
+    {
+        # Roll up hourly topcrashers counts every hour
+        "cmd": "topcrashersrollup",
+        "frequency": "1h",
+        "last_success": True,
+    },
 ]
 
 # Map of cmd -> job_spec
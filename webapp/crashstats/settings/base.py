@@ -334,6 +334,15 @@ SIMPLE_SEARCH_FIELDS = ("product", "version", "platform", "process_type")
 # the number of result filter on tcbs
 TCBS_RESULT_COUNTS = (50, 100, 200, 300)
 
+# Whether the topcrashers page reads from the hourly rollups maintained by the
+# topcrashersrollup cron job when they cover the requested window
+TOPCRASHERS_USE_ROLLUPS = _config(
+    "TOPCRASHERS_USE_ROLLUPS",
+    default="false",
+    parser=parse_bool,
+    doc="Whether the topcrashers page reads from the hourly topcrashers rollups.",
+)
+
 # channels allowed in middleware calls,
 CHANNELS = ("release", "beta", "nightly", "esr")
 
@@ -381,6 +390,10 @@ STATUS_MESSAGE_ADMIN_BATCH_SIZE = 10
 API_RATE_LIMIT = "100/m"
 API_RATE_LIMIT_AUTHENTICATED = "1000/m"
 
+# Rate limit for the SuperSearchExport API which streams all matching crash reports
+API_EXPORT_RATE_LIMIT = "5/m"
+API_EXPORT_RATE_LIMIT_AUTHENTICATED = "30/m"
+
 # Rate limit when using the supersearch web interface
 RATELIMIT_SUPERSEARCH = "10/m"
 RATELIMIT_SUPERSEARCH_AUTHENTICATED = "100/m"
@@ -404,6 +417,33 @@ MANAGERS = ADMINS
 CACHE_IMPLEMENTATION_FETCHES = _config(
     "CACHE_IMPLEMENTATION_FETCHES", default="true", parser=parse_bool
 )
+CACHE_IMPLEMENTATION_FETCHES_STALE_SECONDS = _config(
+    "CACHE_IMPLEMENTATION_FETCHES_STALE_SECONDS",
+    default="600",
+    parser=int,
+    doc=(
+        "Seconds to serve an expired cached implementation fetch result while it's "
+        + "refreshed in the background. Set to 0 to turn this off."
+    ),
+)
+CACHE_IMPLEMENTATION_FETCHES_LOCK_SECONDS = _config(
+    "CACHE_IMPLEMENTATION_FETCHES_LOCK_SECONDS",
+    default="60",
+    parser=int,
+    doc=(
+        "Seconds a process holds the lock for computing an implementation fetch "
+        + "result before the lock expires."
+    ),
+)
+CACHE_IMPLEMENTATION_FETCHES_WAIT_SECONDS = _config(
+    "CACHE_IMPLEMENTATION_FETCHES_WAIT_SECONDS",
+    default="5",
+    parser=int,
+    doc=(
+        "Maximum seconds to wait for another process computing the same "
+        + "implementation fetch result before computing it."
+    ),
+)
 
 # for local development these don't matter
 STATSD_HOST = _config("STATSD_HOST", default="localhost", doc="statsd host.")
@@ -524,6 +564,8 @@ OIDC_EXEMPT_URLS = [
     # Used by signature report as an XHR
     # data-urls-summary
     "signature:signature_summary",
+    # data-urls-tabs
+    "signature:signature_tabs",
     # data-urls-reports
     "signature:signature_reports",
     # data-urls-bugzilla
@@ -536,6 +578,9 @@ OIDC_EXEMPT_URLS = [
     re.compile(r"^/signature/graphs/(?P<field>\w+)/$"),
     # data-urls-aggregations
     re.compile(r"^/signature/aggregation/(?P<aggregation>\w+)/$"),
+    # Used by report index page as an XHR
+    re.compile(r"^/report/threads/(?P<crash_id>[\w-]+)$"),
+    re.compile(r"^/report/stackwalker/(?P<crash_id>[\w-]+)$"),
 ]
 LOGOUT_REDIRECT_URL = "/"
 
@@ -159,6 +159,49 @@ SignatureReport.init = function () {
     showTab(currentTab);
   }
 
+  // Content of tabs loaded with one request, by tab name and then by panel for
+  // tabs with panels. Each one is used once.
+  SignatureReport.prefetched = {};
+
+  SignatureReport.takePrefetched = function (tabName, option) {
+    var content = SignatureReport.prefetched[tabName];
+    if (content !== undefined && option) {
+      var panels = content;
+      content = panels[option];
+      delete panels[option];
+    } else {
+      delete SignatureReport.prefetched[tabName];
+    }
+    return content;
+  };
+
+  // Load the initial content of the tabs that search crash reports with one
+  // request. If that fails, each tab loads its own content.
+  function prefetchTabs(callback) {
+    var params = SignatureReport.getParamsWithSignature();
+    params.page = SignatureReport.pageNum;
+    params._columns = mainBodyElt.data('columns');
+    params._sort = String(mainBodyElt.data('sort')).split(',');
+    params.tab = ['summary', 'reports', 'comments', 'aggregations', 'graphs'].filter(function (tabName) {
+      return tabName in tabs;
+    });
+    if (tabs.aggregations) {
+      params.aggregation = tabs.aggregations.defaultOptions;
+    }
+    if (tabs.graphs) {
+      params.graph = tabs.graphs.defaultOptions;
+    }
+
+    $.ajax({
+      url: SignatureReport.getURL('tabs') + '?' + Qs.stringify(params, { indices: false }),
+      dataType: 'json',
+      success: function (data) {
+        SignatureReport.prefetched = data;
+      },
+      complete: callback,
+    });
+  }
+
   function startSearchForm(callback) {
     var queryString = window.location.search.substring(1);
     var initialParams = socorro.search.parseQueryString(queryString);
@@ -233,7 +276,9 @@ SignatureReport.init = function () {
 
   // Finally start the damn thing.
   bindEvents();
-  startSearchForm(loadInitialTab);
+  startSearchForm(function () {
+    prefetchTabs(loadInitialTab);
+  });
 };
 
 $(SignatureReport.init);
@@ -182,6 +182,13 @@ SignatureReport.Tab.prototype.loadPanel = function (option) {
 
 // This should not need to be extended.
 SignatureReport.Tab.prototype.loadContent = function (contentElement, option) {
+  // Use the content loaded with the other tabs the first time.
+  var prefetched = SignatureReport.takePrefetched(this.tabName, option);
+  if (prefetched !== undefined) {
+    this.onAjaxSuccess(contentElement, prefetched);
+    return;
+  }
+
   // Get the parameters for the URL to get the data.
   var params = this.getParamsForUrl();
 
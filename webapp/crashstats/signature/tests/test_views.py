@@ -12,6 +12,8 @@ import pyquery
 from django.contrib.auth.models import AnonymousUser
 from django.urls import reverse
 from django.utils.encoding import smart_str
+from elasticsearch.dsl import MultiSearch
+from elasticsearch.dsl.response import Response
 
 from crashstats.crashstats import models
 from crashstats.signature.views import get_fields
@@ -635,6 +637,190 @@ class TestViews:
         assert "arm64-v8a" in smart_str(response.content)
         assert "Jerry" in smart_str(response.content)
 
+    def test_signature_tabs(self, client, db, es_helper, user_helper):
+        now = utc_now()
+        for product, user_comments in [
+            ("Firefox", "it crashed"),
+            ("Firefox", None),
+            ("Thunderbird", None),
+        ]:
+            crash_id = create_new_ooid(timestamp=now)
+            processed_crash = {
+                "date_processed": date_to_string(now),
+                "uuid": crash_id,
+                "signature": TEST_SIGNATURE,
+                "product": product,
+                "version": "1.0",
+            }
+            if user_comments:
+                processed_crash["user_comments"] = user_comments
+            es_helper.index_crash(processed_crash=processed_crash, refresh=False)
+        es_helper.refresh()
+
+        url = reverse("signature:signature_tabs")
+        params = {
+            "signature": TEST_SIGNATURE,
+            "tab": ["summary", "reports", "comments", "aggregations", "graphs"],
+            "aggregation": ["product", "platform"],
+            "graph": ["product"],
+        }
+
+        # Comments are left out for users without view_pii
+        response = client.get(url, params)
+        assert response.status_code == 200
+        content = json.loads(response.content)
+        assert set(content) == {"summary", "reports", "aggregations", "graphs"}
+
+        user = user_helper.create_protected_user()
+        client.force_login(user)
+
+        response = client.get(url, params)
+        assert response.status_code == 200
+        content = json.loads(response.content)
+        assert set(content) == {
+            "summary",
+            "reports",
+            "comments",
+            "aggregations",
+            "graphs",
+        }
+
+        # Each tab has the same content as the view for that tab
+        for tab, tab_url in [
+            ("summary", reverse("signature:signature_summary")),
+            ("reports", reverse("signature:signature_reports")),
+            ("comments", reverse("signature:signature_comments")),
+        ]:
+            response = client.get(tab_url, {"signature": TEST_SIGNATURE})
+            assert content[tab] == smart_str(response.content)
+
+        assert set(content["aggregations"]) == {"product", "platform"}
+        response = client.get(
+            reverse("signature:signature_aggregation", args=("product",)),
+            {"signature": TEST_SIGNATURE},
+        )
+        assert content["aggregations"]["product"] == smart_str(response.content)
+        assert "No results were found" in content["aggregations"]["platform"]
+
+        assert set(content["graphs"]) == {"product"}
+        assert [
+            term["term"] for term in content["graphs"]["product"]["term_counts"]
+        ] == [
+            "Firefox",
+            "Thunderbird",
+        ]
+
+    def test_signature_tabs_one_search_request(self, client, db, user_helper):
+        calls = []
+
+        def mocked_msearch(queries):
+            calls.append(queries)
+            return [
+                {"hits": [], "facets": {}, "total": 0, "errors": []} for _ in queries
+            ]
+
+        with mock.patch(
+            "crashstats.supersearch.models.SuperSearchUnredacted.get_implementation"
+        ) as mocked_get_implementation:
+            mocked_get_implementation.return_value.msearch.side_effect = mocked_msearch
+
+            url = reverse("signature:signature_tabs")
+            response = client.get(
+                url,
+                {
+                    "signature": TEST_SIGNATURE,
+                    "product": "Firefox",
+                    "tab": ["summary", "reports", "aggregations", "graphs"],
+                    "aggregation": ["product", "platform"],
+                    "graph": ["product"],
+                },
+            )
+            assert response.status_code == 200
+            content = json.loads(response.content)
+            assert set(content) == {"summary", "reports", "aggregations", "graphs"}
+            assert set(content["aggregations"]) == {"product", "platform"}
+            assert "No results were found" in content["reports"]
+
+            # All the searches are made with one request
+            assert len(calls) == 1
+            queries = calls[0]
+            assert len(queries) == 5
+            for query in queries:
+                assert query["signature"] == ["=" + TEST_SIGNATURE]
+                assert query["product"] == ["Firefox"]
+            assert [query["_facets"] for query in queries[2:]] == [
+                ["product"],
+                ["platform"],
+                ["product"],
+            ]
+
+            # Fields the user isn't allowed to see are rejected
+            response = client.get(
+                url,
+                {
+                    "signature": TEST_SIGNATURE,
+                    "tab": ["aggregations"],
+                    "aggregation": ["user_comments"],
+                },
+            )
+            assert response.status_code == 400
+            assert len(calls) == 1
+
+    def test_signature_tabs_comments_columns(self, client, db, user_helper):
+        crash_id = create_new_ooid()
+        source = {
+            "processed_crash": {
+                "uuid": crash_id,
+                "date_processed": date_to_string(utc_now()),
+                "signature": TEST_SIGNATURE,
+                "product": "Firefox",
+                "user_comments": "it crashed on startup",
+            }
+        }
+
+        def mocked_execute(multi_search):
+            return [
+                Response(
+                    search,
+                    {
+                        "_shards": {"total": 1, "successful": 1, "failed": 0},
+                        "hits": {
+                            "total": {"value": 1, "relation": "eq"},
+                            "hits": [{"_id": crash_id, "_source": source}],
+                        },
+                    },
+                )
+                for search in multi_search._searches
+            ]
+
+        user = user_helper.create_protected_user()
+        client.force_login(user)
+
+        with (
+            mock.patch(
+                "crashstats.crashstats.utils.get_versions_for_product",
+                return_value=[],
+            ),
+            mock.patch.object(
+                MultiSearch, "execute", autospec=True, side_effect=mocked_execute
+            ),
+        ):
+            response = client.get(
+                reverse("signature:signature_tabs"),
+                {
+                    "signature": TEST_SIGNATURE,
+                    "tab": ["comments", "reports", "graphs"],
+                    "graph": ["product"],
+                },
+            )
+        assert response.status_code == 200
+        content = json.loads(response.content)
+
+        # The comments are there even though the searches for the other tabs come
+        # back with other columns
+        assert "it crashed on startup" in content["comments"]
+        assert crash_id in content["reports"]
+
     def test_signature_bugzilla(self, client, db, es_helper):
         models.BugAssociation.objects.create(bug_id=111111, signature="Something")
         models.BugAssociation.objects.create(bug_id=111111, signature="OOM | small")
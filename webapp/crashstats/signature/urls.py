@@ -20,6 +20,7 @@ urlpatterns = [
     ),
     path("graphs/<str:field>/", views.signature_graphs, name="signature_graphs"),
     path("summary/", views.signature_summary, name="signature_summary"),
+    path("tabs/", views.signature_tabs, name="signature_tabs"),
     path("bugzilla/", views.signature_bugzilla, name="signature_bugzilla"),
     path("", views.signature_report, name="signature_report"),
 ]
@@ -8,6 +8,7 @@ import math
 from django import http
 from django.conf import settings
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.urls import reverse
 
 from csp.decorators import csp_update
@@ -44,6 +45,9 @@ DEFAULT_SORT = ("-date",)
 # to crashstats/static/crashstats/js/socorro/correlations.js getDataURL.
 CORRELATIONS_PRODUCTS = ["Firefox"]
 
+# Query string parameters used by signature_tabs to pick which tabs to load
+TABS_PARAMS = ("tab", "aggregation", "graph")
+
 
 def pass_validated_params(view):
     @functools.wraps(view)
@@ -71,6 +75,15 @@ def pass_validated_params(view):
     return inner
 
 
+def _get_current_query(request):
+    """Return a copy of the query string without the signature_tabs parameters"""
+    current_query = request.GET.copy()
+    for key in TABS_PARAMS:
+        if key in current_query:
+            del current_query[key]
+    return current_query
+
+
 def get_fields(user):
     """Retrieve super search fields this user has access to
 
@@ -127,11 +140,12 @@ def signature_report(request, params, default_context=None):
     return render(request, "signature/signature_report.html", context)
 
 
-@track_view
-@pass_validated_params
-def signature_reports(request, params):
-    """Return the results of a search."""
+def _reports_query(request, params):
+    """Return (query, context) for the reports of a signature
+
+    :raises ValidationError: if the page is invalid
 
+    """
     signature = params["signature"][0]
 
     context = {}
@@ -139,7 +153,7 @@ def signature_reports(request, params):
 
     allowed_fields = get_allowed_fields(request.user)
 
-    current_query = request.GET.copy()
+    current_query = _get_current_query(request)
     if "page" in current_query:
         del current_query["page"]
 
@@ -186,8 +200,8 @@ def signature_reports(request, params):
 
     try:
         current_page = int(request.GET.get("page", 1))
-    except ValueError:
-        return http.HttpResponseBadRequest("Invalid page")
+    except ValueError as exc:
+        raise ValidationError("Invalid page") from exc
 
     if current_page <= 0:
         current_page = 1
@@ -195,6 +209,7 @@ def signature_reports(request, params):
     results_per_page = 50
     context["current_page"] = current_page
     context["results_offset"] = results_per_page * (current_page - 1)
+    context["results_per_page"] = results_per_page
 
     params["signature"] = "=" + signature
     params["_results_number"] = results_per_page
@@ -206,29 +221,47 @@ def signature_reports(request, params):
         urlencode_obj(current_query),
     )
 
-    api = SuperSearchUnredacted()
-    try:
-        search_results = api.get(**params)
-    except BadArgumentError as e:
-        # We need to return the error message in some HTML form for jQuery to
-        # pick it up.
-        return http.HttpResponseBadRequest(render_exception(e))
+    return params, context
+
 
+def _paginated_context(context, search_results):
+    """Add paginated search results to the context of reports or comments"""
     search_results["total_pages"] = int(
-        math.ceil(search_results["total"] / float(results_per_page))
+        math.ceil(search_results["total"] / float(context["results_per_page"]))
     )
     search_results["total_count"] = search_results["total"]
 
     context["query"] = search_results
-
-    return render(request, "signature/signature_reports.html", context)
+    return context
 
 
 @track_view
 @pass_validated_params
-def signature_aggregation(request, params, aggregation):
-    """Return the aggregation of a field."""
+def signature_reports(request, params):
+    """Return the results of a search."""
+    try:
+        query, context = _reports_query(request, params)
+    except ValidationError as e:
+        return http.HttpResponseBadRequest(str(e))
+
+    api = SuperSearchUnredacted()
+    try:
+        search_results = api.get(**query)
+    except BadArgumentError as e:
+        # We need to return the error message in some HTML form for jQuery to
+        # pick it up.
+        return http.HttpResponseBadRequest(render_exception(e))
+
+    context = _paginated_context(context, search_results)
+    return render(request, "signature/signature_reports.html", context)
+
 
+def _aggregation_query(request, params, aggregation):
+    """Return (query, context) for the aggregation of a field
+
+    :raises ValidationError: if the user isn't allowed to aggregate on the field
+
+    """
     signature = params["signature"][0]
 
     context = {}
@@ -238,13 +271,13 @@ def signature_aggregation(request, params, aggregation):
 
     # Make sure the field we want to aggregate on is allowed.
     if aggregation not in allowed_fields:
-        return http.HttpResponseBadRequest(
+        raise ValidationError(
             "<ul><li>"
             'You are not allowed to aggregate on the "%s" field'
             "</li></ul>" % aggregation
         )
 
-    current_query = request.GET.copy()
+    current_query = _get_current_query(request)
     context["params"] = current_query.copy()
 
     params["signature"] = "=" + signature
@@ -252,29 +285,46 @@ def signature_aggregation(request, params, aggregation):
     params["_results_offset"] = 0
     params["_facets"] = [aggregation]
 
-    api = SuperSearchUnredacted()
-    try:
-        search_results = api.get(**params)
-    except BadArgumentError as e:
-        # We need to return the error message in some HTML form for jQuery to
-        # pick it up.
-        return http.HttpResponseBadRequest(render_exception(e))
+    return params, context
+
 
+def _aggregation_context(context, search_results):
+    aggregation = context["aggregation"]
     context["aggregates"] = []
     if aggregation in search_results["facets"]:
         context["aggregates"] = search_results["facets"][aggregation]
 
     context["total_count"] = search_results["total"]
-
-    return render(request, "signature/signature_aggregation.html", context)
+    return context
 
 
 @track_view
-@utils.json_view
 @pass_validated_params
-def signature_graphs(request, params, field):
-    """Return a multi-line graph of crashes per day grouped by field."""
+def signature_aggregation(request, params, aggregation):
+    """Return the aggregation of a field."""
+    try:
+        query, context = _aggregation_query(request, params, aggregation)
+    except ValidationError as e:
+        return http.HttpResponseBadRequest(str(e))
 
+    api = SuperSearchUnredacted()
+    try:
+        search_results = api.get(**query)
+    except BadArgumentError as e:
+        # We need to return the error message in some HTML form for jQuery to
+        # pick it up.
+        return http.HttpResponseBadRequest(render_exception(e))
+
+    context = _aggregation_context(context, search_results)
+    return render(request, "signature/signature_aggregation.html", context)
+
+
+def _graph_query(request, params, field):
+    """Return (query, context) for the crashes per day grouped by a field
+
+    :raises ValidationError: if the user isn't allowed to group by the field
+
+    """
     signature = params["signature"][0]
 
     context = {}
@@ -284,11 +334,11 @@ def signature_graphs(request, params, field):
 
     # Make sure the field we want to aggregate on is allowed.
     if field not in allowed_fields:
-        return http.HttpResponseBadRequest(
+        raise ValidationError(
             '<ul><li>You are not allowed to group by the "%s" field</li></ul>' % field
         )
 
-    current_query = request.GET.copy()
+    current_query = _get_current_query(request)
     context["params"] = current_query.copy()
 
     params["signature"] = "=" + signature
@@ -297,34 +347,49 @@ def signature_graphs(request, params, field):
     params["_histogram.date"] = [field]
     params["_facets"] = [field]
 
+    return params, context
+
+
+def _graph_context(context, search_results):
+    field = context["aggregation"]
+    context["aggregates"] = search_results["facets"].get("histogram_date", [])
+    context["term_counts"] = search_results["facets"].get(field, [])
+    return context
+
+
+@track_view
+@utils.json_view
+@pass_validated_params
+def signature_graphs(request, params, field):
+    """Return a multi-line graph of crashes per day grouped by field."""
+    try:
+        query, context = _graph_query(request, params, field)
+    except ValidationError as e:
+        return http.HttpResponseBadRequest(str(e))
+
     api = SuperSearchUnredacted()
     try:
-        search_results = api.get(**params)
+        search_results = api.get(**query)
     except BadArgumentError as e:
         # We need to return the error message in some HTML form for jQuery to
         # pick it up.
         return http.HttpResponseBadRequest(render_exception(e))
 
-    context["aggregates"] = search_results["facets"].get("histogram_date", [])
-    context["term_counts"] = search_results["facets"].get(field, [])
+    return _graph_context(context, search_results)
 
-    return context
 
+def _comments_query(request, params):
+    """Return (query, context) for the non-empty comments of a signature
 
-@track_view
-@pass_validated_params
-def signature_comments(request, params):
-    """Return a list of non-empty comments."""
-    # Users can't see comments unless they have view_pii permissions.
-    if not request.user.has_perm("crashstats.view_pii"):
-        return http.HttpResponseForbidden()
+    :raises ValidationError: if the page is invalid
 
+    """
     signature = params["signature"][0]
 
     context = {}
     context["query"] = {"total": 0, "total_count": 0, "total_pages": 0}
 
-    current_query = request.GET.copy()
+    current_query = _get_current_query(request)
     if "page" in current_query:
         del current_query["page"]
 
@@ -332,8 +397,8 @@ def signature_comments(request, params):
 
     try:
         current_page = int(request.GET.get("page", 1))
-    except ValueError:
-        return http.HttpResponseBadRequest("Invalid page")
+    except ValueError as exc:
+        raise ValidationError("Invalid page") from exc
 
     if current_page <= 0:
         current_page = 1
@@ -341,6 +406,7 @@ def signature_comments(request, params):
     results_per_page = 50
     context["current_page"] = current_page
     context["results_offset"] = results_per_page * (current_page - 1)
+    context["results_per_page"] = results_per_page
 
     params["signature"] = "=" + signature
     params["user_comments"] = "!__null__"
@@ -355,21 +421,31 @@ def signature_comments(request, params):
         urlencode_obj(current_query),
     )
 
+    return params, context
+
+
+@track_view
+@pass_validated_params
+def signature_comments(request, params):
+    """Return a list of non-empty comments."""
+    # Users can't see comments unless they have view_pii permissions.
+    if not request.user.has_perm("crashstats.view_pii"):
+        return http.HttpResponseForbidden()
+
+    try:
+        query, context = _comments_query(request, params)
+    except ValidationError as e:
+        return http.HttpResponseBadRequest(str(e))
+
     api = SuperSearchUnredacted()
     try:
-        search_results = api.get(**params)
+        search_results = api.get(**query)
     except BadArgumentError as e:
         # We need to return the error message in some HTML form for jQuery to
         # pick it up.
         return http.HttpResponseBadRequest(render_exception(e))
 
-    search_results["total_pages"] = int(
-        math.ceil(search_results["total"] / float(results_per_page))
-    )
-    search_results["total_count"] = search_results["total"]
-
-    context["query"] = search_results
-
+    context = _paginated_context(context, search_results)
     return render(request, "signature/signature_comments.html", context)
 
 
@@ -400,10 +476,8 @@ def signature_correlations(request, params):
     return render(request, "signature/signature_correlations.html", context)
 
 
-@track_view
-@pass_validated_params
-def signature_summary(request, params):
-    """Return a list of specific aggregations"""
+def _summary_query(params):
+    """Return (query, context) for the summary of a signature"""
     context = {}
 
     params["signature"] = "=" + params["signature"][0]
@@ -427,16 +501,10 @@ def signature_summary(request, params):
     ]
     params["_aggs.product.version"] = ["_cardinality.install_time"]
 
-    api = SuperSearchUnredacted()
+    return params, context
 
-    # Now make the actual request with all expected parameters.
-    try:
-        search_results = api.get(**params)
-    except BadArgumentError as e:
-        # We need to return the error message in some HTML form for jQuery to
-        # pick it up.
-        return http.HttpResponseBadRequest(render_exception(e))
 
+def _summary_context(context, search_results):
     facets = search_results["facets"]
 
     _transform_uptime_summary(facets)
@@ -449,10 +517,109 @@ def signature_summary(request, params):
         context["signature_stats"] = SignatureStats(
             search_results["facets"]["signature"][0], search_results["total"]
         )
+    return context
+
+
+@track_view
+@pass_validated_params
+def signature_summary(request, params):
+    """Return a list of specific aggregations"""
+    query, context = _summary_query(params)
+
+    api = SuperSearchUnredacted()
 
+    # Now make the actual request with all expected parameters.
+    try:
+        search_results = api.get(**query)
+    except BadArgumentError as e:
+        # We need to return the error message in some HTML form for jQuery to
+        # pick it up.
+        return http.HttpResponseBadRequest(render_exception(e))
+
+    context = _summary_context(context, search_results)
     return render(request, "signature/signature_summary.html", context)
 
 
+# Tab -> (template, function that adds the search results to the context) for the
+# tabs signature_tabs can load; tabs without a template are returned as JSON
+TABS = {
+    "summary": ("signature/signature_summary.html", _summary_context),
+    "reports": ("signature/signature_reports.html", _paginated_context),
+    "comments": ("signature/signature_comments.html", _paginated_context),
+    "aggregations": ("signature/signature_aggregation.html", _aggregation_context),
+    "graphs": (None, _graph_context),
+}
+
+
+@track_view
+@utils.json_view
+@pass_validated_params
+def signature_tabs(request, params):
+    """Return the content of several tabs using one search request.
+
+    The ``tab`` parameter lists the tabs to load out of the ones in ``TABS``. The
+    ``aggregation`` and ``graph`` parameters list the fields of the aggregations
+    and graphs panels to load.
+
+    The searches for all the tabs are sent to Elasticsearch in one multi search
+    request. The content of each tab is the same as what the view for that tab
+    returns. Tabs the user isn't allowed to see are left out.
+
+    """
+    tabs = request.GET.getlist("tab")
+
+    # List of (tab, panel, query, context); panel is None for tabs without panels
+    searches = []
+    try:
+        if "summary" in tabs:
+            searches.append(("summary", None, *_summary_query(dict(params))))
+        if "reports" in tabs:
+            searches.append(("reports", None, *_reports_query(request, dict(params))))
+        # Users can't see comments unless they have view_pii permissions.
+        if "comments" in tabs and request.user.has_perm("crashstats.view_pii"):
+            searches.append(("comments", None, *_comments_query(request, dict(params))))
+        if "aggregations" in tabs:
+            for field in request.GET.getlist("aggregation"):
+                searches.append(
+                    (
+                        "aggregations",
+                        field,
+                        *_aggregation_query(request, dict(params), field),
+                    )
+                )
+        if "graphs" in tabs:
+            for field in request.GET.getlist("graph"):
+                searches.append(
+                    ("graphs", field, *_graph_query(request, dict(params), field))
+                )
+    except ValidationError as e:
+        return http.HttpResponseBadRequest(str(e))
+
+    api = SuperSearchUnredacted()
+    try:
+        all_search_results = api.msearch([query for _, _, query, _ in searches])
+    except BadArgumentError as e:
+        # We need to return the error message in some HTML form for jQuery to
+        # pick it up.
+        return http.HttpResponseBadRequest(render_exception(e))
+
+    content = {}
+    for (tab, panel, _, context), search_results in zip(
+        searches, all_search_results, strict=True
+    ):
+        template, add_results = TABS[tab]
+        tab_content = add_results(context, search_results)
+        if template:
+            tab_content = render_to_string(template, tab_content, request=request)
+
+        if panel is None:
+            content[tab] = tab_content
+        else:
+            content.setdefault(tab, {})[panel] = tab_content
+
+    return content
+
+
 def _transform_graphics_summary(facets):
     # Augment graphics adapter with data from another service.
     if "adapter_vendor_id" in facets:
@@ -4,10 +4,11 @@
 
 import datetime
 from dataclasses import dataclass
+from functools import cached_property
 
 from socorro import settings as socorro_settings
 from socorro.external.es.search_common import SearchBase
-from socorro.libclass import build_instance_from_settings
+from socorro.libclass import build_instance_from_settings, import_class
 
 # To build an allowlist of fields to sanitize SuperSearch API calls against,
 # we need to combine SuperSearch fields (e.g. user_comments) with
@@ -47,8 +48,181 @@ def convert_permissions(fields):
 
 
 def get_supersearch_fields():
-    es_crash_dest = build_instance_from_settings(socorro_settings.ES_STORAGE)
-    return convert_permissions(es_crash_dest.SUPERSEARCH_FIELDS)
+    es_crash_dest_class = import_class(socorro_settings.ES_STORAGE["class"])
+    return convert_permissions(es_crash_dest_class.SUPERSEARCH_FIELDS)
+
+
+# Types of histogram intervals by query type
+INTERVAL_TYPES = {
+    "date": str,
+    "integer": int,
+    "float": float,
+}
+
+
+def build_extended_params(fields):
+    """Return aggregation and histogram parameters for exposed fields
+
+    :arg fields: super search fields structure
+
+    :returns: tuple of (param name, type) tuples
+
+    """
+    # Add aggregation fields to all fields, and add histogram fields for all
+    # 'date','integer', or 'float' fields.
+    extended_params = []
+    for field in fields.values():
+        if not field["is_exposed"]:
+            continue
+
+        extended_params.append(("_aggs.%s" % field["name"], list))
+
+        if field["query_type"] in INTERVAL_TYPES:
+            extended_params.append(("_histogram.%s" % field["name"], list))
+
+            # Intervals can be strings for dates (like "day" or "1.5h"), but
+            # integers and floats are integers and floats.
+            interval_type = INTERVAL_TYPES[field["query_type"]]
+
+            extended_params.append(
+                ("_histogram_interval.%s" % field["name"], interval_type)
+            )
+
+    return tuple(extended_params)
+
+
+class FieldsSpec:
+    """Parameters and permissions derived from a super search fields structure
+
+    Deriving these walks all the fields, so use ``get_fields_spec`` to get the
+    spec that's shared by everything in the process. Each structure is derived the
+    first time it's used.
+
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+
+        # Granted permissions tuple -> tuple of allowed field names
+        self._allowed_fields = {}
+        # Granted permissions tuple -> frozenset of allowed field and pseudo-field
+        # names
+        self._allowed_search_fields = {}
+
+    @cached_property
+    def exposed_params(self):
+        """Tuple of (param name, type) for exposed fields"""
+        return tuple(
+            (field["name"], list)
+            for field in self.fields.values()
+            if field["is_exposed"]
+        )
+
+    @cached_property
+    def extended_params(self):
+        """Tuple of (param name, type) for aggregations and histograms"""
+        return build_extended_params(self.fields)
+
+    @cached_property
+    def permissions(self):
+        """Tuple of all the webapp permissions needed by fields"""
+        return tuple(
+            dict.fromkeys(
+                perm
+                for field in self.fields.values()
+                for perm in field["webapp_permissions_needed"]
+            )
+        )
+
+    def get_granted_permissions(self, user=None):
+        """Return the tuple of field permissions the user has
+
+        Users with the same granted permissions are allowed the same fields.
+
+        """
+        if user is None:
+            return ()
+        return tuple(perm for perm in self.permissions if user.has_perm(perm))
+
+    def get_allowed_fields(self, user=None):
+        """Return the names of fields the user may reference
+
+        :arg user: A Django User or ``None``. If ``None``, only fields with no
+            permissions requirements are returned.
+
+        :returns: tuple of field name strings
+
+        """
+        granted = self.get_granted_permissions(user)
+        allowed_fields = self._allowed_fields.get(granted)
+        if allowed_fields is None:
+            granted_set = set(granted)
+            allowed_fields = tuple(
+                field["name"]
+                for field in self.fields.values()
+                if field["is_exposed"]
+                and granted_set.issuperset(field["webapp_permissions_needed"])
+            )
+            self._allowed_fields[granted] = allowed_fields
+        return allowed_fields
+
+    def get_allowed_search_fields(self, user=None):
+        """Return names of fields and pseudo-fields the user may reference
+
+        This extends the allowed fields with ``_histogram.*`` and ``_cardinality.*``
+        pseudo-fields which are accepted values for parameters listing fields.
+
+        :arg user: A Django User or ``None``
+
+        :returns: frozenset of names to pass to ``sanitize_params``
+
+        """
+        granted = self.get_granted_permissions(user)
+        allowed_fields = self._allowed_search_fields.get(granted)
+        if allowed_fields is None:
+            allowed_fields = set(self.get_allowed_fields(user))
+
+            for param_name, _ in self.extended_params:
+                if not param_name.startswith("_histogram."):
+                    continue
+
+                field_name = param_name[len("_histogram.") :]
+                if (
+                    field_name in self.fields
+                    and self.fields[field_name]["is_returned"]
+                    and field_name in allowed_fields
+                ):
+                    allowed_fields.add(param_name)
+
+            for field in set(allowed_fields):
+                allowed_fields.add("_cardinality.%s" % field)
+
+            allowed_fields = frozenset(allowed_fields)
+            self._allowed_search_fields[granted] = allowed_fields
+        return allowed_fields
+
+
+# id of fields structure -> FieldsSpec; the spec holds a reference to the fields so
+# the id can't be reused while it's cached
+_FIELDS_SPECS = {}
+
+
+def get_fields_spec(fields=None):
+    """Return the process-wide FieldsSpec for a super search fields structure
+
+    :arg fields: super search fields structure; defaults to the super search fields
+
+    :returns: FieldsSpec
+
+    """
+    if fields is None:
+        fields = get_supersearch_fields()
+
+    spec = _FIELDS_SPECS.get(id(fields))
+    if spec is None or spec.fields is not fields:
+        spec = FieldsSpec(fields)
+        _FIELDS_SPECS[id(fields)] = spec
+    return spec
 
 
 @dataclass
@@ -130,17 +304,7 @@ def get_allowed_fields(user=None):
     :returns: tuple of field name strings.
 
     """
-
-    def permissions_condition(field):
-        if user is not None:
-            return user.has_perms(field["webapp_permissions_needed"])
-        return not field["webapp_permissions_needed"]
-
-    fields = get_supersearch_fields().values()
-
-    return tuple(
-        x["name"] for x in fields if x["is_exposed"] and permissions_condition(x)
-    )
+    return get_fields_spec(get_supersearch_fields()).get_allowed_fields(user)
 
 
 def sanitize_params(
@@ -170,7 +334,10 @@ def sanitize_params(
 
     :returns: the mutated ``params`` dict, with disallowed entries removed
     """
-    allowed_fields_set = set(allowed_fields)
+    if isinstance(allowed_fields, (set, frozenset)):
+        allowed_fields_set = allowed_fields
+    else:
+        allowed_fields_set = set(allowed_fields)
 
     # Drop disallowed filters and aggregation/histogram params that name a field
     # in the param key itself.
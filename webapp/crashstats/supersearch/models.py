@@ -3,12 +3,14 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import copy
+import functools
 
 from crashstats import libproduct
 from crashstats.crashstats import models
+from crashstats.crashstats.models import canonicalize_params
 from crashstats.supersearch.libsupersearch import (
     SuperSearchStatusModel,
-    get_allowed_fields,
+    get_fields_spec,
     get_supersearch_fields,
     sanitize_params,
 )
@@ -41,6 +43,38 @@ PARAMETERS_LISTING_FIELDS = (
 )
 
 
+@functools.cache
+def get_parameters_listing_fields(fields_spec):
+    """Return names of parameters that contain lists of fields
+
+    :arg fields_spec: FieldsSpec for the super search fields
+
+    :returns: tuple of parameter names
+
+    """
+    return PARAMETERS_LISTING_FIELDS + tuple(
+        param_name
+        for param_name, _ in fields_spec.extended_params
+        if "_histogram." in param_name or "_aggs." in param_name
+    )
+
+
+@functools.cache
+def get_possible_params(fields_spec):
+    """Return possible params for the super search models
+
+    :arg fields_spec: FieldsSpec for the super search fields
+
+    :returns: tuple of possible params
+
+    """
+    return (
+        fields_spec.exposed_params
+        + SUPERSEARCH_META_PARAMS
+        + fields_spec.extended_params
+    )
+
+
 def get_api_allowlist(include_all_fields=False):
     """Returns an API_ALLOWLIST value based on SUPERSEARCH_FIELDS"""
 
@@ -94,100 +128,108 @@ class SuperSearch(ESSocorroMiddleware):
 
     API_ALLOWLIST = get_api_allowlist()
 
+    # The order of sort and column fields changes the results
+    cache_ordered_params = ("_sort", "_columns")
+
     def __init__(self):
+        # The structures derived from the fields are built once per process and
+        # shared by all instances
         self.all_fields = get_supersearch_fields()
+        self.fields_spec = get_fields_spec(self.all_fields)
+
+        self.extended_fields = self.fields_spec.extended_params
 
         # These fields contain lists of other fields. Later on, we want to
         # make sure that none of those listed fields are restricted.
-        self.parameters_listing_fields = list(PARAMETERS_LISTING_FIELDS)
+        self.parameters_listing_fields = get_parameters_listing_fields(self.fields_spec)
 
-        self.extended_fields = self._get_extended_params()
-        for field in self.extended_fields:
-            if "_histogram." in field[0] or "_aggs." in field[0]:
-                self.parameters_listing_fields.append(field[0])
-
-        self.possible_params = (
-            tuple(
-                (x["name"], list) for x in self.all_fields.values() if x["is_exposed"]
-            )
-            + SUPERSEARCH_META_PARAMS
-            + tuple(self.extended_fields)
-        )
+        self.possible_params = get_possible_params(self.fields_spec)
 
     def get_implementation(self):
         es_crash_dest = build_instance_from_settings(socorro_settings.ES_STORAGE)
         return es_crash_dest.build_supersearch()
 
-    def _get_extended_params(self):
-        # Add aggregation fields to all fields, and add histogram fields for all
-        # 'date','integer', or 'float' fields.
-        extended_fields = []
-        for field in self.all_fields.values():
-            if not field["is_exposed"]:
-                continue
-
-            extended_fields.append(("_aggs.%s" % field["name"], list))
+    def get_cache_key_params(self, method, params):
+        if method == "msearch":
+            # Results come back in the order of the queries, so the queries keep
+            # their order and each one is canonicalized like a single search
+            return tuple(
+                canonicalize_params(query, self.cache_ordered_params)
+                for query in params["queries"]
+            )
+        return super().get_cache_key_params(method, params)
 
-            interval_types = {
-                "date": str,
-                "integer": int,
-                "float": float,
-            }
+    def prepare_params(self, kwargs):
+        """Return search parameters sanitized based on the user's permissions"""
+        # This includes the special fields, like `_histogram.*`. Those are accepted
+        # values for fields listing other fields.
+        allowed_fields = self.fields_spec.get_allowed_search_fields(self.api_user)
 
-            if field["query_type"] in interval_types:
-                extended_fields.append(("_histogram.%s" % field["name"], list))
+        # Strip every param referencing a field the caller isn't allowed to see:
+        # filters, aggregation/histogram param names, and list-of-fields values.
+        kwargs = sanitize_params(
+            kwargs,
+            allowed_fields,
+            list_of_fields_params=self.parameters_listing_fields,
+        )
 
-                # Intervals can be strings for dates (like "day" or "1.5h"), but
-                # integers and floats are integers and floats.
-                interval_type = interval_types[field["query_type"]]
+        # SuperSearch requires that the list of fields be passed to it.
+        kwargs["_fields"] = self.all_fields
 
-                extended_fields.append(
-                    ("_histogram_interval.%s" % field["name"], interval_type)
-                )
+        # Do some data validation here before we go further to reduce efforts
+        validate_products(kwargs.get("product"))
 
-        return tuple(extended_fields)
+        return kwargs
 
     def get(self, dont_cache=False, refresh_cache=False, **kwargs):
         # Sanitize all parameters based on the user's permissions.
         # We sanitize kwargs via an allowlist of SuperSearch fields and
         # meta fields. Without separating out dont_cache and refresh_cache,
         # these would get removed from kwargs, which would regress crash_verify.
+        kwargs = self.prepare_params(kwargs)
 
-        allowed_fields = set(get_allowed_fields(self.api_user))
+        return super().get(dont_cache=dont_cache, refresh_cache=refresh_cache, **kwargs)
 
-        # Extend that list with the special fields, like `_histogram.*`.
-        # Those are accepted values for fields listing other fields.
-        for field in self.extended_fields:
-            histogram = field[0]
-            if not histogram.startswith("_histogram."):
-                continue
+    def iter_hits(self, page_size=1000, **kwargs):
+        """Yield all hits matching parameters.
 
-            field_name = histogram[len("_histogram.") :]
-            if (
-                field_name in self.all_fields
-                and self.all_fields[field_name]["is_returned"]
-                and field_name in allowed_fields
-            ):
-                allowed_fields.add(histogram)
+        Parameters are sanitized the same way as ``get``. Results aren't cached.
 
-        for field in set(allowed_fields):
-            allowed_fields.add("_cardinality.%s" % field)
+        :arg page_size: number of hits to fetch from Elasticsearch per request
+        :arg kwargs: search parameters
 
-        # Strip every param referencing a field the caller isn't allowed to see:
-        # filters, aggregation/histogram param names, and list-of-fields values.
-        kwargs = sanitize_params(
-            kwargs,
-            allowed_fields,
-            list_of_fields_params=self.parameters_listing_fields,
-        )
+        :returns: generator of hits
 
-        # SuperSearch requires that the list of fields be passed to it.
-        kwargs["_fields"] = self.all_fields
+        """
+        params = self.parse_parameters(self.prepare_params(kwargs))
+        return self.get_implementation().iter_hits(page_size=page_size, **params)
 
-        # Do some data validation here before we go further to reduce efforts
-        validate_products(kwargs.get("product"))
+    def msearch(self, queries, dont_cache=False, refresh_cache=False):
+        """Return results for several searches made with one Elasticsearch request.
 
-        return super().get(dont_cache=dont_cache, refresh_cache=refresh_cache, **kwargs)
+        Parameters for each search are handled the same way as ``get``. The results
+        for all the searches are cached together.
+
+        :arg queries: list of dicts of search parameters
+        :arg dont_cache: whether to skip the cache
+        :arg refresh_cache: whether to refresh the cached results
+
+        :returns: list of results in the same order as queries
+
+        """
+        params = {
+            "queries": [
+                self.parse_parameters(self.prepare_params(dict(kwargs)))
+                for kwargs in queries
+            ]
+        }
+        return self.fetch(
+            self.get_implementation(),
+            params=params,
+            method="msearch",
+            dont_cache=dont_cache,
+            refresh_cache=refresh_cache,
+        )
 
 
 class SuperSearchUnredacted(SuperSearch):
@@ -202,35 +244,28 @@ class SuperSearchUnredacted(SuperSearch):
 
     def __init__(self):
         self.all_fields = get_supersearch_fields()
+        self.fields_spec = get_fields_spec(self.all_fields)
 
-        histogram_fields = self._get_extended_params()
+        self.possible_params = get_possible_params(self.fields_spec)
 
-        self.possible_params = (
-            tuple(
-                (x["name"], list) for x in self.all_fields.values() if x["is_exposed"]
-            )
-            + SUPERSEARCH_META_PARAMS
-            + histogram_fields
-        )
-
-        permissions = {}
-        for field_data in self.all_fields.values():
-            for perm in field_data["webapp_permissions_needed"]:
-                permissions[perm] = True
-
-        self.API_REQUIRED_PERMISSIONS = tuple(permissions.keys())
+        self.API_REQUIRED_PERMISSIONS = self.fields_spec.permissions
 
     def get_implementation(self):
         es_crash_dest = build_instance_from_settings(socorro_settings.ES_STORAGE)
         return es_crash_dest.build_supersearch()
 
-    def get(self, **kwargs):
+    def prepare_params(self, kwargs):
         # SuperSearch requires that the list of fields be passed to it.
         kwargs["_fields"] = self.all_fields
 
         # Do some data validation here before we go further to reduce efforts
         validate_products(kwargs.get("product"))
 
+        return kwargs
+
+    def get(self, **kwargs):
+        kwargs = self.prepare_params(kwargs)
+
         # Notice that here we use `SuperSearch` as the class, so that we
         # shortcut the `get` function in that class. The goal is to avoid
         # the _facets field cleaning.
@@ -7,6 +7,8 @@ import pytest
 from crashstats.supersearch.libsupersearch import (
     convert_permissions,
     get_allowed_fields,
+    get_fields_spec,
+    get_supersearch_fields,
     sanitize_params,
 )
 
@@ -118,6 +120,54 @@ def test_get_allowed_fields(
     assert excluded.isdisjoint(result)
 
 
+def test_get_fields_spec():
+    fields = get_supersearch_fields()
+    spec = get_fields_spec(fields)
+
+    # Specs are shared for the same fields
+    assert get_fields_spec(fields) is spec
+    assert get_fields_spec() is spec
+    assert get_fields_spec(dict(MINIMAL_SUPERSEARCH_FIELDS_FIXTURE)) is not spec
+
+    extended_params = dict(spec.extended_params)
+    assert extended_params["_aggs.signature"] is list
+    assert extended_params["_histogram.date"] is list
+    assert extended_params["_histogram_interval.date"] is str
+    assert extended_params["_histogram_interval.uptime"] is int
+    assert "_histogram.signature" not in extended_params
+    assert spec.permissions == ("crashstats.view_pii",)
+
+
+def test_fields_spec_allowed_fields(db, user_helper):
+    spec = get_fields_spec(dict(MINIMAL_SUPERSEARCH_FIELDS_FIXTURE))
+
+    public_fields = spec.get_allowed_fields(None)
+    assert set(public_fields) == {"signature", "product"}
+
+    # Users with the same permissions share allowed fields
+    user = user_helper.create_user(username="user")
+    assert spec.get_allowed_fields(user) is public_fields
+
+    protected_user = user_helper.create_protected_user(username="protected1")
+    protected_fields = spec.get_allowed_fields(protected_user)
+    assert set(protected_fields) == {"signature", "product", "user_comments", "url"}
+    protected_user = user_helper.create_protected_user(username="protected2")
+    assert spec.get_allowed_fields(protected_user) is protected_fields
+
+
+def test_fields_spec_allowed_search_fields():
+    spec = get_fields_spec(get_supersearch_fields())
+
+    allowed_fields = spec.get_allowed_search_fields(None)
+    assert isinstance(allowed_fields, frozenset)
+    assert spec.get_allowed_search_fields(None) is allowed_fields
+    assert "signature" in allowed_fields
+    assert "_histogram.date" in allowed_fields
+    assert "_cardinality.signature" in allowed_fields
+    assert "user_comments" not in allowed_fields
+    assert "_cardinality.user_comments" not in allowed_fields
+
+
 @pytest.mark.parametrize(
     "param_name, input_values, allowed, expected",
     [
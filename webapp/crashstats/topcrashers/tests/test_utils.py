@@ -0,0 +1,172 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import datetime
+
+from crashstats.crashstats.models import (
+    TopCrashersRollup,
+    TopCrashersRollupHour,
+    TopCrashersRollupTotal,
+)
+from crashstats.crashstats.utils import SignatureStats
+from crashstats.topcrashers.utils import (
+    get_rollup_results,
+    get_rollup_window,
+    rollups_cover,
+)
+
+
+HOUR = datetime.datetime(2024, 5, 1, 0, tzinfo=datetime.timezone.utc)
+
+
+def add_rollup(hour, signature, count, process_type="parent", facets=None):
+    TopCrashersRollup.objects.create(
+        hour=hour,
+        product="Firefox",
+        version="1.0",
+        process_type=process_type,
+        report_type="crash",
+        signature=signature,
+        count=count,
+        facets=facets or {},
+    )
+
+
+class TestRollups:
+    def test_get_rollup_window(self, db):
+        assert get_rollup_window(HOUR, HOUR + datetime.timedelta(days=1)) is None
+
+        for hour in range(24):
+            TopCrashersRollupHour.objects.create(
+                hour=HOUR + datetime.timedelta(hours=hour)
+            )
+
+        # Window is aligned to hours
+        assert get_rollup_window(
+            HOUR + datetime.timedelta(minutes=30),
+            HOUR + datetime.timedelta(hours=23, minutes=30),
+        ) == (HOUR, HOUR + datetime.timedelta(hours=23))
+
+        # Window ends at the last rolled up hour if it's recent
+        assert get_rollup_window(
+            HOUR + datetime.timedelta(hours=2), HOUR + datetime.timedelta(hours=26)
+        ) == (HOUR, HOUR + datetime.timedelta(hours=24))
+
+        # No window if the rollups are too far behind
+        assert get_rollup_window(HOUR, HOUR + datetime.timedelta(hours=30)) is None
+
+    def test_rollups_cover(self, db):
+        TopCrashersRollupHour.objects.create(hour=HOUR)
+        TopCrashersRollupHour.objects.create(hour=HOUR + datetime.timedelta(hours=2))
+
+        assert rollups_cover(HOUR, HOUR + datetime.timedelta(hours=1))
+        assert not rollups_cover(HOUR, HOUR + datetime.timedelta(hours=3))
+
+    def test_get_rollup_results(self, db):
+        for hour in (HOUR, HOUR + datetime.timedelta(hours=1)):
+            TopCrashersRollupTotal.objects.create(
+                hour=hour,
+                product="Firefox",
+                version="1.0",
+                process_type="parent",
+                report_type="crash",
+                count=10,
+            )
+            add_rollup(
+                hour,
+                "OOM | small",
+                4,
+                facets={
+                    "platform": {"Windows NT": 3, "Linux": 1},
+                    "is_garbage_collecting": {"T": 1},
+                    "startup_crash": {"T": 4},
+                    "startup_window": 2,
+                },
+            )
+            add_rollup(hour, "OOM | large", 3)
+        add_rollup(HOUR, "OOM | other", 3, process_type="content")
+
+        results = get_rollup_results(
+            product="Firefox",
+            versions=["1.0"],
+            process_type="parent",
+            report_type="crash",
+            start=HOUR,
+            end=HOUR + datetime.timedelta(hours=2),
+            facets_size=50,
+        )
+        assert results["total"] == 20
+        signatures = results["facets"]["signature"]
+        assert [(item["term"], item["count"]) for item in signatures] == [
+            ("OOM | small", 8),
+            ("OOM | large", 6),
+        ]
+        assert signatures[0]["facets"]["platform"] == [
+            {"term": "Windows NT", "count": 6},
+            {"term": "Linux", "count": 2},
+        ]
+        # Install counts don't add up across hours, so they come from Elasticsearch
+        assert "cardinality_install_time" not in signatures[0]["facets"]
+
+        stats = SignatureStats(
+            signature=signatures[0],
+            num_total_crashes=results["total"],
+            platforms=[
+                {"short_name": "win", "name": "Windows"},
+                {"short_name": "lin", "name": "Linux"},
+            ],
+        )
+        assert stats.num_crashes_per_platform == {"win_count": 6, "lin_count": 2}
+        assert stats.num_crashes_in_garbage_collection == 2
+        assert stats.is_startup_crash
+        assert not stats.is_startup_window_crash
+
+        # All process types and the top signature only
+        results = get_rollup_results(
+            product="Firefox",
+            versions=None,
+            process_type="any",
+            report_type="any",
+            start=HOUR,
+            end=HOUR + datetime.timedelta(hours=2),
+            facets_size=1,
+        )
+        assert [item["term"] for item in results["facets"]["signature"]] == [
+            "OOM | small"
+        ]
+
+    def test_get_rollup_results_missing_dimensions(self, db):
+        # Crash reports without a process type are rolled up with an empty string
+        for process_type, count in (("parent", 4), ("", 2)):
+            TopCrashersRollupTotal.objects.create(
+                hour=HOUR,
+                product="Firefox",
+                version="1.0",
+                process_type=process_type,
+                report_type="crash",
+                count=count,
+            )
+            add_rollup(HOUR, "OOM | small", count, process_type=process_type)
+
+        def get_results(process_type):
+            return get_rollup_results(
+                product="Firefox",
+                versions=None,
+                process_type=process_type,
+                report_type="any",
+                start=HOUR,
+                end=HOUR + datetime.timedelta(hours=1),
+                facets_size=50,
+            )
+
+        # They're counted for all process types, but not in the process type facet
+        results = get_results("any")
+        assert results["total"] == 6
+        signature = results["facets"]["signature"][0]
+        assert signature["count"] == 6
+        assert signature["facets"]["process_type"] == [{"term": "parent", "count": 4}]
+
+        # They're "other" process types like they are in Elasticsearch
+        assert get_results("other")["total"] == 2
+        assert get_results("parent")["total"] == 4
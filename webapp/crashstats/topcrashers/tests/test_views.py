@@ -3,14 +3,26 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import datetime
+import io
 
 import freezegun
 import pyquery
 
+from django.core.management import call_command
 from django.urls import reverse
 from django.utils.encoding import smart_str
 
-from crashstats.crashstats.models import Signature, BugAssociation
+from crashstats.crashstats.models import (
+    BugAssociation,
+    Signature,
+    TopCrashersRollup,
+    TopCrashersRollupHour,
+    TopCrashersRollupTotal,
+)
+from crashstats.topcrashers.views import (
+    get_topcrashers_stats,
+    get_topcrashers_stats_from_rollups,
+)
 from socorro.external.es.super_search_fields import PROCESS_TYPES
 from socorro.lib.libdatetime import utc_now
 from socorro.lib.libooid import create_new_ooid
@@ -471,3 +483,127 @@ class TestTopCrasherViews:
             {"product": "Firefox", "version": "19.0", "_range_type": "build"},
         )
         assert response.status_code == 200
+
+    def test_topcrashers_from_rollups(self, client, db, es_helper, settings):
+        settings.TOPCRASHERS_USE_ROLLUPS = True
+        signature = "FakeSignature1"
+
+        # Roll up the last 14 days so the 7-day report and the previous window are
+        # covered
+        end = utc_now().replace(minute=0, second=0, microsecond=0)
+        for hours in range(1, 14 * 24 + 1):
+            hour = end - datetime.timedelta(hours=hours)
+            TopCrashersRollupHour.objects.create(hour=hour)
+        hour = end - datetime.timedelta(hours=2)
+
+        # Install counts come from Elasticsearch
+        crash_time = hour + datetime.timedelta(minutes=30)
+        for install_time in (1000, 1000, 2000):
+            es_helper.index_crash(
+                processed_crash={
+                    "date_processed": crash_time,
+                    "uuid": create_new_ooid(timestamp=crash_time),
+                    "signature": signature,
+                    "product": "Firefox",
+                    "version": "1.0",
+                    "process_type": "parent",
+                    "report_type": "crash",
+                    "install_time": install_time,
+                },
+                refresh=False,
+            )
+        es_helper.refresh()
+
+        TopCrashersRollupTotal.objects.create(
+            hour=hour,
+            product="Firefox",
+            version="1.0",
+            process_type="parent",
+            report_type="crash",
+            count=15,
+        )
+        TopCrashersRollup.objects.create(
+            hour=hour,
+            product="Firefox",
+            version="1.0",
+            process_type="parent",
+            report_type="crash",
+            signature=signature,
+            count=15,
+            facets={
+                "platform": {"Linux": 15},
+                "is_garbage_collecting": {"F": 15},
+                "dom_fission_enabled": {"T": 15},
+                "startup_crash": {"T": 15},
+                "startup_window": 0,
+            },
+        )
+
+        url = reverse("topcrashers:topcrashers")
+        response = client.get(url, {"product": "Firefox", "version": "1.0"})
+        assert response.status_code == 200
+        doc = pyquery.PyQuery(response.content)
+        assert doc("td.signature-column > a").text() == signature
+        # Installs column
+        assert doc("#signature-list tbody tr td").eq(8).text() == "2"
+
+    def test_rollups_match_live_with_missing_dimensions(self, db, es_helper):
+        # Crash reports missing process type, report type, or version
+        crash_time = utc_now() - datetime.timedelta(hours=20)
+        crash_data = []
+        for process_type, report_type, version, signature in [
+            ("parent", "crash", "1.0", "OOM | small"),
+            ("parent", "crash", "1.0", "OOM | small"),
+            (None, "crash", "1.0", "OOM | small"),
+            ("content", None, "1.0", "OOM | large"),
+            (None, None, "1.0", "OOM | large"),
+            ("parent", "crash", None, "OOM | small"),
+        ]:
+            processed_crash = {
+                "date_processed": crash_time,
+                "uuid": create_new_ooid(timestamp=crash_time),
+                "signature": signature,
+                "product": "Firefox",
+            }
+            for key, value in [
+                ("process_type", process_type),
+                ("report_type", report_type),
+                ("version", version),
+            ]:
+                if value is not None:
+                    processed_crash[key] = value
+            crash_data.append(processed_crash)
+        for item in crash_data:
+            es_helper.index_crash(processed_crash=item, refresh=False)
+        es_helper.refresh()
+
+        now = utc_now()
+        call_command(
+            "topcrashersrollup",
+            last_success=(now - datetime.timedelta(days=2)).strftime("%Y-%m-%dT%H:%M"),
+            run_time=now.strftime("%Y-%m-%dT%H:%M"),
+            stdout=io.StringIO(),
+        )
+
+        for process_type in ("any", "parent", "other"):
+            params = {
+                "product": "Firefox",
+                "version": ["1.0"],
+                "platform": None,
+                "process_type": process_type,
+                "report_type": "any",
+                "date": [
+                    "<" + now.isoformat(),
+                    ">=" + (now - datetime.timedelta(days=1)).isoformat(),
+                ],
+                "_facets_size": 50,
+                "_range_type": "report",
+            }
+            live_total, live_stats = get_topcrashers_stats(**dict(params))
+            rollup_total, rollup_stats = get_topcrashers_stats_from_rollups(
+                **dict(params)
+            )
+            assert rollup_total == live_total
+            assert [
+                (stats.signature_term, stats.num_crashes) for stats in rollup_stats
+            ] == [(stats.signature_term, stats.num_crashes) for stats in live_stats]
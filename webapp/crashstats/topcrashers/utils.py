@@ -0,0 +1,203 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from collections import Counter, defaultdict
+import datetime
+
+from django.db.models import Max, Sum
+
+from crashstats.crashstats.models import (
+    TopCrashersRollup,
+    TopCrashersRollupHour,
+    TopCrashersRollupTotal,
+)
+from socorro.external.es.super_search_fields import PROCESS_TYPES
+
+
+# Facets rolled up for each signature
+SIGNATURE_FACETS = [
+    "platform",
+    "is_garbage_collecting",
+    "dom_fission_enabled",
+    "startup_crash",
+]
+
+# Maximum number of hours the most recent rollups can lag behind the end of the
+# requested window
+MAX_ROLLUP_LAG = datetime.timedelta(hours=2)
+
+
+def truncate_to_hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def get_rollup_window(start_date, end_date):
+    """Return the hour-aligned window to use for rollups or None
+
+    Rollups only exist for complete hours. If the most recent hours haven't been
+    rolled up yet, the window is moved back so it ends at the last rolled up hour.
+
+    :arg start_date: the start of the requested window
+    :arg end_date: the end of the requested window
+
+    :returns: tuple of (start, end) datetimes or None if there are no recent rollups
+
+    """
+    end = truncate_to_hour(end_date)
+    latest = TopCrashersRollupHour.objects.aggregate(latest=Max("hour"))["latest"]
+    if latest is None:
+        return None
+
+    latest = latest + datetime.timedelta(hours=1)
+    if latest < end:
+        if end - latest > MAX_ROLLUP_LAG:
+            return None
+        end = latest
+
+    return truncate_to_hour(end - (end_date - start_date)), end
+
+
+def rollups_cover(start, end):
+    """Return whether every hour in the window has been rolled up
+
+    :arg start: hour-aligned start of the window
+    :arg end: hour-aligned end of the window
+
+    """
+    num_hours = int((end - start).total_seconds() // 3600)
+    rolled_up = TopCrashersRollupHour.objects.filter(
+        hour__gte=start, hour__lt=end
+    ).count()
+    return rolled_up == num_hours
+
+
+def filter_rollups(qs, product, versions, process_type, report_type, start, end):
+    """Filter a rollup queryset the way topcrashers filters crash reports
+
+    :arg qs: TopCrashersRollup or TopCrashersRollupTotal queryset
+    :arg product: the product name
+    :arg versions: list of versions or None for all versions
+    :arg process_type: a process type, "other" for process types that aren't known,
+        or "any" or "all" for all process types
+    :arg report_type: a report type, or "any" or "all" for all report types
+    :arg start: hour-aligned start of the window
+    :arg end: hour-aligned end of the window
+
+    :returns: filtered queryset
+
+    """
+    qs = qs.filter(product=product, hour__gte=start, hour__lt=end)
+    if versions:
+        qs = qs.filter(version__in=versions)
+    if process_type == "other":
+        process_types = {
+            process[0] if isinstance(process, tuple) else process
+            for process in PROCESS_TYPES
+        }
+        qs = qs.exclude(process_type__in=process_types)
+    elif process_type and process_type not in ("any", "all"):
+        qs = qs.filter(process_type=process_type)
+    if report_type and report_type not in ("any", "all"):
+        qs = qs.filter(report_type=report_type)
+    return qs
+
+
+def to_buckets(counter):
+    """Convert a Counter to facet buckets sorted the way Elasticsearch sorts them"""
+    return [
+        {"term": term, "count": count}
+        for term, count in sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def get_rollup_results(
+    product, versions, process_type, report_type, start, end, facets_size
+):
+    """Return topcrashers results from rollups
+
+    The results have the same shape as SuperSearch results for the topcrashers
+    query, so they work with SignatureStats.
+
+    Distinct install counts don't add up across hours, so the results don't have
+    install counts. Callers get them from Elasticsearch for the top signatures.
+
+    :arg product: the product name
+    :arg versions: list of versions or None for all versions
+    :arg process_type: process type filter; see ``filter_rollups``
+    :arg report_type: report type filter; see ``filter_rollups``
+    :arg start: hour-aligned start of the window
+    :arg end: hour-aligned end of the window
+    :arg facets_size: the number of signatures to return
+
+    :returns: dict with "total" and "facets" keys like SuperSearch results
+
+    """
+    filters = {
+        "product": product,
+        "versions": versions,
+        "process_type": process_type,
+        "report_type": report_type,
+        "start": start,
+        "end": end,
+    }
+    total = (
+        filter_rollups(TopCrashersRollupTotal.objects, **filters).aggregate(
+            total=Sum("count")
+        )["total"]
+        or 0
+    )
+
+    qs = filter_rollups(TopCrashersRollup.objects, **filters)
+    top_signatures = list(
+        qs.values("signature")
+        .annotate(total=Sum("count"))
+        .order_by("-total", "signature")[:facets_size]
+    )
+
+    facets = defaultdict(lambda: defaultdict(Counter))
+    rows = qs.filter(
+        signature__in=[item["signature"] for item in top_signatures]
+    ).values_list("signature", "process_type", "report_type", "count", "facets")
+    for signature, row_process_type, row_report_type, count, row_facets in rows:
+        signature_facets = facets[signature]
+        # Crash reports without a process type or report type aren't in those
+        # facets, which matches Elasticsearch facets
+        if row_process_type:
+            signature_facets["process_type"][row_process_type] += count
+        if row_report_type:
+            signature_facets["report_type"][row_report_type] += count
+        for field in SIGNATURE_FACETS:
+            signature_facets[field].update(row_facets.get(field, {}))
+        signature_facets["startup_window"]["count"] += row_facets.get(
+            "startup_window", 0
+        )
+
+    signatures = []
+    for item in top_signatures:
+        signature_facets = facets[item["signature"]]
+        startup_window = signature_facets["startup_window"]["count"]
+        signatures.append(
+            {
+                "term": item["signature"],
+                "count": item["total"],
+                "facets": {
+                    **{
+                        field: to_buckets(signature_facets[field])
+                        for field in SIGNATURE_FACETS + ["process_type", "report_type"]
+                    },
+                    # The rollup has the count of crash reports in the first bucket
+                    # of the uptime histogram
+                    "histogram_uptime": (
+                        [{"term": 0, "count": startup_window}] if startup_window else []
+                    ),
+                },
+            }
+        )
+
+    return {
+        "total": total,
+        "hits": [],
+        "errors": [],
+        "facets": {"signature": signatures},
+    }
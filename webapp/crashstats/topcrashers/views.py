@@ -22,6 +22,11 @@ from crashstats.crashstats.utils import get_comparison_signatures, SignatureStat
 from crashstats.supersearch.models import SuperSearchUnredacted
 from crashstats.supersearch.utils import get_date_boundaries
 from crashstats.topcrashers.forms import TopCrashersForm
+from crashstats.topcrashers.utils import (
+    get_rollup_results,
+    get_rollup_window,
+    rollups_cover,
+)
 from socorro.external.es.super_search_fields import PROCESS_TYPES
 
 
@@ -30,6 +35,20 @@ def datetime_to_build_id(date):
     return date.strftime("%Y%m%d%H%M%S")
 
 
+def convert_type_filters(params):
+    """Convert topcrashers process type and report type filters to search params"""
+    if params.get("process_type") in ("any", "all"):
+        params["process_type"] = None
+    elif params.get("process_type") == "other":
+        process_types = {
+            process[0] if isinstance(process, tuple) else process
+            for process in PROCESS_TYPES
+        }
+        params["process_type"] = [f"!{process}" for process in process_types]
+    if params.get("report_type") in ("any", "all"):
+        params["report_type"] = None
+
+
 def get_topcrashers_stats(**kwargs):
     """Return the results of a search."""
     params = kwargs
@@ -51,16 +70,7 @@ def get_topcrashers_stats(**kwargs):
     # We don't care about no results, only facets.
     params["_results_number"] = 0
 
-    if params.get("process_type") in ("any", "all"):
-        params["process_type"] = None
-    elif params.get("process_type") == "other":
-        process_types = {
-            process[0] if isinstance(process, tuple) else process
-            for process in PROCESS_TYPES
-        }
-        params["process_type"] = [f"!{process}" for process in process_types]
-    if params.get("report_type") in ("any", "all"):
-        params["report_type"] = None
+    convert_type_filters(params)
 
     if range_type == "build":
         params["build_id"] = [
@@ -71,9 +81,8 @@ def get_topcrashers_stats(**kwargs):
     api = SuperSearchUnredacted()
     search_results = api.get(**params)
 
-    signatures_stats = []
-    total_results = search_results["total"]
-    if total_results > 0:
+    previous_range_results = None
+    if search_results["total"] > 0:
         # Run the same query but for the previous date range, so we can
         # compare the rankings and show rank changes.
         delta = (dates[1] - dates[0]) * 2
@@ -92,6 +101,94 @@ def get_topcrashers_stats(**kwargs):
             ]
 
         previous_range_results = api.get(**params)
+
+    return build_signatures_stats(search_results, previous_range_results)
+
+
+def get_topcrashers_stats_from_rollups(**kwargs):
+    """Return the results from the topcrashers rollups.
+
+    Returns None if the rollups can't answer this query. Rollups don't have
+    platform or build id data and only cover complete hours that have been
+    rolled up. Install counts come from Elasticsearch.
+
+    """
+    params = kwargs
+    if params["_range_type"] != "report" or params.get("platform"):
+        return None
+
+    window = get_rollup_window(*get_date_boundaries(params))
+    if window is None:
+        return None
+
+    start, end = window
+    previous_start = end - (end - start) * 2
+    if not rollups_cover(previous_start, end):
+        return None
+
+    filters = {
+        "product": params["product"],
+        "versions": params.get("version"),
+        "process_type": params.get("process_type"),
+        "report_type": params.get("report_type"),
+    }
+    search_results = get_rollup_results(
+        start=start, end=end, facets_size=params["_facets_size"], **filters
+    )
+
+    add_install_counts(search_results, filters, start, end)
+
+    previous_range_results = None
+    if search_results["total"] > 0:
+        previous_range_results = get_rollup_results(
+            start=previous_start,
+            end=start,
+            facets_size=params["_facets_size"] * 2,
+            **filters,
+        )
+
+    return build_signatures_stats(search_results, previous_range_results)
+
+
+def add_install_counts(search_results, filters, start, end):
+    """Add install counts from Elasticsearch to rollup results
+
+    Distinct install counts don't add up across hours, so they're counted with a
+    search for just the top signatures in the window.
+
+    """
+    signatures = search_results["facets"]["signature"]
+    if not signatures:
+        return
+
+    params = {
+        "product": filters["product"],
+        "version": filters["versions"],
+        "process_type": filters["process_type"],
+        "report_type": filters["report_type"],
+        "signature": ["=" + item["term"] for item in signatures],
+        "date": [">=" + start.isoformat(), "<" + end.isoformat()],
+        "_aggs.signature": ["_cardinality.install_time"],
+        "_facets_size": len(signatures),
+        "_results_number": 0,
+    }
+    convert_type_filters(params)
+    results = SuperSearchUnredacted().get(**params)
+    installs = {
+        item["term"]: item["facets"]["cardinality_install_time"]
+        for item in results["facets"].get("signature", [])
+    }
+    for item in signatures:
+        item["facets"]["cardinality_install_time"] = installs.get(
+            item["term"], {"value": 0}
+        )
+
+
+def build_signatures_stats(search_results, previous_range_results):
+    """Return the total and SignatureStats for the current and previous results."""
+    signatures_stats = []
+    total_results = search_results["total"]
+    if total_results > 0:
         previous_signatures = get_comparison_signatures(previous_range_results)
 
         for index, signature in enumerate(search_results["facets"]["signature"]):
@@ -210,19 +307,25 @@ def topcrashers(request, days=None, possible_days=None, default_context=None):
         "start_date": end_date - datetime.timedelta(days=days),
     }
 
-    total_number_of_crashes, topcrashers_stats = get_topcrashers_stats(
-        product=product.name,
-        version=versions,
-        platform=os_name,
-        process_type=crash_type,
-        report_type=report_type,
-        date=[
+    search_params = {
+        "product": product.name,
+        "version": versions,
+        "platform": os_name,
+        "process_type": crash_type,
+        "report_type": report_type,
+        "date": [
             "<" + end_date.isoformat(),
             ">=" + context["query"]["start_date"].isoformat(),
         ],
-        _facets_size=result_count,
-        _range_type=range_type,
-    )
+        "_facets_size": result_count,
+        "_range_type": range_type,
+    }
+    stats = None
+    if settings.TOPCRASHERS_USE_ROLLUPS:
+        stats = get_topcrashers_stats_from_rollups(**search_params)
+    if stats is None:
+        stats = get_topcrashers_stats(**search_params)
+    total_number_of_crashes, topcrashers_stats = stats
 
     count_of_included_crashes = 0
     signatures = []